@@ -1,16 +1,87 @@
 """
 Base Repository - Capa de acceso a datos
 Cada module will have su propio repository que hereda de esta clase base
+
+Besides the single-document helpers, every repository gets:
+- find_page: keyset pagination with opaque cursors (no skip cost on deep pages)
+- iter_many: async streaming in batches (flat memory on large reads/exports)
+- find_by_ids: batched $in lookups, a drop-in for find_by_id in a loop
+- insert_many / bulk_upsert / bulk_update: chunked bulk writes
+- PROJECTIONS: named projection presets, usable wherever a projection is taken
 """
-from typing import Dict, List, Optional, Any, TypeVar, Generic
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Any, Tuple, TypeVar, Generic, Union
 from datetime import datetime, timezone
+import base64
+import json
 import logging
 from abc import ABC, abstractmethod
 
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import ASCENDING, DESCENDING, UpdateOne
+
 logger = logging.getLogger(__name__)
 
 T = TypeVar('T')
 
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_CHUNK_SIZE = 1000
+
+Projection = Union[str, Dict, None]
+
+
+def _tag(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"$dt": value.isoformat()}
+    if isinstance(value, ObjectId):
+        return {"$oid": str(value)}
+    return value
+
+
+def _untag(value: Any) -> Any:
+    if isinstance(value, dict):
+        if "$dt" in value:
+            return datetime.fromisoformat(value["$dt"])
+        if "$oid" in value:
+            return ObjectId(value["$oid"])
+    return value
+
+
+def encode_cursor(value: Any, last_id: Any) -> str:
+    """Opaque page cursor holding the last row's sort value and id"""
+    payload = json.dumps({"v": _tag(value), "id": _tag(last_id)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, Any]:
+    """(sort value, id) from a cursor made by encode_cursor; ValueError if malformed"""
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(data, dict) or "id" not in data:
+        raise ValueError("Invalid cursor")
+    try:
+        return _untag(data.get("v")), _untag(data["id"])
+    except (ValueError, TypeError, InvalidId):
+        raise ValueError("Invalid cursor")
+
+
+def _is_inclusion(projection: Dict) -> bool:
+    return any(v for k, v in projection.items() if k != "_id")
+
+
+def _included(projection: Dict, field: str) -> bool:
+    """Whether a projection returns `field`"""
+    if field in projection:
+        return bool(projection[field])
+    return not _is_inclusion(projection) and field != "_id"
+
+
+def _chunks(items: List, size: int) -> Iterable[List]:
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
 
 class BaseRepository(ABC, Generic[T]):
     """
@@ -23,6 +94,9 @@ class BaseRepository(ABC, Generic[T]):
     Cada module implementa su propio repository heredando de esta clase.
     """
     
+    # Named projections, e.g. {"summary": {"_id": 0, "order_id": 1, "status": 1}}
+    PROJECTIONS: Dict[str, Dict] = {}
+    
     def __init__(self, db, collection_name: str):
         self.db = db
         self.collection_name = collection_name
@@ -32,6 +106,17 @@ class BaseRepository(ABC, Generic[T]):
     def collection(self):
         return self._collection
     
+    def _projection(self, projection: Projection = None, exclude_fields: List[str] = None) -> Dict:
+        """Resolve a preset name or projection dict; _id is left out unless asked for"""
+        if isinstance(projection, str):
+            if projection not in self.PROJECTIONS:
+                raise ValueError(f"Unknown projection preset: {projection}")
+            projection = self.PROJECTIONS[projection]
+        resolved = {"_id": 0, **(projection or {})}
+        for field in exclude_fields or []:
+            resolved[field] = 0
+        return resolved
+    
     async def find_by_id(self, id_field: str, id_value: str) -> Optional[Dict]:
         """Buscar documento por ID"""
         return await self._collection.find_one(
@@ -42,14 +127,11 @@ class BaseRepository(ABC, Generic[T]):
     async def find_one(
         self,
         query: Dict,
-        exclude_fields: List[str] = None
+        exclude_fields: List[str] = None,
+        projection: Projection = None
     ) -> Optional[Dict]:
         """Buscar un documento por query"""
-        projection = {"_id": 0}
-        if exclude_fields:
-            for field in exclude_fields:
-                projection[field] = 0
-        return await self._collection.find_one(query, projection)
+        return await self._collection.find_one(query, self._projection(projection, exclude_fields))
     
     async def find_many(
         self,
@@ -57,16 +139,12 @@ class BaseRepository(ABC, Generic[T]):
         skip: int = 0,
         limit: int = 100,
         sort: List[tuple] = None,
-        exclude_fields: List[str] = None
+        exclude_fields: List[str] = None,
+        projection: Projection = None
     ) -> List[Dict]:
-        """Buscar multiple documentos"""
+        """Buscar multiple documentos (skip/limit; see find_page for deep pages)"""
         query = query or {}
-        projection = {"_id": 0}
-        if exclude_fields:
-            for field in exclude_fields:
-                projection[field] = 0
-        
-        cursor = self._collection.find(query, projection)
+        cursor = self._collection.find(query, self._projection(projection, exclude_fields))
         
         if sort:
             cursor = cursor.sort(sort)
@@ -74,6 +152,100 @@ class BaseRepository(ABC, Generic[T]):
         cursor = cursor.skip(skip).limit(limit)
         return await cursor.to_list(length=limit)
     
+    async def find_page(
+        self,
+        query: Dict = None,
+        sort_field: str = "created_at",
+        id_field: str = "_id",
+        descending: bool = True,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        projection: Projection = None
+    ) -> Dict:
+        """
+        Keyset pagination ordered by (sort_field, id_field).
+        
+        Each page starts right after the previous page's last row, so page N
+        costs the same as page 1 (given an index on sort_field, id_field).
+        Returns {"items": [...], "next_cursor": str | None}; pass next_cursor
+        back to get the following page. A malformed cursor raises ValueError.
+        """
+        query = dict(query or {})
+        if cursor:
+            value, last_id = decode_cursor(cursor)
+            query = {"$and": [query, self._after(sort_field, id_field, value, last_id, descending)]}
+        
+        fields = self._projection(projection)
+        # The cursor needs the sort keys even if the caller's projection leaves them out
+        extra = [f for f in (sort_field, id_field) if not _included(fields, f)]
+        if extra:
+            fields = {**fields, **{f: 1 for f in extra}} if _is_inclusion(fields) else {
+                k: v for k, v in fields.items() if k not in extra
+            }
+        
+        direction = DESCENDING if descending else ASCENDING
+        docs = await self._collection.find(query, fields).sort(
+            [(sort_field, direction), (id_field, direction)]
+        ).limit(limit).to_list(length=limit)
+        
+        next_cursor = None
+        if len(docs) == limit and docs:
+            last = docs[-1]
+            next_cursor = encode_cursor(last.get(sort_field), last.get(id_field))
+        for doc in docs:
+            for field in extra:
+                doc.pop(field, None)
+        return {"items": docs, "next_cursor": next_cursor}
+    
+    @staticmethod
+    def _after(sort_field: str, id_field: str, value: Any, last_id: Any, descending: bool) -> Dict:
+        """Rows after (value, last_id) in the page order. Missing values sort first ascending."""
+        cmp = "$lt" if descending else "$gt"
+        if value is None:
+            if descending:
+                return {sort_field: None, id_field: {cmp: last_id}}
+            return {"$or": [{sort_field: None, id_field: {cmp: last_id}}, {sort_field: {"$ne": None}}]}
+        after = [{sort_field: {cmp: value}}, {sort_field: value, id_field: {cmp: last_id}}]
+        if descending:
+            after.append({sort_field: None})
+        return {"$or": after}
+    
+    async def iter_many(
+        self,
+        query: Dict = None,
+        sort: List[tuple] = None,
+        projection: Projection = None,
+        batch_size: int = DEFAULT_BATCH_SIZE
+    ) -> AsyncIterator[Dict]:
+        """Stream matching documents, fetched from the server batch_size at a time"""
+        cursor = self._collection.find(query or {}, self._projection(projection)).batch_size(batch_size)
+        if sort:
+            cursor = cursor.sort(sort)
+        async for doc in cursor:
+            yield doc
+    
+    async def find_by_ids(
+        self,
+        id_field: str,
+        ids: Iterable[Any],
+        projection: Projection = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> Dict[Any, Dict]:
+        """Documents for many ids at once ({id: doc}); one $in query per chunk"""
+        unique = list(dict.fromkeys(i for i in ids if i is not None))
+        fields = self._projection(projection)
+        drop_id = not _included(fields, id_field)
+        if drop_id:
+            fields = {**fields, id_field: 1} if _is_inclusion(fields) else {
+                k: v for k, v in fields.items() if k != id_field
+            }
+        found = {}
+        for chunk in _chunks(unique, chunk_size):
+            async for doc in self._collection.find({id_field: {"$in": chunk}}, fields):
+                key = doc.pop(id_field) if drop_id else doc.get(id_field)
+                found[key] = doc
+        return found
+    
     async def count(self, query: Dict = None) -> int:
         """Contar documentos"""
         query = query or {}
@@ -101,6 +273,70 @@ class BaseRepository(ABC, Generic[T]):
         result = await self._collection.update_one(query, update, upsert=upsert)
         return result.modified_count > 0 or result.upserted_id is not None
     
+    async def insert_many(self, documents: List[Dict], chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+        """Insert documents in unordered chunks; returns how many were inserted"""
+        now = datetime.now(timezone.utc).isoformat()
+        inserted = 0
+        for chunk in _chunks(documents, chunk_size):
+            for document in chunk:
+                document.setdefault("created_at", now)
+                document.setdefault("updated_at", now)
+            result = await self._collection.insert_many(chunk, ordered=False)
+            inserted += len(result.inserted_ids)
+            for document in chunk:
+                document.pop("_id", None)
+        return inserted
+    
+    async def bulk_upsert(
+        self,
+        documents: List[Dict],
+        key_fields: Union[str, List[str]],
+        set_on_insert: Optional[Dict] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> Dict[str, int]:
+        """
+        Upsert documents matched on key_fields, one unordered bulk_write per chunk.
+        created_at (and set_on_insert) are only written for new documents.
+        Chunks already written stay written if a later chunk fails.
+        """
+        keys = [key_fields] if isinstance(key_fields, str) else list(key_fields)
+        now = datetime.now(timezone.utc).isoformat()
+        ops = [
+            UpdateOne(
+                {k: doc.get(k) for k in keys},
+                {
+                    "$set": {**{k: v for k, v in doc.items() if k not in ("_id", "created_at")}, "updated_at": now},
+                    "$setOnInsert": {"created_at": doc.get("created_at", now), **(set_on_insert or {})},
+                },
+                upsert=True
+            )
+            for doc in documents
+        ]
+        return await self._bulk_write(ops, chunk_size)
+    
+    async def bulk_update(
+        self,
+        updates: List[Tuple[Dict, Dict]],
+        chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> Dict[str, int]:
+        """Apply (query, update) pairs, one unordered bulk_write per chunk; sets updated_at like update_one"""
+        now = datetime.now(timezone.utc).isoformat()
+        ops = []
+        for query, update in updates:
+            update = dict(update)
+            update["$set"] = {**update.get("$set", {}), "updated_at": now}
+            ops.append(UpdateOne(query, update))
+        return await self._bulk_write(ops, chunk_size)
+    
+    async def _bulk_write(self, ops: List, chunk_size: int) -> Dict[str, int]:
+        totals = {"matched": 0, "modified": 0, "upserted": 0}
+        for chunk in _chunks(ops, chunk_size):
+            result = await self._collection.bulk_write(chunk, ordered=False)
+            totals["matched"] += result.matched_count
+            totals["modified"] += result.modified_count
+            totals["upserted"] += result.upserted_count
+        return totals
+    
     async def update_by_id(self, id_field: str, id_value: str, data: Dict) -> bool:
         """Actualizar documento por ID"""
         return await self.update_one(
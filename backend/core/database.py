@@ -444,6 +444,10 @@ async def create_indexes():
             _safe_index(db.sport_live_sessions, "session_id", unique=True),
             _safe_index(db.sport_live_sessions, "status"),
             _safe_index(db.sport_tournaments, "tournament_id", unique=True),
+            _safe_index(db.sport_tournament_matches, [("tournament_id", 1), ("match_id", 1)], unique=True),
+            _safe_index(db.sport_tournament_matches, [("tournament_id", 1), ("round", 1), ("position", 1)]),
+            _safe_index(db.sport_matches, [("league_id", 1), ("status", 1)]),
+            _safe_index(db.sport_rating_history, [("scope", 1), ("player_id", 1)], unique=True),
             # Tutor indexes
             _safe_index(db.tutor_students, "student_id", unique=True),
             _safe_index(db.tutor_students, "status"),
@@ -454,6 +458,51 @@ async def create_indexes():
             # Shared orders (for multi-user student linking)
             _safe_index(orders, "shared_with.user_id"),
             _safe_index(students, "linked_users.user_id"),
+            # CRM admin inbox index
+            _safe_index(db.crm_student_links, "student_id", unique=True),
+            _safe_index(db.crm_student_links, "monday_item_id"),
+            _safe_index(db.crm_student_links, [("last_activity_at", -1), ("student_id", 1)]),
+            _safe_index(db.crm_inbox_topics, "topic_id", unique=True),
+            _safe_index(db.crm_inbox_topics, [("student_id", 1), ("created_at", -1)]),
+            _safe_index(db.crm_chat_messages, [("student_id", 1), ("is_staff", 1)]),
+            # Store analytics rollups
+            _safe_index(db.store_analytics_daily, [("day", 1), ("status", 1)]),
+            _safe_index(db.store_analytics_grade, [("day", 1), ("status", 1)]),
+            _safe_index(db.store_analytics_book, [("day", 1), ("status", 1)]),
+            _safe_index(db.store_analytics_customer, [("day", 1), ("status", 1)]),
+            _safe_index(db.store_analytics_inventory, "active"),
+            # Textbooks board mirror
+            _safe_index(db.textbook_board_items, [("board_id", 1), ("item_id", 1)], unique=True),
+            _safe_index(db.textbook_board_items, [("board_id", 1), ("revision", 1)]),
+            _safe_index(db.textbook_board_items, [("board_id", 1), ("code", 1)]),
+            _safe_index(db.textbook_board_mirror_meta, "board_id", unique=True),
+            # Payment-to-user matching
+            _safe_index(users, "updated_at"),
+            _safe_index(users, "created_at"),
+            _safe_index(db.auth_user_name_tokens, "user_id", unique=True),
+            _safe_index(db.auth_user_name_tokens, "tokens"),
+            _safe_index(db.store_textbook_orders, [("total_amount", 1), ("status", 1)]),
+            _safe_index(db.wallet_pending_topups, [("amount", 1), ("source", 1), ("status", 1), ("created_at", -1)]),
+            # Admin wallet directory (keyset pages, prefix search)
+            _safe_index(users, [("name", 1), ("user_id", 1)]),
+            _safe_index(db.chipi_wallets, "user_id"),
+            _safe_index(db.chipi_wallets, [("balance_usd", -1), ("user_id", 1)]),
+            _safe_index(db.chipi_wallets, [("updated_at", -1), ("user_id", 1)]),
+            # Bulk TSV imports (per-chunk $in lookups and upserts by natural key)
+            _safe_index(db.synced_students, "numero_estudiante"),
+            _safe_index(db.store_products, "code"),
+            # Incremental Google Sheets student sync
+            _safe_index(db.synced_students, [("sheet_id", 1), ("numero_estudiante", 1)]),
+            _safe_index(db.sheet_sync_snapshots, "sheet_id", unique=True),
+            # Streamed exports (per-book order lists, transaction listings)
+            _safe_index(db.store_textbook_orders, "items.book_id"),
+            _safe_index(db.store_textbook_orders, [("user_id", 1), ("created_at", -1)]),
+            _safe_index(db.chipi_transactions, [("created_at", -1)]),
+            _safe_index(db.chipi_transactions, [("user_id", 1), ("created_at", -1)]),
+            # Realtime broker presence (rows expire when a worker stops heartbeating)
+            _safe_index(db.realtime_presence, [("worker_id", 1), ("channel", 1)], unique=True),
+            _safe_index(db.realtime_presence, [("channel", 1), ("expires_at", 1)]),
+            _safe_index(db.realtime_presence, "expires_at", expireAfterSeconds=0),
         )
         logger.info("Database indexes ensured")
     except Exception as e:
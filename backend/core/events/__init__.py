@@ -4,6 +4,7 @@ from .event_bus import (
     EventPriority,
     event_bus,
     PinpanClubEvents,
+    SportEvents,
     StoreEvents,
     AuthEvents,
     CommunityEvents
@@ -15,6 +16,7 @@ __all__ = [
     'EventPriority',
     'event_bus',
     'PinpanClubEvents',
+    'SportEvents',
     'StoreEvents',
     'AuthEvents',
     'CommunityEvents'
@@ -242,6 +242,11 @@ class PinpanClubEvents:
     SYNC_COMPLETED = "pinpanclub.sync.completed"
 
 
+class SportEvents:
+    """Tipos de eventos del module Sport"""
+    MATCH_RECORDED = "sport.match.recorded"
+
+
 class StoreEvents:
     """Tipos de eventos del module Store"""
     ORDER_CREATED = "store.order.created"
@@ -250,6 +255,8 @@ class StoreEvents:
     ORDER_COMPLETED = "store.order.completed"
     ORDER_CANCELLED = "store.order.cancelled"
     
+    TEXTBOOK_ORDER_SUBMITTED = "store.textbook_order.submitted"
+    
     PRODUCT_CREATED = "store.product.created"
     PRODUCT_UPDATED = "store.product.updated"
     PRODUCT_LOW_STOCK = "store.product.low_stock"
@@ -0,0 +1,377 @@
+"""
+Exports — stream Mongo cursors to CSV / XLSX without holding them in memory.
+
+An export is an ExportSpec: a source of documents (usually a Motor cursor),
+an optional formatter turning each document into zero or more rows, and the
+columns to write. Rows are encoded in small chunks as the cursor is read, so
+memory stays bounded whatever the size of the result set.
+
+Usage:
+    from core.exports import ExportSpec, export_response, export_jobs
+
+    def orders_export(status: str = None) -> ExportSpec:
+        query = {"status": status} if status else {}
+        return ExportSpec(
+            name="orders",
+            columns=[("order_id", "Order"), ("total", "Total")],
+            source=lambda: db.orders.find(query, {"_id": 0}),
+        )
+
+    # Direct download
+    return export_response(orders_export(status), "xlsx")
+
+    # Background job with a downloadable artifact
+    export_jobs.register("orders", orders_export, "All orders")
+    job = export_jobs.start("orders", "csv", {"status": "paid"})
+"""
+import asyncio
+import csv
+import inspect
+import io
+import json
+import logging
+import math
+import os
+import re
+import tempfile
+import uuid
+import zipfile
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from typing import Any, AsyncIterable, AsyncIterator, Callable, Dict, Iterable, List, Optional, Tuple
+from xml.sax.saxutils import escape
+
+from fastapi.responses import StreamingResponse
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+CHUNK_ROWS = 500            # Rows encoded per yielded chunk
+CURSOR_BATCH_SIZE = 500     # Documents fetched per Mongo round trip
+MAX_FINISHED_JOBS = 20      # Finished jobs (and their files) kept for download
+XLSX_MAX_CELL = 32767       # Excel rejects longer cell text
+
+EXPORT_DIR = os.environ.get("EXPORT_DIR") or os.path.join(tempfile.gettempdir(), "chipi_exports")
+
+
+@dataclass
+class ExportSpec:
+    name: str
+    columns: List[Tuple[str, str]]                          # (row key, header)
+    source: Callable[[], AsyncIterable[Dict]]               # Called once per export run
+    formatter: Optional[Callable[[Dict], Iterable[Dict]]] = None  # document -> rows
+    filename: Optional[str] = None
+
+    def file_name(self, fmt: str) -> str:
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M")
+        return f"{self.filename or self.name}_{stamp}.{fmt}"
+
+
+def _cell(value: Any) -> Any:
+    """Flatten a document value into something a spreadsheet cell can hold."""
+    if value is None:
+        return ""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (list, tuple, set)):
+        return ", ".join(str(_cell(v)) for v in value)
+    if isinstance(value, dict):
+        return json.dumps(value, default=str, ensure_ascii=False)
+    if isinstance(value, (bool, int, float, str)):
+        return value
+    return str(value)
+
+
+async def iter_rows(spec: ExportSpec) -> AsyncIterator[List[Any]]:
+    """Run the source through the formatter and yield each row's cell values."""
+    keys = [key for key, _ in spec.columns]
+    source = spec.source()
+    if hasattr(source, "batch_size"):
+        source = source.batch_size(CURSOR_BATCH_SIZE)
+    async for doc in source:
+        for row in (spec.formatter(doc) if spec.formatter else (doc,)):
+            yield [_cell(row.get(key)) for key in keys]
+
+
+async def in_batches(source: AsyncIterable, size: int = CURSOR_BATCH_SIZE) -> AsyncIterator[List]:
+    """Group an async iterable into lists of `size` — for per-batch lookups in a source."""
+    batch = []
+    async for item in source:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# ------------------------------------------------------------------ #
+#  Encoders
+# ------------------------------------------------------------------ #
+
+async def iter_csv(spec: ExportSpec, progress: Optional[Dict] = None) -> AsyncIterator[bytes]:
+    """UTF-8 CSV with a BOM so Excel detects the encoding."""
+    buffer = io.StringIO()
+    buffer.write("\ufeff")
+    writer = csv.writer(buffer)
+    writer.writerow([header for _, header in spec.columns])
+    count = 0
+    async for cells in iter_rows(spec):
+        writer.writerow(cells)
+        count += 1
+        if count % CHUNK_ROWS == 0:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+            if progress is not None:
+                progress["rows"] = count
+    yield buffer.getvalue().encode("utf-8")
+    if progress is not None:
+        progress["rows"] = count
+
+
+_XML_ILLEGAL = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+
+_XLSX_PARTS = {
+    "[Content_Types].xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '<Override PartName="/xl/styles.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+        '</Types>'
+    ),
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '<Relationship Id="rId2" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+        'Target="styles.xml"/>'
+        '</Relationships>'
+    ),
+    "xl/styles.xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+        '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+        '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+        '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+        '<fill><patternFill patternType="gray125"/></fill></fills>'
+        '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+        '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+        '<cellXfs count="2"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+        '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/></cellXfs>'
+        '</styleSheet>'
+    ),
+}
+
+_SHEET_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<sheetViews><sheetView workbookViewId="0"><pane ySplit="1" topLeftCell="A2" '
+    'activePane="bottomLeft" state="frozen"/></sheetView></sheetViews><sheetData>'
+)
+
+
+def _xlsx_workbook(sheet_name: str) -> str:
+    name = escape(re.sub(r"[\[\]:*?/\\]", " ", sheet_name)[:31] or "Export", {'"': "&quot;"})
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        f'<sheets><sheet name="{name}" sheetId="1" r:id="rId1"/></sheets></workbook>'
+    )
+
+
+def _xlsx_cell(value: Any, style: str = "") -> str:
+    if isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value):
+        return f"<c{style}><v>{value}</v></c>"
+    text = _XML_ILLEGAL.sub("", str(value))[:XLSX_MAX_CELL]
+    if not text:
+        return "<c/>"
+    return f'<c t="inlineStr"{style}><is><t xml:space="preserve">{escape(text)}</t></is></c>'
+
+
+def _xlsx_row(cells: Iterable[Any], style: str = "") -> str:
+    return "<row>" + "".join(_xlsx_cell(v, style) for v in cells) + "</row>"
+
+
+class _Sink:
+    """Write-only, non-seekable file for ZipFile: the archive is drained as it grows."""
+
+    def __init__(self):
+        self._parts: List[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+async def iter_xlsx(spec: ExportSpec, progress: Optional[Dict] = None) -> AsyncIterator[bytes]:
+    """Single-sheet XLSX written row by row (inline strings, no shared string table).
+
+    ZipFile on a non-seekable sink writes each member with a data descriptor,
+    so the sheet is compressed and emitted while the cursor is still open.
+    """
+    sink = _Sink()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for part, xml in _XLSX_PARTS.items():
+            zf.writestr(part, xml)
+        zf.writestr("xl/workbook.xml", _xlsx_workbook(spec.name))
+        with zf.open("xl/worksheets/sheet1.xml", "w") as sheet:
+            sheet.write((_SHEET_HEAD + _xlsx_row((h for _, h in spec.columns), ' s="1"')).encode("utf-8"))
+            count = 0
+            rows = []
+            async for cells in iter_rows(spec):
+                rows.append(_xlsx_row(cells))
+                count += 1
+                if len(rows) >= CHUNK_ROWS:
+                    sheet.write("".join(rows).encode("utf-8"))
+                    rows = []
+                    if progress is not None:
+                        progress["rows"] = count
+                    chunk = sink.drain()
+                    if chunk:
+                        yield chunk
+            sheet.write(("".join(rows) + "</sheetData></worksheet>").encode("utf-8"))
+    if progress is not None:
+        progress["rows"] = count
+    yield sink.drain()
+
+
+def iter_export(spec: ExportSpec, fmt: str, progress: Optional[Dict] = None) -> AsyncIterator[bytes]:
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    return (iter_xlsx if fmt == "xlsx" else iter_csv)(spec, progress)
+
+
+def export_response(spec: ExportSpec, fmt: str = "csv") -> StreamingResponse:
+    """Stream an export as a file download."""
+    return StreamingResponse(
+        iter_export(spec, fmt),
+        media_type=EXPORT_FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{spec.file_name(fmt)}"'},
+    )
+
+
+# ------------------------------------------------------------------ #
+#  Background jobs
+# ------------------------------------------------------------------ #
+
+class ExportJobs:
+    """Registry of named exports plus in-memory jobs that write them to disk."""
+
+    def __init__(self):
+        self._exports: Dict[str, Tuple[Callable[..., ExportSpec], str]] = {}
+        self._jobs: Dict[str, Dict] = {}
+        self._paths: Dict[str, str] = {}
+
+    def register(self, name: str, factory: Callable[..., ExportSpec], description: str = ""):
+        """`factory(**params)` builds the spec; it raises ValueError for bad params."""
+        self._exports[name] = (factory, description)
+
+    def list_exports(self) -> List[Dict]:
+        return [
+            {"name": name, "description": description,
+             "params": list(inspect.signature(factory).parameters)}
+            for name, (factory, description) in sorted(self._exports.items())
+        ]
+
+    def build(self, name: str, params: Optional[Dict] = None) -> ExportSpec:
+        if name not in self._exports:
+            raise ValueError(f"Unknown export: {name}")
+        factory = self._exports[name][0]
+        try:
+            inspect.signature(factory).bind(**(params or {}))
+        except TypeError as e:
+            raise ValueError(f"Invalid params for export {name}: {e}")
+        return factory(**(params or {}))
+
+    def start(self, name: str, fmt: str, params: Optional[Dict] = None, requested_by: str = None) -> Dict:
+        """Validate and start an export job. Poll it with get(), fetch it with artifact()."""
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unsupported export format: {fmt}")
+        spec = self.build(name, params)
+        job_id = f"ex_{uuid.uuid4().hex[:8]}"
+        job = {
+            "job_id": job_id,
+            "export": name,
+            "format": fmt,
+            "params": params or {},
+            "requested_by": requested_by,
+            "status": "starting",
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "progress": {"rows": 0},
+        }
+        self._jobs[job_id] = job
+        finished = [j for j in self._jobs.values() if j["status"] in ("done", "error")]
+        for old in finished[:-MAX_FINISHED_JOBS]:
+            self._discard(old["job_id"])
+        asyncio.create_task(self._run(job, spec))
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        return self._jobs.get(job_id)
+
+    def artifact(self, job_id: str) -> Optional[Tuple[str, str]]:
+        """(path, download filename) of a finished job's file."""
+        job = self._jobs.get(job_id)
+        path = self._paths.get(job_id)
+        if not job or job["status"] != "done" or not path or not os.path.exists(path):
+            return None
+        return path, job["filename"]
+
+    def _discard(self, job_id: str):
+        self._jobs.pop(job_id, None)
+        path = self._paths.pop(job_id, None)
+        if path and os.path.exists(path):
+            os.remove(path)
+
+    async def _run(self, job: Dict, spec: ExportSpec):
+        fmt = job["format"]
+        path = os.path.join(EXPORT_DIR, f"{job['job_id']}.{fmt}")
+        try:
+            job["status"] = "running"
+            os.makedirs(EXPORT_DIR, mode=0o700, exist_ok=True)
+            with open(path, "wb") as fh:
+                async for chunk in iter_export(spec, fmt, job["progress"]):
+                    await asyncio.to_thread(fh.write, chunk)
+            self._paths[job["job_id"]] = path
+            job.update({"status": "done", "filename": spec.file_name(fmt),
+                        "size_bytes": os.path.getsize(path),
+                        "finished_at": datetime.now(timezone.utc).isoformat()})
+        except Exception as e:
+            logger.error(f"[Exports] Job {job['job_id']} ({job['export']}) failed: {e}")
+            if os.path.exists(path):
+                os.remove(path)
+            job.update({"status": "error", "error": str(e),
+                        "finished_at": datetime.now(timezone.utc).isoformat()})
+
+
+export_jobs = ExportJobs()
@@ -0,0 +1,227 @@
+"""
+Realtime Broker — fan-out of WebSocket messages across API worker processes.
+
+Usage:
+    from core.realtime_broker import realtime_broker
+
+    # Deliver to this worker's sockets (called for local and remote publishes)
+    realtime_broker.subscribe("sport:live:", deliver)
+
+    # Publish from any worker
+    await realtime_broker.publish("sport:live:live_ab12cd34", {"type": "point", ...})
+
+Local subscribers get the message object itself (no copy, no serialization).
+With the Mongo transport the message is also appended, once serialized, to
+the capped `realtime_broker_messages` collection; every other worker tails it
+with a tailable cursor and hands the message to its own subscribers. Tailable
+cursors work on standalone servers too, unlike change streams.
+
+Connection counts per channel are kept in `realtime_presence` (one row per
+worker and channel, refreshed by a heartbeat) so counts can be summed across
+workers.
+
+REALTIME_BROKER=local turns the cross-worker transport off (single process).
+"""
+import asyncio
+import json
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timezone, timedelta
+from typing import Awaitable, Callable, Dict, List
+
+from pymongo import CursorType
+from pymongo.errors import CollectionInvalid
+
+from core.database import db
+
+logger = logging.getLogger(__name__)
+
+MESSAGES_COLLECTION = "realtime_broker_messages"
+PRESENCE_COLLECTION = "realtime_presence"
+
+CAPPED_SIZE_BYTES = 16 * 1024 * 1024
+CAPPED_MAX_DOCS = 20000
+PRESENCE_TTL = timedelta(seconds=90)
+HEARTBEAT_SECONDS = 30
+
+Handler = Callable[[str, dict], Awaitable[None]]
+
+
+class RealtimeBroker:
+    """Channel pub/sub with zero-copy local delivery and a Mongo capped-collection transport"""
+
+    def __init__(self):
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.transport = os.environ.get("REALTIME_BROKER", "mongo").lower()
+        self._handlers: List[tuple] = []   # (channel prefix, handler)
+        self._presence: Dict[str, int] = {}
+        self._tasks: List[asyncio.Task] = []
+        self.stats = {"published": 0, "received": 0, "last_error": None}
+
+    @property
+    def is_running(self) -> bool:
+        return any(not t.done() for t in self._tasks)
+
+    def subscribe(self, prefix: str, handler: Handler) -> None:
+        """Register a local delivery handler for channels starting with `prefix`."""
+        self._handlers.append((prefix, handler))
+
+    async def publish(self, channel: str, message: dict) -> None:
+        """Deliver to this worker's subscribers, then to the other workers."""
+        await self._dispatch(channel, message)
+        self.stats["published"] += 1
+        if self.transport != "mongo" or not self.is_running:
+            return
+        try:
+            await db[MESSAGES_COLLECTION].insert_one({
+                "channel": channel,
+                "origin": self.worker_id,
+                "payload": json.dumps(message, default=str),
+            })
+        except Exception as e:
+            self.stats["last_error"] = str(e)
+            logger.warning(f"[realtime_broker] Publish to {channel} failed (non-blocking): {e}")
+
+    async def _dispatch(self, channel: str, message: dict) -> None:
+        for prefix, handler in self._handlers:
+            if channel.startswith(prefix):
+                try:
+                    await handler(channel, message)
+                except Exception as e:
+                    logger.warning(f"[realtime_broker] Handler for {channel} failed: {e}")
+
+    # ---------- Presence ----------
+
+    async def set_presence(self, channel: str, count: int) -> int:
+        """Record this worker's connection count for a channel; returns the total across workers."""
+        if count:
+            self._presence[channel] = count
+        else:
+            self._presence.pop(channel, None)
+        try:
+            if count:
+                await db[PRESENCE_COLLECTION].update_one(
+                    {"worker_id": self.worker_id, "channel": channel},
+                    {"$set": {"count": count, "expires_at": datetime.now(timezone.utc) + PRESENCE_TTL}},
+                    upsert=True,
+                )
+            else:
+                await db[PRESENCE_COLLECTION].delete_one({"worker_id": self.worker_id, "channel": channel})
+            return await self.get_presence(channel)
+        except Exception as e:
+            logger.warning(f"[realtime_broker] Presence update for {channel} failed (non-blocking): {e}")
+            return count
+
+    async def get_presence(self, channel: str) -> int:
+        """Connections on a channel summed over live workers."""
+        rows = await db[PRESENCE_COLLECTION].aggregate([
+            {"$match": {"channel": channel, "expires_at": {"$gt": datetime.now(timezone.utc)}}},
+            {"$group": {"_id": None, "count": {"$sum": "$count"}}},
+        ]).to_list(1)
+        return rows[0]["count"] if rows else 0
+
+    # ---------- Lifecycle ----------
+
+    async def start(self) -> None:
+        if self.is_running:
+            return
+        self._tasks = [asyncio.create_task(self._heartbeat())]
+        if self.transport == "mongo":
+            await self._ensure_capped()
+            self._tasks.append(asyncio.create_task(self._tail()))
+        logger.info(f"[realtime_broker] Started ({self.transport}, worker {self.worker_id})")
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+        try:
+            await db[PRESENCE_COLLECTION].delete_many({"worker_id": self.worker_id})
+        except Exception as e:
+            logger.warning(f"[realtime_broker] Presence cleanup failed: {e}")
+
+    async def _ensure_capped(self) -> None:
+        try:
+            await db.create_collection(MESSAGES_COLLECTION, capped=True, size=CAPPED_SIZE_BYTES, max=CAPPED_MAX_DOCS)
+            # A tailable cursor on an empty capped collection dies immediately
+            await db[MESSAGES_COLLECTION].insert_one({"channel": "", "origin": "", "payload": "{}"})
+        except CollectionInvalid:
+            pass
+
+    async def _tail(self) -> None:
+        """
+        Follow the capped collection and dispatch messages from other workers.
+
+        A dead cursor is resumed by position, not by `_id`: ObjectIds minted by
+        different workers are not ordered like the inserts, so `_id > last` could
+        drop a message written just before. The new cursor re-reads the collection
+        in natural (insertion) order and skips up to the last message seen. If that
+        message has already rolled out of the collection, the ones evicted with it
+        are lost; the gap is logged and tailing continues from the end.
+        """
+        coll = db[MESSAGES_COLLECTION]
+        last = await coll.find_one({}, {"_id": 1}, sort=[("$natural", -1)])
+        last_id = last["_id"] if last else None
+        while True:
+            try:
+                skipping, passed = last_id is not None, last_id
+                cursor = coll.find({}, cursor_type=CursorType.TAILABLE_AWAIT, max_await_time_ms=1000)
+                while cursor.alive:
+                    async for doc in cursor:
+                        if skipping:
+                            skipping = doc["_id"] != last_id
+                            passed = doc["_id"]
+                            continue
+                        last_id = doc["_id"]
+                        if doc.get("origin") in (self.worker_id, ""):
+                            continue
+                        self.stats["received"] += 1
+                        await self._dispatch(doc["channel"], json.loads(doc["payload"]))
+                    if skipping:
+                        # Caught up without meeting the resume point: it was evicted
+                        self.stats["last_error"] = "resume point rolled out of the capped collection"
+                        logger.warning("[realtime_broker] Resume point rolled out of the capped collection; messages may have been missed")
+                        skipping = False
+                        last_id = passed
+                    await asyncio.sleep(0)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats["last_error"] = str(e)
+                logger.warning(f"[realtime_broker] Tail error, retrying: {e}")
+                await asyncio.sleep(2)
+            else:
+                await asyncio.sleep(0.5)  # cursor died (collection empty or rolled over)
+
+    async def _heartbeat(self) -> None:
+        while True:
+            await asyncio.sleep(HEARTBEAT_SECONDS)
+            if not self._presence:
+                continue
+            try:
+                expires = datetime.now(timezone.utc) + PRESENCE_TTL
+                await db[PRESENCE_COLLECTION].update_many(
+                    {"worker_id": self.worker_id, "channel": {"$in": list(self._presence)}},
+                    {"$set": {"expires_at": expires}},
+                )
+            except Exception as e:
+                logger.warning(f"[realtime_broker] Presence heartbeat failed: {e}")
+
+    def get_status(self) -> Dict:
+        return {
+            **self.stats,
+            "worker_id": self.worker_id,
+            "transport": self.transport,
+            "running": self.is_running,
+            "channels_present": len(self._presence),
+        }
+
+
+realtime_broker = RealtimeBroker()
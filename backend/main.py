@@ -81,6 +81,7 @@ from modules.admin.menu_routes import router as admin_menu_router
 from modules.admin.seed_demo import router as seed_demo_router
 from modules.admin.privacy_routes import router as privacy_router, public_router as privacy_public_router
 from modules.admin.cleanup_routes import router as cleanup_router
+from modules.admin.export_routes import router as export_router
 from modules.admin.data_manager_routes import router as data_manager_router
 from modules.admin.archive_routes import router as archive_router, init_archive_routes
 
@@ -191,6 +192,7 @@ api_router.include_router(sheets_router)
 api_router.include_router(admin_router)
 api_router.include_router(admin_menu_router)
 api_router.include_router(cleanup_router)
+api_router.include_router(export_router)  # Background CSV/XLSX exports
 api_router.include_router(seed_demo_router)  # Demo data seeding
 api_router.include_router(data_manager_router)  # Unified data manager
 api_router.include_router(archive_router)  # Archive / soft-delete system
@@ -584,11 +586,48 @@ async def startup_event():
         except Exception as e:
             logger.warning(f"Textbook orders webhook registration skipped: {e}")
 
+        # Textbooks board mirror: apply item webhooks incrementally
+        try:
+            from modules.sysbook.services.textbook_board_mirror import textbook_board_mirror
+            from modules.integrations.monday.webhook_router import register_handler as register_wh
+            register_wh(textbook_board_mirror.board_id, textbook_board_mirror.handle_webhook)
+        except Exception as e:
+            logger.warning(f"Textbooks board mirror webhook registration skipped: {e}")
+
+        # Analytics rollups: periodic full rebuild repairs any drift from missed deltas
+        try:
+            from modules.store.services.analytics_rollup_service import analytics_rollup_service
+            analytics_rollup_service.start_reconcile()
+        except Exception as e:
+            logger.warning(f"Analytics rollup reconcile skipped: {e}")
+
+        # Sport tournaments: convert any still stored as embedded brackets
+        try:
+            from modules.sport.tournament_service import migrate_legacy_brackets
+            await migrate_legacy_brackets()
+        except Exception as e:
+            logger.warning(f"Tournament bracket conversion skipped: {e}")
+
         # Background pollers — MOVED TO INTEGRATION HUB
-        # Telegram polling, Gmail polling now run in the Hub process (port 8002).
+        # Telegram polling now runs in the Hub process (port 8002).
         # Main app only writes jobs to hub_jobs for Monday.com API calls.
         logger.info("Background pollers delegated to Integration Hub")
 
+        # Realtime fan-out across worker processes (live match sockets, notifications)
+        try:
+            from core.realtime_broker import realtime_broker
+            await realtime_broker.start()
+        except Exception as e:
+            logger.warning(f"Realtime broker start skipped: {e}")
+
+        # Gmail bank alerts: IMAP IDLE ingestion, leased to a single worker process.
+        # The Hub's interval scan stands down while the lease is held.
+        try:
+            from modules.wallet_topups.gmail_poller import gmail_poller
+            await gmail_poller.start()
+        except Exception as e:
+            logger.warning(f"Gmail IMAP ingestion skipped: {e}")
+
         try:
             from modules.showcase.scheduler import banner_sync_scheduler
             from modules.showcase.monday_banner_adapter import monday_banner_adapter
@@ -717,6 +756,33 @@ async def shutdown_event():
         banner_sync_scheduler.stop()
     except Exception as e:
         logger.warning(f"Banner scheduler shutdown issue: {e}")
+    try:
+        from modules.wallet_topups.gmail_poller import gmail_poller
+        await gmail_poller.stop()
+    except Exception as e:
+        logger.warning(f"Gmail ingestion shutdown issue: {e}")
+    try:
+        from modules.sport.reactions import reaction_aggregator
+        from modules.sport.live_dispatch import live_dispatcher
+        await reaction_aggregator.stop()
+        await live_dispatcher.stop()
+    except Exception as e:
+        logger.warning(f"Reaction flush shutdown issue: {e}")
+    try:
+        from modules.ticker.feed import ticker_feed
+        await ticker_feed.stop()
+    except Exception as e:
+        logger.warning(f"Ticker feed shutdown issue: {e}")
+    try:
+        from modules.sport.live_registry import live_registry
+        await live_registry.stop()
+    except Exception as e:
+        logger.warning(f"Live session flush shutdown issue: {e}")
+    try:
+        from core.realtime_broker import realtime_broker
+        await realtime_broker.stop()
+    except Exception as e:
+        logger.warning(f"Realtime broker shutdown issue: {e}")
     try:
         await close_database()
         logger.info("Database connection closed")
@@ -80,6 +80,17 @@ async def publish_to_channel(channel_name: str, event: str, data: dict):
         logger.error(f"Ably publish error on {channel_name}: {e}")
 
 
+async def publish_many_to_channel(channel_name: str, messages: list):
+    """Publish several (event, data) messages to an Ably channel in one request."""
+    from ably.types.message import Message
+    try:
+        client = get_ably_client()
+        channel = client.channels.get(channel_name)
+        await channel.publish([Message(name=event, data=data) for event, data in messages])
+    except Exception as e:
+        logger.error(f"Ably publish error on {channel_name}: {e}")
+
+
 # ═══ AUTO-TRANSLATION FOR CHAT ═══
 
 async def _translate_message(text: str, target_lang: str) -> str:
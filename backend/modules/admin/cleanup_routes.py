@@ -1,6 +1,7 @@
 """
 Admin Data Cleanup Routes
 Endpoints for previewing and executing test data cleanup.
+Large cleanups should use /jobs, which runs in the background with progress.
 """
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException
@@ -65,6 +66,36 @@ async def execute_cleanup(request: CleanupRequest, admin: dict = Depends(get_adm
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/jobs")
+async def start_cleanup_job(request: CleanupRequest, admin: dict = Depends(get_admin_user)):
+    """Start the cleanup as a background job — returns job_id immediately."""
+    if not request.student_ids and not request.order_ids and not request.demo_only:
+        raise HTTPException(
+            status_code=400,
+            detail="At least one filter is required: student_ids, order_ids, or demo_only"
+        )
+
+    job = cleanup_service.start_job(
+        student_ids=request.student_ids,
+        order_ids=request.order_ids,
+        demo_only=request.demo_only,
+        date_before=request.date_before,
+        delete_monday_items=request.delete_monday_items,
+        collections_to_clean=request.collections,
+    )
+    logger.info(f"[Cleanup] Job {job['job_id']} started by {admin.get('email', 'unknown')}")
+    return {"job_id": job["job_id"], "status": job["status"]}
+
+
+@router.get("/jobs/{job_id}")
+async def get_cleanup_job(job_id: str, admin: dict = Depends(get_admin_user)):
+    """Poll a cleanup job: status, per-collection progress, and the results when done."""
+    job = cleanup_service.get_job(job_id)
+    if not job:
+        raise HTTPException(404, "Job not found")
+    return job
+
+
 @router.get("/students")
 async def list_students_for_cleanup(admin: dict = Depends(get_admin_user)):
     """List ALL students with order counts — for the cleanup UI picker.
@@ -2,13 +2,18 @@
 Admin Data Cleanup Service
 Provides preview + execute for cleaning up test/demo data across collections.
 Supports: orders, CRM links, CRM messages, students, wallets, users, Monday.com items.
+Large cleanups run as background jobs that report progress while they delete.
 """
 from typing import Dict, List, Optional
 from datetime import datetime, timezone
+import asyncio
 import logging
+import uuid
 
 from core.database import db
 from modules.integrations.monday.core_client import monday_client
+from modules.store.services.analytics_rollup_service import analytics_rollup_service, ORDER_PROJECTION
+from modules.integrations.monday.queue import Priority, monday_queue
 
 logger = logging.getLogger(__name__)
 
@@ -30,9 +35,18 @@ CLEANUP_COLLECTIONS = {
 # Admin user IDs that must NEVER be deleted
 PROTECTED_USER_IDS = set()
 
+BATCH_SIZE = 500            # Documents per delete batch
+MAX_PARALLEL = 4            # Collections cleaned at the same time
+MONDAY_BATCH_SIZE = 25      # Item deletions per Monday.com request
+MAX_FINISHED_JOBS = 20      # Finished jobs kept for polling
+
 
 class CleanupService:
 
+    def __init__(self):
+        # In-memory job store (survives within same process)
+        self._jobs: Dict[str, Dict] = {}
+
     # ------------------------------------------------------------------ #
     #  Preview — dry-run showing what WOULD be deleted
     # ------------------------------------------------------------------ #
@@ -44,105 +58,146 @@ class CleanupService:
         demo_only: bool = False,
         date_before: Optional[str] = None,
     ) -> Dict:
-        """Return counts and sample data that would be deleted."""
-        result = {}
+        """Return counts and sample data that would be deleted.
 
-        # Build filters
+        Counts use count_documents with the same filters execute() deletes
+        with; only the small sample lists are fetched.
+        """
+        orders = db[CLEANUP_COLLECTIONS["orders"]]
         order_filter = self._build_order_filter(order_ids, student_ids, demo_only, date_before)
 
-        # Orders
-        orders = await db[CLEANUP_COLLECTIONS["orders"]].find(
-            order_filter, {"_id": 0, "order_id": 1, "student_name": 1, "total_amount": 1,
-                           "status": 1, "monday_item_ids": 1, "submitted_at": 1, "created_at": 1}
-        ).to_list(500)
-        monday_item_ids = []
-        for o in orders:
-            monday_item_ids.extend(o.get("monday_item_ids", []))
-        result["orders"] = {
-            "count": len(orders),
-            "monday_items_count": len([m for m in monday_item_ids if m]),
-            "samples": orders[:10],
-        }
-
         # Resolve student IDs and user IDs
         resolved_sids = await self._resolve_student_ids(student_ids, demo_only)
         user_ids = await self._resolve_user_ids(resolved_sids)
         protected = await self._get_protected_user_ids()
         safe_user_ids = [uid for uid in user_ids if uid not in protected]
+        filters = self._collection_filters(resolved_sids, safe_user_ids)
 
-        # CRM Links
-        if resolved_sids:
-            link_filter = {"student_id": {"$in": resolved_sids}}
-            links = await db[CLEANUP_COLLECTIONS["crm_links"]].find(link_filter, {"_id": 0}).to_list(100)
-            crm_monday_ids = [l.get("monday_item_id") for l in links if l.get("monday_item_id")]
-            result["crm_links"] = {"count": len(links), "crm_monday_items_count": len(crm_monday_ids)}
-        else:
-            result["crm_links"] = {"count": 0}
-
-        # CRM Messages
-        msg_filter = {"student_id": {"$in": resolved_sids}} if resolved_sids else {}
-        result["crm_messages"] = {"count": await db[CLEANUP_COLLECTIONS["crm_messages"]].count_documents(msg_filter) if msg_filter else 0}
-
-        # CRM Notifications
-        result["crm_notifications"] = {"count": await db[CLEANUP_COLLECTIONS["crm_notifications"]].count_documents(msg_filter) if msg_filter else 0}
-
-        # Students
-        if resolved_sids:
-            student_docs = await db[CLEANUP_COLLECTIONS["students"]].find(
-                {"student_id": {"$in": resolved_sids}},
-                {"_id": 0, "student_id": 1, "full_name": 1, "is_demo": 1, "user_id": 1}
-            ).to_list(100)
-            result["students"] = {"count": len(student_docs), "samples": student_docs[:10]}
-        else:
-            result["students"] = {"count": 0}
+        async def count(name: str) -> int:
+            query = filters.get(name)
+            return await db[CLEANUP_COLLECTIONS[name]].count_documents(query) if query else 0
+
+        async def sample(name: str, fields: Dict, limit: int) -> List[Dict]:
+            query = filters.get(name)
+            if not query:
+                return []
+            return await db[CLEANUP_COLLECTIONS[name]].find(query, {"_id": 0, **fields}).to_list(limit)
 
-        # Order Messages
-        order_id_list = [o["order_id"] for o in orders]
-        result["order_messages"] = {
-            "count": await db[CLEANUP_COLLECTIONS["order_messages"]].count_documents(
+        async def order_message_count() -> int:
+            order_id_list = await orders.distinct("order_id", order_filter)
+            return await db[CLEANUP_COLLECTIONS["order_messages"]].count_documents(
                 {"order_id": {"$in": order_id_list}}
             ) if order_id_list else 0
-        }
-
-        # --- Wallets ---
-        if safe_user_ids:
-            uid_filter = {"user_id": {"$in": safe_user_ids}}
-            wallets = await db[CLEANUP_COLLECTIONS["wallets"]].find(uid_filter, {"_id": 0, "wallet_id": 1, "user_id": 1, "balance_usd": 1}).to_list(100)
-            wallet_ids = [w["wallet_id"] for w in wallets if w.get("wallet_id")]
-            txn1 = await db[CLEANUP_COLLECTIONS["wallet_transactions"]].count_documents(uid_filter)
-            txn2 = await db[CLEANUP_COLLECTIONS["wallet_transactions_v2"]].count_documents(uid_filter)
-            # Wallet alerts use usuario_id
-            alert_count = await db[CLEANUP_COLLECTIONS["wallet_alerts"]].count_documents(
-                {"usuario_id": {"$in": safe_user_ids}}
-            )
-            result["wallets"] = {"count": len(wallets), "samples": wallets[:5]}
-            result["wallet_transactions"] = {"count": txn1 + txn2}
-            result["wallet_alerts"] = {"count": alert_count}
-        else:
-            result["wallets"] = {"count": 0}
-            result["wallet_transactions"] = {"count": 0}
-            result["wallet_alerts"] = {"count": 0}
 
-        # --- Users ---
+        async def crm_monday_count() -> int:
+            query = filters.get("crm_links")
+            return await db[CLEANUP_COLLECTIONS["crm_links"]].count_documents(
+                {**query, "monday_item_id": {"$nin": [None, ""]}}
+            ) if query else 0
+
+        (
+            order_count, order_samples, monday_counts, order_messages,
+            link_count, crm_monday_items, crm_messages, crm_notifications,
+            student_count, student_samples, wallet_count, wallet_samples,
+            txn1, txn2, alert_count, user_count, user_samples,
+        ) = await asyncio.gather(
+            orders.count_documents(order_filter),
+            orders.find(
+                order_filter, {"_id": 0, "order_id": 1, "student_name": 1, "total_amount": 1,
+                               "status": 1, "monday_item_ids": 1, "submitted_at": 1, "created_at": 1}
+            ).to_list(10),
+            self._count_monday_items(order_filter),
+            order_message_count(),
+            count("crm_links"),
+            crm_monday_count(),
+            count("crm_messages"),
+            count("crm_notifications"),
+            count("students"),
+            sample("students", {"student_id": 1, "full_name": 1, "is_demo": 1, "user_id": 1}, 10),
+            count("wallets"),
+            sample("wallets", {"wallet_id": 1, "user_id": 1, "balance_usd": 1}, 5),
+            count("wallet_transactions"),
+            count("wallet_transactions_v2"),
+            count("wallet_alerts"),
+            count("users"),
+            sample("users", {"user_id": 1, "email": 1, "name": 1}, 10),
+        )
+
+        result = {
+            "orders": {
+                "count": order_count,
+                "monday_items_count": monday_counts["items"],
+                "samples": order_samples,
+            },
+            "crm_links": {"count": link_count, "crm_monday_items_count": crm_monday_items} if resolved_sids else {"count": 0},
+            "crm_messages": {"count": crm_messages},
+            "crm_notifications": {"count": crm_notifications},
+            "students": {"count": student_count, "samples": student_samples} if resolved_sids else {"count": 0},
+            "order_messages": {"count": order_messages},
+            "wallets": {"count": wallet_count, "samples": wallet_samples} if safe_user_ids else {"count": 0},
+            "wallet_transactions": {"count": txn1 + txn2},
+            "wallet_alerts": {"count": alert_count},
+        }
         if safe_user_ids:
-            user_docs = await db[CLEANUP_COLLECTIONS["users"]].find(
-                {"user_id": {"$in": safe_user_ids}},
-                {"_id": 0, "user_id": 1, "email": 1, "name": 1}
-            ).to_list(100)
-            result["users"] = {"count": len(user_docs), "samples": user_docs[:10]}
+            result["users"] = {"count": user_count, "samples": user_samples}
         else:
             result["users"] = {"count": 0, "note": "Admin users are protected and won't be deleted"}
 
         # Summary
         result["protected_user_ids"] = list(protected & set(user_ids))
-        result["total_monday_items"] = len(set(m for m in monday_item_ids if m))
+        result["total_monday_items"] = monday_counts["distinct"]
 
         return result
 
+    async def _count_monday_items(self, order_filter: Dict) -> Dict:
+        """Monday.com item IDs referenced by the matching orders (all, and distinct)."""
+        rows = await db[CLEANUP_COLLECTIONS["orders"]].aggregate([
+            {"$match": order_filter},
+            {"$project": {"_id": 0, "monday_item_ids": 1}},
+            {"$unwind": "$monday_item_ids"},
+            {"$match": {"monday_item_ids": {"$nin": [None, ""]}}},
+            {"$facet": {
+                "items": [{"$count": "n"}],
+                "distinct": [{"$group": {"_id": "$monday_item_ids"}}, {"$count": "n"}],
+            }},
+        ]).to_list(1)
+        facet = rows[0] if rows else {}
+        return {key: (facet.get(key) or [{}])[0].get("n", 0) for key in ("items", "distinct")}
+
     # ------------------------------------------------------------------ #
     #  Execute — actually delete
     # ------------------------------------------------------------------ #
 
+    def start_job(self, **params) -> Dict:
+        """Run execute() as a background job. Poll it with get_job()."""
+        job_id = f"cj_{uuid.uuid4().hex[:8]}"
+        job = {
+            "job_id": job_id,
+            "status": "starting",
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "progress": {},
+        }
+        self._jobs[job_id] = job
+        finished = [j for j in self._jobs.values() if j["status"] in ("done", "error")]
+        for old in finished[:-MAX_FINISHED_JOBS]:
+            self._jobs.pop(old["job_id"], None)
+        asyncio.create_task(self._run_job(job, params))
+        return job
+
+    def get_job(self, job_id: str) -> Optional[Dict]:
+        return self._jobs.get(job_id)
+
+    async def _run_job(self, job: Dict, params: Dict):
+        try:
+            job["status"] = "running"
+            result = await self.execute(**params, progress=job["progress"])
+            job.update({"status": "done", "result": result,
+                        "finished_at": datetime.now(timezone.utc).isoformat()})
+        except Exception as e:
+            logger.error(f"[Cleanup] Job {job['job_id']} failed: {e}")
+            job.update({"status": "error", "error": str(e),
+                        "finished_at": datetime.now(timezone.utc).isoformat()})
+
     async def execute(
         self,
         student_ids: Optional[List[str]] = None,
@@ -151,9 +206,16 @@ class CleanupService:
         date_before: Optional[str] = None,
         delete_monday_items: bool = True,
         collections_to_clean: Optional[List[str]] = None,
+        progress: Optional[Dict] = None,
     ) -> Dict:
-        """Execute cleanup. Returns counts of deleted records per collection."""
+        """Execute cleanup. Returns counts of deleted records per collection.
+
+        Every collection is deleted in bounded _id-range batches, and the
+        independent collections run concurrently (MAX_PARALLEL at a time).
+        `progress` is filled with running counts as batches complete.
+        """
         results = {}
+        progress = progress if progress is not None else {}
         all_collections = collections_to_clean or [
             "orders", "crm_links", "crm_messages", "crm_notifications",
             "students", "order_messages",
@@ -165,119 +227,116 @@ class CleanupService:
         user_ids = await self._resolve_user_ids(resolved_sids)
         protected = await self._get_protected_user_ids()
         safe_user_ids = [uid for uid in user_ids if uid not in protected]
+        filters = self._collection_filters(resolved_sids, safe_user_ids)
 
-        # 1. Collect Monday.com item IDs before deleting orders
+        # Monday.com item IDs are collected from the batches before they are deleted
         monday_ids_to_delete = set()
-
-        if "orders" in all_collections:
-            order_filter = self._build_order_filter(order_ids, student_ids, demo_only, date_before)
-            orders = await db[CLEANUP_COLLECTIONS["orders"]].find(
-                order_filter, {"_id": 0, "order_id": 1, "monday_item_ids": 1}
-            ).to_list(1000)
-
-            for o in orders:
-                for mid in o.get("monday_item_ids", []):
+        limit = asyncio.Semaphore(MAX_PARALLEL)
+
+        async def clean(key: str, names: List[str], query: Dict, fields=(), on_batch=None):
+            async with limit:
+                progress.setdefault(key, 0)
+                deleted = 0
+                for name in names:
+                    deleted += await self._delete_batched(name, query, key, progress, fields, on_batch)
+                results[key] = {"deleted": deleted}
+
+        async def order_batch(docs: List[Dict]):
+            # Take the orders out of the analytics rollups before they disappear
+            await analytics_rollup_service.record_order_changes((o, None) for o in docs)
+            for o in docs:
+                for mid in o.get("monday_item_ids") or []:
                     if mid:
                         monday_ids_to_delete.add(str(mid))
-
-            deleted_order_ids = [o["order_id"] for o in orders]
-
-            r = await db[CLEANUP_COLLECTIONS["orders"]].delete_many(order_filter)
-            results["orders"] = {"deleted": r.deleted_count}
-
             # Delete related order messages
-            if "order_messages" in all_collections and deleted_order_ids:
+            batch_order_ids = [o["order_id"] for o in docs if o.get("order_id")]
+            if "order_messages" in all_collections and batch_order_ids:
                 r = await db[CLEANUP_COLLECTIONS["order_messages"]].delete_many(
-                    {"order_id": {"$in": deleted_order_ids}}
+                    {"order_id": {"$in": batch_order_ids}}
                 )
-                results["order_messages"] = {"deleted": r.deleted_count}
-
-        # 2. CRM Links
-        if "crm_links" in all_collections and resolved_sids:
-            links = await db[CLEANUP_COLLECTIONS["crm_links"]].find(
-                {"student_id": {"$in": resolved_sids}}, {"_id": 0, "monday_item_id": 1}
-            ).to_list(200)
-            for l in links:
+                progress["order_messages"] = progress.get("order_messages", 0) + r.deleted_count
+                results["order_messages"] = {"deleted": progress["order_messages"]}
+
+        async def link_batch(docs: List[Dict]):
+            for l in docs:
                 if l.get("monday_item_id"):
                     monday_ids_to_delete.add(str(l["monday_item_id"]))
 
-            r = await db[CLEANUP_COLLECTIONS["crm_links"]].delete_many(
-                {"student_id": {"$in": resolved_sids}}
-            )
-            results["crm_links"] = {"deleted": r.deleted_count}
-
-        # 3. CRM Messages
-        if "crm_messages" in all_collections and resolved_sids:
-            r = await db[CLEANUP_COLLECTIONS["crm_messages"]].delete_many(
-                {"student_id": {"$in": resolved_sids}}
-            )
-            results["crm_messages"] = {"deleted": r.deleted_count}
-
-        # 4. CRM Notifications
-        if "crm_notifications" in all_collections and resolved_sids:
-            r = await db[CLEANUP_COLLECTIONS["crm_notifications"]].delete_many(
-                {"student_id": {"$in": resolved_sids}}
-            )
-            results["crm_notifications"] = {"deleted": r.deleted_count}
-
-        # 5. Students
-        if "students" in all_collections and resolved_sids:
-            r = await db[CLEANUP_COLLECTIONS["students"]].delete_many(
-                {"student_id": {"$in": resolved_sids}}
-            )
-            results["students"] = {"deleted": r.deleted_count}
-
-        # 6. Wallets
-        if "wallets" in all_collections and safe_user_ids:
-            uid_filter = {"user_id": {"$in": safe_user_ids}}
-            r = await db[CLEANUP_COLLECTIONS["wallets"]].delete_many(uid_filter)
-            results["wallets"] = {"deleted": r.deleted_count}
-
-        # 7. Wallet Transactions (both collections)
-        if "wallet_transactions" in all_collections and safe_user_ids:
-            uid_filter = {"user_id": {"$in": safe_user_ids}}
-            r1 = await db[CLEANUP_COLLECTIONS["wallet_transactions"]].delete_many(uid_filter)
-            r2 = await db[CLEANUP_COLLECTIONS["wallet_transactions_v2"]].delete_many(uid_filter)
-            results["wallet_transactions"] = {"deleted": r1.deleted_count + r2.deleted_count}
-
-        # 8. Wallet Alerts
-        if "wallet_alerts" in all_collections and safe_user_ids:
-            r = await db[CLEANUP_COLLECTIONS["wallet_alerts"]].delete_many(
-                {"usuario_id": {"$in": safe_user_ids}}
-            )
-            results["wallet_alerts"] = {"deleted": r.deleted_count}
-
-        # 9. Users
-        if "users" in all_collections and safe_user_ids:
-            r = await db[CLEANUP_COLLECTIONS["users"]].delete_many(
-                {"user_id": {"$in": safe_user_ids}}
-            )
-            results["users"] = {"deleted": r.deleted_count}
-
-        # 10. Protected users info
+        tasks = []
+        if "orders" in all_collections:
+            order_filter = self._build_order_filter(order_ids, student_ids, demo_only, date_before)
+            order_fields = ("monday_item_ids", *(f for f, on in ORDER_PROJECTION.items() if on))
+            tasks.append(clean("orders", ["orders"], order_filter, order_fields, order_batch))
+        if "crm_links" in all_collections and filters.get("crm_links"):
+            tasks.append(clean("crm_links", ["crm_links"], filters["crm_links"], ("monday_item_id",), link_batch))
+        for key in ("crm_messages", "crm_notifications", "students", "wallets", "wallet_alerts", "users"):
+            if key in all_collections and filters.get(key):
+                tasks.append(clean(key, [key], filters[key]))
+        # Wallet Transactions (both collections)
+        if "wallet_transactions" in all_collections and filters.get("wallet_transactions"):
+            tasks.append(clean("wallet_transactions", ["wallet_transactions", "wallet_transactions_v2"],
+                               filters["wallet_transactions"]))
+        await asyncio.gather(*tasks)
+
+        # Protected users info
         protected_skipped = list(protected & set(user_ids))
         if protected_skipped:
             results["protected_users_skipped"] = protected_skipped
 
-        # 11. Delete Monday.com items
+        # Delete Monday.com items
         monday_results = {"attempted": 0, "deleted": 0, "failed": 0}
+        progress["monday_items"] = monday_results
         if delete_monday_items and monday_ids_to_delete:
-            for mid in monday_ids_to_delete:
-                monday_results["attempted"] += 1
-                try:
-                    success = await monday_client.delete_item(mid)
-                    if success:
-                        monday_results["deleted"] += 1
-                    else:
-                        monday_results["failed"] += 1
-                except Exception as e:
-                    monday_results["failed"] += 1
-                    logger.error(f"Failed to delete Monday.com item {mid}: {e}")
+            await self._delete_monday_items(sorted(monday_ids_to_delete), monday_results)
         results["monday_items"] = monday_results
 
         logger.info(f"[Cleanup] Executed: {results}")
         return results
 
+    async def _delete_batched(
+        self, name: str, query: Dict, key: str, progress: Dict,
+        fields=(), on_batch=None,
+    ) -> int:
+        """Delete the documents matching `query` BATCH_SIZE at a time.
+
+        Each batch reads the next _id range (with `fields` for on_batch) and
+        deletes that range with the same filter, so no single operation
+        scans or removes more than one batch.
+        """
+        collection = db[CLEANUP_COLLECTIONS[name]]
+        projection = {"_id": 1, **{f: 1 for f in fields}}
+        deleted, last_id = 0, None
+        while True:
+            page = query if last_id is None else {"$and": [query, {"_id": {"$gt": last_id}}]}
+            docs = await collection.find(page, projection).sort("_id", 1).limit(BATCH_SIZE).to_list(BATCH_SIZE)
+            if not docs:
+                break
+            last_id = docs[-1]["_id"]
+            if on_batch:
+                await on_batch(docs)
+            r = await collection.delete_many({"$and": [query, {"_id": {"$gte": docs[0]["_id"], "$lte": last_id}}]})
+            deleted += r.deleted_count
+            progress[key] = progress.get(key, 0) + r.deleted_count
+            if len(docs) < BATCH_SIZE:
+                break
+        return deleted
+
+    async def _delete_monday_items(self, item_ids: List[str], stats: Dict):
+        """Delete Monday.com items MONDAY_BATCH_SIZE per request, through the Monday queue."""
+        for i in range(0, len(item_ids), MONDAY_BATCH_SIZE):
+            batch = item_ids[i:i + MONDAY_BATCH_SIZE]
+            stats["attempted"] += len(batch)
+            try:
+                deleted = await monday_queue.enqueue(
+                    monday_client.delete_items, batch,
+                    priority=Priority.NORMAL, label=f"cleanup: delete {len(batch)} items", timeout=120.0,
+                )
+            except Exception as e:
+                logger.error(f"Failed to delete Monday.com items {batch}: {e}")
+                deleted = set()
+            stats["deleted"] += len(deleted)
+            stats["failed"] += len(batch) - len(deleted)
+
     # ------------------------------------------------------------------ #
     #  Helpers
     # ------------------------------------------------------------------ #
@@ -310,6 +369,21 @@ class CleanupService:
             f = {"$and": conditions}
         return f
 
+    def _collection_filters(self, student_ids: List[str], safe_user_ids: List[str]) -> Dict[str, Dict]:
+        """Filters for the collections keyed by student or user (empty IDs -> no filter)."""
+        filters = {}
+        if student_ids:
+            sid_filter = {"student_id": {"$in": student_ids}}
+            for name in ("crm_links", "crm_messages", "crm_notifications", "students"):
+                filters[name] = sid_filter
+        if safe_user_ids:
+            uid_filter = {"user_id": {"$in": safe_user_ids}}
+            for name in ("wallets", "wallet_transactions", "wallet_transactions_v2", "users"):
+                filters[name] = uid_filter
+            # Wallet alerts use usuario_id
+            filters["wallet_alerts"] = {"usuario_id": {"$in": safe_user_ids}}
+        return filters
+
     def _build_student_filter(self, student_ids: Optional[List[str]], demo_only: bool) -> Dict:
         if student_ids:
             return {"student_id": {"$in": student_ids}}
@@ -0,0 +1,59 @@
+"""
+Admin Export Routes
+Background exports for large reports: start a job, poll its row count, download the file.
+Small exports can stream directly from each module's /export endpoint instead.
+"""
+from typing import Dict, Literal
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
+from pydantic import BaseModel
+import logging
+
+from core.auth import get_admin_user
+from core.exports import EXPORT_FORMATS, export_jobs
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/exports", tags=["admin-exports"])
+
+
+class ExportJobRequest(BaseModel):
+    export: str
+    format: Literal["csv", "xlsx"] = "csv"
+    params: Dict = {}
+
+
+@router.get("")
+async def list_exports(admin: dict = Depends(get_admin_user)):
+    """Exports available as background jobs, with the params each one accepts."""
+    return {"exports": export_jobs.list_exports(), "formats": list(EXPORT_FORMATS)}
+
+
+@router.post("/jobs")
+async def start_export_job(request: ExportJobRequest, admin: dict = Depends(get_admin_user)):
+    """Start an export as a background job — returns job_id immediately."""
+    try:
+        job = export_jobs.start(request.export, request.format, request.params,
+                                requested_by=admin.get("email"))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    logger.info(f"[Exports] Job {job['job_id']} ({request.export}) started by {admin.get('email', 'unknown')}")
+    return {"job_id": job["job_id"], "status": job["status"]}
+
+
+@router.get("/jobs/{job_id}")
+async def get_export_job(job_id: str, admin: dict = Depends(get_admin_user)):
+    """Poll an export job: status, rows written so far, and the file size when done."""
+    job = export_jobs.get(job_id)
+    if not job:
+        raise HTTPException(404, "Job not found")
+    return job
+
+
+@router.get("/jobs/{job_id}/download")
+async def download_export(job_id: str, admin: dict = Depends(get_admin_user)):
+    """Download the file produced by a finished export job."""
+    artifact = export_jobs.artifact(job_id)
+    if not artifact:
+        raise HTTPException(404, "Export file not available")
+    path, filename = artifact
+    return FileResponse(path, media_type=EXPORT_FORMATS[path.rsplit(".", 1)[-1]], filename=filename)
@@ -67,6 +67,8 @@ class ModuleStatusService:
             }},
             upsert=True,
         )
+        from modules.landing.bootstrap import public_bootstrap
+        await public_bootstrap.invalidate()
         return True
 
     async def get_public_statuses(self) -> Dict:
@@ -105,6 +105,8 @@ class UIStyleService:
             }},
             upsert=True,
         )
+        from modules.landing.bootstrap import public_bootstrap
+        await public_bootstrap.invalidate()
         return True
 
     async def get_public_style(self) -> Dict:
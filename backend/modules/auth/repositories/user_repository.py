@@ -10,6 +10,9 @@ from core.base import BaseRepository
 from core.database import db
 from core.constants import AuthCollections
 
+# Fields that feed the user name token index
+NAME_INDEX_FIELDS = {"name", "last_name", "apellido", "email"}
+
 
 class UserRepository(BaseRepository):
     """
@@ -29,7 +32,9 @@ class UserRepository(BaseRepository):
         user_data["created_at"] = datetime.now(timezone.utc).isoformat()
         user_data["students"] = user_data.get("students", [])
         user_data["is_admin"] = user_data.get("is_admin", False)
-        return await self.insert_one(user_data)
+        result = await self.insert_one(user_data)
+        await self._refresh_name_index(result["user_id"])
+        return result
     
     async def get_by_id(self, user_id: str) -> Optional[Dict]:
         """Get user by ID (without password)"""
@@ -57,7 +62,10 @@ class UserRepository(BaseRepository):
     
     async def update_user(self, user_id: str, data: Dict) -> bool:
         """Update user"""
-        return await self.update_by_id(self.ID_FIELD, user_id, data)
+        updated = await self.update_by_id(self.ID_FIELD, user_id, data)
+        if updated and NAME_INDEX_FIELDS.intersection(data):
+            await self._refresh_name_index(user_id)
+        return updated
     
     async def update_password(self, user_id: str, password_hash: str) -> bool:
         """Update password"""
@@ -99,4 +107,11 @@ class UserRepository(BaseRepository):
     async def delete_user(self, user_id: str) -> bool:
         """Delete user by user_id"""
         result = await self.collection.delete_one({"user_id": user_id})
+        if result.deleted_count > 0:
+            await self._refresh_name_index(user_id)
         return result.deleted_count > 0
+
+    async def _refresh_name_index(self, user_id: str) -> None:
+        """Keep the name token index in step with this write (non-blocking)"""
+        from modules.auth.services.user_name_index import user_name_index
+        await user_name_index.refresh_users([user_id])
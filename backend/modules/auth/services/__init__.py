@@ -1,7 +1,9 @@
 from .auth_service import AuthService, auth_service
 from .user_service import UserService, user_service
+from .user_name_index import UserNameIndex, user_name_index
 
 __all__ = [
     'AuthService', 'auth_service',
-    'UserService', 'user_service'
+    'UserService', 'user_service',
+    'UserNameIndex', 'user_name_index'
 ]
@@ -0,0 +1,157 @@
+"""
+Auth Module - User Name Index
+Normalized, accent-folded name tokens for indexed user lookup.
+
+Each user gets one row in `auth_user_name_tokens` whose `tokens` array (a
+multikey index) holds the lower-cased, accent-stripped words of their name,
+last name and email local part. Exact token lookups like
+`{"tokens": {"$in": [...]}}` then replace unanchored `$regex` scans over
+`auth_users`.
+
+Rows are refreshed by the user repository on create/update/delete. Writers
+that touch `auth_users` directly are picked up by an incremental sync keyed on
+`updated_at` / `created_at`.
+"""
+from typing import Dict, Iterable, List, Optional
+from datetime import datetime, timezone
+import asyncio
+import logging
+import re
+import time
+import unicodedata
+
+from pymongo import UpdateOne, DeleteOne
+
+from core.database import db
+from core.constants import AuthCollections
+
+logger = logging.getLogger(__name__)
+
+TOKENS_COLLECTION = "auth_user_name_tokens"
+META_COLLECTION = "auth_user_name_tokens_meta"
+
+INDEX_VERSION = 1
+MIN_TOKEN_LENGTH = 3
+SYNC_INTERVAL_SECONDS = 60
+BATCH_SIZE = 1000
+
+USER_FIELDS = {"_id": 0, "user_id": 1, "name": 1, "last_name": 1, "apellido": 1, "email": 1}
+
+_SPLIT_RE = re.compile(r"[^a-z0-9]+")
+# Name particles too common to tell people apart
+STOP_TOKENS = {"del", "las", "los", "van", "von"}
+
+
+def fold(text: str) -> str:
+    """Lower-case and strip accents ("José Núñez" -> "jose nunez")."""
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+
+def name_tokens(*values: Optional[str]) -> List[str]:
+    """Unique folded word tokens (>= 3 chars) from free-text name fragments."""
+    tokens = []
+    for value in values:
+        for token in _SPLIT_RE.split(fold(value or "")):
+            if (
+                len(token) >= MIN_TOKEN_LENGTH
+                and not token.isdigit()
+                and token not in STOP_TOKENS
+                and token not in tokens
+            ):
+                tokens.append(token)
+    return tokens
+
+
+def user_tokens(user: Dict) -> List[str]:
+    email_local = (user.get("email") or "").split("@")[0]
+    return name_tokens(user.get("name"), user.get("last_name"), user.get("apellido"), email_local)
+
+
+def _row(user: Dict) -> Dict:
+    return {
+        "user_id": user["user_id"],
+        "tokens": user_tokens(user),
+        "indexed_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+class UserNameIndex:
+    """Maintains `auth_user_name_tokens` and answers token lookups"""
+
+    def __init__(self):
+        self._lock = asyncio.Lock()
+        self._last_sync = 0.0
+
+    @property
+    def collection(self):
+        return db[TOKENS_COLLECTION]
+
+    async def refresh_users(self, user_ids: Iterable[str]) -> None:
+        """Re-index the given users (rows for deleted users are removed). Never raises."""
+        user_ids = [u for u in user_ids if u]
+        if not user_ids:
+            return
+        try:
+            users = await db[AuthCollections.USERS].find(
+                {"user_id": {"$in": user_ids}}, USER_FIELDS
+            ).to_list(len(user_ids))
+            found = {u["user_id"] for u in users}
+            requests = [
+                UpdateOne({"user_id": u["user_id"]}, {"$set": _row(u)}, upsert=True) for u in users
+            ] + [DeleteOne({"user_id": uid}) for uid in user_ids if uid not in found]
+            await self.collection.bulk_write(requests, ordered=False)
+        except Exception as e:
+            logger.warning(f"[user_name_index] Refresh failed for {user_ids[:5]} (non-blocking): {e}")
+
+    async def ensure_fresh(self) -> None:
+        """Build the index on first use, then pick up direct writes at most once a minute."""
+        if time.monotonic() - self._last_sync < SYNC_INTERVAL_SECONDS:
+            return
+        async with self._lock:
+            if time.monotonic() - self._last_sync < SYNC_INTERVAL_SECONDS:
+                return
+            meta = await db[META_COLLECTION].find_one({"id": "default"}, {"_id": 0})
+            started_at = datetime.now(timezone.utc).isoformat()
+            if not meta or meta.get("version") != INDEX_VERSION:
+                await self._index_users({})
+            else:
+                watermark = meta.get("synced_at", "")
+                await self._index_users({"$or": [
+                    {"updated_at": {"$gt": watermark}},
+                    {"created_at": {"$gt": watermark}},
+                ]})
+            await db[META_COLLECTION].update_one(
+                {"id": "default"},
+                {"$set": {"version": INDEX_VERSION, "synced_at": started_at}},
+                upsert=True,
+            )
+            self._last_sync = time.monotonic()
+
+    async def rebuild(self) -> Dict:
+        """Drop the sync watermark and re-index every user."""
+        await db[META_COLLECTION].delete_one({"id": "default"})
+        self._last_sync = 0.0
+        await self.ensure_fresh()
+        return {"indexed": await self.collection.count_documents({})}
+
+    async def _index_users(self, query: Dict) -> int:
+        count = 0
+        batch = []
+        async for user in db[AuthCollections.USERS].find(query, USER_FIELDS):
+            if not user.get("user_id"):
+                continue
+            batch.append(UpdateOne({"user_id": user["user_id"]}, {"$set": _row(user)}, upsert=True))
+            if len(batch) >= BATCH_SIZE:
+                await self.collection.bulk_write(batch, ordered=False)
+                count += len(batch)
+                batch = []
+        if batch:
+            await self.collection.bulk_write(batch, ordered=False)
+            count += len(batch)
+        if count:
+            logger.info(f"[user_name_index] Indexed {count} users")
+        return count
+
+
+user_name_index = UserNameIndex()
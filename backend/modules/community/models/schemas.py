@@ -86,6 +86,7 @@ class Post(PostBase):
     created_at: Optional[Any] = None
     fecha_publicacion: Optional[Any] = None
     creado_por: Optional[str] = None
+    author_name: Optional[str] = None
     fuente: Optional[str] = None
     fuente_id: Optional[str] = None
     vistas: int = 0
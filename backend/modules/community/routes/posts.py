@@ -83,7 +83,11 @@ async def create_post(
     admin: dict = Depends(get_admin_user)
 ):
     """Create nuevo post (admin)"""
-    return await post_service.create_post(data, creado_por=admin.get("user_id"))
+    return await post_service.create_post(
+        data,
+        creado_por=admin.get("user_id"),
+        author_name=admin.get("name") or (admin.get("email") or "").split("@")[0] or None
+    )
 
 
 @router.put("/admin/{post_id}", response_model=Post)
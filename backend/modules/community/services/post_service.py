@@ -49,13 +49,14 @@ class PostService(BaseService):
         results = await self.repository.get_all_posts(limit=limit)
         return [Post(**r) for r in results]
     
-    async def create_post(self, data: PostCreate, creado_por: str = None) -> Post:
+    async def create_post(self, data: PostCreate, creado_por: str = None, author_name: str = None) -> Post:
         """
         Crear nuevo post.
         Emite evento: community.post.created
         """
         post_dict = data.model_dump()
         post_dict["creado_por"] = creado_por
+        post_dict["author_name"] = author_name
         post_dict["fuente"] = "admin"
         
         result = await self.repository.create(post_dict)
@@ -65,7 +66,8 @@ class PostService(BaseService):
             {
                 "post_id": result["post_id"],
                 "titulo": result["titulo"],
-                "tipo": result["tipo"]
+                "tipo": result["tipo"],
+                "author_name": author_name
             }
         )
         
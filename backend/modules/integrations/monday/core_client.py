@@ -363,6 +363,21 @@ class MondayCoreClient:
             logger.error(f"Failed to delete Monday.com item {item_id}: {e}")
             return False
 
+    async def delete_items(self, item_ids: list) -> set:
+        """Delete several items in one request (one aliased mutation per item).
+        Returns the IDs that were deleted. If the batch is rejected, the items
+        are retried one at a time so one bad ID does not fail the rest."""
+        ids = [str(i) for i in item_ids if str(i).isdigit()]
+        if not ids:
+            return set()
+        mutations = " ".join(f"d{n}: delete_item (item_id: {mid}) {{ id }}" for n, mid in enumerate(ids))
+        try:
+            data = await self.execute(f"mutation {{ {mutations} }}", timeout=60.0)
+        except Exception as e:
+            logger.warning(f"Batch delete of {len(ids)} Monday.com items failed, retrying one by one: {e}")
+            return {mid for mid in ids if await self.delete_item(mid)}
+        return {mid for n, mid in enumerate(ids) if (data or {}).get(f"d{n}")}
+
 
 # Singleton — same interface, now proxied through Hub
 monday_client = MondayCoreClient()
@@ -0,0 +1,155 @@
+"""
+Landing Module - Public bootstrap bundle
+Everything the frontend reads on first paint, in one cached response.
+
+The bundle gathers the public config endpoints (site config, landing page,
+module statuses, UI style, widget config, showcase banners and media player,
+ticker layout icons and icon statuses) concurrently, serializes the result
+once and keeps it in memory both plain and gzip-compressed. Its version is
+a hash of the content, so the ETag is the same on every worker.
+
+Admin endpoints that write any of these call `public_bootstrap.invalidate()`;
+the invalidation reaches the other workers over the realtime broker. The
+bundle is also rebuilt every MAX_AGE_SECONDS so date-scheduled banners
+appear and expire on time.
+"""
+import asyncio
+import gzip
+import hashlib
+import json
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, NamedTuple, Optional
+
+from core.realtime_broker import realtime_broker
+
+logger = logging.getLogger(__name__)
+
+INVALIDATE_CHANNEL = "public:bootstrap:invalidate"
+MAX_AGE_SECONDS = 60
+CACHE_CONTROL = "public, max-age=0, must-revalidate"
+
+
+class BootstrapPayload(NamedTuple):
+    body: bytes
+    gzipped: bytes
+    etag: str
+
+
+async def _site_config():
+    from .routes import get_public_site_config
+    return await get_public_site_config()
+
+
+async def _landing_page():
+    from .routes import get_public_landing_page
+    return await get_public_landing_page()
+
+
+async def _module_status():
+    from modules.admin.services.module_status_service import module_status_service
+    return await module_status_service.get_public_statuses()
+
+
+async def _ui_style():
+    from modules.admin.services.ui_style_service import ui_style_service
+    return await ui_style_service.get_public_style()
+
+
+async def _widget():
+    from modules.widget.service import widget_config_service
+    return await widget_config_service.get_public_config()
+
+
+async def _banners():
+    from modules.showcase import get_banners
+    return await get_banners()
+
+
+async def _media_player():
+    from modules.showcase import get_media_player
+    return await get_media_player()
+
+
+async def _layout_icons():
+    from modules.ticker.routes import get_layout_icons
+    return await get_layout_icons()
+
+
+async def _icon_statuses():
+    from modules.ticker.routes import get_icon_statuses_public
+    return await get_icon_statuses_public()
+
+
+SECTIONS: Dict[str, Callable[[], Awaitable]] = {
+    "site_config": _site_config,
+    "landing_page": _landing_page,
+    "module_status": _module_status,
+    "ui_style": _ui_style,
+    "widget": _widget,
+    "banners": _banners,
+    "media_player": _media_player,
+    "layout_icons": _layout_icons,
+    "icon_statuses": _icon_statuses,
+}
+
+
+class PublicBootstrap:
+    """In-memory, pre-compressed public config bundle"""
+
+    def __init__(self):
+        self._payload: Optional[BootstrapPayload] = None
+        self._built_at = 0.0
+        self._generation = 0
+        self._lock = asyncio.Lock()
+        self.stats = {"builds": 0, "invalidations": 0}
+        realtime_broker.subscribe(INVALIDATE_CHANNEL, self._on_invalidate)
+
+    async def get(self) -> BootstrapPayload:
+        if self._is_fresh():
+            return self._payload
+        async with self._lock:
+            if not self._is_fresh():
+                await self._build()
+        return self._payload
+
+    def _is_fresh(self) -> bool:
+        return self._payload is not None and time.monotonic() - self._built_at < MAX_AGE_SECONDS
+
+    async def _build(self) -> None:
+        generation = self._generation
+        results = await asyncio.gather(*(fn() for fn in SECTIONS.values()), return_exceptions=True)
+        sections = {}
+        for name, result in zip(SECTIONS, results):
+            if isinstance(result, Exception):
+                logger.warning(f"[bootstrap] Section {name} failed (non-blocking): {result}")
+                result = None
+            sections[name] = result
+
+        content = json.dumps(sections, default=str, separators=(",", ":"), sort_keys=True)
+        version = hashlib.sha1(content.encode()).hexdigest()[:16]
+        body = json.dumps({
+            "version": version,
+            "generated_at": datetime.now(timezone.utc).isoformat(),
+            **sections,
+        }, default=str, separators=(",", ":")).encode()
+        self._payload = BootstrapPayload(body, gzip.compress(body, 6), f'"{version}"')
+        # Invalidated while building: serve this one, but rebuild on the next request
+        self._built_at = time.monotonic() if generation == self._generation else 0.0
+        self.stats["builds"] += 1
+
+    async def invalidate(self) -> None:
+        """Drop the bundle here and on every other worker."""
+        await realtime_broker.publish(INVALIDATE_CHANNEL, {"origin": realtime_broker.worker_id})
+
+    async def _on_invalidate(self, channel: str, message: dict) -> None:
+        self._generation += 1
+        self._built_at = 0.0
+        self.stats["invalidations"] += 1
+
+    def get_status(self) -> Dict:
+        return {**self.stats, "cached": self._payload is not None, "fresh": self._is_fresh()}
+
+
+public_bootstrap = PublicBootstrap()
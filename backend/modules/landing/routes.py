@@ -1,13 +1,14 @@
 """
 Landing Routes - Page builder and site configuration endpoints
 """
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
 from typing import Optional
 from datetime import datetime, timezone
 import logging
 
 from core.database import db
 from core.auth import get_admin_user
+from .bootstrap import public_bootstrap, CACHE_CONTROL
 from .models import (
     BloquePagina, 
     ConfiguracionSitio, 
@@ -71,6 +72,19 @@ async def get_public_ui_style():
     return await ui_style_service.get_public_style()
 
 
+@router.get("/public/bootstrap")
+async def get_public_bootstrap(request: Request):
+    """All public config for first paint in one cached response (ETag, gzip)"""
+    payload = await public_bootstrap.get()
+    headers = {"ETag": payload.etag, "Cache-Control": CACHE_CONTROL, "Vary": "Accept-Encoding"}
+    if request.headers.get("if-none-match") == payload.etag:
+        return Response(status_code=304, headers=headers)
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        headers["Content-Encoding"] = "gzip"
+        return Response(content=payload.gzipped, media_type="application/json", headers=headers)
+    return Response(content=payload.body, media_type="application/json", headers=headers)
+
+
 # ============== ADMIN ROUTES ==============
 
 @router.get("/admin/site-config")
@@ -95,6 +109,7 @@ async def update_site_config(config: ConfiguracionSitio, admin: dict = Depends(g
         {"$set": config_dict},
         upsert=True
     )
+    await public_bootstrap.invalidate()
     return {"success": True, "config": config_dict}
 
 
@@ -165,6 +180,7 @@ async def add_block(
         }
         await db.core_pages.insert_one(new_page)
     
+    await public_bootstrap.invalidate()
     return {"success": True, "block": new_block}
 
 
@@ -182,6 +198,7 @@ async def reorder_blocks(request: ReorderBlocksRequest, admin: dict = Depends(ge
         {"$set": {"updated_at": datetime.now(timezone.utc).isoformat()}}
     )
     
+    await public_bootstrap.invalidate()
     return {"success": True}
 
 
@@ -209,6 +226,7 @@ async def update_block(
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Blothat does nott found")
     
+    await public_bootstrap.invalidate()
     return {"success": True}
 
 
@@ -226,6 +244,7 @@ async def toggle_block_publish(bloque_id: str, publicado: bool, admin: dict = De
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Blothat does nott found")
     
+    await public_bootstrap.invalidate()
     return {"success": True, "publicado": publicado}
 
 
@@ -243,6 +262,7 @@ async def delete_block(bloque_id: str, admin: dict = Depends(get_admin_user)):
     if result.modified_count == 0:
         raise HTTPException(status_code=404, detail="Blothat does nott found")
     
+    await public_bootstrap.invalidate()
     return {"success": True}
 
 
@@ -254,6 +274,7 @@ async def toggle_publish_landing(publicada: bool, admin: dict = Depends(get_admi
         {"$set": {"publicada": publicada, "updated_at": datetime.now(timezone.utc).isoformat()}},
         upsert=True
     )
+    await public_bootstrap.invalidate()
     return {"success": True, "publicada": publicada}
 # Add this to the bottom of routes.py
 @router.get("/public/pages/{page_id}")
@@ -303,6 +324,8 @@ async def add_page_block(page_id: str, tipo: str, orden: Optional[int] = None, a
         await db.core_pages.update_one({"page_id": page_id}, {"$push": {"bloques": new_block}, "$set": {"updated_at": datetime.now(timezone.utc).isoformat()}})
     else:
         await db.core_pages.insert_one({"page_id": page_id, "titulo": page_id.replace("_", " ").title(), "bloques": [new_block], "publicada": True, "updated_at": datetime.now(timezone.utc).isoformat()})
+    if page_id == "landing":
+        await public_bootstrap.invalidate()
     return {"success": True, "block": new_block}
 
 @router.put("/admin/pages/{page_id}/blocks/reorder")
@@ -310,6 +333,8 @@ async def reorder_page_blocks(page_id: str, request: ReorderBlocksRequest, admin
     for item in request.orders:
         await db.core_pages.update_one({"page_id": page_id, "bloques.bloque_id": item.bloque_id}, {"$set": {"bloques.$.orden": item.orden}})
     await db.core_pages.update_one({"page_id": page_id}, {"$set": {"updated_at": datetime.now(timezone.utc).isoformat()}})
+    if page_id == "landing":
+        await public_bootstrap.invalidate()
     return {"success": True}
 
 @router.put("/admin/pages/{page_id}/blocks/{bloque_id}")
@@ -323,6 +348,8 @@ async def update_page_block(page_id: str, bloque_id: str, config: dict, active:
     result = await db.core_pages.update_one({"page_id": page_id, "bloques.bloque_id": bloque_id}, {"$set": update_doc})
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Block not found")
+    if page_id == "landing":
+        await public_bootstrap.invalidate()
     return {"success": True}
 
 @router.put("/admin/pages/{page_id}/blocks/{bloque_id}/publish")
@@ -330,6 +357,8 @@ async def toggle_page_block_publish(page_id: str, bloque_id: str, publicado: boo
     result = await db.core_pages.update_one({"page_id": page_id, "bloques.bloque_id": bloque_id}, {"$set": {"bloques.$.publicado": publicado, "updated_at": datetime.now(timezone.utc).isoformat()}})
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Block not found")
+    if page_id == "landing":
+        await public_bootstrap.invalidate()
     return {"success": True, "publicado": publicado}
 
 @router.delete("/admin/pages/{page_id}/blocks/{bloque_id}")
@@ -337,9 +366,13 @@ async def delete_page_block(page_id: str, bloque_id: str, admin: dict = Depends(
     result = await db.core_pages.update_one({"page_id": page_id}, {"$pull": {"bloques": {"bloque_id": bloque_id}}, "$set": {"updated_at": datetime.now(timezone.utc).isoformat()}})
     if result.modified_count == 0:
         raise HTTPException(status_code=404, detail="Block not found")
+    if page_id == "landing":
+        await public_bootstrap.invalidate()
     return {"success": True}
 
 @router.put("/admin/pages/{page_id}/publish")
 async def toggle_publish_page(page_id: str, publicada: bool, admin: dict = Depends(get_admin_user)):
     await db.core_pages.update_one({"page_id": page_id}, {"$set": {"publicada": publicada, "updated_at": datetime.now(timezone.utc).isoformat()}}, upsert=True)
+    if page_id == "landing":
+        await public_bootstrap.invalidate()
     return {"success": True, "publicada": publicada}
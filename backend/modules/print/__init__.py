@@ -3,6 +3,7 @@ Package List Print Module — Backend endpoints for:
 - Package list format configuration (admin)
 - Print job creation and Monday.com webhook trigger
 - Printer configuration
+- Thermal receipts as HTML or raw ESC/POS (rendering lives in receipts.py)
 
 Monday.com Batch Printing:
   When multiple button clicks arrive from Monday.com within a short time window,
@@ -10,12 +11,14 @@ Monday.com Batch Printing:
   click the Print button on 10 rows and get one combined print job.
 """
 from fastapi import APIRouter, HTTPException, Depends
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, Response
 from datetime import datetime, timezone
 from typing import Optional
 import asyncio
 import logging
 
+from .receipts import receipt_renderer, RECEIPT_FIELDS
+
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/print", tags=["Print"])
@@ -180,145 +183,25 @@ async def update_printer_config(data: dict, admin=Depends(lambda: get_admin_user
     return {"success": True}
 
 
-def _build_thermal_html(orders, fmt):
-    """Generate complete thermal receipt HTML for 72mm paper (server-side)"""
-    from html import escape
-    h = fmt.get("header", {})
-    b = fmt.get("body", {})
-    f = fmt.get("footer", {})
-    s = fmt.get("style", {})
-    font_family = s.get("font_family", "Verdana, Arial, Helvetica, sans-serif")
-    base_font_size = s.get("font_size", "12px")
-    now_str = datetime.now(timezone.utc).strftime("%m/%d/%Y, %H:%M:%S")
-    title = h.get("title", "Package List")
-
-    receipts_html = ""
-    for idx, order in enumerate(orders):
-        items = [i for i in order.get("items", []) if (i.get("quantity_ordered") or i.get("quantity") or 0) > 0]
-        def _safe_price(i):
-            try:
-                return float(i.get("price") or 0)
-            except (TypeError, ValueError):
-                return 0.0
-        total = order.get("total_amount") or sum(
-            _safe_price(i) * (i.get("quantity_ordered") or i.get("quantity") or 1) for i in items
-        )
-        try:
-            total = float(total)
-        except (TypeError, ValueError):
-            total = 0.0
-        page_break = 'page-break-after: always;' if idx < len(orders) - 1 else ''
-
-        # For thermal printers: multiple cut strategies between orders
-        cut_marker = ''
-        if idx < len(orders) - 1:
-            cut_marker = (
-                # Strategy 1: CSS page break (works with some printer drivers)
-                '<div style="page-break-after: always;"></div>'
-                # Strategy 2: Large spacing + visual cut line (always visible)
-                '<div style="margin: 8mm 0; text-align: center; page-break-before: always;">'
-                '<div style="border-top: 2px dashed #000; margin: 3mm 0;"></div>'
-                '<div style="font-size: 7px; color: #666; letter-spacing: 2px;">&#9986; CUT HERE &#9986;</div>'
-                '<div style="border-top: 2px dashed #000; margin: 3mm 0;"></div>'
-                '</div>'
-                # Strategy 3: ESC/POS raw cut commands injected via JavaScript
-                '<script>if(window.escpos)window.escpos.cut();</script>'
-            )
+async def _get_format():
+    """Active format config and template"""
+    config = await db.app_config.find_one({"config_key": "print_format"}, {"_id": 0})
+    if not config:
+        return DEFAULT_FORMAT_CONFIG, DEFAULT_TEMPLATE
+    return config["value"], config.get("template", DEFAULT_TEMPLATE)
+
 
-        receipt = f'<div style="padding: 2mm 0;">'
-        # Header
-        receipt += '<div style="text-align:center; border-bottom:1px dashed #000; padding-bottom:2mm; margin-bottom:2mm;">'
-        receipt += f'<div style="font-size:14px; font-weight:bold;">{escape(title)}</div>'
-        if h.get("show_date", True):
-            receipt += f'<div style="font-size:9px; color:#000; font-weight:500;">{now_str}</div>'
-        if h.get("show_order_id", True):
-            receipt += f'<div style="font-size:8px; font-family:Verdana,Arial,sans-serif; color:#000; font-weight:500; margin-top:1mm;">{escape(order.get("order_id", ""))}</div>'
-        receipt += '</div>'
-        # Student
-        if b.get("show_student_name", True):
-            receipt += f'<div style="font-weight:bold; font-size:11px;">{escape(order.get("student_name", "Unknown"))}</div>'
-        if b.get("show_grade", True) and order.get("grade"):
-            yr = f' &mdash; {order["year"]}' if order.get("year") else ''
-            receipt += f'<div style="font-size:9px; color:#000; font-weight:600;">Grade: {escape(str(order["grade"]))}{yr}</div>'
-        if h.get("show_paid_date", True) and order.get("paid_date"):
-            receipt += f'<div style="font-size:9px; color:#000; font-weight:500;">Paid: {escape(str(order["paid_date"]))}</div>'
-        receipt += '<div style="border-top:1px dashed #000; margin:1.5mm 0;"></div>'
-        # Items table
-        receipt += '<table style="width:100%; border-collapse:collapse; font-size:9px;">'
-        receipt += '<tr style="border-bottom:1px solid #000;">'
-        if b.get("show_checkboxes", True):
-            receipt += '<th style="width:12px; padding:1px;"></th>'
-        if b.get("show_item_code", True):
-            receipt += '<th style="text-align:left; padding:1px 2px; font-weight:bold;">Code</th>'
-        receipt += '<th style="text-align:left; padding:1px 2px; font-weight:bold;">Item</th>'
-        if b.get("show_item_quantity", True):
-            receipt += '<th style="text-align:right; padding:1px 2px; width:20px; font-weight:bold;">Qty</th>'
-        if b.get("show_item_price", True):
-            receipt += '<th style="text-align:right; padding:1px 2px; width:40px; font-weight:bold;">Price</th>'
-        if b.get("show_item_status", True):
-            receipt += '<th style="text-align:right; padding:1px 2px; width:40px; font-weight:bold;">Status</th>'
-        receipt += '</tr>'
-        for item in items:
-            code = item.get("book_code") or ""
-            name = item.get("book_name") or item.get("name") or "—"
-            qty = item.get("quantity_ordered") or item.get("quantity") or 1
-            try:
-                price = float(item.get("price") or 0)
-            except (TypeError, ValueError):
-                price = 0.0
-            status = item.get("status") or ""
-            receipt += '<tr style="border-bottom:1px dotted #000;">'
-            if b.get("show_checkboxes", True):
-                receipt += '<td style="padding:1px;"><span style="display:inline-block;width:8px;height:8px;border:1.5px solid #000;"></span></td>'
-            if b.get("show_item_code", True):
-                receipt += f'<td style="padding:1px 2px; font-weight:bold; color:#000; font-size:8px;">{escape(code)}</td>'
-            receipt += f'<td style="padding:1px 2px; font-weight:600; color:#000;">{escape(name)}</td>'
-            if b.get("show_item_quantity", True):
-                receipt += f'<td style="text-align:right; padding:1px 2px; font-weight:600;">{qty}</td>'
-            if b.get("show_item_price", True):
-                receipt += f'<td style="text-align:right; padding:1px 2px; font-weight:600;">${price:.2f}</td>'
-            if b.get("show_item_status", True):
-                receipt += f'<td style="text-align:right; padding:1px 2px; color:#000; font-weight:500; font-size:8px;">{escape(status)}</td>'
-            receipt += '</tr>'
-        receipt += '</table>'
-        # Footer
-        receipt += '<div style="border-top:1px dashed #000; margin-top:1.5mm; padding-top:1.5mm;">'
-        footer_parts = []
-        if f.get("show_item_count", True):
-            footer_parts.append(f'<span style="font-weight:600;">Items: {len(items)}</span>')
-        if f.get("show_total", True):
-            footer_parts.append(f'<span style="font-weight:bold;">Total: ${total:.2f}</span>')
-        if footer_parts:
-            receipt += f'<div style="display:flex; justify-content:space-between; font-size:9px;">{"".join(footer_parts)}</div>'
-        if f.get("show_signature_line", True):
-            label = f.get("signature_label", "Received by")
-            receipt += '<div style="margin-top:8mm;"><div style="border-top:1px solid #000; width:60%; margin:0 auto;"></div>'
-            receipt += f'<div style="text-align:center; font-size:9px; color:#000; font-weight:500; margin-top:1mm;">{escape(label)}</div></div>'
-        if f.get("custom_text"):
-            receipt += f'<div style="font-size:9px; color:#000; font-weight:500; font-style:italic; margin-top:2mm;">{escape(f["custom_text"])}</div>'
-        if f.get("show_notes_space"):
-            notes_label = escape(f.get("notes_label", "Notes"))
-            notes_lines = int(f.get("notes_lines", 3))
-            receipt += f'<div style="margin-top:3mm;"><div style="font-size:9px; font-weight:600; color:#000; margin-bottom:1mm;">{notes_label}:</div>'
-            for _ in range(notes_lines):
-                receipt += '<div style="border-bottom:1px dotted #888; height:6mm; margin-bottom:1mm;"></div>'
-            receipt += '</div>'
-        receipt += '</div></div>'
-        receipts_html += receipt + cut_marker
-
-    return f'''<!DOCTYPE html>
-<html><head><title>Print</title>
-<style>
-*{{margin:0;padding:0;box-sizing:border-box;}}
-@page{{size:72mm auto;margin:2mm 3mm;}}
-body{{font-family:{font_family};font-size:{base_font_size};line-height:1.4;width:72mm;color:#000;background:#fff;font-weight:500;}}
-table{{font-family:{font_family};}}
-@media screen{{body{{max-width:72mm;margin:10mm auto;border:1px solid #ddd;padding:3mm;}}}}
-@media print{{body{{width:72mm;margin:0;padding:0;}}}}
-</style></head>
-<body>{receipts_html}
-<script>window.onload=function(){{window.print();}}</script>
-</body></html>'''
+async def _get_receipt_orders(order_ids):
+    """Orders to print (only the fields a receipt shows), in the order requested"""
+    orders = await db.store_textbook_orders.find(
+        {"order_id": {"$in": order_ids}},
+        RECEIPT_FIELDS
+    ).to_list(100)
+    if not orders:
+        raise HTTPException(status_code=404, detail="No orders found")
+    position = {oid: i for i, oid in enumerate(order_ids)}
+    orders.sort(key=lambda o: position.get(o["order_id"], len(position)))
+    return orders
 
 
 # ============ THERMAL RECEIPT (GET — auto-printing page) ============
@@ -337,18 +220,9 @@ async def get_thermal_page(order_ids: str, token: str):
     if not ids:
         raise HTTPException(status_code=400, detail="No orders specified")
 
-    orders = await db.store_textbook_orders.find(
-        {"order_id": {"$in": ids}},
-        {"_id": 0}
-    ).to_list(100)
-
-    if not orders:
-        raise HTTPException(status_code=404, detail="No orders found")
-
-    config = await db.app_config.find_one({"config_key": "print_format"}, {"_id": 0})
-    fmt = config["value"] if config else DEFAULT_FORMAT_CONFIG
-
-    return HTMLResponse(content=_build_thermal_html(orders, fmt), media_type="text/html")
+    orders = await _get_receipt_orders(ids)
+    fmt, _ = await _get_format()
+    return HTMLResponse(content=receipt_renderer.html(orders, fmt), media_type="text/html")
 
 
 # ============ THERMAL RECEIPT (returns raw HTML) ============
@@ -360,18 +234,25 @@ async def get_thermal_receipt(data: dict, admin=Depends(lambda: get_admin_user))
     if not order_ids:
         raise HTTPException(status_code=400, detail="No orders specified")
 
-    orders = await db.store_textbook_orders.find(
-        {"order_id": {"$in": order_ids}},
-        {"_id": 0}
-    ).to_list(100)
+    orders = await _get_receipt_orders(order_ids)
+    fmt, _ = await _get_format()
+    return HTMLResponse(content=receipt_renderer.html(orders, fmt), media_type="text/html")
 
-    if not orders:
-        raise HTTPException(status_code=404, detail="No orders found")
 
-    config = await db.app_config.find_one({"config_key": "print_format"}, {"_id": 0})
-    fmt = config["value"] if config else DEFAULT_FORMAT_CONFIG
+@router.post("/thermal-escpos")
+async def get_thermal_escpos(data: dict, admin=Depends(lambda: get_admin_user)):
+    """Return raw ESC/POS bytes (one cut receipt per order) for direct thermal printing"""
+    order_ids = data.get("order_ids", [])
+    if not order_ids:
+        raise HTTPException(status_code=400, detail="No orders specified")
 
-    return HTMLResponse(content=_build_thermal_html(orders, fmt), media_type="text/html")
+    orders = await _get_receipt_orders(order_ids)
+    fmt, _ = await _get_format()
+    return Response(
+        content=receipt_renderer.escpos(orders, fmt),
+        media_type="application/octet-stream",
+        headers={"Content-Disposition": 'attachment; filename="receipts.bin"'},
+    )
 
 
 # ============ PRINT JOBS ============
@@ -404,18 +285,15 @@ async def create_print_job(data: dict, admin=Depends(lambda: get_admin_user)):
             item["quantity"] = item.get("quantity_ordered") or item.get("quantity") or 1
             item["qty"] = item["quantity"]
 
-    # Get format config
-    config = await db.app_config.find_one({"config_key": "print_format"}, {"_id": 0})
-    fmt = config["value"] if config else DEFAULT_FORMAT_CONFIG
-    template = config.get("template", DEFAULT_TEMPLATE) if config else DEFAULT_TEMPLATE
+    fmt, template = await _get_format()
 
     now = datetime.now(timezone.utc).isoformat()
     job_id = f"PJ-{datetime.now(timezone.utc).strftime('%Y%m%d%H%M%S')}"
 
+    # The job references its orders; GET /jobs/{job_id} loads them
     job = {
         "job_id": job_id,
         "order_ids": order_ids,
-        "orders": orders,
         "student_names": list({o.get("student_name", "") for o in orders if o.get("student_name")}),
         "order_count": len(orders),
         "format_config": fmt,
@@ -442,16 +320,22 @@ async def create_print_job(data: dict, admin=Depends(lambda: get_admin_user)):
         "orders": orders,
         "format_config": fmt,
         "template": template,
-        "thermal_html": _build_thermal_html(orders, fmt),
+        "thermal_html": receipt_renderer.html(orders, fmt),
     }
 
 
 @router.get("/jobs/{job_id}")
 async def get_print_job(job_id: str, admin=Depends(lambda: get_admin_user)):
-    """Get a specific print job"""
+    """Get a specific print job (with its current orders)"""
     job = await db.print_jobs.find_one({"job_id": job_id}, {"_id": 0})
     if not job:
         raise HTTPException(status_code=404, detail="Print job not found")
+    if "orders" not in job:
+        # Jobs store order references; older jobs still carry embedded copies
+        job["orders"] = await db.store_textbook_orders.find(
+            {"order_id": {"$in": job.get("order_ids", [])}},
+            {"_id": 0}
+        ).to_list(100)
     return job
 
 
@@ -618,20 +502,17 @@ async def _finalize_batch(batch_id: str, order_ids: list, monday_item_ids: list)
 
     logger.info(f"[print/batch] Batch {batch_id}: finalizing with {len(final_order_ids)} orders: {final_order_ids}")
 
-    # Fetch all orders
+    # Only the orders that exist (and their student names) are needed here
     orders = await db.store_textbook_orders.find(
         {"order_id": {"$in": final_order_ids}},
-        {"_id": 0}
+        {"_id": 0, "order_id": 1, "student_name": 1}
     ).to_list(100)
 
     if not orders:
         logger.warning(f"[print/batch] Batch {batch_id}: no orders found in DB")
         return
 
-    # Get format config
-    config = await db.app_config.find_one({"config_key": "print_format"}, {"_id": 0})
-    fmt = config["value"] if config else DEFAULT_FORMAT_CONFIG
-    template = config.get("template", DEFAULT_TEMPLATE) if config else DEFAULT_TEMPLATE
+    fmt, template = await _get_format()
 
     now = datetime.now(timezone.utc).isoformat()
     job_id = f"PJ-MON-{datetime.now(timezone.utc).strftime('%Y%m%d%H%M%S')}"
@@ -639,7 +520,6 @@ async def _finalize_batch(batch_id: str, order_ids: list, monday_item_ids: list)
     job = {
         "job_id": job_id,
         "order_ids": final_order_ids,
-        "orders": orders,
         "student_names": list({o.get("student_name", "") for o in orders if o.get("student_name")}),
         "order_count": len(orders),
         "format_config": fmt,
@@ -0,0 +1,372 @@
+"""
+Print Module — Receipt renderer
+Thermal receipts (72mm) as HTML for the browser and as ESC/POS for raw printing.
+
+A format config is compiled once per version: every fragment that depends
+only on the config (table header, row and footer templates, signature and
+notes blocks, ESC/POS title) is built up front, so rendering an order is a
+handful of `str.format` calls joined with "".join.
+
+Rendered orders are cached by (order_id, order_version, template_version).
+The order version is a fingerprint of the fields a receipt shows, so any
+change to the order (from any module) renders it again. The print date is
+kept out of the cached part and added when the page is assembled.
+"""
+import hashlib
+import json
+import textwrap
+from collections import OrderedDict
+from datetime import datetime, timezone
+from html import escape
+from typing import Dict, Iterator, List, Tuple
+
+MAX_CACHED_RECEIPTS = 2000
+MAX_COMPILED_FORMATS = 8
+
+# Fields a receipt reads; also the projection used to load orders for printing
+RECEIPT_FIELDS = {
+    "_id": 0, "order_id": 1, "student_name": 1, "grade": 1, "year": 1, "paid_date": 1, "total_amount": 1,
+    "items.book_code": 1, "items.book_name": 1, "items.name": 1, "items.price": 1, "items.status": 1,
+    "items.quantity_ordered": 1, "items.quantity": 1,
+}
+
+# ESC/POS: Font A on 72mm paper is 48 columns; PC858 covers Spanish and the euro sign
+LINE_WIDTH = 48
+ESC_INIT = b"\x1b@"
+ESC_CODEPAGE = b"\x1bt\x13"
+ESC_LEFT, ESC_CENTER = b"\x1ba\x00", b"\x1ba\x01"
+ESC_BOLD_ON, ESC_BOLD_OFF = b"\x1bE\x01", b"\x1bE\x00"
+ESC_DOUBLE, ESC_NORMAL = b"\x1b!\x30", b"\x1b!\x00"
+ESC_FEED_CUT = b"\x1dVB\x00"  # feed to the cutter, partial cut
+ENCODING = "cp858"
+
+CUT_MARKER_HTML = (
+    # Strategy 1: CSS page break (works with some printer drivers)
+    '<div style="page-break-after: always;"></div>'
+    # Strategy 2: Large spacing + visual cut line (always visible)
+    '<div style="margin: 8mm 0; text-align: center; page-break-before: always;">'
+    '<div style="border-top: 2px dashed #000; margin: 3mm 0;"></div>'
+    '<div style="font-size: 7px; color: #666; letter-spacing: 2px;">&#9986; CUT HERE &#9986;</div>'
+    '<div style="border-top: 2px dashed #000; margin: 3mm 0;"></div>'
+    '</div>'
+    # Strategy 3: ESC/POS raw cut commands injected via JavaScript
+    '<script>if(window.escpos)window.escpos.cut();</script>'
+)
+
+
+def _quantity(item: dict):
+    return item.get("quantity_ordered") or item.get("quantity") or 1
+
+
+def _price(item: dict) -> float:
+    try:
+        return float(item.get("price") or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def receipt_items(order: dict) -> List[dict]:
+    return [i for i in order.get("items", []) if (i.get("quantity_ordered") or i.get("quantity") or 0) > 0]
+
+
+def receipt_total(order: dict, items: List[dict]) -> float:
+    total = order.get("total_amount") or sum(_price(i) * _quantity(i) for i in items)
+    try:
+        return float(total)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def template_version(fmt: dict) -> str:
+    return hashlib.sha1(json.dumps(fmt, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+def order_version(order: dict) -> str:
+    """Fingerprint of everything a receipt shows for this order."""
+    fields = [order.get(k) for k in ("order_id", "student_name", "grade", "year", "paid_date", "total_amount")]
+    items = [
+        [i.get(k) for k in ("book_code", "book_name", "name", "price", "status", "quantity_ordered", "quantity")]
+        for i in order.get("items", [])
+    ]
+    return hashlib.sha1(json.dumps([fields, items], default=str).encode()).hexdigest()[:16]
+
+
+def print_date() -> str:
+    return datetime.now(timezone.utc).strftime("%m/%d/%Y, %H:%M:%S")
+
+
+class CompiledReceipt:
+    """Everything about a receipt that depends only on the format config"""
+
+    def __init__(self, fmt: dict):
+        self.version = template_version(fmt)
+        h = fmt.get("header", {})
+        b = fmt.get("body", {})
+        f = fmt.get("footer", {})
+        s = fmt.get("style", {})
+        self.header = h
+        self.body = b
+        title = h.get("title", "Package List")
+        font_family = s.get("font_family", "Verdana, Arial, Helvetica, sans-serif")
+        base_font_size = s.get("font_size", "12px")
+
+        show_checkboxes = b.get("show_checkboxes", True)
+        show_code = b.get("show_item_code", True)
+        show_qty = b.get("show_item_quantity", True)
+        show_price = b.get("show_item_price", True)
+        show_status = b.get("show_item_status", True)
+
+        # ---------- HTML ----------
+        self.page_head = (
+            '<!DOCTYPE html>\n<html><head><title>Print</title>\n<style>\n'
+            '*{margin:0;padding:0;box-sizing:border-box;}\n'
+            '@page{size:72mm auto;margin:2mm 3mm;}\n'
+            f'body{{font-family:{font_family};font-size:{base_font_size};line-height:1.4;width:72mm;'
+            'color:#000;background:#fff;font-weight:500;}\n'
+            f'table{{font-family:{font_family};}}\n'
+            '@media screen{body{max-width:72mm;margin:10mm auto;border:1px solid #ddd;padding:3mm;}}\n'
+            '@media print{body{width:72mm;margin:0;padding:0;}}\n'
+            '</style></head>\n<body>'
+        )
+        self.page_tail = '\n<script>window.onload=function(){window.print();}</script>\n</body></html>'
+
+        self.receipt_head = (
+            '<div style="padding: 2mm 0;">'
+            '<div style="text-align:center; border-bottom:1px dashed #000; padding-bottom:2mm; margin-bottom:2mm;">'
+            f'<div style="font-size:14px; font-weight:bold;">{escape(title)}</div>'
+        )
+        self.show_date = h.get("show_date", True)
+        self.order_id_tpl = (
+            '<div style="font-size:8px; font-family:Verdana,Arial,sans-serif; color:#000; font-weight:500; '
+            'margin-top:1mm;">{}</div>' if h.get("show_order_id", True) else ""
+        )
+
+        head_cells = ['<tr style="border-bottom:1px solid #000;">']
+        row_cells = ['<tr style="border-bottom:1px dotted #000;">']
+        if show_checkboxes:
+            head_cells.append('<th style="width:12px; padding:1px;"></th>')
+            row_cells.append('<td style="padding:1px;"><span style="display:inline-block;width:8px;height:8px;'
+                             'border:1.5px solid #000;"></span></td>')
+        if show_code:
+            head_cells.append('<th style="text-align:left; padding:1px 2px; font-weight:bold;">Code</th>')
+            row_cells.append('<td style="padding:1px 2px; font-weight:bold; color:#000; font-size:8px;">{code}</td>')
+        head_cells.append('<th style="text-align:left; padding:1px 2px; font-weight:bold;">Item</th>')
+        row_cells.append('<td style="padding:1px 2px; font-weight:600; color:#000;">{name}</td>')
+        if show_qty:
+            head_cells.append('<th style="text-align:right; padding:1px 2px; width:20px; font-weight:bold;">Qty</th>')
+            row_cells.append('<td style="text-align:right; padding:1px 2px; font-weight:600;">{qty}</td>')
+        if show_price:
+            head_cells.append('<th style="text-align:right; padding:1px 2px; width:40px; font-weight:bold;">Price</th>')
+            row_cells.append('<td style="text-align:right; padding:1px 2px; font-weight:600;">${price:.2f}</td>')
+        if show_status:
+            head_cells.append('<th style="text-align:right; padding:1px 2px; width:40px; font-weight:bold;">Status</th>')
+            row_cells.append('<td style="text-align:right; padding:1px 2px; color:#000; font-weight:500; '
+                             'font-size:8px;">{status}</td>')
+        head_cells.append('</tr>')
+        row_cells.append('</tr>')
+        self.table_head = (
+            '<div style="border-top:1px dashed #000; margin:1.5mm 0;"></div>'
+            '<table style="width:100%; border-collapse:collapse; font-size:9px;">' + "".join(head_cells)
+        )
+        self.row_tpl = "".join(row_cells)
+
+        totals = []
+        if f.get("show_item_count", True):
+            totals.append('<span style="font-weight:600;">Items: {count}</span>')
+        if f.get("show_total", True):
+            totals.append('<span style="font-weight:bold;">Total: ${total:.2f}</span>')
+        self.totals_tpl = (
+            '<div style="display:flex; justify-content:space-between; font-size:9px;">' + "".join(totals) + '</div>'
+            if totals else ""
+        )
+
+        footer = []
+        if f.get("show_signature_line", True):
+            label = f.get("signature_label", "Received by")
+            footer.append('<div style="margin-top:8mm;"><div style="border-top:1px solid #000; width:60%; margin:0 auto;"></div>')
+            footer.append(f'<div style="text-align:center; font-size:9px; color:#000; font-weight:500; margin-top:1mm;">{escape(label)}</div></div>')
+        if f.get("custom_text"):
+            footer.append(f'<div style="font-size:9px; color:#000; font-weight:500; font-style:italic; margin-top:2mm;">{escape(f["custom_text"])}</div>')
+        if f.get("show_notes_space"):
+            notes_label = escape(f.get("notes_label", "Notes"))
+            footer.append(f'<div style="margin-top:3mm;"><div style="font-size:9px; font-weight:600; color:#000; margin-bottom:1mm;">{notes_label}:</div>')
+            footer.append('<div style="border-bottom:1px dotted #888; height:6mm; margin-bottom:1mm;"></div>' * int(f.get("notes_lines", 3)))
+            footer.append('</div>')
+        self.footer_html = "".join(footer) + '</div></div>'
+
+        # ---------- ESC/POS ----------
+        self.escpos_head = ESC_INIT + ESC_CODEPAGE + ESC_CENTER + ESC_DOUBLE + ESC_BOLD_ON + _enc(title) + b"\n" \
+            + ESC_NORMAL + ESC_BOLD_OFF
+        self.show_order_id = h.get("show_order_id", True)
+        # Item lines: "[ ] CODE       Name" (the name wraps under itself), then
+        # "qty x $price" and the status, right aligned, on the line below
+        self.show_checkboxes = show_checkboxes
+        self.show_code = show_code
+        self.show_qty = show_qty
+        self.show_price = show_price
+        self.show_status = show_status
+        self.indent = (4 if show_checkboxes else 0) + (11 if show_code else 0)
+        self.show_count = f.get("show_item_count", True)
+        self.show_total = f.get("show_total", True)
+        tail = []
+        if f.get("show_signature_line", True):
+            tail.append(b"\n\n\n" + ESC_CENTER + _enc("_" * 30) + b"\n" + _enc(f.get("signature_label", "Received by")) + b"\n" + ESC_LEFT)
+        if f.get("custom_text"):
+            tail.append(b"\n" + _enc("\n".join(textwrap.wrap(f["custom_text"], LINE_WIDTH))) + b"\n")
+        if f.get("show_notes_space"):
+            tail.append(b"\n" + ESC_BOLD_ON + _enc(f"{f.get('notes_label', 'Notes')}:") + ESC_BOLD_OFF + b"\n")
+            tail.append((b"\n" + _enc("." * LINE_WIDTH) + b"\n") * int(f.get("notes_lines", 3)))
+        self.escpos_tail = b"".join(tail)
+
+    # ---------- HTML ----------
+
+    def date_html(self, now_str: str) -> str:
+        if not self.show_date:
+            return ""
+        return f'<div style="font-size:9px; color:#000; font-weight:500;">{now_str}</div>'
+
+    def order_html(self, order: dict) -> str:
+        """The receipt for one order from the order ID on (the date goes before it)."""
+        b = self.body
+        items = receipt_items(order)
+        parts = []
+        if self.order_id_tpl:
+            parts.append(self.order_id_tpl.format(escape(order.get("order_id", ""))))
+        parts.append('</div>')
+        if b.get("show_student_name", True):
+            parts.append(f'<div style="font-weight:bold; font-size:11px;">{escape(order.get("student_name", "Unknown"))}</div>')
+        if b.get("show_grade", True) and order.get("grade"):
+            yr = f' &mdash; {order["year"]}' if order.get("year") else ''
+            parts.append(f'<div style="font-size:9px; color:#000; font-weight:600;">Grade: {escape(str(order["grade"]))}{yr}</div>')
+        if self.header.get("show_paid_date", True) and order.get("paid_date"):
+            parts.append(f'<div style="font-size:9px; color:#000; font-weight:500;">Paid: {escape(str(order["paid_date"]))}</div>')
+        parts.append(self.table_head)
+        row = self.row_tpl.format
+        for item in items:
+            parts.append(row(
+                code=escape(item.get("book_code") or ""),
+                name=escape(item.get("book_name") or item.get("name") or "—"),
+                qty=_quantity(item),
+                price=_price(item),
+                status=escape(item.get("status") or ""),
+            ))
+        parts.append('</table><div style="border-top:1px dashed #000; margin-top:1.5mm; padding-top:1.5mm;">')
+        if self.totals_tpl:
+            parts.append(self.totals_tpl.format(count=len(items), total=receipt_total(order, items)))
+        parts.append(self.footer_html)
+        return "".join(parts)
+
+    # ---------- ESC/POS ----------
+
+    def date_escpos(self, now_str: str) -> bytes:
+        return _enc(now_str) + b"\n" if self.show_date else b""
+
+    def order_escpos(self, order: dict) -> bytes:
+        """ESC/POS for one order from the order ID on, ending with a cut."""
+        b = self.body
+        items = receipt_items(order)
+        out = [ESC_CENTER]
+        if self.show_order_id:
+            out.append(_enc(order.get("order_id", "")) + b"\n")
+        out.append(ESC_LEFT + _enc("-" * LINE_WIDTH) + b"\n")
+        if b.get("show_student_name", True):
+            out.append(ESC_BOLD_ON + _enc(order.get("student_name", "Unknown")) + ESC_BOLD_OFF + b"\n")
+        if b.get("show_grade", True) and order.get("grade"):
+            yr = f" - {order['year']}" if order.get("year") else ""
+            out.append(_enc(f"Grade: {order['grade']}{yr}") + b"\n")
+        if self.header.get("show_paid_date", True) and order.get("paid_date"):
+            out.append(_enc(f"Paid: {order['paid_date']}") + b"\n")
+        out.append(_enc("-" * LINE_WIDTH) + b"\n")
+        for item in items:
+            out.append(self._item_lines(item))
+        out.append(_enc("-" * LINE_WIDTH) + b"\n")
+        count = f"Items: {len(items)}" if self.show_count else ""
+        total = f"Total: ${receipt_total(order, items):.2f}" if self.show_total else ""
+        if count or total:
+            out.append(ESC_BOLD_ON + _enc(count + total.rjust(LINE_WIDTH - len(count))) + ESC_BOLD_OFF + b"\n")
+        out.append(self.escpos_tail)
+        out.append(b"\n\n" + ESC_FEED_CUT)
+        return b"".join(out)
+
+    def _item_lines(self, item: dict) -> bytes:
+        pad = " " * self.indent
+        prefix = ("[ ] " if self.show_checkboxes else "") + \
+            ((item.get("book_code") or "")[:10].ljust(11) if self.show_code else "")
+        name = textwrap.wrap(item.get("book_name") or item.get("name") or "-", LINE_WIDTH - self.indent) or ["-"]
+        lines = [prefix + name[0]] + [pad + part for part in name[1:]]
+        qty = str(_quantity(item)) if self.show_qty else ""
+        price = f"${_price(item):.2f}" if self.show_price else ""
+        detail = f"{qty} x {price}" if qty and price else qty or price
+        status = (item.get("status") or "") if self.show_status else ""
+        if detail or status:
+            lines.append(pad + detail + status.rjust(LINE_WIDTH - self.indent - len(detail)))
+        return _enc("\n".join(line.rstrip() for line in lines)) + b"\n"
+
+
+def _enc(text: str) -> bytes:
+    return text.encode(ENCODING, errors="replace")
+
+
+class ReceiptRenderer:
+    """Compiled formats and an LRU of rendered orders"""
+
+    def __init__(self):
+        self._compiled: "OrderedDict[str, CompiledReceipt]" = OrderedDict()
+        self._rendered: "OrderedDict[Tuple[str, str, str, str], object]" = OrderedDict()
+        self.stats = {"compiles": 0, "hits": 0, "misses": 0}
+
+    def compile(self, fmt: dict) -> CompiledReceipt:
+        version = template_version(fmt)
+        compiled = self._compiled.get(version)
+        if compiled is None:
+            compiled = self._compiled[version] = CompiledReceipt(fmt)
+            self.stats["compiles"] += 1
+            if len(self._compiled) > MAX_COMPILED_FORMATS:
+                self._compiled.popitem(last=False)
+        else:
+            self._compiled.move_to_end(version)
+        return compiled
+
+    def _cached(self, kind: str, compiled: CompiledReceipt, order: dict):
+        key = (kind, order.get("order_id", ""), order_version(order), compiled.version)
+        rendered = self._rendered.get(key)
+        if rendered is not None:
+            self._rendered.move_to_end(key)
+            self.stats["hits"] += 1
+            return rendered
+        self.stats["misses"] += 1
+        rendered = compiled.order_html(order) if kind == "html" else compiled.order_escpos(order)
+        self._rendered[key] = rendered
+        if len(self._rendered) > MAX_CACHED_RECEIPTS:
+            self._rendered.popitem(last=False)
+        return rendered
+
+    def iter_html(self, orders: List[dict], fmt: dict) -> Iterator[str]:
+        """The auto-printing thermal page, chunk by chunk."""
+        compiled = self.compile(fmt)
+        date = compiled.date_html(print_date())
+        yield compiled.page_head
+        for idx, order in enumerate(orders):
+            if idx:
+                yield CUT_MARKER_HTML
+            yield compiled.receipt_head
+            yield date
+            yield self._cached("html", compiled, order)
+        yield compiled.page_tail
+
+    def html(self, orders: List[dict], fmt: dict) -> str:
+        return "".join(self.iter_html(orders, fmt))
+
+    def escpos(self, orders: List[dict], fmt: dict) -> bytes:
+        """Raw ESC/POS for a thermal printer: one cut receipt per order."""
+        compiled = self.compile(fmt)
+        date = compiled.date_escpos(print_date())
+        return b"".join(
+            compiled.escpos_head + date + self._cached("escpos", compiled, order) for order in orders
+        )
+
+    def get_status(self) -> Dict:
+        return {**self.stats, "formats": len(self._compiled), "cached": len(self._rendered)}
+
+
+receipt_renderer = ReceiptRenderer()
@@ -91,8 +91,9 @@ async def websocket_endpoint(
 
 @router.get("/stats")
 async def get_realtime_stats():
-    """Get WebSocket connection statistics"""
-    return ws_manager.get_stats()
+    """Get WebSocket connection statistics (this worker) and broker status"""
+    from core.realtime_broker import realtime_broker
+    return {**ws_manager.get_stats(), "broker": realtime_broker.get_status()}
 
 
 @router.get("/rooms")
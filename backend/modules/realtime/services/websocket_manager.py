@@ -9,6 +9,8 @@ import asyncio
 from datetime import datetime, timezone
 import logging
 
+from core.realtime_broker import realtime_broker
+
 logger = logging.getLogger(__name__)
 
 
@@ -19,7 +21,11 @@ class ConnectionManager:
     - Multiple rooms/channels (e.g., rapidpin, community, store)
     - User-specific connections
     - Multi-language messages
+    - Delivery across worker processes (room/user sends go through the realtime broker)
     """
+
+    ROOM_CHANNEL = "realtime:room:"
+    USER_CHANNEL = "realtime:user:"
     
     def __init__(self):
         # Active connections by room: {"room_name": {websocket1, websocket2, ...}}
@@ -33,6 +39,9 @@ class ConnectionManager:
         
         # Lock for thread-safe operations
         self._lock = asyncio.Lock()
+
+        realtime_broker.subscribe(self.ROOM_CHANNEL, self._deliver_to_room)
+        realtime_broker.subscribe(self.USER_CHANNEL, self._deliver_to_user)
     
     async def connect(
         self, 
@@ -107,11 +116,19 @@ class ConnectionManager:
         message: Dict[str, Any],
         exclude_users: Optional[List[str]] = None
     ):
-        """Broadcast message to all clients in a room"""
+        """Broadcast message to all clients in a room (on every worker)"""
+        await realtime_broker.publish(
+            self.ROOM_CHANNEL + room, {"message": message, "exclude_users": exclude_users or []}
+        )
+
+    async def _deliver_to_room(self, channel: str, envelope: Dict[str, Any]):
+        """Broker handler: send a room message to this worker's connections"""
+        room = channel[len(self.ROOM_CHANNEL):]
         if room not in self.rooms:
             return
         
-        exclude_users = exclude_users or []
+        message = envelope["message"]
+        exclude_users = envelope["exclude_users"]
         
         for websocket in list(self.rooms.get(room, set())):
             try:
@@ -129,7 +146,12 @@ class ConnectionManager:
                 await self.disconnect(websocket)
     
     async def send_to_user(self, user_id: str, message: Dict[str, Any]):
-        """Send message to specific user (all their connections)"""
+        """Send message to specific user (all their connections, on every worker)"""
+        await realtime_broker.publish(self.USER_CHANNEL + user_id, message)
+
+    async def _deliver_to_user(self, channel: str, message: Dict[str, Any]):
+        """Broker handler: send a user message to this worker's connections"""
+        user_id = channel[len(self.USER_CHANNEL):]
         if user_id not in self.user_connections:
             return
         
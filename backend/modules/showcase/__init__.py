@@ -9,6 +9,7 @@ import re
 import httpx
 
 from core.database import db
+from modules.landing.bootstrap import public_bootstrap
 
 router = APIRouter(prefix="/showcase", tags=["Showcase"])
 admin_router = APIRouter(prefix="/admin/showcase", tags=["Showcase Admin"])
@@ -189,6 +190,7 @@ async def create_banner(body: dict):
     }
     await db.showcase_banners.insert_one(banner)
     banner.pop("_id", None)
+    await public_bootstrap.invalidate()
     return banner
 
 
@@ -204,6 +206,7 @@ async def update_banner(banner_id: str, body: dict):
     )
     if result.matched_count == 0:
         raise HTTPException(404, "Banner not found")
+    await public_bootstrap.invalidate()
     updated = await db.showcase_banners.find_one({"banner_id": banner_id}, {"_id": 0})
     return updated
 
@@ -214,6 +217,7 @@ async def delete_banner(banner_id: str):
     result = await db.showcase_banners.delete_one({"banner_id": banner_id})
     if result.deleted_count == 0:
         raise HTTPException(404, "Banner not found")
+    await public_bootstrap.invalidate()
     return {"status": "deleted", "banner_id": banner_id}
 
 
@@ -272,6 +276,7 @@ async def update_media_player(body: dict):
         }},
         upsert=True
     )
+    await public_bootstrap.invalidate()
     return {"status": "ok", "config": body}
 
 
@@ -286,6 +291,7 @@ async def patch_media_player(body: dict):
         {"$set": set_fields},
         upsert=True
     )
+    await public_bootstrap.invalidate()
     return {"status": "ok"}
 
 
@@ -310,6 +316,7 @@ async def add_media_item(body: dict):
         },
         upsert=True
     )
+    await public_bootstrap.invalidate()
     return {"status": "added", "item": item}
 
 
@@ -320,6 +327,7 @@ async def delete_media_item(item_id: str):
         {"config_key": "media_player"},
         {"$pull": {"value.items": {"item_id": item_id}}}
     )
+    await public_bootstrap.invalidate()
     return {"status": "deleted", "item_id": item_id}
 
 
@@ -406,6 +414,7 @@ async def fetch_google_photos_album(body: dict):
             upsert=True
         )
 
+        await public_bootstrap.invalidate()
         return {
             "status": "ok",
             "message": f"Found {len(items)} media items",
@@ -269,6 +269,10 @@ class MondayBannerAdapter:
                 )
                 synced += 1
 
+            if synced:
+                from modules.landing.bootstrap import public_bootstrap
+                await public_bootstrap.invalidate()
+
             config["last_sync"] = datetime.now(timezone.utc).isoformat()
             config["sync_count"] = config.get("sync_count", 0) + 1
             await self.save_config(config)
@@ -0,0 +1,264 @@
+"""
+Sport Module — Bracket Engine
+Builds tournament brackets as an explicit match graph.
+
+Every match knows where its winner and loser go (`winner_to` / `loser_to` =
+{"match_id", "slot"}), so reporting a result is a couple of targeted updates
+instead of a search through nested rounds. Byes are resolved here, before the
+matches are stored: a slot that will never be filled is listed in `bye_slots`
+and whoever lands opposite it advances automatically.
+
+Pure functions — persistence lives in tournament_service.py.
+"""
+import math
+import uuid
+from typing import Dict, List, Optional, Set, Tuple
+
+SLOTS = ("player_a", "player_b")
+SWISS_SEARCH_BUDGET = 20000  # candidate pairings tried before giving up on avoiding rematches
+
+
+def _next_pow2(n): return 2 ** math.ceil(math.log2(max(n, 2)))
+
+def _seed_order(size):
+    if size == 2: return [0, 1]
+    half = _seed_order(size // 2)
+    return [x * 2 for x in half] + [size - 1 - x * 2 for x in half]
+
+
+def _player(p: Optional[dict]) -> Optional[dict]:
+    if not p: return None
+    return {"player_id": p["player_id"], "nickname": p["nickname"], "seed": p.get("seed", 0)}
+
+
+def _match(round_num: int, position: int, bracket: str = None, **extra) -> dict:
+    m = {"match_id": f"tm_{uuid.uuid4().hex[:8]}", "round": round_num, "position": position,
+         "player_a": None, "player_b": None, "winner_id": None, "loser_id": None, "score": None,
+         "status": "waiting", "winner_to": None, "loser_to": None, "bye_slots": []}
+    if bracket: m["bracket"] = bracket
+    m.update(extra)
+    return m
+
+
+def _link(src: dict, outcome: str, dst: dict, slot: str):
+    src[f"{outcome}_to"] = {"match_id": dst["match_id"], "slot": slot}
+
+
+def _seeded_first_round(participants: List[dict], bracket: str = None) -> Tuple[List[dict], int]:
+    size = _next_pow2(len(participants))
+    padded = participants + [None] * (size - len(participants))
+    ordered = [padded[i] for i in _seed_order(size)]
+    r1 = []
+    for i in range(0, size, 2):
+        m = _match(1, len(r1) + 1, bracket, player_a=_player(ordered[i]), player_b=_player(ordered[i + 1]))
+        m["bye_slots"] = [s for s, p in zip(SLOTS, ordered[i:i + 2]) if p is None]
+        r1.append(m)
+    return r1, size
+
+
+# ═══ GENERATORS ═══
+# Each returns (rounds, matches): round metadata [{"round", "name", "bracket"?}] and match documents.
+
+def single_elimination(participants: List[dict], third_place: bool = True) -> Tuple[List[dict], List[dict]]:
+    r1, size = _seeded_first_round(participants)
+    total = int(math.log2(size))
+    names = {total: "Final"}
+    if total >= 2: names[total - 1] = "Semifinals"
+    if total >= 3: names[total - 2] = "Quarterfinals"
+
+    by_round = [r1]
+    for r in range(2, total + 1):
+        cur = [_match(r, j + 1, feeds_from=[2 * j + 1, 2 * j + 2]) for j in range(size // 2 ** r)]
+        for i, m in enumerate(by_round[-1]):
+            _link(m, "winner", cur[i // 2], SLOTS[i % 2])
+        by_round.append(cur)
+    by_round[-1][0]["decides"] = True
+
+    rounds = [{"round": r, "name": names.get(r, f"Round {r}")} for r in range(1, total + 1)]
+    if third_place and total >= 2:
+        tp = _match(total + 1, 1, is_third_place=True)
+        for i, m in enumerate(by_round[-2]):
+            _link(m, "loser", tp, SLOTS[i])
+        by_round.append([tp])
+        rounds.append({"round": total + 1, "name": "Third Place"})
+
+    matches = [m for rm in by_round for m in rm]
+    resolve_byes(matches)
+    return rounds, matches
+
+
+def double_elimination(participants: List[dict]) -> Tuple[List[dict], List[dict]]:
+    """
+    Winners bracket, losers bracket (losers drop down; out after a second loss),
+    Grand Final between both champions and a Grand Final Reset, played only
+    when the losers-bracket champion wins the first Grand Final.
+    """
+    r1, size = _seeded_first_round(participants, "winners")
+    k = int(math.log2(size))
+    rounds, winners = [], [r1]
+    for wr in range(1, k + 1):
+        if wr > 1:
+            cur = [_match(wr, j + 1, "winners", feeds_from=[2 * j + 1, 2 * j + 2]) for j in range(size // 2 ** wr)]
+            for i, m in enumerate(winners[-1]):
+                _link(m, "winner", cur[i // 2], SLOTS[i % 2])
+            winners.append(cur)
+        rounds.append({"round": wr, "name": "Winners Final" if wr == k else f"Winners R{wr}", "bracket": "winners"})
+
+    # Losers bracket: L1 pairs W1 losers; even rounds take the next winners round's
+    # losers (in reverse order, to delay rematches); odd rounds halve the field.
+    losers: List[List[dict]] = []
+    num_lr = 2 * (k - 1)
+    for lr in range(1, num_lr + 1):
+        rnum = k + lr
+        if lr == 1:
+            cur = [_match(rnum, j + 1, "losers") for j in range(size // 4)]
+            for i, m in enumerate(winners[0]):
+                _link(m, "loser", cur[i // 2], SLOTS[i % 2])
+        elif lr % 2 == 0:
+            prev = losers[-1]
+            cur = [_match(rnum, j + 1, "losers") for j in range(len(prev))]
+            dropping = winners[lr // 2]
+            for i, m in enumerate(prev):
+                _link(m, "winner", cur[i], "player_a")
+            for i, m in enumerate(reversed(dropping)):
+                _link(m, "loser", cur[i], "player_b")
+        else:
+            prev = losers[-1]
+            cur = [_match(rnum, j + 1, "losers") for j in range(len(prev) // 2)]
+            for i, m in enumerate(prev):
+                _link(m, "winner", cur[i // 2], SLOTS[i % 2])
+        losers.append(cur)
+        rounds.append({"round": rnum, "name": "Losers Final" if lr == num_lr else f"Losers R{lr}", "bracket": "losers"})
+
+    gf_round = k + num_lr + 1
+    gf = _match(gf_round, 1, "final", is_grand_final=True, decides=True)
+    reset = _match(gf_round + 1, 1, "final", is_grand_final=True, is_reset=True, decides=True)
+    gf["reset_match_id"] = reset["match_id"]
+    _link(winners[-1][0], "winner", gf, "player_a")
+    if losers:
+        _link(losers[-1][0], "winner", gf, "player_b")
+    else:
+        _link(winners[-1][0], "loser", gf, "player_b")  # two players: the loser gets a second chance
+    rounds.append({"round": gf_round, "name": "Grand Final", "bracket": "final"})
+    rounds.append({"round": gf_round + 1, "name": "Grand Final Reset", "bracket": "final"})
+
+    matches = [m for rm in winners + losers for m in rm] + [gf, reset]
+    resolve_byes(matches)
+    return rounds, matches
+
+
+def round_robin(participants: List[dict]) -> Tuple[List[dict], List[dict]]:
+    n = len(participants)
+    players = list(participants)
+    if n % 2 == 1: players.append(None); n += 1
+    rounds, matches = [], []
+    for r in range(n - 1):
+        pos = 0
+        for i in range(n // 2):
+            pa, pb = players[i], players[n - 1 - i]
+            if pa and pb:
+                pos += 1
+                matches.append(_match(r + 1, pos, player_a=_player(pa), player_b=_player(pb), status="pending"))
+        rounds.append({"round": r + 1, "name": f"Round {r + 1}"})
+        players = [players[0]] + [players[-1]] + players[1:-1]
+    return rounds, matches
+
+
+def swiss(participants: List[dict], rounds_count: int = 5) -> Tuple[List[dict], List[dict]]:
+    """Round 1 is paired now; later rounds are paired from standings as each round completes."""
+    total = max(1, min(rounds_count, len(participants) - 1))
+    rounds = [{"round": r, "name": f"Round {r}"} for r in range(1, total + 1)]
+    standings = [{"player": p, "points": 0} for p in sorted(participants, key=lambda p: p.get("seed", 0))]
+    return rounds, swiss_round(1, standings, {}, set())
+
+
+# ═══ BYES ═══
+
+def resolve_byes(matches: List[dict]) -> None:
+    """Advance every player facing a slot that can never be filled (in generation order)."""
+    by_id = {m["match_id"]: m for m in matches}
+    for m in matches:
+        if len(m["bye_slots"]) == 2:
+            m["status"] = "bye"
+            for outcome in ("winner", "loser"):
+                if m[f"{outcome}_to"]:
+                    dst = m[f"{outcome}_to"]
+                    by_id[dst["match_id"]]["bye_slots"].append(dst["slot"])
+            continue
+        if len(m["bye_slots"]) == 1:
+            # Nobody loses a walkover, whether its player is known yet or arrives later
+            if m["loser_to"]:
+                by_id[m["loser_to"]["match_id"]]["bye_slots"].append(m["loser_to"]["slot"])
+            player = m[_other(m["bye_slots"][0])]
+            if player:
+                m["status"] = "bye"
+                m["winner_id"] = player["player_id"]
+                if m["winner_to"]:
+                    by_id[m["winner_to"]["match_id"]][m["winner_to"]["slot"]] = player
+            continue
+        if m["player_a"] and m["player_b"] and m["status"] == "waiting":
+            m["status"] = "pending"
+
+
+def _other(slot: str) -> str:
+    return "player_b" if slot == "player_a" else "player_a"
+
+
+# ═══ SWISS PAIRING ═══
+
+def swiss_round(round_num: int, standings: List[dict], opponents: Dict[str, Set[str]], had_bye: Set[str]) -> List[dict]:
+    """
+    Pair one Swiss round. `standings` are {"player", "points"} best first;
+    `opponents` maps player_id -> ids already faced. Players meet someone on
+    equal (or the nearest) points, top half against bottom half of a score
+    group, and never a previous opponent while any rematch-free pairing exists
+    (depth-first search with backtracking, which is immediate in practice).
+    """
+    players = list(standings)
+    bye = None
+    if len(players) % 2 == 1:
+        # Bye to the lowest-placed player who has not had one yet
+        idx = next((i for i in range(len(players) - 1, -1, -1)
+                    if players[i]["player"]["player_id"] not in had_bye), len(players) - 1)
+        bye = players.pop(idx)
+
+    ids = [s["player"]["player_id"] for s in players]
+    points = [s["points"] for s in players]
+    group_size: Dict[float, int] = {}
+    for p in points:
+        group_size[p] = group_size.get(p, 0) + 1
+    budget = [SWISS_SEARCH_BUDGET]
+
+    def candidates(i: int, free: List[int]) -> List[int]:
+        half = max(1, group_size[points[i]] // 2)
+        return sorted(
+            (j for j in free[1:] if ids[j] not in opponents.get(ids[i], ())),
+            key=lambda j: (abs(points[i] - points[j]), abs(j - i - half)),
+        )
+
+    def solve(free: List[int]) -> Optional[List[Tuple[int, int]]]:
+        if not free:
+            return []
+        i = free[0]
+        for j in candidates(i, free):
+            budget[0] -= 1
+            if budget[0] < 0:
+                return None
+            rest = solve([k for k in free[1:] if k != j])
+            if rest is not None:
+                return [(i, j)] + rest
+        return None
+
+    pairs = solve(list(range(len(players))))
+    if pairs is None:
+        # No rematch-free pairing (or not found quickly): pair in standings order
+        pairs = [(i, i + 1) for i in range(0, len(players), 2)]
+    matches = [
+        _match(round_num, pos, player_a=_player(players[i]["player"]),
+               player_b=_player(players[j]["player"]), status="pending")
+        for pos, (i, j) in enumerate(pairs, start=1)
+    ]
+    if bye:
+        matches.append(_match(round_num, len(matches) + 1, player_a=_player(bye["player"]),
+                              bye_slots=["player_b"], status="bye", winner_id=bye["player"]["player_id"]))
+    return matches
@@ -0,0 +1,105 @@
+"""
+Sport Module — Live Dispatch
+Fans live frames out off the request path.
+
+Routes hand a frame to `live_dispatcher.submit()` and return as soon as their
+DB write is done. One task per session drains that session's queue in order
+and delivers each frame to the WebSocket side (this worker's sockets plus the
+realtime broker). Ably runs concurrently on its own per-session task: frames
+arriving within ABLY_BATCH_WINDOW of each other go out as one multi-message
+publish, in order.
+"""
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger("sport")
+
+QUEUE_SIZE = 256            # frames buffered per session before new ones are dropped
+ABLY_BATCH_WINDOW = 0.005   # seconds to wait for more frames before publishing to Ably
+IDLE_EXIT_SECONDS = 60      # drain task exits after this long without frames
+
+
+class LiveDispatcher:
+    """Per-session ordered fan-out queues with concurrent, batched Ably publishing"""
+
+    def __init__(self):
+        self._queues: Dict[str, asyncio.Queue] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._ably_pending: Dict[str, List[dict]] = {}
+        self._ably_tasks: Dict[str, asyncio.Task] = {}
+        self._deliver: Optional[Callable[[str, dict], Awaitable[None]]] = None
+        self._ably: Optional[Callable[[str, List[dict]], Awaitable[None]]] = None
+        self.stats = {"dispatched": 0, "dropped": 0, "ably_batches": 0}
+
+    def bind(
+        self,
+        deliver: Callable[[str, dict], Awaitable[None]],
+        ably_publish: Callable[[str, List[dict]], Awaitable[None]],
+    ) -> None:
+        self._deliver = deliver
+        self._ably = ably_publish
+
+    def submit(self, session_id: str, frame: dict, ably: bool = False) -> None:
+        """Queue a frame for delivery; never blocks the caller."""
+        queue = self._queues.get(session_id)
+        if queue is None:
+            queue = self._queues[session_id] = asyncio.Queue(maxsize=QUEUE_SIZE)
+        try:
+            queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            self.stats["dropped"] += 1
+            logger.warning(f"[live_dispatch] Queue full for {session_id}, dropping {frame.get('type')} frame")
+            return
+        task = self._tasks.get(session_id)
+        if not task or task.done():
+            self._tasks[session_id] = asyncio.create_task(self._drain(session_id, queue))
+        if ably and self._ably:
+            self._ably_pending.setdefault(session_id, []).append(frame)
+            task = self._ably_tasks.get(session_id)
+            if not task or task.done():
+                self._ably_tasks[session_id] = asyncio.create_task(self._flush_ably(session_id))
+
+    async def _drain(self, session_id: str, queue: asyncio.Queue):
+        while True:
+            try:
+                frame = await asyncio.wait_for(queue.get(), IDLE_EXIT_SECONDS)
+            except asyncio.TimeoutError:
+                if queue.empty():
+                    self._queues.pop(session_id, None)
+                    self._tasks.pop(session_id, None)
+                    return
+                continue
+            try:
+                await self._deliver(session_id, frame)
+                self.stats["dispatched"] += 1
+            except Exception as e:
+                logger.warning(f"[live_dispatch] Delivery failed for {session_id} (non-blocking): {e}")
+
+    async def _flush_ably(self, session_id: str):
+        while self._ably_pending.get(session_id):
+            await asyncio.sleep(ABLY_BATCH_WINDOW)
+            frames = self._ably_pending.pop(session_id, [])
+            try:
+                await self._ably(session_id, frames)
+                self.stats["ably_batches"] += 1
+            except Exception as e:
+                logger.debug(f"Ably publish skipped: {e}")
+        self._ably_tasks.pop(session_id, None)
+
+    async def stop(self):
+        """Cancel all dispatch tasks (frames still queued are dropped)."""
+        tasks = list(self._tasks.values()) + list(self._ably_tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
+        self._ably_tasks.clear()
+        self._queues.clear()
+        self._ably_pending.clear()
+
+    def get_status(self) -> Dict:
+        return {**self.stats, "sessions": len(self._queues)}
+
+
+live_dispatcher = LiveDispatcher()
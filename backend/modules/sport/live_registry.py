@@ -0,0 +1,342 @@
+"""
+Sport Module — Live Session Registry
+Hot in-memory state for active live sessions, persisted write-behind.
+
+A session is loaded from `sport_live_sessions` on first use (which is also how
+state is recovered after a restart) and then read and mutated in memory under
+a per-session asyncio.Lock, so concurrent taps serialize. Mutations are
+applied to the in-memory document, recorded as live_stream frames, and the
+touched fields are written back at most every WRITE_BEHIND_SECONDS in one
+update (`$set` of changed top-level fields, `$push` of appended points).
+Set and match ends flush synchronously.
+
+Nested containers are never modified in place (updates copy along the path),
+so a shallow copy of the document is a consistent snapshot for readers.
+
+Only one worker process may hold a session hot: ownership is a lease on the
+session document (`owner` / `owner_expires`). A worker that needs a session
+owned elsewhere asks the owner, over the realtime broker, to flush and let go.
+"""
+import asyncio
+import copy
+import logging
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone, timedelta
+from typing import Dict, List, Optional
+
+from pymongo import ReturnDocument
+
+from core.database import db
+from core.realtime_broker import realtime_broker
+from .live_stream import live_stream
+
+logger = logging.getLogger("sport")
+
+C_LIVE = "sport_live_sessions"
+
+WRITE_BEHIND_SECONDS = 1.0
+LEASE_TTL = timedelta(seconds=10)
+SWEEP_SECONDS = 3
+IDLE_EVICT_SECONDS = 300
+HANDOFF_WAIT_SECONDS = 3
+LEASE_CHANNEL = "sport:lease:"
+
+
+class LiveSessionBusy(RuntimeError):
+    """The session is held by another worker that did not hand it over in time."""
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def apply_update(doc: Dict, update: Dict) -> None:
+    """Apply $set / $inc / $push / $pop (dotted paths) to `doc`, copying nested containers."""
+    def assign(path: str, fn):
+        keys = path.split(".")
+        if len(keys) == 1:
+            doc[path] = fn(doc.get(path))
+            return
+        root = dict(doc.get(keys[0]) or {})
+        node = root
+        for k in keys[1:-1]:
+            node[k] = dict(node.get(k) or {})
+            node = node[k]
+        node[keys[-1]] = fn(node.get(keys[-1]))
+        doc[keys[0]] = root
+
+    for path, value in (update.get("$set") or {}).items():
+        assign(path, lambda _, v=value: v)
+    for path, n in (update.get("$inc") or {}).items():
+        assign(path, lambda v, n=n: (v or 0) + n)
+    for path, value in (update.get("$push") or {}).items():
+        assign(path, lambda v, value=value: list(v or []) + [value])
+    for path, direction in (update.get("$pop") or {}).items():
+        assign(path, lambda v, d=direction: list(v or [])[:-1] if d == 1 else list(v or [])[1:])
+
+
+class LiveSessionState:
+    """One hot session: the document, its lock and the fields awaiting write-back"""
+
+    __slots__ = (
+        "session_id", "doc", "lock", "flush_lock", "dirty", "pushes",
+        "persisted_seq", "last_used", "lease_expires", "flush_handle",
+    )
+
+    def __init__(self, doc: Dict):
+        self.session_id = doc["session_id"]
+        self.doc = doc
+        self.lock = asyncio.Lock()
+        self.flush_lock = asyncio.Lock()
+        self.dirty: set = set()                   # top-level fields to $set
+        self.pushes: Dict[str, List] = {}         # array field -> items to $push
+        self.persisted_seq = doc.get("seq", 0)
+        self.last_used = time.monotonic()
+        self.lease_expires = 0.0
+        self.flush_handle: Optional[asyncio.TimerHandle] = None
+
+    @property
+    def seq(self) -> int:
+        return self.doc.get("seq", 0)
+
+    def snapshot(self) -> Dict:
+        return dict(self.doc)
+
+    def commit(self, update: Dict, event_type: str, data: Optional[Dict] = None) -> Dict:
+        """Apply a mutation in memory, bump seq and return its frame. Caller holds `lock`."""
+        update = {**update, "$inc": {**update.get("$inc", {}), "seq": 1}}
+        apply_update(self.doc, update)
+        for op in ("$set", "$inc"):
+            for path in update.get(op) or {}:
+                top = path.split(".")[0]
+                if top != "seq":
+                    self.dirty.add(top)
+                    self.pushes.pop(top, None)
+        for path in update.get("$pop") or {}:
+            self.dirty.add(path)
+            self.pushes.pop(path, None)
+        for path, value in (update.get("$push") or {}).items():
+            if path not in self.dirty:
+                self.pushes.setdefault(path, []).append(value)
+        self.last_used = time.monotonic()
+        return live_stream.record(self.session_id, self.seq, event_type, update, data)
+
+    @property
+    def is_dirty(self) -> bool:
+        return self.seq != self.persisted_seq
+
+
+class LiveRegistry:
+    """Active live sessions held in this worker's memory"""
+
+    def __init__(self):
+        self._sessions: Dict[str, LiveSessionState] = {}
+        self._loading: Dict[str, asyncio.Lock] = {}
+        self._sweeper: Optional[asyncio.Task] = None
+        self.stats = {"loads": 0, "flushes": 0, "handoffs": 0}
+        realtime_broker.subscribe(LEASE_CHANNEL, self._on_lease_request)
+
+    @property
+    def owner_id(self) -> str:
+        return realtime_broker.worker_id
+
+    def peek(self, session_id: str) -> Optional[LiveSessionState]:
+        """The hot state if this worker holds the session, without loading it."""
+        return self._sessions.get(session_id)
+
+    async def get(self, session_id: str) -> LiveSessionState:
+        """Hot state for a session, loading it (and taking the lease) if needed."""
+        state = self._sessions.get(session_id)
+        if state:
+            state.last_used = time.monotonic()
+            return state
+        lock = self._loading.setdefault(session_id, asyncio.Lock())
+        try:
+            async with lock:
+                state = self._sessions.get(session_id)
+                if not state:
+                    state = await self._load(session_id)
+                    self._sessions[session_id] = state
+                    self._ensure_sweeper()
+        finally:
+            self._loading.pop(session_id, None)
+        return state
+
+    @asynccontextmanager
+    async def session(self, session_id: str):
+        """Hold a session's lock: `async with live_registry.session(sid) as state: state.commit(...)`.
+        Changes are scheduled for write-behind on exit."""
+        while True:
+            state = await self.get(session_id)
+            await state.lock.acquire()
+            if self._sessions.get(session_id) is state:
+                break
+            state.lock.release()  # handed off or dropped while we waited
+        try:
+            yield state
+        finally:
+            state.lock.release()
+            if state.is_dirty:
+                self.schedule_flush(state)
+
+    async def read(self, session_id: str) -> Optional[Dict]:
+        """Session document: from memory when hot here, else straight from Mongo."""
+        state = self._sessions.get(session_id)
+        if state:
+            return state.snapshot()
+        return await db[C_LIVE].find_one({"session_id": session_id}, {"_id": 0, "owner": 0, "owner_expires": 0})
+
+    async def _load(self, session_id: str) -> LiveSessionState:
+        deadline = time.monotonic() + HANDOFF_WAIT_SECONDS
+        asked = False
+        while True:
+            doc = await self._acquire(session_id)
+            if doc:
+                self.stats["loads"] += 1
+                doc.pop("owner", None)
+                doc.pop("owner_expires", None)
+                state = LiveSessionState(doc)
+                state.lease_expires = time.monotonic() + LEASE_TTL.total_seconds()
+                return state
+            if not await db[C_LIVE].count_documents({"session_id": session_id}, limit=1):
+                raise ValueError("Live session not found")
+            if time.monotonic() > deadline:
+                raise LiveSessionBusy("Live session is held by another worker, retry shortly")
+            if not asked:
+                await realtime_broker.publish(LEASE_CHANNEL + session_id, {"requested_by": self.owner_id})
+                asked = True
+            await asyncio.sleep(0.1)
+
+    async def _acquire(self, session_id: str) -> Optional[Dict]:
+        now = _now()
+        return await db[C_LIVE].find_one_and_update(
+            {"session_id": session_id, "$or": [
+                {"owner": self.owner_id},
+                {"owner": None},
+                {"owner_expires": {"$lt": now.isoformat()}},
+            ]},
+            {"$set": {"owner": self.owner_id, "owner_expires": (now + LEASE_TTL).isoformat()}},
+            projection={"_id": 0},
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def _on_lease_request(self, channel: str, message: Dict) -> None:
+        session_id = channel[len(LEASE_CHANNEL):]
+        if message.get("requested_by") == self.owner_id or session_id not in self._sessions:
+            return
+        self.stats["handoffs"] += 1
+        await self.release(session_id)
+
+    # ---------- Write-behind ----------
+
+    def schedule_flush(self, state: LiveSessionState) -> None:
+        if state.flush_handle is None:
+            loop = asyncio.get_running_loop()
+            state.flush_handle = loop.call_later(
+                WRITE_BEHIND_SECONDS, lambda: asyncio.ensure_future(self.flush(state))
+            )
+
+    async def flush(self, state: LiveSessionState) -> None:
+        """Write the fields changed since the last flush in one update."""
+        async with state.flush_lock:
+            if state.flush_handle:
+                state.flush_handle.cancel()
+                state.flush_handle = None
+            if not state.is_dirty:
+                return
+            dirty, pushes, seq = state.dirty, state.pushes, state.seq
+            state.dirty, state.pushes = set(), {}
+            update = {"$set": {
+                **copy.deepcopy({f: state.doc.get(f) for f in dirty}),
+                "seq": seq,
+                "owner_expires": (_now() + LEASE_TTL).isoformat(),
+            }}
+            if pushes:
+                update["$push"] = {f: {"$each": items} for f, items in pushes.items()}
+            try:
+                result = await db[C_LIVE].update_one(
+                    {"session_id": state.session_id, "owner": self.owner_id}, update
+                )
+            except Exception as e:
+                # Keep the changes for the next attempt
+                state.dirty |= dirty
+                for f, items in pushes.items():
+                    if f not in state.dirty:
+                        state.pushes[f] = items + state.pushes.get(f, [])
+                logger.warning(f"[live_registry] Flush of {state.session_id} failed, will retry: {e}")
+                self.schedule_flush(state)
+                return
+            if result.matched_count == 0:
+                logger.error(f"[live_registry] Lost the lease on {state.session_id}; dropping hot state")
+                self._sessions.pop(state.session_id, None)
+                return
+            state.persisted_seq = seq
+            state.lease_expires = time.monotonic() + LEASE_TTL.total_seconds()
+            self.stats["flushes"] += 1
+
+    async def release(self, session_id: str) -> None:
+        """Flush, give up the lease and forget the session."""
+        state = self._sessions.get(session_id)
+        if not state:
+            return
+        async with state.lock:
+            await self.flush(state)
+            self._sessions.pop(session_id, None)
+        await db[C_LIVE].update_one(
+            {"session_id": session_id, "owner": self.owner_id},
+            {"$set": {"owner": None, "owner_expires": None}},
+        )
+
+    # ---------- Lease upkeep ----------
+
+    def _ensure_sweeper(self) -> None:
+        if not self._sweeper or self._sweeper.done():
+            self._sweeper = asyncio.create_task(self._sweep())
+
+    async def _sweep(self) -> None:
+        while self._sessions:
+            await asyncio.sleep(SWEEP_SECONDS)
+            try:
+                now = time.monotonic()
+                for session_id, state in list(self._sessions.items()):
+                    if now - state.last_used > IDLE_EVICT_SECONDS:
+                        await self.release(session_id)
+                renew = [
+                    s.session_id for s in self._sessions.values()
+                    if s.lease_expires - now < LEASE_TTL.total_seconds() / 2
+                ]
+                if renew:
+                    await db[C_LIVE].update_many(
+                        {"session_id": {"$in": renew}, "owner": self.owner_id},
+                        {"$set": {"owner_expires": (_now() + LEASE_TTL).isoformat()}},
+                    )
+                    for session_id in renew:
+                        if session_id in self._sessions:
+                            self._sessions[session_id].lease_expires = now + LEASE_TTL.total_seconds()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"[live_registry] Lease sweep failed (non-blocking): {e}")
+
+    async def stop(self) -> None:
+        """Flush every hot session and release its lease (graceful shutdown)."""
+        if self._sweeper and not self._sweeper.done():
+            self._sweeper.cancel()
+        for session_id in list(self._sessions):
+            try:
+                await self.release(session_id)
+            except Exception as e:
+                logger.warning(f"[live_registry] Release of {session_id} failed: {e}")
+
+    def get_status(self) -> Dict:
+        return {
+            **self.stats,
+            "owner": self.owner_id,
+            "sessions": {
+                sid: {"seq": s.seq, "persisted_seq": s.persisted_seq} for sid, s in self._sessions.items()
+            },
+        }
+
+
+live_registry = LiveRegistry()
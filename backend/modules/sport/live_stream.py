@@ -0,0 +1,94 @@
+"""
+Sport Module — Live State Stream
+Sequenced deltas for live sessions, so clients can resume instead of refetching.
+
+Every mutation of a `sport_live_sessions` document bumps its `seq` in the same
+write and yields one delta frame:
+
+    {"type": "point", "seq": 42, "patch": {...}, "data": {...}}
+
+`patch` mirrors the Mongo update on the state view (`set` / `inc` by dotted
+path, `push` onto arrays, `pop` the last element), and `data` carries transient
+event details (emotions, the card shown, ...) that are not part of the state.
+Recent frames stay in a per-session ring buffer. A client that knows `seq` N
+asks for `since=N` and gets the missing frames, or a full snapshot when the
+ring no longer covers the gap.
+"""
+import bisect
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+RING_SIZE = 200      # frames kept per session
+MAX_STREAMS = 64     # sessions with a ring buffer (least recently used dropped)
+
+_PATCH_OPS = {"$set": "set", "$inc": "inc", "$push": "push"}
+
+
+def patch_from_update(update: Dict) -> Dict:
+    """Translate a Mongo update document into a client-side state patch."""
+    patch = {}
+    for op, name in _PATCH_OPS.items():
+        fields = {k: v for k, v in (update.get(op) or {}).items() if k != "seq"}
+        if fields:
+            patch[name] = fields
+    popped = [k for k, v in (update.get("$pop") or {}).items() if v == 1]
+    if popped:
+        patch["pop"] = popped
+    return patch
+
+
+class LiveStream:
+    """Per-session ring buffers of sequenced delta frames"""
+
+    def __init__(self):
+        self._rings: "OrderedDict[str, List[Dict]]" = OrderedDict()
+
+    def record(self, session_id: str, seq: int, event_type: str, update: Dict, data: Optional[Dict] = None) -> Dict:
+        """Build the frame for a committed mutation and keep it in the session's ring."""
+        frame = {"type": event_type, "seq": seq, "patch": patch_from_update(update)}
+        if data is not None:
+            frame["data"] = data
+        self.add(session_id, frame)
+        return frame
+
+    def add(self, session_id: str, frame: Dict) -> None:
+        """Insert a frame in seq order (concurrent commits may finish out of order)."""
+        ring = self._rings.get(session_id)
+        if ring is None:
+            ring = self._rings[session_id] = []
+            if len(self._rings) > MAX_STREAMS:
+                self._rings.popitem(last=False)
+        else:
+            self._rings.move_to_end(session_id)
+        seqs = [f["seq"] for f in ring]
+        i = bisect.bisect_left(seqs, frame["seq"])
+        if i < len(ring) and ring[i]["seq"] == frame["seq"]:
+            return
+        ring.insert(i, frame)
+        if len(ring) > RING_SIZE:
+            del ring[:len(ring) - RING_SIZE]
+
+    def frame(self, session_id: str, seq: int) -> Optional[Dict]:
+        for f in reversed(self._rings.get(session_id, [])):
+            if f["seq"] == seq:
+                return f
+        return None
+
+    def latest(self, session_id: str) -> int:
+        ring = self._rings.get(session_id)
+        return ring[-1]["seq"] if ring else 0
+
+    def since(self, session_id: str, since: int, current: int) -> Optional[List[Dict]]:
+        """Frames after `since` up to `current`, or None if the ring has a gap (snapshot needed)."""
+        if since > current:
+            return None
+        frames = [f for f in self._rings.get(session_id, []) if since < f["seq"] <= current]
+        if [f["seq"] for f in frames] != list(range(since + 1, current + 1)):
+            return None
+        return frames
+
+    def drop(self, session_id: str) -> None:
+        self._rings.pop(session_id, None)
+
+
+live_stream = LiveStream()
@@ -34,6 +34,7 @@ class MatchRecordRequest(BaseModel):
     score_loser: int = 0
     league_id: Optional[str] = None
     challenge_id: Optional[str] = None  # link match to an active challenge
+    played_at: Optional[str] = None  # ISO date of a past match (rating history is replayed)
     notes: Optional[str] = None
 
 
@@ -0,0 +1,272 @@
+"""
+Sport Module — Rating Replay Engine
+Recomputes ELO from the full match history instead of trusting running totals.
+
+Matches are ordered by `played_at` (falling back to `created_at`), players are
+mapped to ordinals and the history is replayed over NumPy arrays. ELO is
+sequential per player, but matches that share no player since the previous
+"wave" are independent, so each wave is rated in one vectorized step; a
+round-robin evening is a handful of waves, not hundreds of matches.
+
+Scopes:
+  - "global": every recorded match. Writes back `sport_players.elo` and each
+    match's `elo_before` / `elo_change`, only where they changed.
+  - a league_id: that league's validated matches. Feeds league standings.
+
+Each scope stores one compact rating series per player in
+`sport_rating_history` (`t`: epoch seconds, `r`: rating after each match).
+History changes (new, deleted, validated or backdated matches) schedule a
+debounced replay of the affected scopes.
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from pymongo import ReplaceOne, UpdateOne
+
+from core.database import db
+from .settings import get_section
+
+logger = logging.getLogger("sport")
+
+C_PLAYERS = "sport_players"
+C_MATCHES = "sport_matches"
+C_HISTORY = "sport_rating_history"
+
+GLOBAL = "global"
+REPLAY_DELAY_SECONDS = 1.0  # coalesce bursts of history changes into one replay
+
+_MATCH_FIELDS = {
+    "_id": 0, "match_id": 1, "winner_id": 1, "played_at": 1, "created_at": 1,
+    "player_a.player_id": 1, "player_a.elo_before": 1, "player_a.elo_change": 1,
+    "player_b.player_id": 1, "player_b.elo_before": 1, "player_b.elo_change": 1,
+}
+
+
+# ═══ ENGINE ═══
+
+def k_schedule_from_settings(rating: dict) -> List[tuple]:
+    """[(min_matches_played, k), ...] sorted; a constant elo_k_factor when no schedule is set."""
+    schedule = rating.get("elo_k_schedule") or []
+    steps = sorted((int(s["min_matches"]), float(s["k"])) for s in schedule)
+    if not steps or steps[0][0] > 0:
+        steps.insert(0, (0, float(rating.get("elo_k_factor", 32))))
+    return steps
+
+
+def k_for(k_schedule: Sequence[tuple], games_played: int) -> float:
+    """K of the schedule step for a player who has played `games_played` matches."""
+    k = k_schedule[0][1]
+    for min_matches, step_k in k_schedule:
+        if games_played >= min_matches:
+            k = step_k
+    return k
+
+
+def replay_elo(
+    a: np.ndarray,
+    b: np.ndarray,
+    a_won: np.ndarray,
+    n_players: int,
+    initial: float = 1000,
+    k_schedule: Sequence[tuple] = ((0, 32),),
+) -> Dict[str, np.ndarray]:
+    """Replay matches (already in chronological order) between player ordinals `a` and `b`.
+
+    K depends on how many matches a player had played before each match.
+    Returns rating before / change for both sides of every match and the
+    final rating per ordinal. Changes are rounded like calculate_elo().
+    """
+    m = len(a)
+    # Integer bookkeeping is sequential but cheap: games played so far and the wave of each match
+    played = [0] * n_players
+    last_wave = [-1] * n_players
+    games_a = np.empty(m, dtype=np.int64)
+    games_b = np.empty(m, dtype=np.int64)
+    wave = np.empty(m, dtype=np.int64)
+    for i, (pa, pb) in enumerate(zip(a.tolist(), b.tolist())):
+        games_a[i], games_b[i] = played[pa], played[pb]
+        played[pa] += 1
+        played[pb] += 1
+        w = max(last_wave[pa], last_wave[pb]) + 1
+        wave[i] = last_wave[pa] = last_wave[pb] = w
+
+    thresholds = np.array([s[0] for s in k_schedule], dtype=np.int64)
+    ks = np.array([s[1] for s in k_schedule], dtype=np.float64)
+    k_a = ks[np.searchsorted(thresholds, games_a, side="right") - 1]
+    k_b = ks[np.searchsorted(thresholds, games_b, side="right") - 1]
+    score_a = a_won.astype(np.float64)
+
+    ratings = np.full(n_players, initial, dtype=np.float64)
+    before_a = np.empty(m)
+    before_b = np.empty(m)
+    change_a = np.empty(m)
+    change_b = np.empty(m)
+
+    order = np.argsort(wave, kind="stable")
+    bounds = np.searchsorted(wave[order], np.arange(int(wave.max(initial=-1)) + 2))
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        idx = order[lo:hi]
+        pa, pb = a[idx], b[idx]
+        ra, rb = ratings[pa], ratings[pb]
+        expected_a = 1.0 / (1 + 10 ** ((rb - ra) / 400))
+        ca = np.round(k_a[idx] * (score_a[idx] - expected_a))
+        cb = np.round(k_b[idx] * ((1.0 - score_a[idx]) - (1.0 - expected_a)))
+        before_a[idx], before_b[idx] = ra, rb
+        change_a[idx], change_b[idx] = ca, cb
+        # No player appears twice within a wave, so plain fancy-index updates are safe
+        ratings[pa] = ra + ca
+        ratings[pb] = rb + cb
+
+    return {
+        "before_a": before_a, "before_b": before_b,
+        "change_a": change_a, "change_b": change_b,
+        "final": ratings,
+    }
+
+
+def _epoch(value) -> float:
+    if not value:
+        return 0.0
+    try:
+        dt = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return 0.0
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+# ═══ REPLAY ═══
+
+_locks: Dict[str, asyncio.Lock] = {}
+_scheduled: Dict[str, asyncio.Task] = {}
+
+
+def schedule_replay(*scopes: Optional[str]) -> None:
+    """Replay the given scopes shortly (debounced); None entries are ignored."""
+    for scope in filter(None, scopes):
+        task = _scheduled.get(scope)
+        if task and not task.done():
+            continue
+        _scheduled[scope] = asyncio.create_task(_delayed_replay(scope))
+
+
+async def _delayed_replay(scope: str):
+    await asyncio.sleep(REPLAY_DELAY_SECONDS)
+    _scheduled.pop(scope, None)
+    try:
+        await replay_scope(scope)
+    except Exception as e:
+        logger.warning(f"[ratings] Replay of {scope} failed (non-blocking): {e}")
+
+
+async def replay_scope(scope: str = GLOBAL) -> dict:
+    """Replay one scope's match history and persist ratings and series."""
+    async with _locks.setdefault(scope, asyncio.Lock()):
+        started = time.perf_counter()
+        query = {} if scope == GLOBAL else {"league_id": scope, "status": "validated"}
+        matches = await db[C_MATCHES].find(query, _MATCH_FIELDS).to_list(None)
+        rating = await get_section("rating")
+        initial = rating.get("initial_elo", 1000)
+
+        when = [_epoch(m.get("played_at") or m.get("created_at")) for m in matches]
+        matches = [matches[i] for i in np.argsort(np.array(when), kind="stable")]
+        when = np.sort(np.array(when)) if matches else np.empty(0)
+
+        player_ids: List[str] = []
+        ordinal: Dict[str, int] = {}
+        for m in matches:
+            for side in ("player_a", "player_b"):
+                pid = m[side]["player_id"]
+                if pid not in ordinal:
+                    ordinal[pid] = len(player_ids)
+                    player_ids.append(pid)
+        a = np.array([ordinal[m["player_a"]["player_id"]] for m in matches], dtype=np.int64)
+        b = np.array([ordinal[m["player_b"]["player_id"]] for m in matches], dtype=np.int64)
+        a_won = np.array([m["winner_id"] == m["player_a"]["player_id"] for m in matches], dtype=bool)
+
+        result = replay_elo(a, b, a_won, len(player_ids), initial, k_schedule_from_settings(rating))
+        compute_ms = round((time.perf_counter() - started) * 1000, 1)
+
+        await _save_history(scope, player_ids, a, b, when, result)
+        updated = 0
+        if scope == GLOBAL:
+            updated = await _write_back(matches, player_ids, result)
+        summary = {"scope": scope, "matches": len(matches), "players": len(player_ids),
+                   "matches_updated": updated, "compute_ms": compute_ms}
+        logger.info(f"[ratings] Replayed {summary}")
+        return summary
+
+
+async def _save_history(scope, player_ids, a, b, when, result) -> None:
+    """One document per player: timestamps and rating after each of their matches."""
+    n = len(player_ids)
+    # Every match contributes one (player, time, rating after) row per side
+    players = np.concatenate([a, b])
+    ratings = np.concatenate([result["before_a"] + result["change_a"], result["before_b"] + result["change_b"]])
+    times = np.concatenate([when, when])
+    seq = np.concatenate([np.arange(len(a)), np.arange(len(b))])
+    order = np.lexsort((seq, players))
+    players, ratings, times = players[order], ratings[order], times[order]
+    bounds = np.searchsorted(players, np.arange(n + 1))
+
+    now = datetime.now(timezone.utc).isoformat()
+    ops = []
+    for i, pid in enumerate(player_ids):
+        r = ratings[bounds[i]:bounds[i + 1]].astype(int).tolist()
+        ops.append(ReplaceOne({"scope": scope, "player_id": pid}, {
+            "scope": scope,
+            "player_id": pid,
+            "t": times[bounds[i]:bounds[i + 1]].astype(int).tolist(),
+            "r": r,
+            "rating": int(result["final"][i]),
+            "matches": len(r),
+            "updated_at": now,
+        }, upsert=True))
+    if ops:
+        await db[C_HISTORY].bulk_write(ops, ordered=False)
+    await db[C_HISTORY].delete_many({"scope": scope, "player_id": {"$nin": player_ids}})
+
+
+async def _write_back(matches, player_ids, result) -> int:
+    """Store replayed ELO on matches and players, touching only what changed."""
+    ops = []
+    for i, m in enumerate(matches):
+        fields = {}
+        for side, key in (("player_a", "a"), ("player_b", "b")):
+            before = int(result[f"before_{key}"][i])
+            change = int(result[f"change_{key}"][i])
+            if m[side].get("elo_before") != before:
+                fields[f"{side}.elo_before"] = before
+            if m[side].get("elo_change") != change:
+                fields[f"{side}.elo_change"] = change
+        if fields:
+            ops.append(UpdateOne({"match_id": m["match_id"]}, {"$set": fields}))
+    if ops:
+        await db[C_MATCHES].bulk_write(ops, ordered=False)
+
+    final = {pid: int(result["final"][i]) for i, pid in enumerate(player_ids)}
+    current = await db[C_PLAYERS].find(
+        {"player_id": {"$in": player_ids}}, {"_id": 0, "player_id": 1, "elo": 1}
+    ).to_list(None)
+    player_ops = [
+        UpdateOne({"player_id": p["player_id"]}, {"$set": {"elo": final[p["player_id"]]}})
+        for p in current if p.get("elo") != final[p["player_id"]]
+    ]
+    if player_ops:
+        await db[C_PLAYERS].bulk_write(player_ops, ordered=False)
+    return len(ops)
+
+
+async def get_rating_history(player_id: str, scope: str = GLOBAL) -> Optional[dict]:
+    return await db[C_HISTORY].find_one({"scope": scope, "player_id": player_id}, {"_id": 0})
+
+
+async def get_scope_ratings(scope: str) -> Dict[str, int]:
+    """Final replayed rating per player in a scope."""
+    docs = await db[C_HISTORY].find({"scope": scope}, {"_id": 0, "player_id": 1, "rating": 1}).to_list(None)
+    return {d["player_id"]: d["rating"] for d in docs}
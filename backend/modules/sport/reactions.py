@@ -0,0 +1,164 @@
+"""
+Sport Module — Spectator Reactions
+Coalesces reaction taps in memory instead of writing and broadcasting each one.
+
+Taps only bump per-session counters. A tick task sends at most one `reaction`
+frame per session every TICK_SECONDS (totals plus the delta since the last
+tick), and every FLUSH_SECONDS the accumulated counts are folded into
+`sport_live_sessions` with one `$inc` per session in a single bulk write.
+Each client gets a small token bucket so one phone cannot flood a session.
+"""
+import asyncio
+import logging
+import re
+import time
+from collections import Counter
+from typing import Callable, Dict, Optional, Tuple
+
+from pymongo import UpdateOne
+
+from core.database import db
+
+logger = logging.getLogger("sport")
+
+C_LIVE = "sport_live_sessions"
+
+TICK_SECONDS = 0.25
+FLUSH_SECONDS = 5
+IDLE_EVICT_SECONDS = 600   # forget a session's totals after 10 min without taps
+BUCKET_CAPACITY = 10       # burst taps per client
+BUCKET_REFILL_PER_SECOND = 4
+
+REACTION_ID_RE = re.compile(r"^[a-z0-9_]{1,32}$")
+
+
+class ReactionAggregator:
+    """In-memory reaction counters with tick-based broadcast and batched persistence"""
+
+    def __init__(self):
+        self._totals: Dict[str, Dict[str, int]] = {}
+        self._pending: Dict[str, Counter] = {}     # taps since the last tick (broadcast)
+        self._unflushed: Dict[str, Counter] = {}   # taps since the last flush (persist)
+        self._last_tap: Dict[str, float] = {}
+        self._buckets: Dict[str, Tuple[float, float]] = {}  # client -> (tokens, updated_at)
+        self._publish: Optional[Callable[[str, dict], None]] = None
+        self._task: Optional[asyncio.Task] = None
+        self._last_flush = time.monotonic()
+
+    def bind(self, publish: Callable[[str, dict], None]) -> None:
+        """Set the (non-blocking) function used to send a frame to a session's viewers."""
+        self._publish = publish
+
+    def allow(self, client: str) -> bool:
+        """Token bucket per client: BUCKET_CAPACITY burst, BUCKET_REFILL_PER_SECOND sustained."""
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(client, (BUCKET_CAPACITY, now))
+        tokens = min(BUCKET_CAPACITY, tokens + (now - updated) * BUCKET_REFILL_PER_SECOND)
+        if tokens < 1:
+            self._buckets[client] = (tokens, now)
+            return False
+        self._buckets[client] = (tokens - 1, now)
+        return True
+
+    async def add(self, session_id: str, reaction_id: str) -> Dict[str, int]:
+        """Count one tap and return the current totals (including unflushed taps)."""
+        if not REACTION_ID_RE.match(reaction_id):
+            raise ValueError("Invalid reaction_id")
+        if session_id not in self._totals:
+            session = await db[C_LIVE].find_one({"session_id": session_id}, {"_id": 0, "reactions": 1})
+            if not session:
+                raise LookupError("Session not found")
+            self._totals.setdefault(session_id, dict(session.get("reactions") or {}))
+
+        totals = self._totals[session_id]
+        totals[reaction_id] = totals.get(reaction_id, 0) + 1
+        self._pending.setdefault(session_id, Counter())[reaction_id] += 1
+        self._unflushed.setdefault(session_id, Counter())[reaction_id] += 1
+        self._last_tap[session_id] = time.monotonic()
+
+        if not self._task or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return totals
+
+    def get_totals(self, session_id: str) -> Optional[Dict[str, int]]:
+        """Live totals for a session this worker has seen taps for, else None."""
+        return self._totals.get(session_id)
+
+    async def _run(self):
+        while self._totals:
+            await asyncio.sleep(TICK_SECONDS)
+            try:
+                self._tick()
+                if time.monotonic() - self._last_flush >= FLUSH_SECONDS:
+                    await self.flush()
+                    self._evict_idle()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"[reactions] Tick failed (non-blocking): {e}")
+
+    def _tick(self):
+        pending, self._pending = self._pending, {}
+        if not self._publish:
+            return
+        for session_id, delta in pending.items():
+            self._publish(session_id, {
+                "type": "reaction",
+                "data": dict(self._totals.get(session_id, {})),
+                "delta": dict(delta),
+            })
+
+    async def flush(self) -> int:
+        """Persist accumulated taps with one $inc per session; returns the sessions written."""
+        self._last_flush = time.monotonic()
+        unflushed, self._unflushed = self._unflushed, {}
+        if not unflushed:
+            return 0
+        requests = [
+            UpdateOne(
+                {"session_id": session_id},
+                {"$inc": {f"reactions.{rid}": n for rid, n in counts.items()}},
+            )
+            for session_id, counts in unflushed.items()
+        ]
+        try:
+            await db[C_LIVE].bulk_write(requests, ordered=False)
+        except Exception:
+            # Put the counts back so the next flush retries them
+            for session_id, counts in unflushed.items():
+                self._unflushed.setdefault(session_id, Counter()).update(counts)
+            raise
+
+        # Re-base totals on the stored counts, so taps counted by other workers show up too
+        docs = await db[C_LIVE].find(
+            {"session_id": {"$in": list(unflushed)}}, {"_id": 0, "session_id": 1, "reactions": 1}
+        ).to_list(len(unflushed))
+        for doc in docs:
+            totals = dict(doc.get("reactions") or {})
+            for rid, n in self._unflushed.get(doc["session_id"], {}).items():
+                totals[rid] = totals.get(rid, 0) + n
+            self._totals[doc["session_id"]] = totals
+        return len(requests)
+
+    def _evict_idle(self):
+        now = time.monotonic()
+        for session_id, last in list(self._last_tap.items()):
+            if now - last > IDLE_EVICT_SECONDS and session_id not in self._unflushed:
+                self._last_tap.pop(session_id, None)
+                self._totals.pop(session_id, None)
+        stale = now - BUCKET_CAPACITY / BUCKET_REFILL_PER_SECOND
+        self._buckets = {c: b for c, b in self._buckets.items() if b[1] > stale}
+
+    async def stop(self):
+        """Cancel the tick task and persist whatever is still in memory."""
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        await self.flush()
+
+
+reaction_aggregator = ReactionAggregator()
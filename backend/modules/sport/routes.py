@@ -1,28 +1,53 @@
 """
 Sport Module — API Routes
 """
-from fastapi import APIRouter, HTTPException, Depends, WebSocket, WebSocketDisconnect, Query
+from fastapi import APIRouter, HTTPException, Depends, WebSocket, WebSocketDisconnect, Query, Request, Response
 from typing import Optional
 from core.auth import get_current_user, get_admin_user
 from core.database import db
+from core.realtime_broker import realtime_broker
 from . import services
 from .models import *
 from .settings import get_settings, update_settings, get_section
+from .reactions import reaction_aggregator
+from .live_stream import live_stream
+from .live_dispatch import live_dispatcher
+from .live_registry import live_registry, LiveSessionBusy
 import logging, json, asyncio
 
 logger = logging.getLogger("sport")
 router = APIRouter(prefix="/sport", tags=["Sport"])
 
 
-async def _ably_publish(session_id, event, data):
-    """Publish to Ably channel for this live session."""
+async def _ably_publish(session_id, frames):
+    """Publish a batch of frames to the Ably channel for this live session."""
     try:
-        from modules.ably_integration import publish_to_channel
-        await publish_to_channel(f"sport:live:{session_id}", event, data)
+        from modules.ably_integration import publish_many_to_channel
+        await publish_many_to_channel(f"sport:live:{session_id}", [(f["type"], f) for f in frames])
     except Exception as e:
         logger.debug(f"Ably publish skipped: {e}")
 
 
+async def _commit(session_id: str, update: dict, event_type: str, data: dict = None) -> dict:
+    """Apply a live session mutation and queue its sequenced delta frame for broadcast."""
+    try:
+        frame = await services.commit_live_update(session_id, update, event_type, data)
+    except ValueError as e:
+        raise HTTPException(404, str(e))
+    except LiveSessionBusy as e:
+        raise HTTPException(503, str(e))
+    _broadcast(session_id, frame, ably=True)
+    return frame
+
+
+def _emit(session_id: str, seq: int) -> Optional[dict]:
+    """Queue the frame a service call recorded for `seq` for broadcast."""
+    frame = live_stream.frame(session_id, seq)
+    if frame:
+        _broadcast(session_id, frame, ably=True)
+    return frame
+
+
 # ═══ SETTINGS ═══
 
 @router.get("/settings")
@@ -169,6 +194,20 @@ async def get_player_analytics(player_id: str):
     from .analytics import get_player_technique_report
     return await get_player_technique_report(player_id)
 
+@router.get("/players/{player_id}/rating-history")
+async def get_rating_history(player_id: str, scope: str = "global"):
+    """Rating after each match (`t` epoch seconds, `r` rating) for charts; scope is "global" or a league_id."""
+    from .ratings import get_rating_history
+    history = await get_rating_history(player_id, scope)
+    if not history: raise HTTPException(404, "No rating history")
+    return history
+
+@router.post("/ratings/replay")
+async def replay_ratings(scope: str = "global", admin: dict = Depends(get_admin_user)):
+    """Recompute ELO from the full match history of a scope now."""
+    from .ratings import replay_scope
+    return await replay_scope(scope)
+
 
 # ═══ MATCHES ═══
 
@@ -227,21 +266,24 @@ async def score_point(session_id: str, data: LivePointScore, user: dict = Depend
     """Score a point in a live match."""
     try:
         result = await services.score_point(session_id, data.scored_by, data.technique)
-        # Broadcast via both WebSocket AND Ably
-        await _broadcast(session_id, {"type": "point", "data": result})
-        await _ably_publish(session_id, "point", result)
+        # Broadcast via both WebSocket AND Ably, off the request path
+        _emit(session_id, result["seq"])
         return result
     except ValueError as e:
         raise HTTPException(400, str(e))
+    except LiveSessionBusy as e:
+        raise HTTPException(503, str(e))
 
 @router.post("/live/{session_id}/undo")
 async def undo_point(session_id: str, user: dict = Depends(get_current_user)):
     try:
         result = await services.undo_point(session_id)
-        await _broadcast(session_id, {"type": "undo", "data": result})
+        _emit(session_id, result["seq"])
         return result
     except ValueError as e:
         raise HTTPException(400, str(e))
+    except LiveSessionBusy as e:
+        raise HTTPException(503, str(e))
 
 
 # ═══ CARDS & CALLS ═══
@@ -263,8 +305,7 @@ async def issue_card(session_id: str, data: dict, user: dict = Depends(get_curre
         other = "b" if target == "a" else "a"
         update["$inc"] = {f"score.{other}": 1}
     
-    await db[services.C_LIVE].update_one({"session_id": session_id}, update)
-    await _broadcast(session_id, {"type": "card", "data": card})
+    await _commit(session_id, update, "card", card)
     return {"success": True, "card": card}
 
 
@@ -281,8 +322,7 @@ async def make_call(session_id: str, data: dict, user: dict = Depends(get_curren
     if call_type == "timeout" and target in ("a", "b"):
         update_set[f"timeouts.{target}"] = 1  # Mark timeout used
     
-    await db[services.C_LIVE].update_one({"session_id": session_id}, {"$push": {"calls": call}, "$set": update_set})
-    await _broadcast(session_id, {"type": "call", "data": call})
+    await _commit(session_id, {"$push": {"calls": call}, "$set": update_set}, "call", call)
     return {"success": True, "call": call}
 
 
@@ -293,11 +333,12 @@ async def send_effect(session_id: str, data: dict, user: dict = Depends(get_curr
     """Referee sends a manual sticker/effect to TV."""
     effect_id = data.get("effect_id", "fire")
     now = __import__('datetime').datetime.now(__import__('datetime').timezone.utc).isoformat()
-    await db[services.C_LIVE].update_one(
-        {"session_id": session_id},
-        {"$set": {"display.last_effect": effect_id, "display.last_effect_at": now}}
+    await _commit(
+        session_id,
+        {"$set": {"display.last_effect": effect_id, "display.last_effect_at": now}},
+        "effect",
+        {"effect_id": effect_id},
     )
-    await _broadcast(session_id, {"type": "effect", "data": {"effect_id": effect_id}})
     return {"success": True}
 
 
@@ -312,11 +353,11 @@ async def change_referee(session_id: str, data: dict, user: dict = Depends(get_c
     if "referee" not in ref.get("roles", []):
         await db[services.C_PLAYERS].update_one({"player_id": ref["player_id"]}, {"$addToSet": {"roles": "referee"}})
     photo = data.get("photo_url", "") or ref.get("avatar_url", "")
-    await db[services.C_LIVE].update_one(
-        {"session_id": session_id},
-        {"$set": {"referee": {"player_id": ref["player_id"], "nickname": ref["nickname"], "photo_url": photo}}}
+    await _commit(
+        session_id,
+        {"$set": {"referee": {"player_id": ref["player_id"], "nickname": ref["nickname"], "photo_url": photo}}},
+        "referee",
     )
-    await _broadcast(session_id, {"type": "state_refresh"})
     return {"success": True, "referee": ref["nickname"]}
 
 
@@ -329,67 +370,93 @@ async def set_broadcast(session_id: str, data: dict, user: dict = Depends(get_cu
     mode = data.get("mode")  # null=game | "intro" | "break" | "banner" | "standings" | "sponsor"
     broadcast_data = data.get("data", {})
     
-    await db[services.C_LIVE].update_one(
-        {"session_id": session_id},
-        {"$set": {"display.broadcast_mode": mode, "display.broadcast_data": broadcast_data}}
+    await _commit(
+        session_id,
+        {"$set": {"display.broadcast_mode": mode, "display.broadcast_data": broadcast_data}},
+        "broadcast",
     )
-    await _broadcast(session_id, {"type": "broadcast", "data": {"mode": mode, **broadcast_data}})
     return {"success": True, "mode": mode}
 
 
 @router.post("/live/{session_id}/end")
 async def end_live(session_id: str, user: dict = Depends(get_current_user)):
-    result = await services.end_live_session(session_id)
-    await _broadcast(session_id, {"type": "ended", "data": result})
+    try:
+        result = await services.end_live_session(session_id)
+    except ValueError as e:
+        raise HTTPException(404, str(e))
+    except LiveSessionBusy as e:
+        raise HTTPException(503, str(e))
+    _emit(session_id, result["seq"])
     return result
 
 
 @router.post("/live/{session_id}/manual-set")
 async def add_manual_set(session_id: str, data: dict, user: dict = Depends(get_current_user)):
     """Add a completed set manually (for games already in progress before referee started)."""
-    session = await services.get_live_session(session_id)
-    if not session:
-        raise HTTPException(404, "Session not found")
-    if session["status"] != "live":
-        raise HTTPException(400, "Session is not live")
-    
     score_a = int(data.get("score_a", 0))
     score_b = int(data.get("score_b", 0))
     winner = data.get("winner", "a" if score_a > score_b else "b")
-    
-    new_set = {"set_num": session["current_set"], "score_a": score_a, "score_b": score_b, "winner": winner}
-    sets = session.get("sets", []) + [new_set]
-    sets_won = session.get("sets_won", {"a": 0, "b": 0})
-    sets_won[winner] += 1
-    new_current = session["current_set"] + 1
-    
-    # Check if match is won
-    status = "live"
-    if sets_won[winner] >= session["settings"]["sets_to_win"]:
-        status = "finished"
-    
-    await db[services.C_LIVE].update_one(
-        {"session_id": session_id},
-        {"$set": {"sets": sets, "sets_won": sets_won, "current_set": new_current, "status": status,
-                  "score": {"a": 0, "b": 0}}}
-    )
-    
+    if winner not in ("a", "b"):
+        raise HTTPException(400, "winner must be 'a' or 'b'")
+
+    try:
+        # Read and write under the session lock so a concurrent point cannot interleave
+        async with live_registry.session(session_id) as state:
+            session = state.doc
+            if session["status"] != "live":
+                raise HTTPException(400, "Session is not live")
+
+            new_set = {"set_num": session["current_set"], "score_a": score_a, "score_b": score_b, "winner": winner}
+            sets = session.get("sets", []) + [new_set]
+            sets_won = dict(session.get("sets_won") or {"a": 0, "b": 0})
+            sets_won[winner] += 1
+            new_current = session["current_set"] + 1
+
+            # Check if match is won
+            status = "live"
+            if sets_won[winner] >= session["settings"]["sets_to_win"]:
+                status = "finished"
+
+            frame = state.commit(
+                {"$set": {"sets": sets, "sets_won": sets_won, "current_set": new_current, "status": status,
+                          "score": {"a": 0, "b": 0}}},
+                "manual_set",
+                {"set": new_set},
+            )
+            await live_registry.flush(state)
+            updated = state.snapshot()
+    except ValueError as e:
+        raise HTTPException(404, str(e))
+    except LiveSessionBusy as e:
+        raise HTTPException(503, str(e))
+    _broadcast(session_id, frame, ably=True)
+
     if status == "finished":
-        updated = await services.get_live_session(session_id)
-        if updated:
-            updated["winner"] = winner
-            await services._finalize_live_match(updated)
+        updated["winner"] = winner
+        await services._finalize_live_match(updated)
     
-    await _broadcast(session_id, {"type": "manual_set", "data": {"set": new_set, "sets_won": sets_won}})
     return {"success": True, "set": new_set, "sets_won": sets_won, "status": status}
 
+def _client_key(request: Request) -> str:
+    """
+    Rate-limit key for anonymous spectators. Only the rightmost X-Forwarded-For
+    hop was added by our ingress; earlier entries are whatever the client sent.
+    """
+    forwarded = request.headers.get("x-forwarded-for", "").split(",")[-1].strip()
+    return forwarded or (request.client.host if request.client else "unknown")
+
+
 @router.post("/live/{session_id}/react")
-async def react(session_id: str, data: dict):
-    """Add a spectator reaction (no auth needed)."""
-    reaction_id = data.get("reaction_id", "clap")
-    reactions = await services.add_reaction(session_id, reaction_id)
-    await _broadcast(session_id, {"type": "reaction", "data": reactions})
-    return reactions
+async def react(session_id: str, data: dict, request: Request):
+    """Add a spectator reaction (no auth needed). Taps are coalesced and broadcast per tick."""
+    if not reaction_aggregator.allow(_client_key(request)):
+        raise HTTPException(429, "Too many reactions")
+    try:
+        return await reaction_aggregator.add(session_id, str(data.get("reaction_id", "clap")))
+    except LookupError as e:
+        raise HTTPException(404, str(e))
+    except ValueError as e:
+        raise HTTPException(400, str(e))
 
 
 @router.put("/live/{session_id}/settings")
@@ -406,8 +473,7 @@ async def update_live_settings(session_id: str, data: dict, user: dict = Depends
         update["settings.points_to_win"] = int(data["points_to_win"])
     
     if update:
-        await db[services.C_LIVE].update_one({"session_id": session_id}, {"$set": update})
-        await _broadcast(session_id, {"type": "settings_changed", "data": data})
+        await _commit(session_id, {"$set": update}, "settings_changed")
     
     return {"success": True, "updated": update}
 
@@ -429,8 +495,7 @@ async def update_display(session_id: str, data: dict, user: dict = Depends(get_c
         update["player_b.photo_url"] = data["player_b_photo"]
     
     if update:
-        await db[services.C_LIVE].update_one({"session_id": session_id}, {"$set": update})
-        await _broadcast(session_id, {"type": "display_update", "data": data})
+        await _commit(session_id, {"$set": update}, "display_update")
     return {"success": True}
 
 
@@ -440,23 +505,18 @@ async def override_server(session_id: str, data: dict, user: dict = Depends(get_
     server = data.get("server")
     if server not in ("a", "b"):
         raise HTTPException(400, "server must be 'a' or 'b'")
-    await db[services.C_LIVE].update_one({"session_id": session_id}, {"$set": {"server": server}})
-    # Broadcast full state refresh so TV picks up immediately
-    await _broadcast(session_id, {"type": "state_refresh"})
+    await _commit(session_id, {"$set": {"server": server}}, "server")
     return {"success": True, "server": server}
 
-# Polling fallback for live state
-@router.get("/live/{session_id}/state")
-async def get_live_state(session_id: str):
-    """Polling endpoint: get current live match state."""
-    s = await services.get_live_session(session_id)
-    if not s: raise HTTPException(404, "Session not found")
+def _state_view(s: dict) -> dict:
+    """Compact client state of a live session (polling response and WS snapshot)."""
     return {
+        "seq": s.get("seq", 0),
         "score": s["score"], "sets": s["sets"], "sets_won": s["sets_won"],
         "server": s["server"], "current_set": s["current_set"], "status": s["status"],
         "points": s["points"][-20:],
         "all_points": s.get("all_points", s.get("points", []))[-60:],  # Persistent across sets
-        "reactions": s.get("reactions", {}),
+        "reactions": reaction_aggregator.get_totals(s.get("session_id")) or s.get("reactions", {}),
         "stream_url": s.get("stream_url", ""),
         "display": s.get("display", {}),
         "player_a": s.get("player_a", {}),
@@ -470,6 +530,32 @@ async def get_live_state(session_id: str):
     }
 
 
+# Polling fallback for live state
+@router.get("/live/{session_id}/state")
+async def get_live_state(session_id: str, since: Optional[int] = Query(None, ge=0)):
+    """Polling endpoint: current live match state.
+    With `since`, returns 304 when nothing changed, the missing delta frames
+    when they are still buffered, or else the full state.
+    """
+    if since is not None:
+        hot = live_registry.peek(session_id)
+        if hot:
+            current = hot.seq
+        else:
+            # Held by another worker (or idle): Mongo lags that worker's write-behind, its ring does not
+            head = await services.db[services.C_LIVE].find_one({"session_id": session_id}, {"_id": 0, "seq": 1})
+            if not head: raise HTTPException(404, "Session not found")
+            current = max(head.get("seq", 0), live_stream.latest(session_id))
+        if since == current:
+            return Response(status_code=304)
+        frames = live_stream.since(session_id, since, current)
+        if frames is not None:
+            return {"seq": current, "deltas": frames}
+    s = await services.get_live_session(session_id)
+    if not s: raise HTTPException(404, "Session not found")
+    return _state_view(s)
+
+
 # ═══ LEAGUES ═══
 
 @router.post("/leagues")
@@ -600,11 +686,16 @@ async def generate_demo_matches(league_id: str, admin: dict = Depends(get_admin_
 
     players = list(player_registry.items())  # [(player_id, nickname), ...]
 
-    # Fetch ELO for each player
-    elo_map: dict = {}
-    for pid, _ in players:
-        doc = await services.db[services.C_PLAYERS].find_one({"player_id": pid}, {"_id": 0, "elo": 1})
-        elo_map[pid] = (doc or {}).get("elo", 1000)
+    # Fetch ELO and games played for each player (K follows the rating K schedule)
+    rating_settings = await get_section("rating")
+    player_docs = await services.db[services.C_PLAYERS].find(
+        {"player_id": {"$in": [pid for pid, _ in players]}}, {"_id": 0, "player_id": 1, "elo": 1, "stats.matches": 1}
+    ).to_list(None)
+    player_state = {pid: {"elo": 1000, "stats": {"matches": 0}} for pid, _ in players}
+    for doc in player_docs:
+        player_state[doc["player_id"]] = {
+            "elo": doc.get("elo", 1000), "stats": {"matches": (doc.get("stats") or {}).get("matches", 0)},
+        }
 
     # --- Step 3: generate missing round-robin pairs ---
     generated = 0
@@ -626,15 +717,15 @@ async def generate_demo_matches(league_id: str, admin: dict = Depends(get_admin_
                 continue  # already have a match for this pair
 
             # Weighted coin flip: higher ELO wins more often
-            elo_a = elo_map.get(pa_id, 1000)
-            elo_b = elo_map.get(pb_id, 1000)
+            state_a, state_b = player_state[pa_id], player_state[pb_id]
+            elo_a, elo_b = state_a["elo"], state_b["elo"]
             prob_a = 1.0 / (1 + 10 ** ((elo_b - elo_a) / 400))
             winner_is_a = random.random() < prob_a
 
             winner_id = pa_id if winner_is_a else pb_id
             sw, sl = random.choice(score_options)
 
-            elo_change_a, elo_change_b = services.calculate_elo(elo_a, elo_b, winner_is_a)
+            elo_change_a, elo_change_b = services.elo_changes(rating_settings, state_a, state_b, winner_is_a)
 
             match_doc = {
                 "match_id": f"sm_{uuid.uuid4().hex[:10]}",
@@ -655,24 +746,20 @@ async def generate_demo_matches(league_id: str, admin: dict = Depends(get_admin_
             await services.db[services.C_MATCHES].insert_one(match_doc)
             match_doc.pop("_id", None)
 
-            # Update player ELO in player records
-            await services.db[services.C_PLAYERS].update_one(
-                {"player_id": pa_id},
-                {"$inc": {"elo": elo_change_a, "stats.matches_played": 1,
-                          "stats.wins": (1 if winner_is_a else 0),
-                          "stats.losses": (0 if winner_is_a else 1)}}
+            # Update player ELO and stats in player records
+            await services._update_player_stats(
+                [(pa_id, winner_is_a, elo_change_a), (pb_id, not winner_is_a, elo_change_b)]
             )
-            await services.db[services.C_PLAYERS].update_one(
-                {"player_id": pb_id},
-                {"$inc": {"elo": elo_change_b, "stats.matches_played": 1,
-                          "stats.wins": (0 if winner_is_a else 1),
-                          "stats.losses": (1 if winner_is_a else 0)}}
-            )
-            elo_map[pa_id] = elo_a + elo_change_a
-            elo_map[pb_id] = elo_b + elo_change_b
+            for state, change in ((state_a, elo_change_a), (state_b, elo_change_b)):
+                state["elo"] += change
+                state["stats"]["matches"] += 1
             paired.add(key)
             generated += 1
 
+    # Validated and generated matches change the league's history: replay ratings and series
+    if pending or generated:
+        services.ratings.schedule_replay(services.ratings.GLOBAL, league_id)
+
     standings = await services.get_league_standings(league_id)
     matrix = await services.get_league_matrix(league_id)
 
@@ -703,36 +790,92 @@ async def get_rankings(type: str = "elo"):
 
 # ═══ WEBSOCKET ═══
 
-_ws_connections: dict = {}  # session_id -> set of WebSocket
+_ws_connections: dict = {}  # session_id -> set of WebSocket (this worker only)
+LIVE_CHANNEL = "sport:live:"
+WS_SEND_TIMEOUT = 5
 
 @router.websocket("/ws/live/{session_id}")
-async def websocket_live(websocket: WebSocket, session_id: str):
+async def websocket_live(websocket: WebSocket, session_id: str, since: Optional[int] = None):
+    """Live frames for a session. With `?since=<seq>` the socket first replays
+    the frames missed since then, or sends a `snapshot` frame when they are no
+    longer buffered. Frames with seq <= the client's seq can be ignored."""
     await websocket.accept()
-    if session_id not in _ws_connections:
-        _ws_connections[session_id] = set()
-    _ws_connections[session_id].add(websocket)
-    # Update spectator count
-    await services.db[services.C_LIVE].update_one(
-        {"session_id": session_id}, {"$set": {"spectator_count": len(_ws_connections[session_id])}}
-    )
     try:
+        if since is not None:
+            await _resync(websocket, session_id, since)
+        # No await between the last catch-up check and joining the broadcast set
+        if session_id not in _ws_connections:
+            _ws_connections[session_id] = set()
+        _ws_connections[session_id].add(websocket)
+        await _update_spectator_count(session_id)
         while True:
             await websocket.receive_text()  # Keep alive
     except WebSocketDisconnect:
-        _ws_connections[session_id].discard(websocket)
-        if not _ws_connections[session_id]:
-            del _ws_connections[session_id]
+        if session_id in _ws_connections:
+            _ws_connections[session_id].discard(websocket)
+            if not _ws_connections[session_id]:
+                del _ws_connections[session_id]
+            await _update_spectator_count(session_id)
+
+
+async def _update_spectator_count(session_id: str):
+    """Spectators summed over all workers (see core.realtime_broker presence)."""
+    total = await realtime_broker.set_presence(LIVE_CHANNEL + session_id, len(_ws_connections.get(session_id, ())))
+    hot = live_registry.peek(session_id)
+    if hot:
+        hot.doc["spectator_count"] = total
+    await services.db[services.C_LIVE].update_one(
+        {"session_id": session_id}, {"$set": {"spectator_count": total}}
+    )
 
 
-async def _broadcast(session_id: str, message: dict):
-    """Broadcast to all WebSocket subscribers of a live session."""
+async def _resync(websocket: WebSocket, session_id: str, since: int):
+    """Send the frames a reconnecting client missed (or a snapshot), in seq order."""
+    s = await services.get_live_session(session_id)
+    if not s:
+        return
+    current = s.get("seq", 0)
+    frames = live_stream.since(session_id, since, current)
+    if frames is None:
+        frames = [{"type": "snapshot", "seq": current, "data": _state_view(s)}]
+    while frames:
+        for frame in frames:
+            await websocket.send_text(json.dumps(frame, default=str))
+        # Catch up on frames committed while sending
+        sent = frames[-1]["seq"]
+        frames = live_stream.since(session_id, sent, live_stream.latest(session_id)) or []
+
+
+def _broadcast(session_id: str, message: dict, ably: bool = False):
+    """Queue a frame for every WebSocket subscriber of a live session (on every
+    worker) and, with `ably`, for the session's Ably channel. Returns immediately."""
+    live_dispatcher.submit(session_id, message, ably)
+
+
+async def _publish(session_id: str, message: dict):
+    await realtime_broker.publish(LIVE_CHANNEL + session_id, message)
+
+
+async def _deliver(channel: str, message: dict):
+    """Broker handler: send a live frame to this worker's sockets."""
+    session_id = channel[len(LIVE_CHANNEL):]
+    if "seq" in message:
+        # Frames committed on other workers fill this worker's ring for since= resyncs
+        live_stream.add(session_id, message)
     if session_id not in _ws_connections:
         return
-    dead = set()
     text = json.dumps(message, default=str)
-    for ws in _ws_connections[session_id]:
-        try:
-            await ws.send_text(text)
-        except Exception:
-            dead.add(ws)
-    _ws_connections[session_id] -= dead
+    sockets = list(_ws_connections[session_id])
+    # Send concurrently so one slow spectator does not hold up the rest
+    results = await asyncio.gather(
+        *(asyncio.wait_for(ws.send_text(text), WS_SEND_TIMEOUT) for ws in sockets),
+        return_exceptions=True,
+    )
+    dead = {ws for ws, r in zip(sockets, results) if isinstance(r, BaseException)}
+    if dead and session_id in _ws_connections:
+        _ws_connections[session_id] -= dead
+
+
+live_dispatcher.bind(_publish, _ably_publish)
+reaction_aggregator.bind(_broadcast)
+realtime_broker.subscribe(LIVE_CHANNEL, _deliver)
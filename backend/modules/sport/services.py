@@ -8,8 +8,12 @@ import math
 import logging
 from datetime import datetime, timezone
 from typing import Dict, List, Optional, Tuple
+from pymongo import UpdateOne
 from core.database import db
+from core.events import event_bus, Event, SportEvents
 from .settings import get_settings, get_section
+from .live_registry import live_registry
+from . import ratings
 
 logger = logging.getLogger("sport")
 
@@ -105,12 +109,13 @@ async def record_match(data: dict) -> dict:
 
     settings = await get_settings()
     now = datetime.now(timezone.utc).isoformat()
+    played_at = data.get("played_at")
+    if played_at and not settings.get("match", {}).get("allow_past_matches", True):
+        raise ValueError("Past matches are not allowed")
 
-    # Calculate ELO change
-    elo_change_a, elo_change_b = calculate_elo(
-        pa["elo"], pb["elo"],
-        winner_is_a=(winner["player_id"] == pa["player_id"]),
-        k=settings.get("rating", {}).get("elo_k_factor", 32)
+    # Calculate ELO change (same K schedule as the replay, so ratings don't jump on replay)
+    elo_change_a, elo_change_b = elo_changes(
+        settings.get("rating", {}), pa, pb, winner_is_a=(winner["player_id"] == pa["player_id"])
     )
 
     match = {
@@ -125,6 +130,7 @@ async def record_match(data: dict) -> dict:
         "status": "validated" if settings.get("match", {}).get("auto_validate") else "pending",
         "notes": data.get("notes"),
         "source": "manual",
+        "played_at": played_at or now,
         "created_at": now,
         "validated_at": now if settings.get("match", {}).get("auto_validate") else None,
     }
@@ -132,9 +138,15 @@ async def record_match(data: dict) -> dict:
     match.pop("_id", None)
 
     # Update player stats + ELO
-    await _update_player_stats(pa["player_id"], winner["player_id"] == pa["player_id"], elo_change_a)
-    await _update_player_stats(pb["player_id"], winner["player_id"] == pb["player_id"], elo_change_b)
-    await db[C_PLAYERS].update_one({"player_id": ref["player_id"]}, {"$inc": {"stats.matches_refereed": 1}})
+    await _update_player_stats(
+        [(pa["player_id"], winner["player_id"] == pa["player_id"], elo_change_a),
+         (pb["player_id"], winner["player_id"] == pb["player_id"], elo_change_b)],
+        referee_id=ref["player_id"],
+    )
+
+    # Backdated matches change every later rating; the replay also refreshes rating series
+    ratings.schedule_replay(ratings.GLOBAL, match["league_id"] if match["status"] == "validated" else None)
+    await _announce_match(match)
 
     logger.info(f"Match recorded: {pa['nickname']} vs {pb['nickname']} -> {winner['nickname']} wins ({data.get('score_winner', 11)}-{data.get('score_loser', 0)})")
     return match
@@ -162,6 +174,7 @@ async def validate_match(match_id: str, validated_by: str) -> dict:
         {"$set": {"status": "validated", "validated_at": datetime.now(timezone.utc).isoformat(), "validated_by": validated_by}}
     )
     match["status"] = "validated"
+    ratings.schedule_replay(match.get("league_id"))
     return match
 
 
@@ -177,6 +190,7 @@ async def delete_match(match_id: str) -> bool:
     if pb.get("player_id"):
         await db[C_PLAYERS].update_one({"player_id": pb["player_id"]}, {"$inc": {"elo": -(pb.get("elo_change", 0)), "stats.matches": -1}})
     await db[C_MATCHES].delete_one({"match_id": match_id})
+    ratings.schedule_replay(ratings.GLOBAL, match.get("league_id"))
     return True
 
 
@@ -239,6 +253,7 @@ async def create_live_session(data: dict) -> dict:
         "calls": [],  # Let, timeout calls log
         "reactions": {},
         "spectator_count": 0,
+        "seq": 0,  # Bumped by every mutation (live_stream delta sequence)
         "created_at": now,
         # Timers
         "timers": {
@@ -275,10 +290,27 @@ async def create_live_session(data: dict) -> dict:
 
 
 async def score_point(session_id: str, scored_by: str, technique: str = None) -> dict:
-    """Score a point and return updated state + emotions."""
-    session = await db[C_LIVE].find_one({"session_id": session_id}, {"_id": 0})
-    if not session or session["status"] != "live":
+    """Score a point and return updated state + emotions.
+    Runs against the hot in-memory session (live_registry.py) under its lock."""
+    async with live_registry.session(session_id) as state:
+        result, session = _score_point(state, scored_by, technique)
+        if result["set_won"]:
+            await live_registry.flush(state)
+
+    # If match finished, auto-create a recorded match
+    if session["status"] == "finished":
+        await _finalize_live_match(session)
+
+    return result
+
+
+def _score_point(state, scored_by: str, technique: str = None) -> Tuple[dict, dict]:
+    # Work on copies: nested values of the hot document are never changed in place
+    doc = state.doc
+    if doc["status"] != "live":
         raise ValueError("Live session not found or not active")
+    session = {**doc, "score": dict(doc["score"]), "sets": list(doc["sets"]),
+               "sets_won": dict(doc["sets_won"])}
 
     other = "b" if scored_by == "a" else "a"
     score = session["score"]
@@ -364,19 +396,17 @@ async def score_point(session_id: str, scored_by: str, technique: str = None) ->
         display_updates["display.last_emotion_side"] = scored_by
         display_updates["display.last_emotion_at"] = datetime.now(timezone.utc).isoformat()
     
-    await db[C_LIVE].update_one(
-        {"session_id": session_id},
+    frame = state.commit(
         {"$set": {"score": session["score"], "sets": session["sets"], "sets_won": session["sets_won"],
                   "server": session["server"], "current_set": session["current_set"],
                   "status": session["status"], **display_updates},
-         "$push": {"points": point, "all_points": point}}
+         "$push": {"points": point, "all_points": point}},
+        "point",
+        {"emotions": emotions, "momentum": momentum, "set_won": set_won, "winner": session.get("winner")},
     )
 
-    # If match finished, auto-create a recorded match
-    if session["status"] == "finished":
-        await _finalize_live_match(session)
-
     return {
+        "seq": frame["seq"],
         "point": point,
         "score": session["score"],
         "sets": session["sets"],
@@ -388,26 +418,35 @@ async def score_point(session_id: str, scored_by: str, technique: str = None) ->
         "momentum": momentum,
         "set_won": set_won,
         "winner": session.get("winner"),
-    }
+    }, session
 
 
 async def undo_point(session_id: str) -> dict:
     """Undo the last point scored."""
-    session = await db[C_LIVE].find_one({"session_id": session_id}, {"_id": 0})
-    if not session or not session["points"]:
-        raise ValueError("No points to undo")
-    last = session["points"][-1]
-    # Revert score
-    session["score"][last["scored_by"]] -= 1
-    await db[C_LIVE].update_one(
-        {"session_id": session_id},
-        {"$set": {"score": session["score"]}, "$pop": {"points": 1}}
-    )
-    return {"undone": last, "score": session["score"]}
+    async with live_registry.session(session_id) as state:
+        if not state.doc["points"]:
+            raise ValueError("No points to undo")
+        last = state.doc["points"][-1]
+        # Revert score
+        score = dict(state.doc["score"])
+        score[last["scored_by"]] -= 1
+        frame = state.commit(
+            {"$set": {"score": score}, "$pop": {"points": 1}},
+            "undo",
+            {"undone": last},
+        )
+    return {"seq": frame["seq"], "undone": last, "score": score}
+
+
+async def commit_live_update(session_id: str, update: dict, event_type: str, data: dict = None) -> dict:
+    """Apply a mutation to a live session in memory, bump its `seq` and return the
+    sequenced delta frame (see live_stream.py). Persisted write-behind by live_registry."""
+    async with live_registry.session(session_id) as state:
+        return state.commit(update, event_type, data)
 
 
 async def get_live_session(session_id: str) -> Optional[dict]:
-    return await db[C_LIVE].find_one({"session_id": session_id}, {"_id": 0})
+    return await live_registry.read(session_id)
 
 
 async def get_active_sessions() -> List[dict]:
@@ -416,15 +455,18 @@ async def get_active_sessions() -> List[dict]:
 
 async def end_live_session(session_id: str) -> dict:
     """Force-end a live session."""
-    await db[C_LIVE].update_one({"session_id": session_id}, {"$set": {"status": "cancelled"}})
-    return {"session_id": session_id, "status": "cancelled"}
+    frame = await commit_live_update(session_id, {"$set": {"status": "cancelled"}}, "ended")
+    await live_registry.release(session_id)
+    return {"seq": frame["seq"], "session_id": session_id, "status": "cancelled"}
 
 
-async def add_reaction(session_id: str, reaction_id: str, user_id: str = None) -> dict:
-    key = f"reactions.{reaction_id}"
-    await db[C_LIVE].update_one({"session_id": session_id}, {"$inc": {key: 1}})
-    session = await db[C_LIVE].find_one({"session_id": session_id}, {"_id": 0, "reactions": 1})
-    return session.get("reactions", {})
+async def _announce_match(match: dict) -> None:
+    """Let in-process listeners (activity ticker) know a match was recorded."""
+    await event_bus.publish(Event(
+        event_type=SportEvents.MATCH_RECORDED,
+        payload={k: match.get(k) for k in ("match_id", "player_a", "player_b", "winner_id", "league_id", "created_at")},
+        source_module="sport",
+    ))
 
 
 # ═══ LEAGUE SERVICE ═══
@@ -462,6 +504,7 @@ async def get_all_leagues() -> List[dict]:
 async def get_league_standings(league_id: str) -> List[dict]:
     """Get standings for a league based on matches."""
     matches = await db[C_MATCHES].find({"league_id": league_id, "status": "validated"}, {"_id": 0}).to_list(1000)
+    league_elo = await ratings.get_scope_ratings(league_id)
     stats = {}
     for m in matches:
         for side in ["player_a", "player_b"]:
@@ -476,7 +519,7 @@ async def get_league_standings(league_id: str) -> List[dict]:
             else:
                 stats[pid]["losses"] += 1
                 stats[pid]["points"] += 1
-            stats[pid]["elo"] = p.get("elo_before", 1000) + p.get("elo_change", 0)
+            stats[pid]["elo"] = league_elo.get(pid, p.get("elo_before", 1000) + p.get("elo_change", 0))
 
     standings = sorted(stats.values(), key=lambda x: (-x["points"], -x["wins"], -x["elo"]))
     for i, s in enumerate(standings):
@@ -642,7 +685,9 @@ async def record_challenge_match(
     # Calculate ELO
     elo_a = challenger_player.get("elo", 1000)
     elo_b = challenged_player.get("elo", 1000)
-    elo_change_a, elo_change_b = calculate_elo(elo_a, elo_b, challenger_won)
+    elo_change_a, elo_change_b = elo_changes(
+        await get_section("rating"), challenger_player, challenged_player, challenger_won
+    )
 
     # Record the match in sport_matches
     import uuid as _uuid
@@ -663,8 +708,12 @@ async def record_challenge_match(
     }
     await db[C_MATCHES].insert_one(match_doc)
     match_doc.pop("_id", None)
-    await _update_player_stats(challenge["challenger_id"], challenger_won, elo_change_a)
-    await _update_player_stats(challenge["challenged_id"], not challenger_won, elo_change_b)
+    await _update_player_stats([
+        (challenge["challenger_id"], challenger_won, elo_change_a),
+        (challenge["challenged_id"], not challenger_won, elo_change_b),
+    ])
+    ratings.schedule_replay(ratings.GLOBAL, challenge["league_id"])
+    await _announce_match(match_doc)
 
     # Update challenge state
     new_consec = (challenge["consecutive_wins"] + 1) if challenger_won else 0
@@ -738,17 +787,27 @@ async def cancel_challenge(challenge_id: str, admin_id: str) -> dict:
 
 
 
-def calculate_elo(elo_a: float, elo_b: float, winner_is_a: bool, k: int = 32) -> Tuple[int, int]:
-    """Calculate ELO changes for both players."""
+def calculate_elo(elo_a: float, elo_b: float, winner_is_a: bool, k: float = 32, k_b: float = None) -> Tuple[int, int]:
+    """Calculate ELO changes for both players (`k_b` defaults to `k`)."""
     expected_a = 1.0 / (1 + 10 ** ((elo_b - elo_a) / 400))
     expected_b = 1.0 - expected_a
     score_a = 1.0 if winner_is_a else 0.0
     score_b = 1.0 - score_a
     change_a = round(k * (score_a - expected_a))
-    change_b = round(k * (score_b - expected_b))
+    change_b = round((k if k_b is None else k_b) * (score_b - expected_b))
     return change_a, change_b
 
 
+def elo_changes(rating_settings: dict, pa: dict, pb: dict, winner_is_a: bool) -> Tuple[int, int]:
+    """ELO changes with each player's K taken from the rating K schedule, as the replay does."""
+    schedule = ratings.k_schedule_from_settings(rating_settings)
+    return calculate_elo(
+        pa.get("elo", 1000), pb.get("elo", 1000), winner_is_a,
+        k=ratings.k_for(schedule, (pa.get("stats") or {}).get("matches", 0)),
+        k_b=ratings.k_for(schedule, (pb.get("stats") or {}).get("matches", 0)),
+    )
+
+
 # ═══ MOMENTUM ENGINE ═══
 
 def calculate_momentum(points: list, last_scorer: str) -> float:
@@ -810,24 +869,34 @@ def detect_emotions(score: dict, scored_by: str, streak: int, session: dict, poi
 
 # ═══ HELPERS ═══
 
-async def _update_player_stats(player_id: str, won: bool, elo_change: int):
-    inc = {"stats.matches": 1, "elo": elo_change}
-    if won:
-        inc["stats.wins"] = 1
-    else:
-        inc["stats.losses"] = 1
-    await db[C_PLAYERS].update_one({"player_id": player_id}, {"$inc": inc})
-    # Update win rate and streak
-    player = await db[C_PLAYERS].find_one({"player_id": player_id}, {"_id": 0})
-    if player:
-        s = player.get("stats", {})
-        win_rate = round(s.get("wins", 0) / max(s.get("matches", 1), 1) * 100)
-        streak = (s.get("current_streak", 0) + 1) if won else 0
-        best = max(s.get("best_streak", 0), streak)
-        await db[C_PLAYERS].update_one(
-            {"player_id": player_id},
-            {"$set": {"stats.win_rate": win_rate, "stats.current_streak": streak, "stats.best_streak": best}}
-        )
+async def _update_player_stats(results: List[Tuple[str, bool, int]], referee_id: str = None):
+    """Apply (player_id, won, elo_change) results in one bulk write.
+    Each player is a single pipeline update, so ELO, counters, win rate and
+    streaks change atomically even when two matches finish at once."""
+    ops = [UpdateOne({"player_id": pid}, _player_stats_pipeline(won, elo_change)) for pid, won, elo_change in results]
+    if referee_id:
+        ops.append(UpdateOne({"player_id": referee_id}, {"$inc": {"stats.matches_refereed": 1}}))
+    await db[C_PLAYERS].bulk_write(ops, ordered=False)
+
+
+def _player_stats_pipeline(won: bool, elo_change: int) -> list:
+    def add(field, n):
+        return {"$add": [{"$ifNull": [f"${field}", 0]}, n]}
+    counters = {
+        "elo": add("elo", elo_change),
+        "stats.matches": add("stats.matches", 1),
+        "stats.wins" if won else "stats.losses": add("stats.wins" if won else "stats.losses", 1),
+        "stats.current_streak": add("stats.current_streak", 1) if won else {"$literal": 0},
+    }
+    return [
+        {"$set": counters},
+        {"$set": {
+            "stats.win_rate": {"$toInt": {"$round": [{"$multiply": [
+                {"$divide": [{"$ifNull": ["$stats.wins", 0]}, {"$max": ["$stats.matches", 1]}]}, 100,
+            ]}, 0]}},
+            "stats.best_streak": {"$max": [{"$ifNull": ["$stats.best_streak", 0]}, "$stats.current_streak"]},
+        }},
+    ]
 
 
 async def _finalize_live_match(session: dict):
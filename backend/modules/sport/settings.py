@@ -34,6 +34,7 @@ DEFAULTS = {
         "default_system": "elo",
         "initial_elo": 1000,
         "elo_k_factor": 32,  # How much a single match can change ELO
+        "elo_k_schedule": [],  # Optional [{"min_matches": 0, "k": 40}, {"min_matches": 10, "k": 32}] (replays)
         "simple_points": {"win": 3, "loss": 1, "draw": 0},
         "performance": {
             "decay_days": 90,  # Ratings decay after inactivity
@@ -5,19 +5,31 @@ Bracket generation, seeding, round management for:
 - Double Elimination  
 - Round Robin
 - Swiss System
+
+Brackets are built by bracket_engine as a match graph and each match is its
+own document in `sport_tournament_matches`. Reporting a result claims the
+match atomically and places the winner (and loser) straight into their
+destination slots, so results from many tables never contend on the
+tournament document. `get_tournament` assembles the nested `brackets` view.
 """
 import uuid
-import math
 import logging
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from typing import Dict, List, Optional, Tuple
+
+from pymongo import ReturnDocument
+
 from core.database import db
+from . import bracket_engine as engine
 
 logger = logging.getLogger("sport.tournament")
 
 C_TOURNAMENTS = "sport_tournaments"
 C_PLAYERS = "sport_players"
 C_MATCHES = "sport_matches"
+C_TMATCHES = "sport_tournament_matches"
+
+_MATCH_VIEW = {"_id": 0, "tournament_id": 0}
 
 
 async def create_tournament(data: dict, created_by: str) -> dict:
@@ -51,7 +63,16 @@ async def create_tournament(data: dict, created_by: str) -> dict:
 
 
 async def get_tournament(tid: str) -> Optional[dict]:
-    return await db[C_TOURNAMENTS].find_one({"tournament_id": tid}, {"_id": 0})
+    t = await db[C_TOURNAMENTS].find_one({"tournament_id": tid}, {"_id": 0})
+    if t and t.get("rounds") and not t.get("brackets"):
+        matches = await db[C_TMATCHES].find({"tournament_id": tid}, _MATCH_VIEW).sort(
+            [("round", 1), ("position", 1)]
+        ).to_list(None)
+        by_round: Dict[int, List[dict]] = {}
+        for m in matches:
+            by_round.setdefault(m["round"], []).append(m)
+        t["brackets"] = [{**r, "matches": by_round.get(r["round"], [])} for r in t["rounds"]]
+    return t
 
 
 async def get_all_tournaments(status: str = None) -> List[dict]:
@@ -60,7 +81,10 @@ async def get_all_tournaments(status: str = None) -> List[dict]:
 
 
 async def delete_tournament(tid: str) -> bool:
-    return (await db[C_TOURNAMENTS].delete_one({"tournament_id": tid})).deleted_count > 0
+    deleted = (await db[C_TOURNAMENTS].delete_one({"tournament_id": tid})).deleted_count > 0
+    if deleted:
+        await db[C_TMATCHES].delete_many({"tournament_id": tid})
+    return deleted
 
 
 async def register_by_name(tid: str, name: str) -> dict:
@@ -104,260 +128,307 @@ async def seed_from_league(tid: str, league_id: str) -> dict:
     return {"seeded": len(seeded), "participants": seeded}
 
 
-def _next_pow2(n): return 2 ** math.ceil(math.log2(max(n, 2)))
-
-def _seed_order(size):
-    if size == 2: return [0, 1]
-    half = _seed_order(size // 2)
-    return [x * 2 for x in half] + [size - 1 - x * 2 for x in half]
-
-
 async def generate_brackets(tid: str) -> dict:
-    t = await get_tournament(tid)
+    t = await db[C_TOURNAMENTS].find_one({"tournament_id": tid}, {"_id": 0})
     if not t: raise ValueError("Tournament not found")
+    if len(t["participants"]) < 2: raise ValueError("Need at least 2 participants")
+    rounds, matches = _build(t)
+    for m in matches:
+        m["tournament_id"] = tid
+    await db[C_TMATCHES].delete_many({"tournament_id": tid})
+    await db[C_TMATCHES].insert_many(matches)
+    await db[C_TOURNAMENTS].update_one({"tournament_id": tid}, {"$set": {
+        "rounds": rounds, "brackets": [], "current_round": 1, "status": "in_progress", "winner_id": None,
+        "updated_at": datetime.now(timezone.utc).isoformat(),
+    }})
+    return {"brackets": (await get_tournament(tid))["brackets"]}
+
+
+def _build(t: dict) -> Tuple[List[dict], List[dict]]:
     parts = t["participants"]
-    if len(parts) < 2: raise ValueError("Need at least 2 participants")
     fmt = t["format"]
-    if fmt == "single_elimination":
-        brackets = _gen_single_elim(parts, t.get("third_place_match", True))
-    elif fmt == "double_elimination":
-        brackets = _gen_double_elim(parts)
-    elif fmt == "round_robin":
-        brackets = _gen_round_robin(parts)
-    elif fmt == "swiss":
-        brackets = _gen_swiss(parts)
-    else:
-        brackets = _gen_single_elim(parts, True)
-    await db[C_TOURNAMENTS].update_one({"tournament_id": tid}, {"$set": {"brackets": brackets, "current_round": 1, "status": "in_progress"}})
-    return {"brackets": brackets}
-
-
-def _gen_single_elim(participants, third_place=True):
-    n = len(participants)
-    size = _next_pow2(n)
-    total_rounds = int(math.log2(size))
-    padded = participants + [None] * (size - n)
-    order = _seed_order(size)
-    ordered = [padded[i] if i < len(padded) else None for i in order]
-    
-    names = {}
-    if total_rounds >= 2: names[total_rounds - 1] = "Semifinals"
-    if total_rounds >= 1: names[total_rounds] = "Final"
-    if total_rounds >= 3: names[total_rounds - 2] = "Quarterfinals"
-    
-    rounds = []
-    # Round 1
-    r1 = []
-    for i in range(0, size, 2):
-        pa, pb = ordered[i], ordered[i+1]
-        m = {"match_id": f"tm_{uuid.uuid4().hex[:8]}", "round": 1, "position": len(r1)+1,
-             "player_a": {"player_id": pa["player_id"], "nickname": pa["nickname"], "seed": pa["seed"]} if pa else None,
-             "player_b": {"player_id": pb["player_id"], "nickname": pb["nickname"], "seed": pb["seed"]} if pb else None,
-             "winner_id": None, "score": None, "status": "pending"}
-        if not pa or not pb:
-            w = pa or pb
-            if w: m["winner_id"] = w["player_id"]; m["status"] = "bye"
-        r1.append(m)
-    rounds.append({"round": 1, "name": names.get(1, "Round 1"), "matches": r1})
-    
-    for r in range(2, total_rounds + 1):
-        mc = size // (2 ** r)
-        rm = [{"match_id": f"tm_{uuid.uuid4().hex[:8]}", "round": r, "position": j+1,
-               "player_a": None, "player_b": None, "winner_id": None, "score": None,
-               "status": "waiting", "feeds_from": [2*j+1, 2*j+2]} for j in range(mc)]
-        rounds.append({"round": r, "name": names.get(r, f"Round {r}"), "matches": rm})
-    
-    if third_place and total_rounds >= 2:
-        rounds.append({"round": total_rounds + 1, "name": "Third Place",
-                       "matches": [{"match_id": f"tm_{uuid.uuid4().hex[:8]}", "round": total_rounds+1, "position": 1,
-                                    "player_a": None, "player_b": None, "winner_id": None, "score": None,
-                                    "status": "waiting", "is_third_place": True}]})
-    
-    # Auto-advance byes in round 1
-    _auto_advance_byes(rounds)
-    return rounds
-
-
-def _auto_advance_byes(rounds):
-    if len(rounds) < 2: return
-    for m in rounds[0]["matches"]:
-        if m["status"] == "bye" and m["winner_id"]:
-            pos = m["position"]
-            next_pos = math.ceil(pos / 2)
-            slot = "player_a" if pos % 2 == 1 else "player_b"
-            winner_info = m["player_a"] if (m.get("player_a") or {}).get("player_id") == m["winner_id"] else m["player_b"]
-            for nm in rounds[1]["matches"]:
-                if nm["position"] == next_pos:
-                    nm[slot] = winner_info
-                    if nm["player_a"] and nm["player_b"]: nm["status"] = "pending"
-                    break
-
-
-
-def _gen_double_elim(participants):
-    """
-    Double elimination bracket.
-    Structure:
-    - Winners bracket (standard single-elim)
-    - Losers bracket (losers drop down; must lose twice)
-    - Grand Final (winners champ vs losers champ)
-    - Optional Grand Final Reset
-    """
-    n = len(participants)
-    size = _next_pow2(n)
-    total_w_rounds = int(math.log2(size))
-    padded = participants + [None] * (size - n)
-    order = _seed_order(size)
-    ordered = [padded[i] if i < len(padded) else None for i in order]
-
-    rounds = []
-
-    # ── Winners Bracket ──
-    # Round 1
-    r1 = []
-    for i in range(0, size, 2):
-        pa, pb = ordered[i], ordered[i + 1]
-        m = {
-            "match_id": f"tm_{uuid.uuid4().hex[:8]}", "round": 1, "position": len(r1) + 1,
-            "player_a": {"player_id": pa["player_id"], "nickname": pa["nickname"], "seed": pa["seed"]} if pa else None,
-            "player_b": {"player_id": pb["player_id"], "nickname": pb["nickname"], "seed": pb["seed"]} if pb else None,
-            "winner_id": None, "score": None, "status": "pending",
-        }
-        if not pa or not pb:
-            w = pa or pb
-            if w:
-                m["winner_id"] = w["player_id"]
-                m["status"] = "bye"
-        r1.append(m)
-    rounds.append({"round": 1, "name": "Winners R1", "bracket": "winners", "matches": r1})
-
-    for wr in range(2, total_w_rounds + 1):
-        mc = size // (2 ** wr)
-        rname = "Winners Final" if wr == total_w_rounds else f"Winners R{wr}"
-        rm = [{
-            "match_id": f"tm_{uuid.uuid4().hex[:8]}", "round": wr, "position": j + 1,
-            "player_a": None, "player_b": None, "winner_id": None, "score": None,
-            "status": "waiting", "feeds_from": [2 * j + 1, 2 * j + 2],
-        } for j in range(mc)]
-        rounds.append({"round": wr, "name": rname, "bracket": "winners", "matches": rm})
-
-    _auto_advance_byes(rounds)
-
-    # ── Losers Bracket ──
-    # Number of losers rounds = 2 * (total_w_rounds - 1)
-    num_lr = 2 * (total_w_rounds - 1)
-    lr_base = total_w_rounds + 1  # offset round numbers past winners
-
-    prev_count = size // 2  # matches in W R1 = losers who drop
-    for lr in range(1, num_lr + 1):
-        rnum = lr_base + lr - 1
-        if lr == 1:
-            # Losers from W R1 play each other
-            mc = prev_count // 2
-        elif lr % 2 == 0:
-            # Drop-down round: losers from next winners round join
-            mc = prev_count  # same count
-        else:
-            # Reduction round: winners of previous losers round play each other
-            mc = max(1, prev_count // 2)
-        prev_count = mc
-
-        rname = "Losers Final" if lr == num_lr else f"Losers R{lr}"
-        rm = [{
-            "match_id": f"tm_{uuid.uuid4().hex[:8]}", "round": rnum, "position": j + 1,
-            "player_a": None, "player_b": None, "winner_id": None, "score": None,
-            "status": "waiting",
-        } for j in range(max(1, mc))]
-        rounds.append({"round": rnum, "name": rname, "bracket": "losers", "matches": rm})
-
-    # ── Grand Final ──
-    gf_round = lr_base + num_lr
-    rounds.append({
-        "round": gf_round, "name": "Grand Final", "bracket": "final",
-        "matches": [{
-            "match_id": f"tm_{uuid.uuid4().hex[:8]}", "round": gf_round, "position": 1,
-            "player_a": None, "player_b": None, "winner_id": None, "score": None,
-            "status": "waiting", "is_grand_final": True,
-        }],
-    })
-
-    # Grand Final Reset (if losers champ wins GF)
-    rounds.append({
-        "round": gf_round + 1, "name": "Grand Final Reset", "bracket": "final",
-        "matches": [{
-            "match_id": f"tm_{uuid.uuid4().hex[:8]}", "round": gf_round + 1, "position": 1,
-            "player_a": None, "player_b": None, "winner_id": None, "score": None,
-            "status": "waiting", "is_grand_final": True,
-        }],
-    })
-
-    return rounds
-
-
-
-def _gen_round_robin(participants):
-    n = len(participants)
-    players = list(participants)
-    if n % 2 == 1: players.append(None); n += 1
-    rounds = []
-    for r in range(n - 1):
-        rm = []
-        for i in range(n // 2):
-            pa, pb = players[i], players[n-1-i]
-            if pa and pb:
-                rm.append({"match_id": f"tm_{uuid.uuid4().hex[:8]}", "round": r+1, "position": len(rm)+1,
-                           "player_a": {"player_id": pa["player_id"], "nickname": pa["nickname"], "seed": pa.get("seed", 0)},
-                           "player_b": {"player_id": pb["player_id"], "nickname": pb["nickname"], "seed": pb.get("seed", 0)},
-                           "winner_id": None, "score": None, "status": "pending"})
-        rounds.append({"round": r+1, "name": f"Round {r+1}", "matches": rm})
-        players = [players[0]] + [players[-1]] + players[1:-1]
-    return rounds
-
-
-def _gen_swiss(participants, rounds_count=5):
-    n = len(participants); half = n // 2
-    r1 = [{"match_id": f"tm_{uuid.uuid4().hex[:8]}", "round": 1, "position": i+1,
-           "player_a": {"player_id": participants[i]["player_id"], "nickname": participants[i]["nickname"]},
-           "player_b": {"player_id": participants[half+i]["player_id"], "nickname": participants[half+i]["nickname"]} if half+i < n else None,
-           "winner_id": None, "score": None, "status": "pending"} for i in range(half)]
-    rounds = [{"round": 1, "name": "Round 1", "matches": r1}]
-    for r in range(2, min(rounds_count, n) + 1):
-        rounds.append({"round": r, "name": f"Round {r}", "matches": [], "status": "waiting"})
-    return rounds
+    if fmt == "double_elimination":
+        return engine.double_elimination(parts)
+    if fmt == "round_robin":
+        return engine.round_robin(parts)
+    if fmt == "swiss":
+        return engine.swiss(parts)
+    return engine.single_elimination(parts, t.get("third_place_match", True))
 
 
 async def report_match_result(tid: str, match_id: str, winner_id: str, score: str) -> dict:
-    t = await get_tournament(tid)
+    t = await db[C_TOURNAMENTS].find_one(
+        {"tournament_id": tid}, {"_id": 0, "format": 1, "status": 1, "rounds": 1, "brackets": 1}
+    )
     if not t: raise ValueError("Tournament not found")
-    now = datetime.now(timezone.utc).isoformat()
-    
-    for rnd in t["brackets"]:
-        for m in rnd["matches"]:
-            if m["match_id"] == match_id:
-                m["winner_id"] = winner_id
-                m["score"] = score
-                m["status"] = "completed"
-                # Advance winner
-                _advance(t["brackets"], rnd["round"], m["position"], winner_id, m)
-                # Check tournament complete
-                finals = [r for r in t["brackets"] if "Final" in r.get("name", "")]
-                if finals and all(fm.get("winner_id") for fm in finals[-1]["matches"]):
-                    t["status"] = "finished"
-                    t["winner_id"] = finals[-1]["matches"][0]["winner_id"]
-                await db[C_TOURNAMENTS].update_one({"tournament_id": tid}, {"$set": {"brackets": t["brackets"], "status": t["status"], "winner_id": t.get("winner_id"), "updated_at": now}})
-                return {"success": True, "match_id": match_id}
-    raise ValueError("Match not found")
-
-
-def _advance(brackets, from_round, from_pos, winner_id, match):
-    next_round = from_round + 1
-    next_pos = math.ceil(from_pos / 2)
-    slot = "player_a" if from_pos % 2 == 1 else "player_b"
-    winner_info = match.get("player_a") if (match.get("player_a") or {}).get("player_id") == winner_id else match.get("player_b")
-    for rnd in brackets:
-        if rnd["round"] == next_round:
-            for m in rnd["matches"]:
-                if m["position"] == next_pos and not m.get("is_third_place"):
-                    m[slot] = winner_info
-                    if m["player_a"] and m["player_b"]: m["status"] = "pending"
-                    return
+    if t.get("brackets"):
+        if not await migrate_tournament_brackets(tid):
+            raise ValueError("Tournament brackets are being converted; try again shortly")
+        t = await db[C_TOURNAMENTS].find_one(
+            {"tournament_id": tid}, {"_id": 0, "format": 1, "status": 1, "rounds": 1}
+        )
+    await _record_result(tid, t, match_id, winner_id, score)
+    return {"success": True, "match_id": match_id}
+
+
+async def _record_result(tid: str, t: dict, match_id: str, winner_id: str, score: str, completed_at: str = None):
+    now = completed_at or datetime.now(timezone.utc).isoformat()
+
+    # Claim the match: only a pending match with the winner in it can be completed, exactly once
+    match = await db[C_TMATCHES].find_one_and_update(
+        {"tournament_id": tid, "match_id": match_id, "status": "pending",
+         "$or": [{"player_a.player_id": winner_id}, {"player_b.player_id": winner_id}]},
+        [{"$set": {
+            "winner_id": {"$literal": winner_id},
+            "loser_id": {"$cond": [{"$eq": ["$player_a.player_id", {"$literal": winner_id}]},
+                                   "$player_b.player_id", "$player_a.player_id"]},
+            "score": {"$literal": score},
+            "status": "completed",
+            "completed_at": now,
+        }}],
+        projection=_MATCH_VIEW,
+        return_document=ReturnDocument.AFTER,
+    )
+    if not match:
+        current = await db[C_TMATCHES].find_one({"tournament_id": tid, "match_id": match_id}, _MATCH_VIEW)
+        if not current: raise ValueError("Match not found")
+        if current["status"] != "pending": raise ValueError(f"Match is {current['status']}")
+        raise ValueError("Winner is not a player in this match")
+
+    winner, loser = match["player_a"], match["player_b"]
+    if winner["player_id"] != winner_id:
+        winner, loser = loser, winner
+    if t["format"] == "swiss":
+        await _after_swiss_result(tid, match["round"], len(t["rounds"]))
+    elif t["format"] == "round_robin":
+        await _after_round_robin_result(tid)
+    else:
+        await _advance(tid, match, winner, loser)
+
+
+# ═══ ELIMINATION ADVANCEMENT ═══
+
+async def _advance(tid: str, match: dict, winner: dict, loser: Optional[dict]):
+    """Send a decided match's players along its graph edges."""
+    if match.get("reset_match_id"):
+        # Grand Final: the unbeaten winners-bracket champion (player_a) only needs one win
+        if winner["player_id"] == match["player_a"]["player_id"]:
+            await db[C_TMATCHES].update_one(
+                {"tournament_id": tid, "match_id": match["reset_match_id"]}, {"$set": {"status": "skipped"}}
+            )
+            await _finish(tid, winner["player_id"])
+        else:
+            await db[C_TMATCHES].update_one(
+                {"tournament_id": tid, "match_id": match["reset_match_id"]},
+                {"$set": {"player_a": match["player_a"], "player_b": match["player_b"], "status": "pending"}},
+            )
+        return
+    if match.get("winner_to"):
+        await _place(tid, match["winner_to"], winner)
+    if loser and match.get("loser_to"):
+        await _place(tid, match["loser_to"], loser)
+    if match.get("decides"):
+        await _finish(tid, winner["player_id"])
+
+
+async def _place(tid: str, dest: dict, player: dict):
+    """Put a player into one slot; the match becomes pending once both slots are filled."""
+    other = "$" + engine._other(dest["slot"])
+    m = await db[C_TMATCHES].find_one_and_update(
+        {"tournament_id": tid, "match_id": dest["match_id"]},
+        [{"$set": {
+            dest["slot"]: {"$literal": player},
+            "status": {"$cond": [
+                {"$and": [{"$eq": ["$status", "waiting"]}, {"$ne": [other, None]}]}, "pending", "$status",
+            ]},
+        }}],
+        projection=_MATCH_VIEW,
+        return_document=ReturnDocument.AFTER,
+    )
+    if m and engine._other(dest["slot"]) in m["bye_slots"]:
+        # Nobody will ever arrive opposite: walk over
+        walkover = await db[C_TMATCHES].update_one(
+            {"tournament_id": tid, "match_id": m["match_id"], "status": "waiting"},
+            {"$set": {"status": "bye", "winner_id": player["player_id"]}},
+        )
+        if walkover.modified_count:
+            await _advance(tid, m, player, None)
+
+
+async def _finish(tid: str, winner_id: Optional[str]):
+    await db[C_TOURNAMENTS].update_one(
+        {"tournament_id": tid, "status": "in_progress"},
+        {"$set": {"status": "finished", "winner_id": winner_id, "updated_at": datetime.now(timezone.utc).isoformat()}},
+    )
+
+
+# ═══ ROUND ROBIN / SWISS ═══
+
+async def _records(tid: str) -> Tuple[Dict[str, float], Dict[str, set], set]:
+    """Points, opponents faced and bye recipients from the stored matches."""
+    points: Dict[str, float] = {}
+    opponents: Dict[str, set] = {}
+    had_bye = set()
+    async for m in db[C_TMATCHES].find(
+        {"tournament_id": tid}, {"_id": 0, "player_a.player_id": 1, "player_b.player_id": 1, "winner_id": 1, "status": 1}
+    ):
+        a = (m.get("player_a") or {}).get("player_id")
+        b = (m.get("player_b") or {}).get("player_id")
+        if m["status"] == "bye":
+            had_bye.add(m["winner_id"])
+        elif a and b:
+            opponents.setdefault(a, set()).add(b)
+            opponents.setdefault(b, set()).add(a)
+        if m.get("winner_id") and m["status"] in ("completed", "bye"):
+            points[m["winner_id"]] = points.get(m["winner_id"], 0) + 1
+    return points, opponents, had_bye
+
+
+async def _standings(tid: str) -> Tuple[List[dict], Dict[str, set], set]:
+    t = await db[C_TOURNAMENTS].find_one({"tournament_id": tid}, {"_id": 0, "participants": 1})
+    points, opponents, had_bye = await _records(tid)
+    participants = sorted(t["participants"], key=lambda p: (-points.get(p["player_id"], 0), p.get("seed", 0)))
+    standings = [{"player": p, "points": points.get(p["player_id"], 0)} for p in participants]
+    return standings, opponents, had_bye
+
+
+async def _after_round_robin_result(tid: str):
+    if await db[C_TMATCHES].count_documents({"tournament_id": tid, "status": "pending"}, limit=1):
+        return
+    standings, _, _ = await _standings(tid)
+    await _finish(tid, standings[0]["player"]["player_id"] if standings else None)
+
+
+async def _after_swiss_result(tid: str, round_num: int, total_rounds: int):
+    if await db[C_TMATCHES].count_documents(
+        {"tournament_id": tid, "round": round_num, "status": "pending"}, limit=1
+    ):
+        return
+    if round_num >= total_rounds:
+        standings, _, _ = await _standings(tid)
+        await _finish(tid, standings[0]["player"]["player_id"] if standings else None)
+        return
+    # Whoever moves current_round on pairs the next round; concurrent last results do nothing
+    moved = await db[C_TOURNAMENTS].update_one(
+        {"tournament_id": tid, "current_round": round_num},
+        {"$set": {"current_round": round_num + 1, "updated_at": datetime.now(timezone.utc).isoformat()}},
+    )
+    if not moved.modified_count:
+        return
+    standings, opponents, had_bye = await _standings(tid)
+    matches = engine.swiss_round(round_num + 1, standings, opponents, had_bye)
+    for m in matches:
+        m["tournament_id"] = tid
+    await db[C_TMATCHES].insert_many(matches)
+
+
+# ═══ LEGACY BRACKETS ═══
+# Tournaments generated before the match graph kept every match embedded in
+# `brackets`. They are converted once: elimination formats are rebuilt as a
+# graph and their recorded results replayed through the normal advancement,
+# round robin / Swiss matches (no links between them) are copied as they are.
+# The original array is kept in `legacy_brackets`.
+
+async def migrate_legacy_brackets() -> int:
+    """Convert every tournament still in the embedded format. Safe to run on every start."""
+    converted = 0
+    async for t in db[C_TOURNAMENTS].find({"brackets.0": {"$exists": True}}, {"_id": 0, "tournament_id": 1}):
+        try:
+            if await migrate_tournament_brackets(t["tournament_id"]):
+                converted += 1
+        except Exception as e:
+            logger.warning(f"Bracket conversion failed for {t['tournament_id']}: {e}")
+    if converted:
+        logger.info(f"Converted {converted} tournaments to match documents")
+    return converted
+
+
+async def migrate_tournament_brackets(tid: str) -> bool:
+    """Convert one tournament; False while another process holds the conversion."""
+    now_dt = datetime.now(timezone.utc)
+    now = now_dt.isoformat()
+    stale = (now_dt - timedelta(minutes=10)).isoformat()  # a conversion that died mid-way is retried
+    t = await db[C_TOURNAMENTS].find_one_and_update(
+        {"tournament_id": tid, "brackets.0": {"$exists": True},
+         "$or": [{"brackets_migrating_at": {"$exists": False}}, {"brackets_migrating_at": {"$lt": stale}}]},
+        {"$set": {"brackets_migrating_at": now}},
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER,
+    )
+    if not t:
+        current = await db[C_TOURNAMENTS].find_one({"tournament_id": tid}, {"_id": 0, "brackets": 1})
+        return bool(current) and not current.get("brackets")
+
+    legacy = [m for r in t["brackets"] for m in r.get("matches") or []]
+    results = []
+    if t["format"] in ("round_robin", "swiss"):
+        rounds = [{"round": r["round"], "name": r.get("name", f"Round {r['round']}")} for r in t["brackets"]]
+        matches = [_from_legacy(m) for m in legacy if m.get("player_a") and m.get("player_b")]
+    else:
+        rounds, matches = _build(t)
+        _keep_legacy_ids(matches, legacy)
+        results = sorted(
+            (m for m in legacy if m.get("status") == "completed" and m.get("winner_id")
+             and m.get("player_a") and m.get("player_b")),
+            key=lambda m: (m["round"], m["position"]),
+        )
+    for m in matches:
+        m["tournament_id"] = tid
+    await db[C_TMATCHES].delete_many({"tournament_id": tid})
+    if matches:
+        await db[C_TMATCHES].insert_many(matches)
+
+    completed_at = t.get("updated_at") or now
+    for r in results:
+        pair = [r["player_a"]["player_id"], r["player_b"]["player_id"]]
+        target = await db[C_TMATCHES].find_one(
+            {"tournament_id": tid, "status": "pending",
+             "player_a.player_id": {"$in": pair}, "player_b.player_id": {"$in": pair}},
+            {"_id": 0, "match_id": 1},
+        )
+        if not target:
+            logger.warning(f"Legacy result {r['match_id']} in {tid} has no matching bracket slot; skipped")
+            continue
+        await _record_result(tid, t, target["match_id"], r["winner_id"], r.get("score"), completed_at)
+
+    await db[C_TOURNAMENTS].update_one({"tournament_id": tid}, [{"$set": {
+        "legacy_brackets": "$brackets", "brackets": [], "rounds": {"$literal": rounds},
+        "current_round": {"$max": [{"$ifNull": ["$current_round", 0]}, 1]},
+        "updated_at": now,
+    }}, {"$unset": "brackets_migrating_at"}])
+
+    if t.get("status") == "in_progress":
+        if t["format"] == "swiss":
+            # The old format never paired rounds after the first
+            await _after_swiss_result(tid, t.get("current_round") or 1, len(rounds))
+        elif t["format"] == "round_robin":
+            await _after_round_robin_result(tid)
+    return True
+
+
+def _keep_legacy_ids(matches: List[dict], legacy: List[dict]) -> None:
+    """Both layouts number matches by (round, position): reuse the old ids so clients keep working."""
+    old_ids = {(m["round"], m["position"]): m["match_id"] for m in legacy}
+    renamed = {m["match_id"]: old_ids[(m["round"], m["position"])]
+               for m in matches if (m["round"], m["position"]) in old_ids}
+    for m in matches:
+        m["match_id"] = renamed.get(m["match_id"], m["match_id"])
+        if m.get("reset_match_id"):
+            m["reset_match_id"] = renamed.get(m["reset_match_id"], m["reset_match_id"])
+        for edge in ("winner_to", "loser_to"):
+            if m.get(edge):
+                m[edge] = {**m[edge], "match_id": renamed.get(m[edge]["match_id"], m[edge]["match_id"])}
+
+
+def _from_legacy(m: dict) -> dict:
+    a, b = m["player_a"], m["player_b"]
+    winner = m.get("winner_id")
+    loser = (b if a["player_id"] == winner else a)["player_id"] if winner else None
+    converted = engine._match(
+        m["round"], m["position"],
+        player_a={**a, "seed": a.get("seed", 0)}, player_b={**b, "seed": b.get("seed", 0)},
+        winner_id=winner, loser_id=loser, score=m.get("score"),
+        status="completed" if winner and m.get("status") == "completed" else "pending",
+    )
+    converted["match_id"] = m["match_id"]
+    return converted
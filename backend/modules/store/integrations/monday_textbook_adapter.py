@@ -11,6 +11,7 @@ import json
 from modules.integrations.monday.base_adapter import BaseMondayAdapter
 from modules.integrations.monday.config_manager import monday_config
 from core.database import db
+from modules.store.services.analytics_rollup_service import analytics_rollup_service
 
 logger = logging.getLogger(__name__)
 
@@ -338,6 +339,7 @@ class TextbookMondayAdapter(BaseMondayAdapter):
                 "last_synced_at": now,
             }}
         )
+        await analytics_rollup_service.record_order_change(order, {**order, "status": new_app_status})
 
         logger.info(f"[order_status_webhook] Order {order['order_id']} status: {old_status} → {new_app_status} (from Monday label '{new_label}')")
 
@@ -21,6 +21,7 @@ from datetime import datetime, timezone
 from modules.integrations.monday.base_adapter import BaseMondayAdapter
 from modules.integrations.monday.config_manager import monday_config
 from core.database import db
+from modules.store.services.analytics_rollup_service import analytics_rollup_service
 
 logger = logging.getLogger(__name__)
 
@@ -937,6 +938,9 @@ class TxbInventoryAdapter(BaseMondayAdapter):
                         "timestamp": now,
                     }
                     await db.inventory_movements.insert_one(movement)
+            await analytics_rollup_service.refresh_inventory(
+                item["book_id"] for item in adjustment.get("items", [])
+            )
 
             await db.stock_orders.update_one(
                 {"order_id": order_id},
@@ -1113,6 +1117,7 @@ class TxbInventoryAdapter(BaseMondayAdapter):
             "timestamp": datetime.now(timezone.utc).isoformat(),
         }
         await db.inventory_movements.insert_one(movement)
+        await analytics_rollup_service.refresh_inventory([product_data["book_id"]])
 
         logger.info(f"Create item webhook: imported '{item_name}' as {product_data['book_id']}")
 
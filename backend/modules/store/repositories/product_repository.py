@@ -32,6 +32,10 @@ class ProductRepository(BaseRepository):
         """Get producto by ID"""
         return await self.find_by_id(self.ID_FIELD, book_id)
     
+    async def get_by_ids(self, book_ids: List[str]) -> Dict[str, Dict]:
+        """Get productos by ID in one query ({book_id: producto})"""
+        return await self.find_by_ids(self.ID_FIELD, book_ids)
+    
     async def get_all_active(
         self,
         category: Optional[str] = None,
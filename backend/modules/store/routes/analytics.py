@@ -4,11 +4,14 @@ Comprehensive analytics and reports for admin decision making
 Admin-only access for sensitive financial data
 """
 from fastapi import APIRouter, HTTPException, Depends, Query
-from typing import Optional
+from typing import Literal, Optional
 from datetime import datetime, timezone, timedelta
+import asyncio
 
 from core.auth import get_admin_user
 from core.database import db
+from core.exports import ExportSpec, export_response, export_jobs
+from ..services.analytics_rollup_service import analytics_rollup_service
 
 router = APIRouter(prefix="/analytics", tags=["Store - Analytics"])
 
@@ -50,215 +53,47 @@ async def get_comprehensive_analytics(
             start_date = None
         end_date = now
     
-    date_filter = {}
-    if start_date:
-        date_filter = {
-            "created_at": {
-                "$gte": start_date.isoformat(),
-                "$lte": end_date.isoformat()
-            }
-        }
-    
+    # All sections are served from materialized rollups (see analytics_rollup_service)
+    await analytics_rollup_service.ensure_ready()
+    day_filter = analytics_rollup_service.day_filter(start_date, end_date)
+
+    (
+        revenue, by_status, by_grade, by_client,
+        by_student, by_book, inventory_results, monthly,
+    ) = await asyncio.gather(
+        analytics_rollup_service.revenue_summary(day_filter),
+        analytics_rollup_service.orders_by_status(day_filter),
+        analytics_rollup_service.orders_by_grade(day_filter),
+        analytics_rollup_service.top_clients(day_filter),
+        analytics_rollup_service.top_students(day_filter),
+        analytics_rollup_service.top_books(day_filter),
+        analytics_rollup_service.active_inventory(),
+        analytics_rollup_service.monthly_trends(),
+    )
+
     result = {
         "generated_at": now.isoformat(),
         "period": period,
         "year": year,
-        "revenue": {},
-        "orders": {},
+        "revenue": revenue,
+        "orders": {"by_status": by_status},
         "inventory": {},
-        "by_grade": {},
-        "by_client": [],
-        "by_student": [],
-        "by_book": [],
-        "trends": {},
+        "by_grade": by_grade,
+        "by_client": by_client,
+        "by_student": by_student,
+        "by_book": by_book,
+        "trends": {"monthly": monthly},
         "alerts": []
     }
     
-    # ============== REVENUE ANALYTICS ==============
-    revenue_pipeline = [
-        {"$match": {**date_filter, "status": {"$nin": ["cancelled", "draft"]}}},
-        {"$group": {
-            "_id": None,
-            "total_revenue": {"$sum": "$total_amount"},
-            "avg_order_value": {"$avg": "$total_amount"},
-            "total_orders": {"$sum": 1}
-        }}
-    ]
-    revenue_results = await db.store_textbook_orders.aggregate(revenue_pipeline).to_list(1)
-    if revenue_results:
-        result["revenue"] = {
-            "total": round(revenue_results[0].get("total_revenue", 0), 2),
-            "average_order_value": round(revenue_results[0].get("avg_order_value", 0), 2),
-            "order_count": revenue_results[0].get("total_orders", 0)
-        }
-    
-    # ============== ORDERS BY STATUS ==============
-    status_pipeline = [
-        {"$match": date_filter} if date_filter else {"$match": {}},
-        {"$group": {"_id": "$status", "count": {"$sum": 1}, "revenue": {"$sum": "$total_amount"}}}
-    ]
-    status_results = await db.store_textbook_orders.aggregate(status_pipeline).to_list(20)
-    result["orders"]["by_status"] = {
-        r["_id"]: {"count": r["count"], "revenue": round(r["revenue"], 2)} 
-        for r in status_results if r["_id"]
-    }
-    
-    # ============== ORDERS BY GRADE ==============
-    grade_pipeline = [
-        {"$match": date_filter} if date_filter else {"$match": {}},
-        {"$group": {
-            "_id": "$grade",
-            "order_count": {"$sum": 1},
-            "revenue": {"$sum": "$total_amount"},
-            "unique_students": {"$addToSet": "$student_id"}
-        }},
-        {"$project": {
-            "_id": 1,
-            "order_count": 1,
-            "revenue": 1,
-            "student_count": {"$size": "$unique_students"}
-        }},
-        {"$sort": {"_id": 1}}
-    ]
-    grade_results = await db.store_textbook_orders.aggregate(grade_pipeline).to_list(20)
-    result["by_grade"] = {
-        r["_id"]: {
-            "orders": r["order_count"],
-            "revenue": round(r["revenue"], 2),
-            "students": r["student_count"]
-        } for r in grade_results if r["_id"]
-    }
-    
-    # ============== TOP CLIENTS (USERS) ==============
-    client_pipeline = [
-        {"$match": {**date_filter, "status": {"$nin": ["cancelled", "draft"]}}},
-        {"$group": {
-            "_id": "$user_id",
-            "order_count": {"$sum": 1},
-            "total_spent": {"$sum": "$total_amount"},
-            "students": {"$addToSet": "$student_name"}
-        }},
-        {"$sort": {"total_spent": -1}},
-        {"$limit": 20}
-    ]
-    client_results = await db.store_textbook_orders.aggregate(client_pipeline).to_list(20)
-    
-    # Enrich with user info
-    for client in client_results:
-        user = await db.auth_users.find_one(
-            {"user_id": client["_id"]},
-            {"_id": 0, "name": 1, "email": 1}
-        )
-        result["by_client"].append({
-            "user_id": client["_id"],
-            "name": user.get("name", "Unknown") if user else "Unknown",
-            "email": user.get("email", "") if user else "",
-            "order_count": client["order_count"],
-            "total_spent": round(client["total_spent"], 2),
-            "students": client["students"]
-        })
-    
-    # ============== TOP STUDENTS ==============
-    student_pipeline = [
-        {"$match": {**date_filter, "status": {"$nin": ["cancelled", "draft"]}}},
-        {"$group": {
-            "_id": "$student_id",
-            "student_name": {"$first": "$student_name"},
-            "grade": {"$first": "$grade"},
-            "order_count": {"$sum": 1},
-            "total_spent": {"$sum": "$total_amount"},
-            "items_ordered": {"$sum": {"$size": {"$filter": {
-                "input": "$items",
-                "as": "item",
-                "cond": {"$gt": ["$$item.quantity_ordered", 0]}
-            }}}}
-        }},
-        {"$sort": {"total_spent": -1}},
-        {"$limit": 30}
-    ]
-    student_results = await db.store_textbook_orders.aggregate(student_pipeline).to_list(30)
-    result["by_student"] = [
-        {
-            "student_id": s["_id"],
-            "name": s["student_name"],
-            "grade": s["grade"],
-            "order_count": s["order_count"],
-            "items_ordered": s["items_ordered"],
-            "total_spent": round(s["total_spent"], 2)
-        } for s in student_results
-    ]
-    
-    # ============== BOOK ANALYTICS ==============
-    book_pipeline = [
-        {"$match": date_filter} if date_filter else {"$match": {}},
-        {"$unwind": "$items"},
-        {"$match": {"items.quantity_ordered": {"$gt": 0}}},
-        {"$group": {
-            "_id": "$items.book_id",
-            "book_name": {"$first": "$items.book_name"},
-            "total_ordered": {"$sum": "$items.quantity_ordered"},
-            "revenue": {"$sum": {"$multiply": ["$items.price", "$items.quantity_ordered"]}},
-            "unique_students": {"$addToSet": "$student_id"},
-            "orders": {"$addToSet": "$order_id"},
-            "grades": {"$addToSet": "$grade"}
-        }},
-        {"$project": {
-            "_id": 1,
-            "book_name": 1,
-            "total_ordered": 1,
-            "revenue": 1,
-            "student_count": {"$size": "$unique_students"},
-            "order_count": {"$size": "$orders"},
-            "grades": 1
-        }},
-        {"$sort": {"total_ordered": -1}}
-    ]
-    book_results = await db.store_textbook_orders.aggregate(book_pipeline).to_list(100)
-    
-    # Get inventory info for each book
-    for book in book_results:
-        product = await db.store_products.find_one(
-            {"book_id": book["_id"]},
-            {"_id": 0, "inventory_quantity": 1, "reserved_quantity": 1, "price": 1, "grade": 1}
-        )
-        inventory = 0
-        if product:
-            inventory = product.get("inventory_quantity", 0) - product.get("reserved_quantity", 0)
-        
-        result["by_book"].append({
-            "book_id": book["_id"],
-            "name": book["book_name"],
-            "total_sold": book["total_ordered"],
-            "revenue": round(book["revenue"], 2),
-            "student_count": book["student_count"],
-            "order_count": book["order_count"],
-            "grades": book["grades"],
-            "current_inventory": inventory,
-            "needs_restock": inventory < 5
-        })
-    
     # ============== INVENTORY OVERVIEW ==============
-    inventory_pipeline = [
-        {"$match": {"is_sysbook": True, "active": True}},
-        {"$project": {
-            "_id": 0,
-            "book_id": 1,
-            "name": 1,
-            "grade": 1,
-            "price": 1,
-            "inventory_quantity": {"$ifNull": ["$inventory_quantity", 0]},
-            "reserved_quantity": {"$ifNull": ["$reserved_quantity", 0]}
-        }}
-    ]
-    inventory_results = await db.store_products.aggregate(inventory_pipeline).to_list(200)
-    
     total_inventory = 0
     low_stock_count = 0
     out_of_stock_count = 0
     inventory_value = 0
     
     for prod in inventory_results:
-        available = prod["inventory_quantity"] - prod["reserved_quantity"]
+        available = prod["available"]
         total_inventory += available
         inventory_value += available * prod.get("price", 0)
         if available <= 0:
@@ -289,29 +124,6 @@ async def get_comprehensive_analytics(
         "out_of_stock_count": out_of_stock_count
     }
     
-    # ============== TRENDS (Monthly) ==============
-    trends_pipeline = [
-        {"$match": {"status": {"$nin": ["cancelled", "draft"]}}},
-        {"$addFields": {
-            "month": {"$substr": ["$created_at", 0, 7]}
-        }},
-        {"$group": {
-            "_id": "$month",
-            "orders": {"$sum": 1},
-            "revenue": {"$sum": "$total_amount"}
-        }},
-        {"$sort": {"_id": -1}},
-        {"$limit": 12}
-    ]
-    trends_results = await db.store_textbook_orders.aggregate(trends_pipeline).to_list(12)
-    result["trends"]["monthly"] = [
-        {
-            "month": t["_id"],
-            "orders": t["orders"],
-            "revenue": round(t["revenue"], 2)
-        } for t in reversed(trends_results)
-    ]
-    
     # ============== PURCHASE RECOMMENDATIONS ==============
     # Find books that are selling well but have low inventory
     recommendations = []
@@ -333,15 +145,52 @@ async def get_comprehensive_analytics(
     return result
 
 
-@router.get("/inventory-report")
-async def get_inventory_report(
-    admin: dict = Depends(get_admin_user)
-):
-    """
-    Detailed inventory report for all textbooks.
-    """
+@router.get("/rollups/status")
+async def get_rollup_status(admin: dict = Depends(get_admin_user)):
+    """Last rebuild time and document counts of the analytics rollups."""
     check_super_admin(admin)
-    
+    return await analytics_rollup_service.get_status()
+
+
+@router.post("/rollups/rebuild")
+async def rebuild_rollups(admin: dict = Depends(get_admin_user)):
+    """Recompute all analytics rollups from orders and products."""
+    check_super_admin(admin)
+    return await analytics_rollup_service.rebuild()
+
+
+INVENTORY_COLUMNS = [
+    ("book_id", "Book ID"),
+    ("name", "Name"),
+    ("grade", "Grade"),
+    ("price", "Price"),
+    ("active", "Active"),
+    ("inventory", "Inventory"),
+    ("reserved", "Reserved"),
+    ("available", "Available"),
+    ("total_sold", "Total Sold"),
+    ("total_revenue", "Total Revenue"),
+    ("status", "Status"),
+    ("publisher", "Publisher"),
+    ("isbn", "ISBN"),
+]
+
+
+async def _inventory_rows():
+    """Stream the inventory report, one row per textbook, with its sales totals."""
+    # Get sales data for each book
+    sales_pipeline = [
+        {"$unwind": "$items"},
+        {"$match": {"items.quantity_ordered": {"$gt": 0}}},
+        {"$group": {
+            "_id": "$items.book_id",
+            "total_sold": {"$sum": "$items.quantity_ordered"},
+            "total_revenue": {"$sum": {"$multiply": ["$items.price", "$items.quantity_ordered"]}}
+        }}
+    ]
+    sales_data = await db.store_textbook_orders.aggregate(sales_pipeline).to_list(None)
+    sales_by_book = {s["_id"]: s for s in sales_data}
+
     pipeline = [
         {"$match": {"is_sysbook": True}},
         {"$project": {
@@ -359,28 +208,12 @@ async def get_inventory_report(
         }},
         {"$sort": {"grade": 1, "name": 1}}
     ]
-    
-    products = await db.store_products.aggregate(pipeline).to_list(500)
-    
-    # Get sales data for each book
-    sales_pipeline = [
-        {"$unwind": "$items"},
-        {"$match": {"items.quantity_ordered": {"$gt": 0}}},
-        {"$group": {
-            "_id": "$items.book_id",
-            "total_sold": {"$sum": "$items.quantity_ordered"},
-            "total_revenue": {"$sum": {"$multiply": ["$items.price", "$items.quantity_ordered"]}}
-        }}
-    ]
-    sales_data = await db.store_textbook_orders.aggregate(sales_pipeline).to_list(500)
-    sales_by_book = {s["_id"]: s for s in sales_data}
-    
-    result = []
-    for prod in products:
+
+    async for prod in db.store_products.aggregate(pipeline):
         available = prod["inventory_quantity"] - prod["reserved_quantity"]
         sales = sales_by_book.get(prod["book_id"], {})
-        
-        result.append({
+
+        yield {
             "book_id": prod["book_id"],
             "name": prod["name"],
             "grade": prod.get("grade") or (prod.get("grades", [None])[0] if prod.get("grades") else None),
@@ -394,8 +227,27 @@ async def get_inventory_report(
             "status": "out_of_stock" if available <= 0 else ("low_stock" if available < 5 else "in_stock"),
             "publisher": prod.get("publisher"),
             "isbn": prod.get("isbn")
-        })
-    
+        }
+
+
+def inventory_report_export() -> ExportSpec:
+    return ExportSpec(name="inventory_report", columns=INVENTORY_COLUMNS, source=_inventory_rows)
+
+
+export_jobs.register("inventory_report", inventory_report_export, "Textbook inventory with sales totals")
+
+
+@router.get("/inventory-report")
+async def get_inventory_report(
+    admin: dict = Depends(get_admin_user)
+):
+    """
+    Detailed inventory report for all textbooks.
+    """
+    check_super_admin(admin)
+
+    result = [row async for row in _inventory_rows()]
+
     return {
         "generated_at": datetime.now(timezone.utc).isoformat(),
         "total_products": len(result),
@@ -403,6 +255,67 @@ async def get_inventory_report(
     }
 
 
+@router.get("/inventory-report/export")
+async def export_inventory_report(
+    fmt: Literal["csv", "xlsx"] = Query("csv", alias="format"),
+    admin: dict = Depends(get_admin_user)
+):
+    """Download the inventory report as CSV or XLSX (streamed)."""
+    check_super_admin(admin)
+    return export_response(inventory_report_export(), fmt)
+
+
+CLIENT_ORDER_COLUMNS = [
+    ("order_id", "Order ID"),
+    ("created_at", "Created At"),
+    ("status", "Status"),
+    ("student_name", "Student"),
+    ("grade", "Grade"),
+    ("book_code", "Book Code"),
+    ("book_name", "Book"),
+    ("quantity", "Quantity"),
+    ("price", "Price"),
+    ("line_total", "Line Total"),
+    ("order_total", "Order Total"),
+]
+
+
+def _client_order_lines(order: dict):
+    """One row per ordered book of an order."""
+    for item in order.get("items", []):
+        qty = item.get("quantity_ordered", 0)
+        if qty > 0:
+            yield {
+                "order_id": order.get("order_id"),
+                "created_at": order.get("created_at"),
+                "status": order.get("status"),
+                "student_name": order.get("student_name"),
+                "grade": order.get("grade"),
+                "book_code": item.get("book_code"),
+                "book_name": item.get("book_name"),
+                "quantity": qty,
+                "price": item.get("price", 0),
+                "line_total": round(item.get("price", 0) * qty, 2),
+                "order_total": order.get("total_amount", 0),
+            }
+
+
+def client_orders_export(user_id: str, status: Optional[str] = None) -> ExportSpec:
+    query = {"user_id": user_id}
+    if status:
+        query["status"] = status
+    return ExportSpec(
+        name="client_orders",
+        columns=CLIENT_ORDER_COLUMNS,
+        source=lambda: db.store_textbook_orders.find(query, {"_id": 0}).sort("created_at", -1),
+        formatter=_client_order_lines,
+        filename=f"client_orders_{user_id}",
+    )
+
+
+export_jobs.register("client_orders", client_orders_export, "Ordered books of one client, one row per book")
+
+
 @router.get("/client-report/{user_id}")
 async def get_client_report(
     user_id: str,
@@ -426,7 +339,7 @@ async def get_client_report(
     orders = await db.store_textbook_orders.find(
         {"user_id": user_id},
         {"_id": 0}
-    ).sort("created_at", -1).to_list(100)
+    ).sort("created_at", -1).to_list(None)
     
     # Calculate totals
     total_spent = sum(o.get("total_amount", 0) for o in orders if o.get("status") not in ["cancelled", "draft"])
@@ -436,7 +349,7 @@ async def get_client_report(
     students = await db.store_students.find(
         {"user_id": user_id},
         {"_id": 0, "student_id": 1, "full_name": 1, "enrollments": 1}
-    ).to_list(20)
+    ).to_list(None)
     
     return {
         "user": {
@@ -460,3 +373,15 @@ async def get_client_report(
         ],
         "orders": orders
     }
+
+
+@router.get("/client-report/{user_id}/export")
+async def export_client_orders(
+    user_id: str,
+    fmt: Literal["csv", "xlsx"] = Query("csv", alias="format"),
+    status: Optional[str] = None,
+    admin: dict = Depends(get_admin_user)
+):
+    """Download a client's ordered books as CSV or XLSX (streamed)."""
+    check_super_admin(admin)
+    return export_response(client_orders_export(user_id, status), fmt)
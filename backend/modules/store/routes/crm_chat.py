@@ -2,8 +2,9 @@
 CRM Chat Routes
 Multi-topic customer chat via Monday.com Admin Customers board.
 """
-from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi import APIRouter, HTTPException, Depends, Request, Query
 from fastapi.responses import JSONResponse
+from typing import Optional
 from core.auth import get_current_user, get_admin_user
 from ..services.crm_chat_service import crm_chat_service
 from ..integrations.monday_crm_adapter import crm_monday_adapter
@@ -75,9 +76,14 @@ async def reply_to_topic(
 # ============== ADMIN ENDPOINTS ==============
 
 @router.get("/admin/inbox")
-async def admin_inbox(admin: dict = Depends(get_admin_user)):
-    """Get all CRM conversations for admin"""
-    return await crm_chat_service.get_admin_inbox()
+async def admin_inbox(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=200),
+    q: Optional[str] = Query(None, description="Filter by student name or email"),
+    admin: dict = Depends(get_admin_user)
+):
+    """Get CRM conversations for admin, most recent activity first"""
+    return await crm_chat_service.get_admin_inbox(skip=skip, limit=limit, q=q)
 
 
 @router.get("/admin/{student_id}/topics")
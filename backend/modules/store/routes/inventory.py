@@ -15,6 +15,7 @@ import logging
 
 from core.auth import get_admin_user
 from core.database import db
+from ..services.analytics_rollup_service import analytics_rollup_service
 
 logger = logging.getLogger(__name__)
 
@@ -228,6 +229,7 @@ async def adjust_stock(
         "timestamp": datetime.now(timezone.utc).isoformat(),
     }
     await db.inventory_movements.insert_one(movement)
+    await analytics_rollup_service.refresh_inventory([adjustment.book_id])
 
     result = {
         "success": True,
@@ -300,6 +302,7 @@ async def batch_adjust_stock(
             "new_quantity": new_qty,
         })
 
+    await analytics_rollup_service.refresh_inventory(r["book_id"] for r in results if r["success"])
     return {"results": results, "total": len(results)}
 
 
@@ -362,6 +365,7 @@ async def bulk_delete_products(data: dict, admin: dict = Depends(get_admin_user)
     if not product_ids:
         raise HTTPException(status_code=400, detail="No products specified")
     r = await db.store_products.delete_many({"book_id": {"$in": product_ids}})
+    await analytics_rollup_service.refresh_inventory(product_ids)
     return {"status": "deleted", "count": r.deleted_count}
 
 
@@ -376,6 +380,7 @@ async def bulk_archive_products(data: dict, admin: dict = Depends(get_admin_user
         {"book_id": {"$in": product_ids}},
         {"$set": {"archived": True, "active": False, "archived_at": datetime.now(timezone.utc).isoformat()}}
     )
+    await analytics_rollup_service.refresh_inventory(product_ids)
     return {"status": "archived", "count": r.modified_count}
 
 
@@ -389,5 +394,6 @@ async def bulk_unarchive_products(data: dict, admin: dict = Depends(get_admin_us
         {"book_id": {"$in": product_ids}},
         {"$set": {"active": True}, "$unset": {"archived": "", "archived_at": ""}}
     )
+    await analytics_rollup_service.refresh_inventory(product_ids)
     return {"status": "unarchived", "count": r.modified_count}
 
@@ -13,6 +13,7 @@ from datetime import datetime, timezone
 
 from core.database import db
 from core.auth import get_admin_user
+from ..services.analytics_rollup_service import analytics_rollup_service
 
 router = APIRouter(prefix="/inventory-import", tags=["Store - Inventory Import"])
 
@@ -266,6 +267,7 @@ async def execute_csv_import(
         updated = 0
         skipped = 0
         errors = []
+        touched = []
         now = datetime.now(timezone.utc).isoformat()
         
         for row_num, row in enumerate(reader, start=2):
@@ -315,6 +317,7 @@ async def execute_csv_import(
                             "updated_by": admin.get("user_id")
                         }}
                     )
+                    touched.append(existing.get("book_id"))
                     updated += 1
                 else:
                     # Create new product in private catalog
@@ -342,11 +345,14 @@ async def execute_csv_import(
                     }
                     
                     await db.store_products.insert_one(new_product)
+                    touched.append(book_id)
                     created += 1
                     
             except Exception as e:
                 errors.append({"row": row_num, "error": str(e)})
         
+        await analytics_rollup_service.refresh_inventory(touched)
+        
         # Log import
         await db.import_history.insert_one({
             "import_id": f"imp_{datetime.now().strftime('%Y%m%d%H%M%S')}",
@@ -16,6 +16,7 @@ import logging
 
 from core.auth import get_admin_user
 from core.database import db
+from ..services.analytics_rollup_service import analytics_rollup_service
 
 logger = logging.getLogger(__name__)
 
@@ -128,6 +129,7 @@ async def apply_stock_changes(order: dict, admin: dict):
         await db.inventory_movements.insert_one(movement)
         movements.append({"book_id": book_id, "old_qty": old_qty, "new_qty": new_qty, "change": qty_change})
 
+    await analytics_rollup_service.refresh_inventory(m["book_id"] for m in movements)
     return movements
 
 
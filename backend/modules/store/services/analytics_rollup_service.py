@@ -0,0 +1,672 @@
+"""
+Analytics Rollup Service
+Materialized sales and inventory aggregates for the admin analytics dashboard.
+
+Instead of re-aggregating every textbook order on each dashboard open, small
+rollup documents are kept per day (plus a lifetime "all" bucket) and per
+status / grade / book / customer. They are updated incrementally on every order
+write and stock move, and rebuilt from scratch with `$merge` pipelines on
+demand and on a schedule (to repair any drift). Dashboard queries only read rollups, so their
+cost depends on the size of the period and catalog, not on order history.
+
+Day granularity: period filters (week/month/...) are applied on whole UTC days.
+Draft orders are not tracked: they are carts, not sales, and change on every click.
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+from datetime import datetime, timedelta, timezone
+import asyncio
+import logging
+
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+from core.database import db
+
+logger = logging.getLogger(__name__)
+
+ORDERS_COLLECTION = "store_textbook_orders"
+PRODUCTS_COLLECTION = "store_products"
+
+DAILY_COLLECTION = "store_analytics_daily"          # (day, status)
+GRADE_COLLECTION = "store_analytics_grade"          # (day, status, grade)
+BOOK_COLLECTION = "store_analytics_book"            # (day, status, book_id)
+CUSTOMER_COLLECTION = "store_analytics_customer"    # (day, status, user_id, student_id)
+INVENTORY_COLLECTION = "store_analytics_inventory"  # one doc per sysbook product
+META_COLLECTION = "store_analytics_rollup_meta"
+
+ROLLUP_COLLECTIONS = (
+    DAILY_COLLECTION, GRADE_COLLECTION, BOOK_COLLECTION,
+    CUSTOMER_COLLECTION, INVENTORY_COLLECTION,
+)
+
+# Bump when the rollup document shape changes; forces a rebuild on next read.
+ROLLUP_VERSION = 1
+
+# Rebuild stamp on every rollup row. A rebuild merges fresh rows stamped with its
+# start time, then drops rows stamped earlier, so readers never see empty rollups.
+BUILT_AT_FIELD = "_built_at"
+
+# Periodic full rebuild, to repair drift from order writes that bypass the deltas.
+RECONCILE_INTERVAL_SECONDS = 6 * 3600
+
+# Lifetime bucket. Sorts after every ISO date, so day-range filters skip it.
+ALL_BUCKET = "all"
+
+# Fields needed to compute an order's rollup contribution.
+ORDER_PROJECTION = {
+    "_id": 0, "order_id": 1, "status": 1, "created_at": 1, "total_amount": 1,
+    "grade": 1, "student_id": 1, "student_name": 1, "user_id": 1, "items": 1,
+}
+
+UNTRACKED_STATUSES = ["draft"]
+EXCLUDED_REVENUE_STATUSES = ["cancelled", "draft"]
+LOW_STOCK_THRESHOLD = 5
+
+
+def _id_part(value) -> str:
+    return "" if value is None else str(value)
+
+
+def _map_key(value) -> str:
+    """Encode a value for use as a sub-document key ('.' and '$' are reserved)."""
+    return _id_part(value).replace(".", "．").replace("$", "＄") or "unknown"
+
+
+def _unmap_key(key: str) -> str:
+    return key.replace("．", ".").replace("＄", "$")
+
+
+def _order_day(order: Dict) -> str:
+    created = order.get("created_at")
+    if isinstance(created, datetime):
+        return created.astimezone(timezone.utc).strftime("%Y-%m-%d")
+    return (created or "")[:10]
+
+
+def _order_contributions(order: Dict) -> Dict[str, List[tuple]]:
+    """Rollup deltas of a single order: {collection: [(_id, key_fields, inc, set)]}."""
+    out = {c: [] for c in (DAILY_COLLECTION, GRADE_COLLECTION, BOOK_COLLECTION, CUSTOMER_COLLECTION)}
+    status = order.get("status")
+    if status in UNTRACKED_STATUSES:
+        return out
+    grade = order.get("grade")
+    student_id = order.get("student_id")
+    user_id = order.get("user_id")
+    total = float(order.get("total_amount") or 0)
+    student_key = _map_key(student_id)
+
+    # Collapse duplicate lines of the same book so each order counts once per book
+    books: Dict[str, Dict] = {}
+    items_ordered = 0
+    for item in order.get("items") or []:
+        qty = item.get("quantity_ordered") or 0
+        if qty <= 0:
+            continue
+        items_ordered += 1
+        entry = books.setdefault(item.get("book_id"), {"name": item.get("book_name"), "qty": 0, "revenue": 0.0})
+        entry["qty"] += qty
+        entry["revenue"] += float(item.get("price") or 0) * qty
+
+    for day in (_order_day(order), ALL_BUCKET):
+        out[DAILY_COLLECTION].append((
+            f"{day}|{_id_part(status)}",
+            {"day": day, "status": status},
+            {"orders": 1, "revenue": total},
+            {},
+        ))
+        out[GRADE_COLLECTION].append((
+            f"{day}|{_id_part(status)}|{_id_part(grade)}",
+            {"day": day, "status": status, "grade": grade},
+            {"orders": 1, "revenue": total, f"students.{student_key}": 1},
+            {},
+        ))
+        out[CUSTOMER_COLLECTION].append((
+            f"{day}|{_id_part(status)}|{_id_part(user_id)}|{_id_part(student_id)}",
+            {"day": day, "status": status, "user_id": user_id, "student_id": student_id},
+            {"orders": 1, "spent": total, "items_ordered": items_ordered},
+            {"student_name": order.get("student_name"), "grade": grade},
+        ))
+        for book_id, book in books.items():
+            out[BOOK_COLLECTION].append((
+                f"{day}|{_id_part(status)}|{_id_part(book_id)}",
+                {"day": day, "status": status, "book_id": book_id},
+                {
+                    "qty": book["qty"], "revenue": book["revenue"], "orders": 1,
+                    f"students.{student_key}": 1, f"grades.{_map_key(grade)}": 1,
+                },
+                {"book_name": book["name"]},
+            ))
+    return out
+
+
+def _count_map_expr(array_field: str) -> Dict:
+    """Aggregation expression turning an array of keys into a {key: occurrences} document."""
+    return {"$arrayToObject": {"$map": {
+        "input": {"$setUnion": [array_field]},
+        "as": "k",
+        "in": {"k": "$$k", "v": {"$size": {"$filter": {
+            "input": array_field, "cond": {"$eq": ["$$this", "$$k"]},
+        }}}},
+    }}}
+
+
+def _map_key_expr(field: str) -> Dict:
+    """Pipeline counterpart of `_map_key`."""
+    raw = {"$let": {
+        "vars": {"v": {"$ifNull": [field, ""]}},
+        "in": {"$cond": [{"$eq": ["$$v", ""]}, "unknown", {"$toString": "$$v"}]},
+    }}
+    dotless = {"$replaceAll": {"input": raw, "find": ".", "replacement": "．"}}
+    return {"$replaceAll": {"input": dotless, "find": {"$literal": "$"}, "replacement": "＄"}}
+
+
+def _id_part_expr(field: str) -> Dict:
+    return {"$toString": {"$ifNull": [field, ""]}}
+
+
+_DAY_EXPR = {"$cond": [
+    {"$eq": [{"$type": "$created_at"}, "date"]},
+    {"$dateToString": {"format": "%Y-%m-%d", "date": "$created_at"}},
+    {"$substrCP": [{"$ifNull": ["$created_at", ""]}, 0, 10]},
+]}
+
+_BUCKET_STAGES = [
+    {"$addFields": {"_bucket": ["$_day", ALL_BUCKET]}},
+    {"$unwind": "$_bucket"},
+]
+
+
+def _merge_stages(collection: str, built_at: str) -> List[Dict]:
+    return [
+        {"$addFields": {BUILT_AT_FIELD: built_at}},
+        {"$merge": {"into": collection, "on": "_id", "whenMatched": "replace", "whenNotMatched": "insert"}},
+    ]
+
+
+def _sum_counts(maps: Iterable[Dict]) -> Dict[str, int]:
+    totals: Dict[str, int] = {}
+    for m in maps:
+        for k, v in (m or {}).items():
+            totals[k] = totals.get(k, 0) + (v or 0)
+    return {_unmap_key(k): v for k, v in totals.items() if v > 0}
+
+
+class AnalyticsRollupService:
+    """Maintains and queries the analytics rollup collections"""
+
+    def __init__(self):
+        self._ready = False
+        self._lock = asyncio.Lock()
+        self._reconcile_task: Optional[asyncio.Task] = None
+
+    # ---------- Incremental maintenance ----------
+
+    async def record_order_change(self, before: Optional[Dict], after: Optional[Dict]) -> None:
+        """
+        Apply the rollup delta between two snapshots of an order.
+        `before=None` records a new order; `after=None` removes one.
+        Never raises — rollups can always be rebuilt with `rebuild()`.
+        """
+        await self.record_order_changes([(before, after)])
+
+    async def record_order_changes(self, changes: Iterable[Tuple[Optional[Dict], Optional[Dict]]]) -> None:
+        """Apply the deltas of many (before, after) pairs in one bulk write per collection."""
+        try:
+            changes = list(changes)
+            ops: Dict[str, Dict[str, Dict]] = {}
+            for before, after in changes:
+                for snapshot, sign in ((before, -1), (after, 1)):
+                    if not snapshot:
+                        continue
+                    for coll, entries in _order_contributions(snapshot).items():
+                        for _id, key_fields, inc, set_fields in entries:
+                            ops.setdefault(coll, {}).setdefault(_id, {"key": key_fields, "inc": {}, "set": {}})
+                            pending = ops[coll][_id]
+                            for field, value in inc.items():
+                                pending["inc"][field] = pending["inc"].get(field, 0) + sign * value
+                            if sign > 0:
+                                pending["set"].update(set_fields)
+
+            # Rows created here are newer than any rebuild already running, which keeps them
+            built_at = datetime.now(timezone.utc).isoformat()
+            writes = []
+            for coll, by_id in ops.items():
+                requests = []
+                for _id, pending in by_id.items():
+                    inc = {k: v for k, v in pending["inc"].items() if v}
+                    if not inc and not pending["set"]:
+                        continue
+                    update = {"$setOnInsert": {**pending["key"], BUILT_AT_FIELD: built_at}}
+                    if inc:
+                        update["$inc"] = inc
+                    if pending["set"]:
+                        update["$set"] = pending["set"]
+                    requests.append(UpdateOne({"_id": _id}, update, upsert=True))
+                if requests:
+                    writes.append(db[coll].bulk_write(requests, ordered=False))
+            if writes:
+                await asyncio.gather(*writes)
+
+            book_ids = {
+                item.get("book_id")
+                for pair in changes for snapshot in pair if snapshot
+                for item in snapshot.get("items") or [] if item.get("book_id")
+            }
+            if book_ids:
+                await self.refresh_inventory(book_ids)
+        except Exception as e:
+            logger.warning(f"[analytics_rollup] Order delta failed (non-blocking): {e}")
+
+    async def refresh_inventory(self, book_ids: Iterable[str]) -> None:
+        """Re-materialize inventory rows after a stock movement."""
+        try:
+            book_ids = [b for b in set(book_ids) if b]
+            if not book_ids:
+                return
+            products = await db[PRODUCTS_COLLECTION].find(
+                {"book_id": {"$in": book_ids}, "is_sysbook": True},
+                {"_id": 0, "book_id": 1, "name": 1, "grade": 1, "price": 1, "active": 1,
+                 "inventory_quantity": 1, "reserved_quantity": 1},
+            ).to_list(len(book_ids))
+            built_at = datetime.now(timezone.utc).isoformat()
+            requests = [
+                UpdateOne(
+                    {"_id": p["book_id"]},
+                    {"$set": self._inventory_row(p), "$setOnInsert": {BUILT_AT_FIELD: built_at}},
+                    upsert=True,
+                )
+                for p in products
+            ]
+            found = {p["book_id"] for p in products}
+            missing = [b for b in book_ids if b not in found]
+            if requests:
+                await db[INVENTORY_COLLECTION].bulk_write(requests, ordered=False)
+            if missing:
+                await db[INVENTORY_COLLECTION].delete_many({"_id": {"$in": missing}})
+        except Exception as e:
+            logger.warning(f"[analytics_rollup] Inventory refresh failed (non-blocking): {e}")
+
+    @staticmethod
+    def _inventory_row(product: Dict) -> Dict:
+        inventory = product.get("inventory_quantity") or 0
+        reserved = product.get("reserved_quantity") or 0
+        return {
+            "book_id": product["book_id"],
+            "name": product.get("name"),
+            "grade": product.get("grade"),
+            "price": product.get("price") or 0,
+            "active": product.get("active", False),
+            "inventory_quantity": inventory,
+            "reserved_quantity": reserved,
+            "available": inventory - reserved,
+        }
+
+    # ---------- Backfill ----------
+
+    async def ensure_ready(self) -> None:
+        """Build rollups on first use (or after a ROLLUP_VERSION bump)."""
+        if self._ready:
+            return
+        async with self._lock:
+            if self._ready:
+                return
+            meta = await db[META_COLLECTION].find_one({"_id": "state"})
+            if not meta or meta.get("version") != ROLLUP_VERSION:
+                await self._rebuild_locked()
+            self._ready = True
+
+    async def rebuild(self) -> Dict:
+        """Recompute every rollup from source collections with `$merge` pipelines."""
+        async with self._lock:
+            result = await self._rebuild_locked()
+            self._ready = True
+            return result
+
+    async def _rebuild_locked(self) -> Dict:
+        started = datetime.now(timezone.utc)
+        built_at = started.isoformat()
+        backfills = (
+            (ORDERS_COLLECTION, self._daily_backfill(), DAILY_COLLECTION),
+            (ORDERS_COLLECTION, self._grade_backfill(), GRADE_COLLECTION),
+            (ORDERS_COLLECTION, self._book_backfill(), BOOK_COLLECTION),
+            (ORDERS_COLLECTION, self._customer_backfill(), CUSTOMER_COLLECTION),
+            (PRODUCTS_COLLECTION, self._inventory_backfill(), INVENTORY_COLLECTION),
+        )
+        await asyncio.gather(*(
+            db[source].aggregate([*pipeline, *_merge_stages(target, built_at)]).to_list(None)
+            for source, pipeline, target in backfills
+        ))
+        # Rows no longer produced by any order (or product) are the stale ones
+        stale = {"$or": [{BUILT_AT_FIELD: {"$lt": built_at}}, {BUILT_AT_FIELD: {"$exists": False}}]}
+        await asyncio.gather(*(db[c].delete_many(stale) for c in ROLLUP_COLLECTIONS))
+        finished = datetime.now(timezone.utc)
+        meta = {
+            "version": ROLLUP_VERSION,
+            "rebuilt_at": finished.isoformat(),
+            "duration_ms": round((finished - started).total_seconds() * 1000),
+        }
+        await db[META_COLLECTION].update_one({"_id": "state"}, {"$set": meta}, upsert=True)
+        logger.info(f"[analytics_rollup] Rollups rebuilt in {meta['duration_ms']}ms")
+        return meta
+
+    def start_reconcile(self) -> None:
+        """Rebuild every RECONCILE_INTERVAL_SECONDS in the background (one worker per interval)."""
+        if self._reconcile_task and not self._reconcile_task.done():
+            return
+        self._reconcile_task = asyncio.create_task(self._reconcile_loop())
+
+    async def _reconcile_loop(self):
+        while True:
+            await asyncio.sleep(RECONCILE_INTERVAL_SECONDS)
+            try:
+                if await self._claim_reconcile():
+                    await self.rebuild()
+            except Exception as e:
+                logger.warning(f"[analytics_rollup] Scheduled reconcile failed: {e}")
+
+    async def _claim_reconcile(self) -> bool:
+        """Atomically take this interval's reconcile; other workers see it as already claimed."""
+        now = datetime.now(timezone.utc)
+        try:
+            await db[META_COLLECTION].update_one(
+                {"_id": "reconcile", "$or": [
+                    {"next_run": {"$lte": now.isoformat()}},
+                    {"next_run": {"$exists": False}},
+                ]},
+                {"$set": {"next_run": (now + timedelta(seconds=RECONCILE_INTERVAL_SECONDS * 0.9)).isoformat()}},
+                upsert=True,
+            )
+            return True
+        except DuplicateKeyError:
+            return False
+
+    @staticmethod
+    def _order_base_stages() -> List[Dict]:
+        return [
+            {"$match": {"status": {"$nin": UNTRACKED_STATUSES}}},
+            {"$addFields": {"_day": _DAY_EXPR, "_total": {"$ifNull": ["$total_amount", 0]}}},
+            *_BUCKET_STAGES,
+        ]
+
+    def _daily_backfill(self) -> List[Dict]:
+        return [
+            *self._order_base_stages(),
+            {"$group": {
+                "_id": {"$concat": ["$_bucket", "|", _id_part_expr("$status")]},
+                "day": {"$first": "$_bucket"},
+                "status": {"$first": "$status"},
+                "orders": {"$sum": 1},
+                "revenue": {"$sum": "$_total"},
+            }},
+        ]
+
+    def _grade_backfill(self) -> List[Dict]:
+        return [
+            *self._order_base_stages(),
+            {"$group": {
+                "_id": {"$concat": ["$_bucket", "|", _id_part_expr("$status"), "|", _id_part_expr("$grade")]},
+                "day": {"$first": "$_bucket"},
+                "status": {"$first": "$status"},
+                "grade": {"$first": "$grade"},
+                "orders": {"$sum": 1},
+                "revenue": {"$sum": "$_total"},
+                "students": {"$push": _map_key_expr("$student_id")},
+            }},
+            {"$addFields": {"students": _count_map_expr("$students")}},
+        ]
+
+    def _book_backfill(self) -> List[Dict]:
+        return [
+            {"$match": {"status": {"$nin": UNTRACKED_STATUSES}}},
+            {"$unwind": "$items"},
+            {"$match": {"items.quantity_ordered": {"$gt": 0}}},
+            # One row per (order, book) so duplicated lines count the order once
+            {"$group": {
+                "_id": {"order": "$_id", "book_id": "$items.book_id"},
+                "book_name": {"$first": "$items.book_name"},
+                "qty": {"$sum": "$items.quantity_ordered"},
+                "revenue": {"$sum": {"$multiply": [{"$ifNull": ["$items.price", 0]}, "$items.quantity_ordered"]}},
+                "status": {"$first": "$status"},
+                "grade": {"$first": "$grade"},
+                "student_id": {"$first": "$student_id"},
+                "created_at": {"$first": "$created_at"},
+            }},
+            {"$addFields": {"_day": _DAY_EXPR, "book_id": "$_id.book_id"}},
+            *_BUCKET_STAGES,
+            {"$group": {
+                "_id": {"$concat": ["$_bucket", "|", _id_part_expr("$status"), "|", _id_part_expr("$book_id")]},
+                "day": {"$first": "$_bucket"},
+                "status": {"$first": "$status"},
+                "book_id": {"$first": "$book_id"},
+                "book_name": {"$last": "$book_name"},
+                "qty": {"$sum": "$qty"},
+                "revenue": {"$sum": "$revenue"},
+                "orders": {"$sum": 1},
+                "students": {"$push": _map_key_expr("$student_id")},
+                "grades": {"$push": _map_key_expr("$grade")},
+            }},
+            {"$addFields": {"students": _count_map_expr("$students"), "grades": _count_map_expr("$grades")}},
+        ]
+
+    def _customer_backfill(self) -> List[Dict]:
+        return [
+            *self._order_base_stages(),
+            {"$group": {
+                "_id": {"$concat": [
+                    "$_bucket", "|", _id_part_expr("$status"), "|",
+                    _id_part_expr("$user_id"), "|", _id_part_expr("$student_id"),
+                ]},
+                "day": {"$first": "$_bucket"},
+                "status": {"$first": "$status"},
+                "user_id": {"$first": "$user_id"},
+                "student_id": {"$first": "$student_id"},
+                "student_name": {"$last": "$student_name"},
+                "grade": {"$last": "$grade"},
+                "orders": {"$sum": 1},
+                "spent": {"$sum": "$_total"},
+                "items_ordered": {"$sum": {"$size": {"$filter": {
+                    "input": {"$ifNull": ["$items", []]},
+                    "as": "item",
+                    "cond": {"$gt": ["$$item.quantity_ordered", 0]},
+                }}}},
+            }},
+        ]
+
+    @staticmethod
+    def _inventory_backfill() -> List[Dict]:
+        return [
+            {"$match": {"is_sysbook": True, "book_id": {"$exists": True}}},
+            {"$project": {
+                "_id": "$book_id",
+                "book_id": 1,
+                "name": 1,
+                "grade": 1,
+                "price": {"$ifNull": ["$price", 0]},
+                "active": {"$ifNull": ["$active", False]},
+                "inventory_quantity": {"$ifNull": ["$inventory_quantity", 0]},
+                "reserved_quantity": {"$ifNull": ["$reserved_quantity", 0]},
+                "available": {"$subtract": [
+                    {"$ifNull": ["$inventory_quantity", 0]}, {"$ifNull": ["$reserved_quantity", 0]},
+                ]},
+            }},
+        ]
+
+    # ---------- Dashboard queries ----------
+
+    @staticmethod
+    def day_filter(start: Optional[datetime], end: Optional[datetime]) -> Dict:
+        """Rollup filter for a period; no start means the lifetime bucket."""
+        if not start:
+            return {"day": ALL_BUCKET}
+        return {"day": {"$gte": start.strftime("%Y-%m-%d"), "$lte": end.strftime("%Y-%m-%d")}}
+
+    async def revenue_summary(self, day_filter: Dict) -> Dict:
+        rows = await db[DAILY_COLLECTION].aggregate([
+            {"$match": {**day_filter, "status": {"$nin": EXCLUDED_REVENUE_STATUSES}}},
+            {"$group": {"_id": None, "revenue": {"$sum": "$revenue"}, "orders": {"$sum": "$orders"}}},
+        ]).to_list(1)
+        if not rows or not rows[0]["orders"]:
+            return {}
+        revenue, orders = rows[0]["revenue"], rows[0]["orders"]
+        return {
+            "total": round(revenue, 2),
+            "average_order_value": round(revenue / orders, 2),
+            "order_count": orders,
+        }
+
+    async def orders_by_status(self, day_filter: Dict) -> Dict:
+        rows = await db[DAILY_COLLECTION].aggregate([
+            {"$match": day_filter},
+            {"$group": {"_id": "$status", "count": {"$sum": "$orders"}, "revenue": {"$sum": "$revenue"}}},
+        ]).to_list(None)
+        return {
+            r["_id"]: {"count": r["count"], "revenue": round(r["revenue"], 2)}
+            for r in rows if r["_id"] and r["count"] > 0
+        }
+
+    async def orders_by_grade(self, day_filter: Dict) -> Dict:
+        rows = await db[GRADE_COLLECTION].aggregate([
+            {"$match": day_filter},
+            {"$group": {
+                "_id": "$grade",
+                "orders": {"$sum": "$orders"},
+                "revenue": {"$sum": "$revenue"},
+                "students": {"$push": "$students"},
+            }},
+            {"$sort": {"_id": 1}},
+        ]).to_list(None)
+        return {
+            r["_id"]: {
+                "orders": r["orders"],
+                "revenue": round(r["revenue"], 2),
+                "students": len(_sum_counts(r["students"])),
+            }
+            for r in rows if r["_id"] and r["orders"] > 0
+        }
+
+    async def top_clients(self, day_filter: Dict, limit: int = 20) -> List[Dict]:
+        rows = await db[CUSTOMER_COLLECTION].aggregate([
+            {"$match": {**day_filter, "status": {"$nin": EXCLUDED_REVENUE_STATUSES}, "orders": {"$gt": 0}}},
+            {"$group": {
+                "_id": "$user_id",
+                "order_count": {"$sum": "$orders"},
+                "total_spent": {"$sum": "$spent"},
+                "students": {"$addToSet": "$student_name"},
+            }},
+            {"$sort": {"total_spent": -1}},
+            {"$limit": limit},
+            {"$lookup": {"from": "auth_users", "localField": "_id", "foreignField": "user_id", "as": "user"}},
+            {"$project": {
+                "order_count": 1, "total_spent": 1, "students": 1,
+                "user": {"$map": {"input": "$user", "as": "u", "in": {"name": "$$u.name", "email": "$$u.email"}}},
+            }},
+        ]).to_list(limit)
+        clients = []
+        for r in rows:
+            user = r["user"][0] if r["user"] else {}
+            clients.append({
+                "user_id": r["_id"],
+                "name": user.get("name", "Unknown"),
+                "email": user.get("email", ""),
+                "order_count": r["order_count"],
+                "total_spent": round(r["total_spent"], 2),
+                "students": r["students"],
+            })
+        return clients
+
+    async def top_students(self, day_filter: Dict, limit: int = 30) -> List[Dict]:
+        rows = await db[CUSTOMER_COLLECTION].aggregate([
+            {"$match": {**day_filter, "status": {"$nin": EXCLUDED_REVENUE_STATUSES}, "orders": {"$gt": 0}}},
+            {"$group": {
+                "_id": "$student_id",
+                "student_name": {"$first": "$student_name"},
+                "grade": {"$first": "$grade"},
+                "order_count": {"$sum": "$orders"},
+                "total_spent": {"$sum": "$spent"},
+                "items_ordered": {"$sum": "$items_ordered"},
+            }},
+            {"$sort": {"total_spent": -1}},
+            {"$limit": limit},
+        ]).to_list(limit)
+        return [
+            {
+                "student_id": s["_id"],
+                "name": s["student_name"],
+                "grade": s["grade"],
+                "order_count": s["order_count"],
+                "items_ordered": s["items_ordered"],
+                "total_spent": round(s["total_spent"], 2),
+            } for s in rows
+        ]
+
+    async def top_books(self, day_filter: Dict, limit: int = 100) -> List[Dict]:
+        rows = await db[BOOK_COLLECTION].aggregate([
+            {"$match": {**day_filter, "qty": {"$gt": 0}}},
+            {"$group": {
+                "_id": "$book_id",
+                "book_name": {"$first": "$book_name"},
+                "total_ordered": {"$sum": "$qty"},
+                "revenue": {"$sum": "$revenue"},
+                "orders": {"$sum": "$orders"},
+                "students": {"$push": "$students"},
+                "grades": {"$push": "$grades"},
+            }},
+            {"$sort": {"total_ordered": -1}},
+            {"$limit": limit},
+        ]).to_list(limit)
+
+        inventory = await self.inventory_for(r["_id"] for r in rows)
+        books = []
+        for r in rows:
+            available = inventory.get(r["_id"], 0)
+            books.append({
+                "book_id": r["_id"],
+                "name": r["book_name"],
+                "total_sold": r["total_ordered"],
+                "revenue": round(r["revenue"], 2),
+                "student_count": len(_sum_counts(r["students"])),
+                "order_count": r["orders"],
+                "grades": [g for g in _sum_counts(r["grades"]) if g != "unknown"],
+                "current_inventory": available,
+                "needs_restock": available < LOW_STOCK_THRESHOLD,
+            })
+        return books
+
+    async def inventory_for(self, book_ids: Iterable[str]) -> Dict[str, int]:
+        book_ids = list(book_ids)
+        if not book_ids:
+            return {}
+        rows = await db[INVENTORY_COLLECTION].find(
+            {"_id": {"$in": book_ids}}, {"_id": 1, "available": 1}
+        ).to_list(len(book_ids))
+        return {r["_id"]: r.get("available", 0) for r in rows}
+
+    async def active_inventory(self) -> List[Dict]:
+        return await db[INVENTORY_COLLECTION].find(
+            {"active": True}, {"_id": 0}
+        ).to_list(None)
+
+    async def monthly_trends(self, months: int = 12) -> List[Dict]:
+        rows = await db[DAILY_COLLECTION].aggregate([
+            {"$match": {"day": {"$ne": ALL_BUCKET}, "status": {"$nin": EXCLUDED_REVENUE_STATUSES}}},
+            {"$group": {
+                "_id": {"$substrCP": ["$day", 0, 7]},
+                "orders": {"$sum": "$orders"},
+                "revenue": {"$sum": "$revenue"},
+            }},
+            {"$match": {"orders": {"$gt": 0}}},
+            {"$sort": {"_id": -1}},
+            {"$limit": months},
+        ]).to_list(months)
+        return [
+            {"month": t["_id"], "orders": t["orders"], "revenue": round(t["revenue"], 2)}
+            for t in reversed(rows)
+        ]
+
+    async def get_status(self) -> Dict:
+        meta = await db[META_COLLECTION].find_one({"_id": "state"}, {"_id": 0}) or {}
+        counts = await asyncio.gather(*(db[c].estimated_document_count() for c in ROLLUP_COLLECTIONS))
+        return {**meta, "collections": dict(zip(ROLLUP_COLLECTIONS, counts))}
+
+
+analytics_rollup_service = AnalyticsRollupService()
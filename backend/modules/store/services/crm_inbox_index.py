@@ -0,0 +1,325 @@
+"""
+CRM Inbox Index
+Local read model for the admin CRM inbox.
+
+Each `crm_student_links` document carries the conversation summary the inbox
+needs (`last_activity_at`, `topic_count`, `last_topic`), and every known
+Monday.com Update is mirrored as a small summary row in `crm_inbox_topics`.
+The summaries are maintained from local writes, from the CRM webhook and from
+topic lists fetched when an admin opens a conversation, so listing the inbox
+never calls Monday.com.
+"""
+from typing import Dict, List, Optional
+from datetime import datetime, timezone
+import asyncio
+import logging
+import re
+
+from pymongo import UpdateOne
+
+from core.database import db
+
+logger = logging.getLogger(__name__)
+
+LINK_COLLECTION = "crm_student_links"
+LOCAL_MESSAGES_COLLECTION = "crm_chat_messages"
+TOPICS_COLLECTION = "crm_inbox_topics"
+
+PREVIEW_LENGTH = 100
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class CrmInboxIndex:
+    """Maintains and queries the admin inbox summaries"""
+
+    def __init__(self):
+        self._ready = False
+        self._lock = asyncio.Lock()
+
+    # ---------- Maintenance ----------
+
+    async def record_topic(
+        self,
+        student_id: str,
+        monday_item_id: str,
+        topic_id: str,
+        body: str,
+        author: str,
+        created_at: Optional[str] = None,
+        reply_count: int = 0,
+    ) -> None:
+        """Register a topic (Monday.com Update) and bump the conversation's activity."""
+        if not topic_id:
+            return
+        created_at = created_at or _now()
+        summary = {
+            "id": str(topic_id),
+            "body": (body or "")[:PREVIEW_LENGTH],
+            "author": author,
+            "created_at": created_at,
+            "reply_count": reply_count,
+        }
+        result = await db[TOPICS_COLLECTION].update_one(
+            {"topic_id": str(topic_id)},
+            {
+                "$setOnInsert": {
+                    "topic_id": str(topic_id),
+                    "student_id": student_id,
+                    "monday_item_id": monday_item_id,
+                    "body": summary["body"],
+                    "author": author,
+                    "created_at": created_at,
+                    "reply_count": reply_count,
+                },
+                "$max": {"last_activity_at": created_at},
+            },
+            upsert=True,
+        )
+        link_update = {"$max": {"last_activity_at": created_at}}
+        if result.upserted_id is not None:
+            link_update["$inc"] = {"topic_count": 1}
+        await db[LINK_COLLECTION].update_one({"student_id": student_id}, link_update)
+        await self._refresh_last_topic(student_id)
+
+    async def record_reply(
+        self,
+        student_id: str,
+        topic_id: str,
+        reply_id: Optional[str] = None,
+        created_at: Optional[str] = None,
+    ) -> None:
+        """Count a reply on a topic and bump the conversation's activity.
+        Replies are counted once per `reply_id`, so the webhook echo of a
+        locally posted reply is not double counted.
+        """
+        created_at = created_at or _now()
+        if topic_id:
+            query = {"topic_id": str(topic_id)}
+            update = {"$inc": {"reply_count": 1}, "$max": {"last_activity_at": created_at}}
+            if reply_id:
+                query["reply_ids"] = {"$ne": str(reply_id)}
+                update["$push"] = {"reply_ids": str(reply_id)}
+            await db[TOPICS_COLLECTION].update_one(query, update)
+        await db[LINK_COLLECTION].update_one(
+            {"student_id": student_id}, {"$max": {"last_activity_at": created_at}}
+        )
+        await self._refresh_last_topic(student_id)
+
+    async def sync_topics(self, student_id: str, monday_item_id: str, topics: List[Dict]) -> None:
+        """Replace the cached summaries of a conversation with a fresh Monday.com topic list."""
+        try:
+            requests = []
+            last_activity = None
+            for t in topics:
+                replies = t.get("replies") or []
+                activity = max(
+                    [t.get("created_at") or ""] + [r.get("created_at") or "" for r in replies]
+                )
+                last_activity = max(last_activity or "", activity)
+                requests.append(UpdateOne(
+                    {"topic_id": str(t["id"])},
+                    {"$set": {
+                        "topic_id": str(t["id"]),
+                        "student_id": student_id,
+                        "monday_item_id": monday_item_id,
+                        "body": (t.get("body") or "")[:PREVIEW_LENGTH],
+                        "author": t.get("author"),
+                        "created_at": t.get("created_at"),
+                        "reply_count": t.get("reply_count", len(replies)),
+                        "reply_ids": [str(r["id"]) for r in replies if r.get("id")],
+                        "last_activity_at": activity,
+                    }},
+                    upsert=True,
+                ))
+            if requests:
+                await db[TOPICS_COLLECTION].bulk_write(requests, ordered=False)
+            link_update = {"$set": {"topic_count": len(topics)}}
+            if last_activity:
+                link_update["$max"] = {"last_activity_at": last_activity}
+            await db[LINK_COLLECTION].update_one({"student_id": student_id}, link_update)
+            await self._refresh_last_topic(student_id)
+        except Exception as e:
+            logger.warning(f"[crm_inbox] Topic sync failed for {student_id} (non-blocking): {e}")
+
+    async def _refresh_last_topic(self, student_id: str) -> None:
+        latest = await db[TOPICS_COLLECTION].find_one(
+            {"student_id": student_id},
+            {"_id": 0, "topic_id": 1, "body": 1, "author": 1, "created_at": 1, "reply_count": 1},
+            sort=[("created_at", -1)],
+        )
+        if not latest:
+            return
+        await db[LINK_COLLECTION].update_one(
+            {"student_id": student_id},
+            {"$set": {"last_topic": {
+                "id": latest["topic_id"],
+                "body": latest.get("body", ""),
+                "author": latest.get("author"),
+                "created_at": latest.get("created_at"),
+                "reply_count": latest.get("reply_count", 0),
+            }}},
+        )
+
+    # ---------- Backfill ----------
+
+    async def ensure_ready(self) -> None:
+        """Index legacy links (no `last_activity_at`) from local chat history, once per process."""
+        if self._ready:
+            return
+        async with self._lock:
+            if self._ready:
+                return
+            pending = await db[LINK_COLLECTION].find(
+                {"last_activity_at": {"$exists": False}}, {"_id": 0, "student_id": 1, "monday_item_id": 1, "linked_at": 1}
+            ).to_list(None)
+            if pending:
+                await self._backfill(pending)
+            self._ready = True
+
+    async def _backfill(self, links: List[Dict]) -> None:
+        student_ids = [l["student_id"] for l in links]
+        topic_rows = await db[LOCAL_MESSAGES_COLLECTION].aggregate([
+            {"$match": {"student_id": {"$in": student_ids}, "topic_id": {"$ne": None}}},
+            {"$sort": {"created_at": 1}},
+            {"$group": {
+                "_id": "$topic_id",
+                "student_id": {"$first": "$student_id"},
+                "monday_item_id": {"$first": "$monday_item_id"},
+                "first": {"$first": "$$ROOT"},
+                "messages": {"$sum": 1},
+                "last_activity_at": {"$max": "$created_at"},
+            }},
+        ]).to_list(None)
+
+        requests = [
+            UpdateOne(
+                {"topic_id": str(r["_id"])},
+                {"$setOnInsert": {
+                    "topic_id": str(r["_id"]),
+                    "student_id": r["student_id"],
+                    "monday_item_id": r.get("monday_item_id"),
+                    "body": (r["first"].get("message") or "")[:PREVIEW_LENGTH],
+                    "author": r["first"].get("author_name"),
+                    "created_at": r["first"].get("created_at"),
+                    "reply_count": max(r["messages"] - 1, 0),
+                    "last_activity_at": r["last_activity_at"],
+                }},
+                upsert=True,
+            )
+            for r in topic_rows
+        ]
+        if requests:
+            await db[TOPICS_COLLECTION].bulk_write(requests, ordered=False)
+
+        per_student: Dict[str, Dict] = {}
+        for r in topic_rows:
+            entry = per_student.setdefault(r["student_id"], {"count": 0, "last": ""})
+            entry["count"] += 1
+            entry["last"] = max(entry["last"], r["last_activity_at"] or "")
+
+        link_requests = []
+        for link in links:
+            entry = per_student.get(link["student_id"], {"count": 0, "last": ""})
+            link_requests.append(UpdateOne(
+                {"student_id": link["student_id"]},
+                {"$set": {
+                    "topic_count": entry["count"],
+                    "last_activity_at": entry["last"] or link.get("linked_at") or "",
+                }},
+            ))
+        if link_requests:
+            await db[LINK_COLLECTION].bulk_write(link_requests, ordered=False)
+        for student_id in per_student:
+            await self._refresh_last_topic(student_id)
+        logger.info(f"[crm_inbox] Indexed {len(links)} legacy CRM conversations")
+
+    # ---------- Query ----------
+
+    async def _search_student_ids(self, q: str) -> List[str]:
+        """Students whose name or account email contains `q` (case-insensitive)."""
+        pattern = {"$regex": re.escape(q), "$options": "i"}
+        user_ids = await db.auth_users.distinct("user_id", {"email": pattern})
+        return await db.store_students.distinct(
+            "student_id", {"$or": [{"full_name": pattern}, {"user_id": {"$in": user_ids}}]}
+        )
+
+    async def get_inbox(self, skip: int = 0, limit: int = 50, q: Optional[str] = None) -> Dict:
+        """
+        One page of conversations, most recent activity first.
+        `q` filters by student name or email across the whole inbox;
+        `total_unread` always counts every conversation.
+        """
+        await self.ensure_ready()
+
+        query = {}
+        q = (q or "").strip()
+        if q:
+            query["student_id"] = {"$in": await self._search_student_ids(q)}
+
+        total, total_unread, rows = await asyncio.gather(
+            db[LINK_COLLECTION].count_documents(query),
+            db[LOCAL_MESSAGES_COLLECTION].count_documents({"is_staff": False, "read_by": {"$ne": "admin"}}),
+            db[LINK_COLLECTION].aggregate([
+                {"$match": query},
+                {"$sort": {"last_activity_at": -1, "student_id": 1}},
+                {"$skip": skip},
+                {"$limit": limit},
+                {"$lookup": {
+                    "from": "store_students",
+                    "localField": "student_id",
+                    "foreignField": "student_id",
+                    "as": "student",
+                }},
+                {"$set": {"student": {"$first": "$student"}}},
+                {"$lookup": {
+                    "from": "auth_users",
+                    "localField": "student.user_id",
+                    "foreignField": "user_id",
+                    "as": "user",
+                }},
+                {"$project": {
+                    "_id": 0,
+                    "student_id": 1,
+                    "monday_item_id": 1,
+                    "topic_count": 1,
+                    "last_topic": 1,
+                    "last_activity_at": 1,
+                    "student_name": "$student.full_name",
+                    "user_email": {"$first": "$user.email"},
+                }},
+            ]).to_list(limit),
+        )
+
+        student_ids = [r["student_id"] for r in rows]
+        unread_rows = await db[LOCAL_MESSAGES_COLLECTION].aggregate([
+            {"$match": {"student_id": {"$in": student_ids}, "is_staff": False, "read_by": {"$ne": "admin"}}},
+            {"$group": {"_id": "$student_id", "count": {"$sum": 1}}},
+        ]).to_list(None) if student_ids else []
+        unread = {r["_id"]: r["count"] for r in unread_rows}
+
+        conversations = [
+            {
+                "student_id": r["student_id"],
+                "student_name": r.get("student_name") or "Unknown",
+                "user_email": r.get("user_email") or "",
+                "monday_item_id": r.get("monday_item_id"),
+                "topic_count": r.get("topic_count", 0),
+                "unread_count": unread.get(r["student_id"], 0),
+                "last_topic": r.get("last_topic"),
+                "last_activity_at": r.get("last_activity_at"),
+            }
+            for r in rows
+        ]
+        return {
+            "conversations": conversations,
+            "total": total,
+            "total_unread": total_unread,
+            "skip": skip,
+            "limit": limit,
+        }
+
+
+crm_inbox_index = CrmInboxIndex()
@@ -2,16 +2,70 @@
 Store Module - Servicio de Synchronization con Google Sheets
 Sincroniza estudiantes desde hojas de calculation de Google
 """
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Set, Tuple
 from datetime import datetime, timezone
 import asyncio
+import hashlib
+import json
 import logging
+import uuid
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
 
 from core.database import db
 
 logger = logging.getLogger(__name__)
 
 
+def _column_letter(n: int) -> str:
+    """1 -> A, 27 -> AA"""
+    letters = ""
+    while n > 0:
+        n, rem = divmod(n - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters or "A"
+
+
+def _fingerprint(doc: Dict) -> str:
+    """Hash of a student row. The row number is left out so that inserting
+    a row above does not mark every row below it as changed."""
+    data = {k: v for k, v in doc.items() if k != "fila_numero"}
+    return hashlib.sha1(json.dumps(data, sort_keys=True, ensure_ascii=False).encode()).hexdigest()
+
+
+# Snapshot of a spreadsheet: student number -> (fingerprint, tab)
+Snapshot = Dict[str, Tuple[str, str]]
+
+
+def diff_snapshot(current: Snapshot, previous: Snapshot, synced_tabs: Set[str], forzar: bool) -> Tuple[List[str], List[str]]:
+    """Student numbers to write (new or changed) and to deactivate.
+
+    Only rows of the synced tabs can be removed; forzar treats every row as changed.
+    """
+    baseline = {} if forzar else previous
+    changed = [n for n, (fp, _) in current.items() if baseline.get(n, (None,))[0] != fp]
+    removed = [n for n, (_, hoja) in previous.items() if hoja in synced_tabs and n not in current]
+    return changed, removed
+
+
+def next_snapshot(current: Snapshot, previous: Snapshot, synced_tabs: Set[str],
+                  removed: List[str], skipped: Set[str]) -> Snapshot:
+    """Snapshot after a sync. Rows that were not written (overridden or failed)
+    keep their previous entry, so the next sync picks them up again; other
+    tabs' entries are left as they were."""
+    rows = {n: v for n, v in previous.items() if v[1] not in synced_tabs}
+    for numero, entry in current.items():
+        if numero not in skipped:
+            rows[numero] = entry
+        elif numero in previous:
+            rows[numero] = previous[numero]
+    for numero in removed:
+        if numero in skipped:
+            rows[numero] = previous[numero]
+    return rows
+
+
 class GoogleSheetsService:
     """
     Service for sincronizar estudiantes desde Google Sheets.
@@ -22,6 +76,7 @@ class GoogleSheetsService:
         self.credentials = None
         self.service = None
         self._initialized = False
+        self._api_lock = asyncio.Lock()
     
     async def initialize(self, credentials_json: Dict = None):
         """
@@ -159,9 +214,10 @@ class GoogleSheetsService:
         
         try:
             # Intentar leer metadata del sheet
-            sheet_metadata = self.service.spreadsheets().get(
-                spreadsheetId=sheet_id
-            ).execute()
+            sheet_metadata = await self._execute(self.service.spreadsheets().get(
+                spreadsheetId=sheet_id,
+                fields="properties.title,sheets.properties"
+            ))
             
             # Get names de las hojas
             hojas = [
@@ -186,6 +242,12 @@ class GoogleSheetsService:
                 "error": str(e)
             }
     
+    async def _execute(self, request) -> Dict:
+        """Run a Google API request in a worker thread (the client is blocking).
+        One request at a time: the client's HTTP connection is not thread-safe."""
+        async with self._api_lock:
+            return await asyncio.to_thread(request.execute)
+    
     async def read_sheet_data(
         self,
         sheet_id: str,
@@ -197,19 +259,19 @@ class GoogleSheetsService:
         
         Args:
             sheet_id: ID of the Google Sheet
-            sheet_name: Nombre de la tab
+            hoja_name: Nombre de la tab
             rango: Rango a leer (ej: "A1:F100"). Si es None, lee toda la hoja.
         """
         if not self._initialized:
             raise Exception("Servicio no inicializado")
         
         try:
-            range_name = f"'{sheet_name}'!{rango}" if rango else f"'{sheet_name}'"
+            range_name = f"'{hoja_name}'!{rango}" if rango else f"'{hoja_name}'"
             
-            result = self.service.spreadsheets().values().get(
+            result = await self._execute(self.service.spreadsheets().values().get(
                 spreadsheetId=sheet_id,
                 range=range_name
-            ).execute()
+            ))
             
             return result.get('values', [])
             
@@ -217,6 +279,185 @@ class GoogleSheetsService:
             logger.error(f"[GoogleSheets] Error reading sheet: {e}")
             raise
     
+    async def _read_tabs(self, sheet_id: str, hojas: List[str]) -> Dict[str, List[List[str]]]:
+        """
+        Read several tabs in two batchGet calls: the header rows first, then
+        each tab's data rows only as wide as its headers.
+        Returns {hoja_name: [headers, row, row, ...]}.
+        """
+        values = self.service.spreadsheets().values()
+        header_resp = await self._execute(values.batchGet(
+            spreadsheetId=sheet_id,
+            ranges=[f"'{hoja}'!1:1" for hoja in hojas]
+        ))
+        headers = {}
+        for hoja, value_range in zip(hojas, header_resp.get("valueRanges", [])):
+            rows = value_range.get("values", [])
+            if rows and rows[0]:
+                headers[hoja] = rows[0]
+        if not headers:
+            return {}
+        
+        names = list(headers)
+        data_resp = await self._execute(values.batchGet(
+            spreadsheetId=sheet_id,
+            ranges=[f"'{hoja}'!A2:{_column_letter(len(headers[hoja]))}" for hoja in names]
+        ))
+        return {
+            hoja: [headers[hoja]] + value_range.get("values", [])
+            for hoja, value_range in zip(names, data_resp.get("valueRanges", []))
+        }
+    
+    def _parse_rows(self, datos: List[List[str]], hoja_cfg: Dict, config: Dict, sheet_id: str) -> Dict[str, Dict]:
+        """Student documents of one tab, keyed by student number (last row wins)."""
+        # Primera fila son los headers
+        headers = [h.lower().strip() for h in datos[0]]
+        columnas = hoja_cfg.get("columnas", config)
+        
+        # Mapear indexs de columnas
+        col_idx = {}
+        for key in ["columna_numero", "columna_nombre", "columna_grado", "columna_seccion", "columna_estado"]:
+            col_name = columnas.get(key, config.get(key, "")).lower()
+            if col_name in headers:
+                col_idx[key] = headers.index(col_name)
+        
+        estudiantes = {}
+        # Procesar cada fila (desde la 2)
+        for fila_num, fila in enumerate(datos[1:], start=2):
+            def get_val(key):
+                idx = col_idx.get(key)
+                if idx is not None and idx < len(fila):
+                    return fila[idx].strip()
+                return None
+            
+            numero = get_val("columna_numero")
+            if not numero:
+                continue
+            
+            full_name = get_val("columna_nombre") or ""
+            grade = hoja_cfg.get("grade") or get_val("columna_grado") or ""
+            estado_raw = get_val("columna_estado") or "active"
+            
+            # Separar nombre y apellido si es posible
+            partes_nombre = full_name.split(" ", 1)
+            
+            estudiante_data = {
+                "numero_estudiante": numero,
+                "full_name": full_name,
+                "name": partes_nombre[0] if partes_nombre else "",
+                "apellido": partes_nombre[1] if len(partes_nombre) > 1 else "",
+                "grade": str(grade),
+                "seccion": get_val("columna_seccion"),
+                "sheet_id": sheet_id,
+                "sheet_name": hoja_cfg["name"],
+                "fila_numero": fila_num,
+                "estado": "active" if estado_raw.lower() in ["active", "active", "1", "si", "yes"] else "inactivo",
+            }
+            
+            # Guardar datos extra (otras columnas)
+            datos_extra = {}
+            for i, val in enumerate(fila):
+                if i not in col_idx.values() and i < len(headers):
+                    datos_extra[headers[i]] = val
+            if datos_extra:
+                estudiante_data["datos_extra"] = datos_extra
+            
+            estudiantes[numero] = estudiante_data
+        return estudiantes
+    
+    async def _sync_sheet(
+        self,
+        sheet_cfg: Dict,
+        hojas: List[Dict],
+        config: Dict,
+        forzar: bool,
+        resultados: Dict
+    ):
+        """
+        Diff one spreadsheet against its last snapshot and write only the
+        rows that were inserted, changed or removed, in one bulk_write.
+        """
+        sheet_id = sheet_cfg["sheet_id"]
+        tabs = await self._read_tabs(sheet_id, [h["name"] for h in hojas])
+        
+        current: Dict[str, Dict] = {}
+        for hoja_cfg in hojas:
+            datos = tabs.get(hoja_cfg["name"])
+            if datos and len(datos) >= 2:
+                current.update(self._parse_rows(datos, hoja_cfg, config, sheet_id))
+        snapshot = {numero: (_fingerprint(doc), doc["sheet_name"]) for numero, doc in current.items()}
+        
+        # Last snapshot, stored as [numero, hash, tab] rows; forzar rewrites every row
+        snapshot_doc = await db.sheet_sync_snapshots.find_one({"sheet_id": sheet_id}, {"_id": 0, "rows": 1})
+        previous = {row[0]: (row[1], row[2]) for row in (snapshot_doc or {}).get("rows", [])}
+        synced_tabs = {h["name"] for h in hojas}
+        
+        changed, removed = diff_snapshot(snapshot, previous, synced_tabs, forzar)
+        resultados["estudiantes_sin_cambio"] += len(current) - len(changed)
+        
+        # Students edited locally are left alone unless forzar
+        overridden = set()
+        if (changed or removed) and not forzar:
+            overridden = {
+                doc["numero_estudiante"] for doc in await db.synced_students.find(
+                    {"sheet_id": sheet_id, "numero_estudiante": {"$in": changed + removed}, "override_local": True},
+                    {"_id": 0, "numero_estudiante": 1}
+                ).to_list(None)
+            }
+        resultados["estudiantes_override"] += len(overridden)
+        
+        now = datetime.now(timezone.utc).isoformat()
+        ops, op_keys = [], []
+        for numero in changed:
+            if numero in overridden:
+                continue
+            ops.append(UpdateOne(
+                {"sheet_id": sheet_id, "numero_estudiante": numero},
+                {
+                    "$set": {**current[numero], "fecha_sync": now, "updated_at": now},
+                    "$setOnInsert": {
+                        "sync_id": f"sync_{uuid.uuid4().hex[:12]}",
+                        "created_at": now,
+                        "override_local": False
+                    }
+                },
+                upsert=True
+            ))
+            op_keys.append(numero)
+        n_changes = len(ops)
+        for numero in removed:
+            if numero in overridden:
+                continue
+            ops.append(UpdateOne(
+                {"sheet_id": sheet_id, "numero_estudiante": numero},
+                {"$set": {"estado": "inactivo", "fecha_sync": now, "updated_at": now}}
+            ))
+            op_keys.append(numero)
+        
+        failed = set()
+        if ops:
+            try:
+                result = await db.synced_students.bulk_write(ops, ordered=False)
+                upserted = result.upserted_count
+            except BulkWriteError as e:
+                upserted = e.details.get("nUpserted", 0)
+                for err in e.details.get("writeErrors", []):
+                    failed.add(err["index"])
+                    resultados["errores"].append(
+                        f"Estudiante {op_keys[err['index']]} en {sheet_cfg.get('name', sheet_id)}: {err.get('errmsg')}"
+                    )
+            resultados["estudiantes_nuevos"] += upserted
+            resultados["estudiantes_actualizados"] += n_changes - len([i for i in failed if i < n_changes]) - upserted
+            resultados["estudiantes_desactivados"] += len(ops) - n_changes - len([i for i in failed if i >= n_changes])
+        
+        skipped = overridden | {op_keys[i] for i in failed}
+        rows = next_snapshot(snapshot, previous, synced_tabs, removed, skipped)
+        await db.sheet_sync_snapshots.update_one(
+            {"sheet_id": sheet_id},
+            {"$set": {"rows": [[n, fp, hoja] for n, (fp, hoja) in rows.items()], "updated_at": now}},
+            upsert=True
+        )
+    
     async def sync_estudiantes(
         self,
         sheet_id: str = None,
@@ -226,10 +467,15 @@ class GoogleSheetsService:
         """
         Sincronizar estudiantes desde Google Sheets.
         
+        Incremental: each row is fingerprinted and compared with the snapshot
+        of the previous sync, so only new, changed and removed rows are
+        written. Removed rows mark the student "inactivo".
+        
         Args:
             sheet_id: ID specific del sheet (None = todos los configurados)
             solo_hoja: Nombre de hoja specific (None = todas)
             forzar: Si es True, sincroniza aunque override_local sea True
+                    (y reescribe todas las filas, ignorando el snapshot)
         
         Returns:
             Resumen de la synchronization
@@ -260,118 +506,20 @@ class GoogleSheetsService:
             "estudiantes_nuevos": 0,
             "estudiantes_actualizados": 0,
             "estudiantes_sin_cambio": 0,
+            "estudiantes_desactivados": 0,
             "estudiantes_override": 0,
             "errores": []
         }
         
         for sheet_cfg in sheets_config:
+            hojas = [h for h in sheet_cfg.get("hojas", []) if not solo_hoja or h["name"] == solo_hoja]
+            if not hojas:
+                continue
             try:
-                for hoja_cfg in sheet_cfg.get("hojas", []):
-                    if solo_hoja and hoja_cfg["name"] != solo_hoja:
-                        continue
-                    
-                    # Leer datos de la hoja
-                    datos = await self.read_sheet_data(
-                        sheet_cfg["sheet_id"],
-                        hoja_cfg["name"]
-                    )
-                    
-                    if not datos or len(datos) < 2:
-                        continue
-                    
-                    # Primera fila son los headers
-                    headers = [h.lower().strip() for h in datos[0]]
-                    columnas = hoja_cfg.get("columnas", config)
-                    
-                    # Mapear indexs de columnas
-                    col_idx = {}
-                    for key in ["columna_numero", "columna_nombre", "columna_grado", "columna_seccion", "columna_estado"]:
-                        col_name = columnas.get(key, config.get(key, "")).lower()
-                        if col_name in headers:
-                            col_idx[key] = headers.index(col_name)
-                    
-                    # Procesar cada fila (desde la 2)
-                    for fila_num, fila in enumerate(datos[1:], start=2):
-                        try:
-                            # Extract datos con los indexs mapeados
-                            def get_val(key):
-                                idx = col_idx.get(key)
-                                if idx is not None and idx < len(fila):
-                                    return fila[idx].strip()
-                                return None
-                            
-                            numero = get_val("columna_numero")
-                            if not numero:
-                                continue
-                            
-                            full_name = get_val("columna_nombre") or ""
-                            grade = hoja_cfg.get("grade") or get_val("columna_grado") or ""
-                            seccion = get_val("columna_seccion")
-                            estado_raw = get_val("columna_estado") or "active"
-                            
-                            # Separar nombre y apellido si es posible
-                            partes_nombre = full_name.split(" ", 1)
-                            nombre = partes_nombre[0] if partes_nombre else ""
-                            apellido = partes_nombre[1] if len(partes_nombre) > 1 else ""
-                            
-                            # Search si already exists
-                            existente = await db.synced_students.find_one({
-                                "numero_estudiante": numero,
-                                "sheet_id": sheet_cfg["sheet_id"]
-                            })
-                            
-                            estudiante_data = {
-                                "numero_estudiante": numero,
-                                "full_name": full_name,
-                                "name": nombre,
-                                "apellido": apellido,
-                                "grade": str(grade),
-                                "seccion": seccion,
-                                "sheet_id": sheet_cfg["sheet_id"],
-                                "sheet_name": hoja_cfg["name"],
-                                "fila_numero": fila_num,
-                                "estado": "active" if estado_raw.lower() in ["active", "active", "1", "si", "yes"] else "inactivo",
-                                "fecha_sync": datetime.now(timezone.utc).isoformat(),
-                                "updated_at": datetime.now(timezone.utc).isoformat()
-                            }
-                            
-                            # Guardar datos extra (otras columnas)
-                            datos_extra = {}
-                            for i, val in enumerate(fila):
-                                if i not in col_idx.values() and i < len(headers):
-                                    datos_extra[headers[i]] = val
-                            if datos_extra:
-                                estudiante_data["datos_extra"] = datos_extra
-                            
-                            if existente:
-                                # Verify si tiene override
-                                if existente.get("override_local") and not forzar:
-                                    resultados["estudiantes_override"] += 1
-                                    continue
-                                
-                                # Update
-                                await db.synced_students.update_one(
-                                    {"sync_id": existente["sync_id"]},
-                                    {"$set": estudiante_data}
-                                )
-                                resultados["estudiantes_actualizados"] += 1
-                            else:
-                                # Create nuevo
-                                import uuid
-                                estudiante_data["sync_id"] = f"sync_{uuid.uuid4().hex[:12]}"
-                                estudiante_data["created_at"] = datetime.now(timezone.utc).isoformat()
-                                estudiante_data["override_local"] = False
-                                
-                                await db.synced_students.insert_one(estudiante_data)
-                                resultados["estudiantes_nuevos"] += 1
-                                
-                        except Exception as e:
-                            resultados["errores"].append(f"Fila {fila_num} en {hoja_cfg['nombre']}: {str(e)}")
-                    
+                await self._sync_sheet(sheet_cfg, hojas, config, forzar, resultados)
                 resultados["sheets_procesados"] += 1
-                
             except Exception as e:
-                resultados["errores"].append(f"Sheet {sheet_cfg.get('nombre', sheet_cfg['sheet_id'])}: {str(e)}")
+                resultados["errores"].append(f"Sheet {sheet_cfg.get('name', sheet_cfg['sheet_id'])}: {str(e)}")
         
         # Update last synchronization
         await self.update_sync_config({
@@ -36,8 +36,9 @@ class OrderService(BaseService):
         """
         # Validate y calcular total
         total = 0
+        products = await self.product_repository.get_by_ids([item.book_id for item in data.items])
         for item in data.items:
-            product = await self.product_repository.get_by_id(item.book_id)
+            product = products.get(item.book_id)
             if not product:
                 raise ValueError(f"Producto {item.book_id} not found")
             if product.get("inventory_quantity", 0) < item.cantidad:
@@ -87,9 +88,10 @@ class OrderService(BaseService):
         # Validate y calcular total
         total = 0
         items_validados = []
+        products = await self.product_repository.get_by_ids([item.book_id for item in data.items])
         
         for item in data.items:
-            product = await self.product_repository.get_by_id(item.book_id)
+            product = products.get(item.book_id)
             if not product:
                 raise ValueError(f"Producto {item.book_id} not found")
             if product.get("inventory_quantity", 0) < item.cantidad:
@@ -33,6 +33,10 @@ class SchoolRepository(BaseRepository):
             sort=[("name", 1)]
         )
     
+    async def get_all(self) -> List[Dict]:
+        """Get every school, active or not (for name lookups)"""
+        return await self._collection.find({}, {"_id": 0}).to_list(None)
+    
     async def get_by_id(self, school_id: str) -> Optional[Dict]:
         """Get school by ID"""
         return await self.find_one({"school_id": school_id})
@@ -101,6 +105,47 @@ class StudentRecordRepository(BaseRepository):
             sort=[("created_at", -1)]
         )
     
+    async def get_all_with_school(
+        self,
+        status: str = None,
+        school_id: str = None,
+        skip: int = 0,
+        limit: int = 100,
+        include_inactive: bool = False
+    ) -> Dict:
+        """One page of student records with school names joined in, plus the total"""
+        query = {"$or": [{"archived": {"$ne": True}}, {"archived": {"$exists": False}}]}
+        if not include_inactive:
+            query["is_active"] = True
+        if school_id:
+            query["school_id"] = school_id
+        if status:
+            query["enrollments.status"] = status
+        pipeline = [
+            {"$match": query},
+            {"$facet": {
+                "total": [{"$count": "n"}],
+                "students": [
+                    {"$sort": {"created_at": -1}},
+                    {"$skip": skip},
+                    {"$limit": limit},
+                    {"$lookup": {
+                        "from": SchoolRepository.COLLECTION_NAME,
+                        "localField": "school_id",
+                        "foreignField": "school_id",
+                        "as": "_school"
+                    }},
+                    {"$addFields": {
+                        "school_name": {"$ifNull": [{"$arrayElemAt": ["$_school.name", 0]}, "Unknown"]}
+                    }},
+                    {"$project": {"_id": 0, "_school": 0}}
+                ]
+            }}
+        ]
+        result = (await self.aggregate(pipeline) or [{}])[0]
+        total = result.get("total") or [{"n": 0}]
+        return {"students": result.get("students", []), "total": total[0]["n"]}
+    
     async def update_student(self, student_id: str, data: Dict) -> bool:
         """Update a student record"""
         data["updated_at"] = datetime.now(timezone.utc).isoformat()
@@ -262,23 +262,27 @@ async def get_user_students_admin(
 async def get_all_students_admin(
     status: Optional[str] = None,
     school_id: Optional[str] = None,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
     admin: dict = Depends(get_admin_user)
 ):
-    """Get all student records from all users (admin view)"""
-    students = await textbook_access_service.get_all_students(
+    """Get one page of student records from all users (admin view)"""
+    return await textbook_access_service.get_all_students(
         status=status,
-        school_id=school_id
+        school_id=school_id,
+        skip=skip,
+        limit=limit
     )
-    return {"students": students}
 
 
 @router.get("/students/synced")
 async def get_synced_students(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
     admin: dict = Depends(get_admin_user)
 ):
-    """Get all synced students (admin view) - for EstudiantesTab"""
-    students = await textbook_access_service.get_all_students()
-    return {"students": students}
+    """Get one page of synced students (admin view) - for EstudiantesTab"""
+    return await textbook_access_service.get_all_students(skip=skip, limit=limit)
 
 
 @router.put("/admin/students/{student_id}")
@@ -363,7 +367,7 @@ async def update_school(
         school_id=school_id,
         name=data.name,
         short_name=data.short_name,
-        inventory_id=data.catalog_id,
+        catalog_id=data.catalog_id,
         is_active=getattr(data, 'is_active', True)
     )
     if not result:
@@ -9,6 +9,7 @@ from datetime import datetime, timezone
 from core.auth import get_current_user, get_admin_user, get_optional_user
 from core.database import db
 from modules.sysbook.services.textbook_access_service import textbook_access_service
+from modules.store.services.analytics_rollup_service import analytics_rollup_service
 
 router = APIRouter(prefix="/browse", tags=["Sysbook - Browse"])
 
@@ -16,28 +17,16 @@ router = APIRouter(prefix="/browse", tags=["Sysbook - Browse"])
 async def verify_sysbook_access(user_id: str) -> dict:
     """
     Verify if user has access to the Sysbook catalog.
-    Uses the textbook_access system (store_textbook_access_students collection).
+    Uses the textbook_access system (store_textbook_access_students collection);
+    the per-user summary is cached by the service.
     """
     students = []
-    grades = set()
+    grades = []
     
     try:
-        user_students = await textbook_access_service.get_user_students(user_id)
-        for student in user_students:
-            if student.get("has_approved_access") or student.get("status") == "approved":
-                students.append({
-                    "sync_id": student.get("student_id"),
-                    "name": student.get("full_name"),
-                    "first_name": student.get("first_name", ""),
-                    "last_name": student.get("last_name", ""),
-                    "full_name": student.get("full_name"),
-                    "grade": student.get("grade"),
-                    "section": student.get("section"),
-                    "student_id": student.get("student_id"),
-                    "school_name": student.get("school_name")
-                })
-                if student.get("grade"):
-                    grades.add(student.get("grade"))
+        summary = await textbook_access_service.get_access_summary(user_id)
+        students = summary["students"]
+        grades = summary["grades"]
     except Exception as e:
         print(f"Error checking textbook access: {e}")
     
@@ -52,7 +41,7 @@ async def verify_sysbook_access(user_id: str) -> dict:
     return {
         "has_access": True,
         "students": students,
-        "grades": list(grades),
+        "grades": grades,
         "message": None
     }
 
@@ -351,6 +340,7 @@ async def admin_create_sysbook_product(
     
     await db.store_products.insert_one(product)
     product.pop("_id", None)
+    await analytics_rollup_service.refresh_inventory([product["book_id"]])
     
     return {"success": True, "product": product}
 
@@ -375,6 +365,7 @@ async def admin_update_sysbook_product(
     
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Product not found")
+    await analytics_rollup_service.refresh_inventory([book_id])
     
     product = await db.store_products.find_one({"book_id": book_id}, {"_id": 0})
     
@@ -404,6 +395,7 @@ async def admin_delete_sysbook_product(
         )
         if result.matched_count == 0:
             raise HTTPException(status_code=404, detail="Product not found")
+    await analytics_rollup_service.refresh_inventory([book_id])
     
     return {"success": True, "message": "Product deleted"}
 
@@ -420,6 +412,7 @@ async def admin_archive_product(
     )
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Product not found")
+    await analytics_rollup_service.refresh_inventory([book_id])
     return {"success": True}
 
 
@@ -435,6 +428,7 @@ async def admin_restore_product(
     )
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Product not found")
+    await analytics_rollup_service.refresh_inventory([book_id])
     return {"success": True}
 
 
@@ -449,4 +443,5 @@ async def admin_permanent_delete(
     )
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Product not found or not archived")
+    await analytics_rollup_service.refresh_inventory([book_id])
     return {"success": True}
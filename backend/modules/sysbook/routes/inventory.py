@@ -3,14 +3,16 @@ Sysbook — Textbook Inventory Routes
 Dashboard, product list, CRUD, bulk operations — all scoped to is_sysbook=True (Sysbook products).
 """
 from fastapi import APIRouter, HTTPException, Depends, Query
-from typing import Optional, List
+from typing import Optional, List, Literal
 from datetime import datetime, timezone
 from pydantic import BaseModel
 import uuid
 
 from core.auth import get_admin_user
 from core.database import db
+from core.exports import ExportSpec, export_response, export_jobs
 from .alerts import create_stock_alert_if_needed
+from modules.store.services.analytics_rollup_service import analytics_rollup_service
 
 router = APIRouter(prefix="/inventory", tags=["Sysbook - Inventory"])
 
@@ -29,38 +31,103 @@ class BatchStockAdjustment(BaseModel):
 
 
 
+PRESALE_FILTER = {"$or": [
+    {"is_presale": True},
+    {"status": {"$in": ["awaiting_payment", "awaiting_link", "pending", "submitted"]}}
+]}
+
+BOOK_ORDER_COLUMNS = [
+    ("order_id", "Order ID"),
+    ("student_name", "Student"),
+    ("parent_name", "Parent"),
+    ("user_name", "User"),
+    ("user_email", "Email"),
+    ("grade", "Grade"),
+    ("quantity", "Quantity"),
+    ("status", "Status"),
+]
+
+
+def _book_orders(book_id: str, presale: bool = False, status: Optional[str] = None):
+    """Cursor over the orders containing a book — only the first matching item is projected."""
+    query = {"items.book_id": book_id, **(PRESALE_FILTER if presale else {})}
+    if status:
+        query["status"] = status
+    return db.store_textbook_orders.find(
+        query,
+        {"_id": 0, "order_id": 1, "student_name": 1, "parent_name": 1,
+         "user_name": 1, "user_email": 1, "grade": 1, "items.$": 1, "status": 1,
+         "is_presale": 1, "paid_date": 1, "created_at": 1}
+    )
+
+
+def _book_order_row(order: dict) -> dict:
+    item = (order.get("items") or [{}])[0]
+    return {
+        "order_id": order["order_id"],
+        "student_name": order.get("student_name", ""),
+        "parent_name": order.get("parent_name", ""),
+        "user_name": order.get("user_name", ""),
+        "user_email": order.get("user_email", ""),
+        "grade": order.get("grade", ""),
+        "quantity": item.get("quantity_ordered", 1),
+        "status": order.get("status", ""),
+        "is_presale": order.get("is_presale", False),
+        "paid_date": order.get("paid_date"),
+        "created_at": order.get("created_at"),
+    }
+
+
+def purchasers_export(book_id: str, status: Optional[str] = None) -> ExportSpec:
+    return ExportSpec(
+        name="purchasers",
+        columns=BOOK_ORDER_COLUMNS + [("paid_date", "Paid Date")],
+        source=lambda: _book_orders(book_id, status=status),
+        formatter=lambda order: [_book_order_row(order)],
+        filename=f"purchasers_{book_id}",
+    )
+
+
+def presale_orders_export(book_id: str, status: Optional[str] = None) -> ExportSpec:
+    return ExportSpec(
+        name="presale_orders",
+        columns=BOOK_ORDER_COLUMNS + [("is_presale", "Presale"), ("created_at", "Created At")],
+        source=lambda: _book_orders(book_id, presale=True, status=status),
+        formatter=lambda order: [_book_order_row(order)],
+        filename=f"presale_orders_{book_id}",
+    )
+
+
+export_jobs.register("sysbook_purchasers", purchasers_export, "Orders that include a textbook")
+export_jobs.register("sysbook_presale_orders", presale_orders_export, "Presale orders that include a textbook")
+
+
 @router.get("/products/{book_id}/purchasers")
 async def get_product_purchasers(book_id: str, admin: dict = Depends(get_admin_user)):
     """Get all students/users who have this book in their orders, with quantities."""
-    orders = await db.store_textbook_orders.find(
-        {"items.book_id": book_id},
-        {"_id": 0, "order_id": 1, "student_name": 1, "parent_name": 1,
-         "user_name": 1, "user_email": 1, "grade": 1, "items": 1, "status": 1, "paid_date": 1}
-    ).to_list(2000)
-
     purchasers = []
     total_qty = 0
-    for order in orders:
-        for item in order.get("items", []):
-            if item.get("book_id") == book_id:
-                qty = item.get("quantity_ordered", 1)
-                total_qty += qty
-                purchasers.append({
-                    "order_id": order["order_id"],
-                    "student_name": order.get("student_name", ""),
-                    "parent_name": order.get("parent_name", ""),
-                    "user_name": order.get("user_name", ""),
-                    "user_email": order.get("user_email", ""),
-                    "grade": order.get("grade", ""),
-                    "quantity": qty,
-                    "status": order.get("status", ""),
-                    "paid_date": order.get("paid_date"),
-                })
-                break
+    async for order in _book_orders(book_id):
+        row = _book_order_row(order)
+        total_qty += row["quantity"]
+        purchasers.append({k: row[k] for k in (
+            "order_id", "student_name", "parent_name", "user_name", "user_email",
+            "grade", "quantity", "status", "paid_date")})
 
     return {"book_id": book_id, "total_qty": total_qty, "purchasers": purchasers}
 
 
+@router.get("/products/{book_id}/purchasers/export")
+async def export_product_purchasers(
+    book_id: str,
+    fmt: Literal["csv", "xlsx"] = Query("csv", alias="format"),
+    status: Optional[str] = None,
+    admin: dict = Depends(get_admin_user),
+):
+    """Download the purchasers of a book as CSV or XLSX (streamed, no row limit)."""
+    return export_response(purchasers_export(book_id, status), fmt)
+
+
 @router.get("/purchased-summary")
 async def get_purchased_summary(admin: dict = Depends(get_admin_user)):
     """Get total purchased quantity per book_id across all orders."""
@@ -72,7 +139,7 @@ async def get_purchased_summary(admin: dict = Depends(get_admin_user)):
             "order_count": {"$sum": 1},
         }},
     ]
-    results = await db.store_textbook_orders.aggregate(pipeline).to_list(2000)
+    results = await db.store_textbook_orders.aggregate(pipeline).to_list(None)
     summary = {r["_id"]: {"qty": r["total_qty"], "orders": r["order_count"]} for r in results if r["_id"]}
     return summary
 
@@ -81,40 +148,29 @@ async def get_purchased_summary(admin: dict = Depends(get_admin_user)):
 async def get_presale_orders(book_id: str, admin: dict = Depends(get_admin_user)):
     """Get all orders contributing to the presale (reserved) count for this book.
     Presale orders are those with is_presale=True or status in awaiting states."""
-    orders = await db.store_textbook_orders.find(
-        {"items.book_id": book_id, "$or": [
-            {"is_presale": True},
-            {"status": {"$in": ["awaiting_payment", "awaiting_link", "pending", "submitted"]}}
-        ]},
-        {"_id": 0, "order_id": 1, "student_name": 1, "parent_name": 1,
-         "user_name": 1, "user_email": 1, "grade": 1, "items": 1, "status": 1,
-         "is_presale": 1, "created_at": 1}
-    ).to_list(2000)
-
     presale_list = []
     total_qty = 0
-    for order in orders:
-        for item in order.get("items", []):
-            if item.get("book_id") == book_id:
-                qty = item.get("quantity_ordered", 1)
-                total_qty += qty
-                presale_list.append({
-                    "order_id": order["order_id"],
-                    "student_name": order.get("student_name", ""),
-                    "parent_name": order.get("parent_name", ""),
-                    "user_name": order.get("user_name", ""),
-                    "user_email": order.get("user_email", ""),
-                    "grade": order.get("grade", ""),
-                    "quantity": qty,
-                    "status": order.get("status", ""),
-                    "is_presale": order.get("is_presale", False),
-                    "created_at": order.get("created_at"),
-                })
-                break
+    async for order in _book_orders(book_id, presale=True):
+        row = _book_order_row(order)
+        total_qty += row["quantity"]
+        presale_list.append({k: row[k] for k in (
+            "order_id", "student_name", "parent_name", "user_name", "user_email",
+            "grade", "quantity", "status", "is_presale", "created_at")})
 
     return {"book_id": book_id, "total_qty": total_qty, "orders": presale_list}
 
 
+@router.get("/products/{book_id}/presale-orders/export")
+async def export_presale_orders(
+    book_id: str,
+    fmt: Literal["csv", "xlsx"] = Query("csv", alias="format"),
+    status: Optional[str] = None,
+    admin: dict = Depends(get_admin_user),
+):
+    """Download the presale orders of a book as CSV or XLSX (streamed, no row limit)."""
+    return export_response(presale_orders_export(book_id, status), fmt)
+
+
 @router.get("/products/{book_id}/stock-history")
 async def get_stock_history(book_id: str, admin: dict = Depends(get_admin_user)):
     """Get stock movement history for a product — adjustments, orders, imports."""
@@ -164,10 +220,7 @@ async def get_stock_history(book_id: str, admin: dict = Depends(get_admin_user))
 async def get_presale_summary(admin: dict = Depends(get_admin_user)):
     """Get total presale quantity per book_id across all presale/pending orders."""
     pipeline = [
-        {"$match": {"$or": [
-            {"is_presale": True},
-            {"status": {"$in": ["awaiting_payment", "awaiting_link", "pending", "submitted"]}}
-        ]}},
+        {"$match": PRESALE_FILTER},
         {"$unwind": "$items"},
         {"$group": {
             "_id": "$items.book_id",
@@ -175,7 +228,7 @@ async def get_presale_summary(admin: dict = Depends(get_admin_user)):
             "order_count": {"$sum": 1},
         }},
     ]
-    results = await db.store_textbook_orders.aggregate(pipeline).to_list(2000)
+    results = await db.store_textbook_orders.aggregate(pipeline).to_list(None)
     summary = {r["_id"]: {"qty": r["total_qty"], "orders": r["order_count"]} for r in results if r["_id"]}
     return summary
 
@@ -301,6 +354,7 @@ async def sysbook_create_product(product: dict, admin: dict = Depends(get_admin_
     product["created_by"] = admin.get("user_id")
     await db.store_products.insert_one(product)
     product.pop("_id", None)
+    await analytics_rollup_service.refresh_inventory([product["book_id"]])
     return {"success": True, "product": product}
 
 
@@ -324,6 +378,7 @@ async def sysbook_update_product(book_id: str, updates: dict, admin: dict = Depe
     )
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Product not found")
+    await analytics_rollup_service.refresh_inventory([book_id])
     product = await db.store_products.find_one({"book_id": book_id}, {"_id": 0})
     return {"success": True, "product": product}
 
@@ -362,6 +417,7 @@ async def sysbook_adjust_stock(book_id: str, adj: StockAdjustment, admin: dict =
 
     # Check stock alert threshold
     await create_stock_alert_if_needed(book_id, product.get("name", ""), new_qty, product.get("grade", ""), product.get("code", ""))
+    await analytics_rollup_service.refresh_inventory([book_id])
 
     return {"success": True, "old_quantity": old_qty, "new_quantity": new_qty, "movement": movement}
 
@@ -400,6 +456,7 @@ async def sysbook_batch_adjust(batch: BatchStockAdjustment, admin: dict = Depend
         movement.pop("_id", None)
         await create_stock_alert_if_needed(adj.book_id, product.get("name", ""), new_qty, product.get("grade", ""), product.get("code", ""))
         results.append({"book_id": adj.book_id, "old_quantity": old_qty, "new_quantity": new_qty})
+    await analytics_rollup_service.refresh_inventory(r["book_id"] for r in results if "error" not in r)
     return {"success": True, "results": results}
 
 
@@ -412,6 +469,7 @@ async def sysbook_archive_product(book_id: str, admin: dict = Depends(get_admin_
     )
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Product not found")
+    await analytics_rollup_service.refresh_inventory([book_id])
     return {"success": True}
 
 
@@ -424,6 +482,7 @@ async def sysbook_restore_product(book_id: str, admin: dict = Depends(get_admin_
     )
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Product not found")
+    await analytics_rollup_service.refresh_inventory([book_id])
     return {"success": True}
 
 
@@ -441,6 +500,7 @@ async def sysbook_delete_product(book_id: str, hard_delete: bool = False, admin:
         )
         if result.matched_count == 0:
             raise HTTPException(status_code=404, detail="Product not found")
+    await analytics_rollup_service.refresh_inventory([book_id])
     return {"success": True}
 
 
@@ -450,6 +510,7 @@ async def sysbook_permanent_delete(book_id: str, admin: dict = Depends(get_admin
     result = await db.store_products.delete_one({"book_id": book_id, **SYSBOOK_FILTER, "archived": True})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Product not found or not archived")
+    await analytics_rollup_service.refresh_inventory([book_id])
     return {"success": True}
 
 
@@ -463,6 +524,7 @@ async def sysbook_bulk_archive(body: dict, admin: dict = Depends(get_admin_user)
         {"book_id": {"$in": book_ids}, **SYSBOOK_FILTER},
         {"$set": {"archived": True, "archived_at": datetime.now(timezone.utc).isoformat()}}
     )
+    await analytics_rollup_service.refresh_inventory(book_ids)
     return {"status": "archived", "count": r.modified_count}
 
 
@@ -473,6 +535,7 @@ async def sysbook_bulk_delete(body: dict, admin: dict = Depends(get_admin_user))
     if not book_ids:
         raise HTTPException(status_code=400, detail="No book_ids provided")
     r = await db.store_products.delete_many({"book_id": {"$in": book_ids}, **SYSBOOK_FILTER, "archived": True})
+    await analytics_rollup_service.refresh_inventory(book_ids)
     return {"status": "deleted", "count": r.deleted_count}
 
 
@@ -486,6 +549,7 @@ async def sysbook_bulk_unarchive(body: dict, admin: dict = Depends(get_admin_use
         {"book_id": {"$in": book_ids}, **SYSBOOK_FILTER},
         {"$set": {"archived": False}, "$unset": {"archived_at": ""}}
     )
+    await analytics_rollup_service.refresh_inventory(book_ids)
     return {"status": "unarchived", "count": r.modified_count}
 
 
@@ -499,4 +563,5 @@ async def toggle_presale_lock(book_id: str, data: dict, admin: dict = Depends(ge
     )
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Product not found")
+    await analytics_rollup_service.refresh_inventory([book_id])
     return {"status": "ok", "book_id": book_id, "presale_locked": locked}
@@ -1,87 +1,44 @@
 """
 Sysbook — Product Merge Tool
 Merges duplicate products: moves all orders from source → target, combines counts, archives source.
-Also detects potential duplicates by code prefix matching.
+Also detects potential duplicates by code prefix matching (and, on request, by similar names).
 """
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query
 from core.database import db
 from core.auth import get_admin_user
+from modules.store.services.analytics_rollup_service import analytics_rollup_service, ORDER_PROJECTION
+from modules.sysbook.services.duplicate_detection import find_code_duplicates, find_similar_names
 import logging
-import re
 
 logger = logging.getLogger("sysbook.merge")
 router = APIRouter(prefix="/merge", tags=["Sysbook - Merge"])
 
 
+async def _load_products():
+    return await db.store_products.find(
+        {"is_sysbook": True, "archived": {"$ne": True}},
+        {"_id": 0, "book_id": 1, "code": 1, "name": 1, "grade": 1, "price": 1,
+         "inventory_quantity": 1, "reserved_quantity": 1}
+    ).to_list(None)
+
+
 @router.get("/detect-duplicates")
-async def detect_duplicates(admin: dict = Depends(get_admin_user)):
+async def detect_duplicates(
+    include_names: bool = Query(False, description="Also cluster near-identical names with different codes"),
+    admin: dict = Depends(get_admin_user)
+):
     """Detect duplicate products where one code is a clean code and another
     has the same code with extra text appended (from bad Monday.com import).
     
     Example duplicate: code "G7-6" vs code "G7-6 El Arte del Lenguaje"
     NOT duplicate: code "K4/5-4" vs code "K4/5-9" (different item numbers)
     """
-    products = await db.store_products.find(
-        {"is_sysbook": True, "archived": {"$ne": True}},
-        {"_id": 0, "book_id": 1, "code": 1, "name": 1, "grade": 1, "price": 1,
-         "inventory_quantity": 1, "reserved_quantity": 1}
-    ).to_list(2000)
-
-    # Build index of products by grade
-    by_grade = {}
-    for p in products:
-        grade = p.get("grade", "")
-        if grade not in by_grade:
-            by_grade[grade] = []
-        by_grade[grade].append(p)
-
-    duplicates = []
-
-    # For each grade, find products where one code is prefix of another + space
-    for grade, items in by_grade.items():
-        # Sort by code length (short codes first = likely the "correct" ones)
-        items.sort(key=lambda x: len(x.get("code", "")))
-        used = set()
-
-        for i, item_a in enumerate(items):
-            code_a = (item_a.get("code") or "").strip()
-            if not code_a or item_a["book_id"] in used:
-                continue
-
-            group_items = [item_a]
-
-            for j, item_b in enumerate(items):
-                if i == j or item_b["book_id"] in used:
-                    continue
-                code_b = (item_b.get("code") or "").strip()
-                if not code_b:
-                    continue
-
-                # Check: is code_b = code_a + " " + some_text?
-                # This catches "G7-6 El Arte del Lenguaje" as duplicate of "G7-6"
-                if code_b.startswith(code_a + " ") or code_b.startswith(code_a + "\t"):
-                    group_items.append(item_b)
-                    used.add(item_b["book_id"])
-
-            if len(group_items) > 1:
-                used.add(item_a["book_id"])
-                duplicates.append({
-                    "key": f"{code_a}|{grade}",
-                    "normalized_code": code_a,
-                    "grade": grade,
-                    "items": [{
-                        "book_id": p["book_id"],
-                        "code": p.get("code", ""),
-                        "name": p.get("name", ""),
-                        "grade": grade,
-                        "price": p.get("price", 0),
-                        "stock": p.get("inventory_quantity", 0),
-                        "reserved": p.get("reserved_quantity", 0),
-                    } for p in group_items],
-                    "suggested_keep": item_a["book_id"],  # shortest code = correct
-                })
-
-    return {"total_duplicates": len(duplicates), "groups": duplicates}
+    products = await _load_products()
+    duplicates = find_code_duplicates(products)
+    result = {"total_duplicates": len(duplicates), "groups": duplicates}
+    if include_names:
+        result["name_groups"] = find_similar_names(products)
+    return result
 
 
 @router.post("/merge")
@@ -114,11 +71,13 @@ async def merge_products(data: dict, admin: dict = Depends(get_admin_user)):
 
     # Step 1: Update all orders that reference the source book_id
     orders_updated = 0
+    rollup_changes = []
     orders_cursor = db.store_textbook_orders.find(
         {"items.book_id": source_id},
-        {"_id": 1, "order_id": 1, "items": 1}
+        {**ORDER_PROJECTION, "_id": 1}
     )
     async for order in orders_cursor:
+        before = {**order, "items": [dict(i) for i in order.get("items", [])]}
         updated_items = []
         changed = False
         for item in order.get("items", []):
@@ -136,6 +95,7 @@ async def merge_products(data: dict, admin: dict = Depends(get_admin_user)):
                 {"_id": order["_id"]},
                 {"$set": {"items": updated_items}}
             )
+            rollup_changes.append((before, {**order, "items": updated_items}))
             orders_updated += 1
 
     # Step 2: Merge stock and reserved quantities
@@ -171,6 +131,8 @@ async def merge_products(data: dict, admin: dict = Depends(get_admin_user)):
             "reserved_quantity": 0,
         }}
     )
+    await analytics_rollup_service.record_order_changes(rollup_changes)
+    await analytics_rollup_service.refresh_inventory([source_id, target_id])
 
     result = {
         "success": True,
@@ -188,8 +150,7 @@ async def merge_products(data: dict, admin: dict = Depends(get_admin_user)):
 @router.post("/merge-all-duplicates")
 async def merge_all_duplicates(admin: dict = Depends(get_admin_user)):
     """Auto-merge all detected duplicates. Keeps the product with the shortest code."""
-    detect_result = await detect_duplicates(admin)
-    groups = detect_result["groups"]
+    groups = find_code_duplicates(await _load_products())
 
     merged = 0
     errors = []
@@ -7,6 +7,7 @@ from typing import Optional, List
 
 from core.auth import get_current_user, get_admin_user
 from modules.sysbook.services.textbook_order_service import textbook_order_service
+from modules.store.services.analytics_rollup_service import analytics_rollup_service, ORDER_PROJECTION
 from modules.sysbook.models.textbook_order import (
     OrderStatus, SubmitOrderRequest, ReorderRequest, AdminSetMaxQuantity
 )
@@ -415,6 +416,7 @@ async def pay_order(order_id: str, user: dict = Depends(get_current_user)):
         {"order_id": order_id},
         {"$set": {"status": "submitted", "payment_method": "wallet", "paid_at": now, "paid_date": now, "updated_at": now}}
     )
+    await analytics_rollup_service.record_order_change(order, {**order, "status": "submitted"})
     
     # Sync paid_date to Monday.com if order has a monday_item_id
     try:
@@ -460,6 +462,7 @@ async def cancel_order(order_id: str, user: dict = Depends(get_current_user)):
         {"order_id": order_id},
         {"$set": {"status": "cancelled", "cancelled_at": now, "cancelled_by": "user", "updated_at": now}}
     )
+    await analytics_rollup_service.record_order_change(order, {**order, "status": "cancelled"})
     
     return {"success": True, "order_id": order_id, "status": "cancelled"}
 
@@ -532,6 +535,7 @@ async def admin_cancel_order(order_id: str, data: dict = None, admin: dict = Dep
             "refunded_amount": order.get("total_amount", 0) if refunded else 0, "updated_at": now,
         }}
     )
+    await analytics_rollup_service.record_order_change(order, {**order, "status": "cancelled"})
     
     return {"success": True, "order_id": order_id, "previous_status": status, "refunded": refunded}
 
@@ -575,7 +579,7 @@ async def run_auto_cancel(admin: dict = Depends(get_admin_user)):
     
     # Find expired awaiting_payment orders
     expired = await db.store_textbook_orders.find(
-        {"status": "awaiting_payment", "created_at": {"$lt": cutoff}}, {"_id": 0, "order_id": 1, "items": 1}
+        {"status": "awaiting_payment", "created_at": {"$lt": cutoff}}, ORDER_PROJECTION
     ).to_list(100)
     
     cancelled = 0
@@ -591,6 +595,7 @@ async def run_auto_cancel(admin: dict = Depends(get_admin_user)):
             {"order_id": order["order_id"]},
             {"$set": {"status": "cancelled", "cancelled_at": datetime.now(timezone.utc).isoformat(), "cancelled_by": "auto_cancel", "cancel_reason": f"Not paid within {hours} hours"}}
         )
+        await analytics_rollup_service.record_order_change(order, {**order, "status": "cancelled"})
         cancelled += 1
     
     return {"cancelled": cancelled, "hours": hours, "checked": len(expired)}
@@ -642,6 +647,7 @@ async def update_order_grade(
 
     old_grade = order.get("grade", "")
     products_relinked = 0
+    before = {**order, "items": [dict(i) for i in order.get("items", [])]}
 
     # Decrement reserved_quantity on old products
     for item in order.get("items", []):
@@ -707,6 +713,7 @@ async def update_order_grade(
         {"order_id": order_id},
         {"$set": {"grade": new_grade, "items": items, "updated_at": now}}
     )
+    await analytics_rollup_service.record_order_change(before, {**order, "grade": new_grade, "items": items})
 
     return {"status": "ok", "grade": new_grade, "old_grade": old_grade, "products_relinked": products_relinked}
 
@@ -757,6 +764,9 @@ async def remove_order_item(
         {"order_id": order_id},
         {"$set": {"items": new_items, "total_amount": new_total, "updated_at": now}}
     )
+    await analytics_rollup_service.record_order_change(
+        order, {**order, "items": new_items, "total_amount": new_total}
+    )
 
     # Return updated order
     updated = await db.store_textbook_orders.find_one({"order_id": order_id}, {"_id": 0})
@@ -798,20 +808,21 @@ async def add_order_item(
         "matched": True,
     }
 
-    items = order.get("items", [])
-    items.append(new_item)
+    items = order.get("items", []) + [new_item]
     new_total = sum((i.get("price") or 0) * (i.get("quantity_ordered") or 1) for i in items)
 
     await db.store_textbook_orders.update_one(
         {"order_id": order_id},
         {"$set": {"items": items, "total_amount": new_total, "updated_at": now}}
     )
+    await analytics_rollup_service.record_order_change(order, {**order, "items": items, "total_amount": new_total})
 
     # Increment reserved_quantity
     await db.store_products.update_one(
         {"book_id": book_id},
         {"$inc": {"reserved_quantity": quantity}}
     )
+    await analytics_rollup_service.refresh_inventory([book_id])
 
     updated = await db.store_textbook_orders.find_one({"order_id": order_id}, {"_id": 0})
 
@@ -1243,8 +1254,12 @@ async def bulk_delete_orders(data: dict, admin: dict = Depends(get_admin_user)):
     order_ids = data.get("order_ids", [])
     if not order_ids:
         raise HTTPException(status_code=400, detail="No orders specified")
+    orders = await db.store_textbook_orders.find(
+        {"order_id": {"$in": order_ids}}, ORDER_PROJECTION
+    ).to_list(None)
     r = await db.store_textbook_orders.delete_many(
         {"order_id": {"$in": order_ids}}
     )
+    await analytics_rollup_service.record_order_changes((o, None) for o in orders)
     return {"status": "deleted", "count": r.deleted_count}
 
@@ -202,9 +202,26 @@ async def sync_to_textbooks_board(admin: dict = Depends(get_admin_user)):
 async def refresh_textbooks_map(admin: dict = Depends(get_admin_user)):
     """Force refresh the Textbooks board item map cache"""
     from modules.sysbook.services.textbook_board_sync import textbook_board_sync
-    await textbook_board_sync.invalidate_cache()
-    board_map = await textbook_board_sync._get_board_items_map()
-    return {"status": "ok", "items_mapped": len(board_map)}
+    result = await textbook_board_sync.invalidate_cache()
+    return {"status": "ok", **result}
+
+
+@router.get("/textbooks-map/status")
+async def textbooks_map_status(admin: dict = Depends(get_admin_user)):
+    """Textbooks board mirror state (items, revision, last reconciliations, webhooks)"""
+    from modules.sysbook.services.textbook_board_mirror import textbook_board_mirror
+    return await textbook_board_mirror.get_status()
+
+
+@router.post("/textbooks-map/register-webhooks")
+async def register_textbooks_map_webhooks(admin: dict = Depends(get_admin_user)):
+    """Register Monday.com item webhooks so the Textbooks board mirror updates incrementally"""
+    import os
+    from modules.sysbook.services.textbook_board_mirror import textbook_board_mirror
+    base_url = os.environ.get("FRONTEND_URL", "").rstrip("/")
+    if not base_url:
+        raise HTTPException(400, "FRONTEND_URL not configured")
+    return await textbook_board_mirror.register_webhooks(f"{base_url}/api/monday/webhooks/incoming")
 
 
 
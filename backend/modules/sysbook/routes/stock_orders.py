@@ -10,6 +10,7 @@ import uuid
 
 from core.auth import get_admin_user
 from core.database import db
+from modules.store.services.analytics_rollup_service import analytics_rollup_service
 
 router = APIRouter(prefix="/stock-orders", tags=["Sysbook - Stock Orders"])
 
@@ -109,6 +110,7 @@ async def apply_stock_changes(order: dict, admin: dict):
         await db.inventory_movements.insert_one(movement)
         movement.pop("_id", None)
         movements.append({"book_id": book_id, "old_qty": old_qty, "new_qty": new_qty, "change": qty_change})
+    await analytics_rollup_service.refresh_inventory(m["book_id"] for m in movements)
     return movements
 
 
@@ -6,6 +6,7 @@ Multi-User Student Linking + Shared Orders
 from fastapi import APIRouter, HTTPException, Depends
 from core.database import db
 from core.auth import get_current_user, get_admin_user
+from modules.sysbook.services.student_views import student_view_cache
 from datetime import datetime, timezone
 import uuid
 import logging
@@ -72,6 +73,7 @@ async def request_link(data: dict, user: dict = Depends(get_current_user)):
         )
         # Also auto-share existing orders
         await _share_orders_with_user(student_id, user_id)
+        await student_view_cache.invalidate_users([user_id])
         return {"status": "approved", "message": "Linked successfully (auto-approved)"}
     
     # Needs admin approval
@@ -131,6 +133,7 @@ async def approve_link(request_id: str, admin: dict = Depends(get_admin_user)):
     
     # Auto-share existing orders
     await _share_orders_with_user(req["student_id"], req["user_id"])
+    await student_view_cache.invalidate_users([req["user_id"]])
     
     return {"success": True, "message": f"Link approved for {req.get('user_name', req['user_id'])}"}
 
@@ -181,6 +184,7 @@ async def remove_link(student_id: str, user_id: str, admin: dict = Depends(get_a
         {"student_id": student_id},
         {"$pull": {"shared_with": {"user_id": user_id}}}
     )
+    await student_view_cache.invalidate_users([user_id])
     return {"success": True}
 
 
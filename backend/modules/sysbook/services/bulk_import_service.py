@@ -1,17 +1,57 @@
 """
 Store Module - Servicio de Import Masiva (Bulk Import)
 Permite importar estudiantes y productos desde datos copiados de Google Sheets
+
+Preview and import share one engine: rows are parsed lazily from the pasted
+TSV and handled in chunks of CHUNK_SIZE. Each chunk resolves the existing
+records with a single `$in` query and, on import, is written with one
+unordered `bulk_write` of upserts keyed on the natural key (student number
+or product code). Per-row write errors come back from `BulkWriteError`.
 """
-from typing import List, Optional, Dict, Any
+from typing import Callable, Iterator, List, Optional, Dict, Any, Tuple
 from datetime import datetime, timezone
+from io import StringIO
 import uuid
 import logging
 import re
 
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
 from core.database import db
 
 logger = logging.getLogger(__name__)
 
+CHUNK_SIZE = 1000
+
+
+class RowError(ValueError):
+    """A row that cannot be imported (reported with its row number)"""
+
+
+class ImportSpec:
+    """How one kind of record is read from a row and stored"""
+
+    def __init__(
+        self,
+        tipo: str,
+        collection: str,
+        key_field: str,
+        build: Callable[[List[str]], Tuple[str, Dict]],
+        insert_defaults: Callable[[str], Dict],
+        duplicate_error: Optional[str] = None,
+        keep_existing: Callable[[Dict], bool] = lambda existing: False,
+        describe: Callable[[Dict], Dict] = lambda fields: fields,
+    ):
+        self.tipo = tipo
+        self.collection = collection
+        self.key_field = key_field
+        self.build = build                      # row -> (key, fields) or RowError
+        self.insert_defaults = insert_defaults  # now -> fields set only on insert
+        self.duplicate_error = duplicate_error  # preview: duplicates as errors (else listed apart)
+        self.keep_existing = keep_existing      # existing record that must not be overwritten
+        self.describe = describe                # fields -> preview entry
+
 
 class BulkImportService:
     """
@@ -19,6 +59,13 @@ class BulkImportService:
     Soporta formato TSV (tab-separated) that is el formato nativo de Google Sheets.
     """
     
+    def iter_tsv(self, raw_text: str) -> Iterator[List[str]]:
+        """Non-empty TSV rows (cells stripped), read line by line."""
+        for line in StringIO(raw_text or ""):
+            cells = [cell.strip() for cell in line.rstrip("\r\n").split('\t')]
+            if any(cells):  # Si hay al menos una celda no empty
+                yield cells
+    
     def parse_tsv(self, raw_text: str, has_headers: bool = True) -> Dict:
         """
         Parsear texto en formato TSV (tab-separated values).
@@ -35,19 +82,7 @@ class BulkImportService:
                 "total_columns": int
             }
         """
-        if not raw_text or not raw_text.strip():
-            return {"headers": None, "rows": [], "total_rows": 0, "total_columns": 0}
-        
-        lines = raw_text.strip().split('\n')
-        rows = []
-        
-        for line in lines:
-            # Splitear por tab
-            cells = line.split('\t')
-            # Clean espacios extras
-            cells = [cell.strip() for cell in cells]
-            if any(cell for cell in cells):  # Si hay al menos una celda no empty
-                rows.append(cells)
+        rows = list(self.iter_tsv(raw_text))
         
         if not rows:
             return {"headers": None, "rows": [], "total_rows": 0, "total_columns": 0}
@@ -55,20 +90,214 @@ class BulkImportService:
         headers = None
         data_rows = rows
         
-        if has_headers and len(rows) > 0:
+        if has_headers:
             headers = rows[0]
             data_rows = rows[1:]
         
-        max_cols = max(len(row) for row in rows) if rows else 0
-        
         return {
             "headers": headers,
             "rows": data_rows,
             "total_rows": len(data_rows),
-            "total_columns": max_cols
+            "total_columns": max(len(row) for row in rows)
         }
     
-    async def preview_estudiantes(
+    # ============== ENGINE ==============
+    
+    async def _run(self, spec: ImportSpec, raw_text: str, commit: bool = False,
+                   update_existing: bool = True, extra: Dict = None) -> Dict:
+        """
+        Validate, deduplicate and resolve every row against the database;
+        with commit=True also write them. Preview and import both run this.
+        """
+        rows = self.iter_tsv(raw_text)
+        headers = next(rows, None)
+        now = datetime.now(timezone.utc).isoformat()
+        state = {
+            "headers": headers, "total": 0, "planned": [], "errores": [], "duplicados": [],
+            "creados": 0, "actualizados": 0, "omitidos": 0, "seen": set(),
+        }
+        chunk: List[Tuple[int, str, Dict]] = []
+        for idx, row in enumerate(rows):
+            fila = idx + 2
+            state["total"] += 1
+            try:
+                key, fields = spec.build(row)
+            except RowError as e:
+                state["errores"].append({"fila": fila, "error": str(e)})
+                continue
+            if key in state["seen"]:
+                if commit:
+                    state["omitidos"] += 1
+                elif spec.duplicate_error:
+                    state["errores"].append({"fila": fila, "error": f"{spec.duplicate_error}: {key}"})
+                else:
+                    state["duplicados"].append({"fila": fila, "numero": key})
+                continue
+            state["seen"].add(key)
+            chunk.append((fila, key, fields))
+            if len(chunk) >= CHUNK_SIZE:
+                await self._flush(spec, chunk, state, commit, update_existing, now, extra)
+                chunk = []
+        if chunk:
+            await self._flush(spec, chunk, state, commit, update_existing, now, extra)
+        return state
+    
+    async def _flush(self, spec: ImportSpec, chunk: List[Tuple[int, str, Dict]], state: Dict,
+                     commit: bool, update_existing: bool, now: str, extra: Dict) -> None:
+        """One `$in` lookup for the chunk, then (on commit) one unordered bulk upsert."""
+        collection = db[spec.collection]
+        found = await collection.find(
+            {spec.key_field: {"$in": [key for _, key, _ in chunk]}},
+            {"_id": 0, spec.key_field: 1, "override_local": 1}
+        ).to_list(None)
+        existing = {doc[spec.key_field]: doc for doc in found}
+        
+        if not commit:
+            for fila, key, fields in chunk:
+                exists = key in existing
+                state["planned"].append({
+                    "fila": fila, **spec.describe(fields),
+                    "ya_existe": exists,
+                    "accion": "actualizar" if exists else "crear"
+                })
+            return
+        
+        ops, op_rows = [], []
+        for fila, key, fields in chunk:
+            current = existing.get(key)
+            if current and (not update_existing or spec.keep_existing(current)):
+                state["omitidos"] += 1
+                continue
+            doc = {**fields, **(extra or {}), "updated_at": now}
+            if spec.tipo == "estudiantes":
+                doc["fila_numero"] = fila
+            ops.append(UpdateOne(
+                {spec.key_field: key},
+                {"$set": doc, "$setOnInsert": spec.insert_defaults(now)},
+                upsert=True
+            ))
+            op_rows.append(fila)
+        if not ops:
+            return
+        
+        try:
+            result = await collection.bulk_write(ops, ordered=False)
+            upserted, matched = result.upserted_count, result.matched_count
+        except BulkWriteError as e:
+            details = e.details
+            upserted, matched = details.get("nUpserted", 0), details.get("nMatched", 0)
+            for err in details.get("writeErrors", []):
+                state["errores"].append({"fila": op_rows[err["index"]], "error": err.get("errmsg", "Write error")})
+        state["creados"] += upserted
+        state["actualizados"] += matched
+    
+    async def _preview(self, spec: ImportSpec, raw_text: str) -> Dict:
+        state = await self._run(spec, raw_text)
+        if not state["total"]:
+            return {
+                "success": False,
+                "error": "No se encontraron datos para importar",
+                "preview": []
+            }
+        preview = state["planned"]
+        nuevos = sum(1 for p in preview if not p["ya_existe"])
+        result = {
+            "success": True,
+            "headers_detectados": state["headers"],
+            "preview": preview,
+            "resumen": {
+                "total_filas": state["total"],
+                "validos": len(preview),
+                "nuevos": nuevos,
+                "actualizaciones": len(preview) - nuevos,
+                "errores": len(state["errores"])
+            },
+            "errores": state["errores"]
+        }
+        if not spec.duplicate_error:
+            result["resumen"]["duplicados"] = len(state["duplicados"])
+            result["duplicados"] = state["duplicados"]
+        return result
+    
+    async def _import(self, spec: ImportSpec, raw_text: str, update_existing: bool,
+                      extra: Dict, log: Dict) -> Dict:
+        import_id = f"import_{uuid.uuid4().hex[:12]}"
+        state = await self._run(spec, raw_text, commit=True, update_existing=update_existing,
+                                extra={**extra, "import_id": import_id})
+        if not state["total"]:
+            return {
+                "success": False,
+                "error": "No se encontraron datos para importar"
+            }
+        resultados = {
+            "success": True,
+            "import_id": import_id,
+            "creados": state["creados"],
+            "actualizados": state["actualizados"],
+            "omitidos": state["omitidos"],
+            "errores": state["errores"]
+        }
+        
+        # Registrar la import
+        await db.import_logs.insert_one({
+            "import_id": import_id,
+            "tipo": spec.tipo,
+            **log,
+            "resultados": {
+                "creados": resultados["creados"],
+                "actualizados": resultados["actualizados"],
+                "omitidos": resultados["omitidos"],
+                "errores": len(resultados["errores"])
+            },
+            "fecha": datetime.now(timezone.utc).isoformat()
+        })
+        logger.info(f"Import {import_id} ({spec.tipo}): {state['total']} rows, "
+                    f"{resultados['creados']} created, {resultados['actualizados']} updated")
+        return resultados
+    
+    # ============== STUDENTS ==============
+    
+    def _student_spec(self, column_mapping: Dict[str, int], grado_default: str = None) -> ImportSpec:
+        def build(row):
+            numero = self._get_cell(row, column_mapping.get("numero_estudiante"))
+            full_name = self._get_cell(row, column_mapping.get("full_name"))
+            grade = self._get_cell(row, column_mapping.get("grade")) or grado_default
+            seccion = self._get_cell(row, column_mapping.get("seccion"))
+            
+            # Validaciones
+            if not numero:
+                raise RowError("Number de estudiante empty")
+            if not full_name:
+                raise RowError("Nombre empty")
+            if not grade:
+                raise RowError("Grado empty")
+            
+            # Separar nombre y apellido
+            partes = full_name.split(" ", 1)
+            return numero, {
+                "numero_estudiante": numero,
+                "full_name": full_name,
+                "name": partes[0],
+                "apellido": partes[1] if len(partes) > 1 else "",
+                "grade": str(grade),
+                "seccion": seccion,
+            }
+        
+        return ImportSpec(
+            tipo="estudiantes",
+            collection="synced_students",
+            key_field="numero_estudiante",
+            build=build,
+            insert_defaults=lambda now: {
+                "sync_id": f"sync_{uuid.uuid4().hex[:12]}",
+                "sheet_id": "manual_import",
+                "created_at": now,
+                "override_local": False
+            },
+            keep_existing=lambda existing: bool(existing.get("override_local")),
+        )
+    
+    async def preview_students(
         self,
         raw_text: str,
         column_mapping: Dict[str, int],
@@ -91,207 +320,82 @@ class BulkImportService:
         Returns:
             Preview con validaciones
         """
-        parsed = self.parse_tsv(raw_text, has_headers=True)
-        
-        if not parsed["rows"]:
-            return {
-                "success": False,
-                "error": "No se encontraron datos para importar",
-                "preview": []
-            }
-        
-        preview = []
-        errores = []
-        duplicados = []
-        numeros_vistos = set()
-        
-        for idx, row in enumerate(parsed["rows"]):
-            try:
-                # Extract datos according to mapeo
-                numero = self._get_cell(row, column_mapping.get("numero_estudiante"))
-                full_name = self._get_cell(row, column_mapping.get("full_name"))
-                grade = self._get_cell(row, column_mapping.get("grade")) or grado_default
-                seccion = self._get_cell(row, column_mapping.get("seccion"))
-                
-                # Validaciones
-                if not numero:
-                    errores.append({"fila": idx + 2, "error": "Number de estudiante empty"})
-                    continue
-                
-                if not full_name:
-                    errores.append({"fila": idx + 2, "error": "Nombre empty"})
-                    continue
-                
-                if not grade:
-                    errores.append({"fila": idx + 2, "error": "Grado empty"})
-                    continue
-                
-                # Verify duplicados en esta import
-                if numero in numeros_vistos:
-                    duplicados.append({"fila": idx + 2, "numero": numero})
-                    continue
-                numeros_vistos.add(numero)
-                
-                # Verify si already exists en DB
-                existente = await db.synced_students.find_one(
-                    {"numero_estudiante": numero}
-                )
-                
-                # Separar nombre y apellido
-                partes = full_name.split(" ", 1)
-                nombre = partes[0]
-                apellido = partes[1] if len(partes) > 1 else ""
-                
-                preview.append({
-                    "fila": idx + 2,
-                    "numero_estudiante": numero,
-                    "full_name": full_name,
-                    "name": nombre,
-                    "apellido": apellido,
-                    "grade": str(grade),
-                    "seccion": seccion,
-                    "ya_existe": existente is not None,
-                    "accion": "actualizar" if existente else "crear"
-                })
-                
-            except Exception as e:
-                errores.append({"fila": idx + 2, "error": str(e)})
-        
-        return {
-            "success": True,
-            "headers_detectados": parsed["headers"],
-            "preview": preview,
-            "resumen": {
-                "total_filas": len(parsed["rows"]),
-                "validos": len(preview),
-                "nuevos": len([p for p in preview if not p["ya_existe"]]),
-                "actualizaciones": len([p for p in preview if p["ya_existe"]]),
-                "errores": len(errores),
-                "duplicados": len(duplicados)
-            },
-            "errores": errores,
-            "duplicados": duplicados
-        }
+        return await self._preview(self._student_spec(column_mapping, grado_default), raw_text)
     
-    async def importar_estudiantes(
+    async def import_students(
         self,
         raw_text: str,
         column_mapping: Dict[str, int],
         grado_default: str = None,
-        hoja_name: str = "Import Manual",
+        sheet_name: str = "Import Manual",
         actualizar_existentes: bool = True,
         admin_id: str = None
     ) -> Dict:
         """
         Importar estudiantes desde texto pegado.
         """
-        parsed = self.parse_tsv(raw_text, has_headers=True)
-        
-        if not parsed["rows"]:
-            return {
-                "success": False,
-                "error": "No se encontraron datos para importar"
-            }
-        
         now = datetime.now(timezone.utc).isoformat()
-        import_id = f"import_{uuid.uuid4().hex[:12]}"
-        
-        resultados = {
-            "success": True,
-            "import_id": import_id,
-            "creados": 0,
-            "actualizados": 0,
-            "omitidos": 0,
-            "errores": []
-        }
-        
-        numeros_procesados = set()
-        
-        for idx, row in enumerate(parsed["rows"]):
-            try:
-                numero = self._get_cell(row, column_mapping.get("numero_estudiante"))
-                full_name = self._get_cell(row, column_mapping.get("full_name"))
-                grade = self._get_cell(row, column_mapping.get("grade")) or grado_default
-                seccion = self._get_cell(row, column_mapping.get("seccion"))
-                
-                if not numero or not full_name or not grade:
-                    resultados["errores"].append({
-                        "fila": idx + 2,
-                        "error": "Datos incompletos"
-                    })
-                    continue
-                
-                if numero in numeros_procesados:
-                    resultados["omitidos"] += 1
-                    continue
-                numeros_procesados.add(numero)
-                
-                # Separar nombre y apellido
-                partes = full_name.split(" ", 1)
-                nombre = partes[0]
-                apellido = partes[1] if len(partes) > 1 else ""
-                
-                existente = await db.synced_students.find_one(
-                    {"numero_estudiante": numero}
-                )
-                
-                estudiante_data = {
-                    "numero_estudiante": numero,
-                    "full_name": full_name,
-                    "name": nombre,
-                    "apellido": apellido,
-                    "grade": str(grade),
-                    "seccion": seccion,
-                    "sheet_name": sheet_name,
-                    "fila_numero": idx + 2,
-                    "estado": "active",
-                    "import_id": import_id,
-                    "fecha_sync": now,
-                    "updated_at": now
-                }
-                
-                if existente:
-                    if actualizar_existentes and not existente.get("override_local"):
-                        await db.synced_students.update_one(
-                            {"sync_id": existente["sync_id"]},
-                            {"$set": estudiante_data}
-                        )
-                        resultados["actualizados"] += 1
-                    else:
-                        resultados["omitidos"] += 1
-                else:
-                    estudiante_data["sync_id"] = f"sync_{uuid.uuid4().hex[:12]}"
-                    estudiante_data["sheet_id"] = "manual_import"
-                    estudiante_data["created_at"] = now
-                    estudiante_data["override_local"] = False
-                    
-                    await db.synced_students.insert_one(estudiante_data)
-                    resultados["creados"] += 1
-                    
-            except Exception as e:
-                resultados["errores"].append({
-                    "fila": idx + 2,
-                    "error": str(e)
-                })
-        
-        # Registrar la import
-        import_log = {
-            "import_id": import_id,
-            "tipo": "estudiantes",
-            "admin_id": admin_id,
-            "sheet_name": sheet_name,
-            "grado_default": grado_default,
-            "resultados": {
-                "creados": resultados["creados"],
-                "actualizados": resultados["actualizados"],
-                "omitidos": resultados["omitidos"],
-                "errores": len(resultados["errores"])
+        return await self._import(
+            self._student_spec(column_mapping, grado_default), raw_text, actualizar_existentes,
+            extra={"sheet_name": sheet_name, "estado": "active", "fecha_sync": now},
+            log={"admin_id": admin_id, "sheet_name": sheet_name, "grado_default": grado_default}
+        )
+    
+    # ============== BOOKS ==============
+    
+    def _book_spec(self, column_mapping: Dict[str, int], catalogo_id: str = None,
+                   grado_default: str = None) -> ImportSpec:
+        def build(row):
+            codigo = self._get_cell(row, column_mapping.get("code"))
+            nombre = self._get_cell(row, column_mapping.get("name"))
+            precio_str = self._get_cell(row, column_mapping.get("price"))
+            grade = self._get_cell(row, column_mapping.get("grade")) or grado_default
+            
+            # Validaciones
+            if not codigo:
+                raise RowError("Code empty")
+            if not nombre:
+                raise RowError("Nombre empty")
+            precio = self._parse_precio(precio_str)
+            if precio is None:
+                raise RowError(f"Precio invalid: {precio_str}")
+            
+            book = {
+                "code": codigo,
+                "name": nombre,
+                "price": precio,
+                "publisher": self._get_cell(row, column_mapping.get("publisher")),
+                "isbn": self._get_cell(row, column_mapping.get("isbn")),
+                "grade": grade,
+                "subject": self._get_cell(row, column_mapping.get("subject")),
+            }
+            # Handle grades (can be one or multiple)
+            if grade and "," in str(grade):
+                book["grades"] = [g.strip() for g in str(grade).split(",")]
+                del book["grade"]
+            elif grade:
+                book["grade"] = str(grade)
+                book["grades"] = [str(grade)]
+            else:
+                del book["grade"]
+            if catalogo_id:
+                book["catalogo_id"] = catalogo_id
+            return codigo, book
+        
+        return ImportSpec(
+            tipo="books",
+            collection="store_products",
+            key_field="code",
+            build=build,
+            insert_defaults=lambda now: {
+                "book_id": f"book_{uuid.uuid4().hex[:12]}",
+                "created_at": now,
+                "inventory_quantity": 0,
+                "cantidad_reservada": 0
             },
-            "fecha": now
-        }
-        await db.import_logs.insert_one(import_log)
-        
-        return resultados
+            duplicate_error="Code duplicado",
+            describe=lambda book: {**book, "grade": book.get("grade") or ", ".join(book.get("grades", [])) or None},
+        )
     
     async def preview_books(
         self,
@@ -316,82 +420,7 @@ class BulkImportService:
                     "subject": 6           # Materia (opcional)
                 }
         """
-        parsed = self.parse_tsv(raw_text, has_headers=True)
-        
-        if not parsed["rows"]:
-            return {
-                "success": False,
-                "error": "No se encontraron datos para importar",
-                "preview": []
-            }
-        
-        preview = []
-        errores = []
-        codigos_vistos = set()
-        
-        for idx, row in enumerate(parsed["rows"]):
-            try:
-                codigo = self._get_cell(row, column_mapping.get("code"))
-                nombre = self._get_cell(row, column_mapping.get("name"))
-                precio_str = self._get_cell(row, column_mapping.get("price"))
-                editorial = self._get_cell(row, column_mapping.get("publisher"))
-                isbn = self._get_cell(row, column_mapping.get("isbn"))
-                grade = self._get_cell(row, column_mapping.get("grade")) or grado_default
-                materia = self._get_cell(row, column_mapping.get("subject"))
-                
-                # Validaciones
-                if not codigo:
-                    errores.append({"fila": idx + 2, "error": "Code empty"})
-                    continue
-                
-                if not nombre:
-                    errores.append({"fila": idx + 2, "error": "Nombre empty"})
-                    continue
-                
-                # Parseprecio
-                precio = self._parse_precio(precio_str)
-                if precio is None:
-                    errores.append({"fila": idx + 2, "error": f"Precio invalid: {precio_str}"})
-                    continue
-                
-                # Verify duplicados
-                if codigo in codigos_vistos:
-                    errores.append({"fila": idx + 2, "error": f"Code duplicado: {codigo}"})
-                    continue
-                codigos_vistos.add(codigo)
-                
-                # Verify si already exists
-                existente = await db.store_products.find_one({"code": codigo})
-                
-                preview.append({
-                    "fila": idx + 2,
-                    "code": codigo,
-                    "name": nombre,
-                    "price": precio,
-                    "publisher": editorial,
-                    "isbn": isbn,
-                    "grade": grade,
-                    "subject": materia,
-                    "ya_existe": existente is not None,
-                    "accion": "actualizar" if existente else "crear"
-                })
-                
-            except Exception as e:
-                errores.append({"fila": idx + 2, "error": str(e)})
-        
-        return {
-            "success": True,
-            "headers_detectados": parsed["headers"],
-            "preview": preview,
-            "resumen": {
-                "total_filas": len(parsed["rows"]),
-                "validos": len(preview),
-                "nuevos": len([p for p in preview if not p["ya_existe"]]),
-                "actualizaciones": len([p for p in preview if p["ya_existe"]]),
-                "errores": len(errores)
-            },
-            "errores": errores
-        }
+        return await self._preview(self._book_spec(column_mapping, catalogo_id, grado_default), raw_text)
     
     async def import_books(
         self,
@@ -405,127 +434,15 @@ class BulkImportService:
         """
         Import books/products from pasted text.
         """
-        parsed = self.parse_tsv(raw_text, has_headers=True)
-        
-        if not parsed["rows"]:
-            return {
-                "success": False,
-                "error": "No se encontraron datos para importar"
-            }
-        
-        now = datetime.now(timezone.utc).isoformat()
-        import_id = f"import_{uuid.uuid4().hex[:12]}"
-        
-        resultados = {
-            "success": True,
-            "import_id": import_id,
-            "creados": 0,
-            "actualizados": 0,
-            "omitidos": 0,
-            "errores": []
-        }
-        
-        codigos_procesados = set()
-        
-        for idx, row in enumerate(parsed["rows"]):
-            try:
-                codigo = self._get_cell(row, column_mapping.get("code"))
-                nombre = self._get_cell(row, column_mapping.get("name"))
-                precio_str = self._get_cell(row, column_mapping.get("price"))
-                editorial = self._get_cell(row, column_mapping.get("publisher"))
-                isbn = self._get_cell(row, column_mapping.get("isbn"))
-                grade = self._get_cell(row, column_mapping.get("grade")) or grado_default
-                materia = self._get_cell(row, column_mapping.get("subject"))
-                
-                if not codigo or not nombre:
-                    resultados["errores"].append({
-                        "fila": idx + 2,
-                        "error": "Datos incompletos"
-                    })
-                    continue
-                
-                precio = self._parse_precio(precio_str)
-                if precio is None:
-                    resultados["errores"].append({
-                        "fila": idx + 2,
-                        "error": f"Precio invalid: {precio_str}"
-                    })
-                    continue
-                
-                if codigo in codigos_procesados:
-                    resultados["omitidos"] += 1
-                    continue
-                codigos_procesados.add(codigo)
-                
-                existente = await db.store_products.find_one({"code": codigo})
-                
-                book_data = {
-                    "code": codigo,
-                    "name": nombre,
-                    "price": precio,
-                    "publisher": editorial,
-                    "isbn": isbn,
-                    "subject": materia,
-                    "category": "texto_escolar",
-                    "active": True,
-                    "estado_disponibilidad": "disponible",
-                    "import_id": import_id,
-                    "updated_at": now
-                }
-                
-                # Handle grades (can be one or multiple)
-                if grade:
-                    if "," in str(grade):
-                        book_data["grades"] = [g.strip() for g in str(grade).split(",")]
-                    else:
-                        book_data["grade"] = str(grade)
-                        book_data["grades"] = [str(grade)]
-                
-                if catalogo_id:
-                    book_data["catalogo_id"] = catalogo_id
-                
-                if existente:
-                    if actualizar_existentes:
-                        await db.store_products.update_one(
-                            {"book_id": existente["book_id"]},
-                            {"$set": book_data}
-                        )
-                        resultados["actualizados"] += 1
-                    else:
-                        resultados["omitidos"] += 1
-                else:
-                    book_data["book_id"] = f"book_{uuid.uuid4().hex[:12]}"
-                    book_data["created_at"] = now
-                    book_data["inventory_quantity"] = 0
-                    book_data["cantidad_reservada"] = 0
-                    
-                    await db.store_products.insert_one(book_data)
-                    resultados["creados"] += 1
-                    
-            except Exception as e:
-                resultados["errores"].append({
-                    "fila": idx + 2,
-                    "error": str(e)
-                })
-        
-        # Registrar la import
-        import_log = {
-            "import_id": import_id,
-            "tipo": "books",
-            "admin_id": admin_id,
-            "catalogo_id": catalogo_id,
-            "grado_default": grado_default,
-            "resultados": {
-                "creados": resultados["creados"],
-                "actualizados": resultados["actualizados"],
-                "omitidos": resultados["omitidos"],
-                "errores": len(resultados["errores"])
+        return await self._import(
+            self._book_spec(column_mapping, catalogo_id, grado_default), raw_text, actualizar_existentes,
+            extra={
+                "category": "texto_escolar",
+                "active": True,
+                "estado_disponibilidad": "disponible",
             },
-            "fecha": now
-        }
-        await db.import_logs.insert_one(import_log)
-        
-        return resultados
+            log={"admin_id": admin_id, "catalogo_id": catalogo_id, "grado_default": grado_default}
+        )
     
     async def get_import_history(self, tipo: str = None, limit: int = 20) -> List[Dict]:
         """Get historial de importaciones"""
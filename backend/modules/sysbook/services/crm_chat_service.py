@@ -10,6 +10,7 @@ import uuid
 
 from core.database import db
 from modules.store.integrations.monday_crm_adapter import crm_monday_adapter
+from modules.store.services.crm_inbox_index import crm_inbox_index
 
 logger = logging.getLogger(__name__)
 
@@ -35,6 +36,9 @@ class CrmChatService:
                 "monday_item_id": monday_item_id,
                 "user_email": user_email,
                 "linked_at": datetime.now(timezone.utc).isoformat(),
+            }, "$setOnInsert": {
+                "topic_count": 0,
+                "last_activity_at": datetime.now(timezone.utc).isoformat(),
             }},
             upsert=True,
         )
@@ -139,6 +143,9 @@ class CrmChatService:
                 }
                 await db[LOCAL_MESSAGES_COLLECTION].insert_one(msg_doc)
                 del msg_doc["_id"]
+                await crm_inbox_index.record_topic(
+                    student_id, item_id, update_id, body, msg_doc["author_name"], msg_doc["created_at"]
+                )
                 result["topic_created"] = True
                 logger.info(f"Auto-created order topic for student {student_id}, update_id={update_id}")
 
@@ -168,6 +175,7 @@ class CrmChatService:
             }
 
         topics = await crm_monday_adapter.get_topics(item_id)
+        await crm_inbox_index.sync_topics(student_id, item_id, topics)
 
         local_msgs = await db[LOCAL_MESSAGES_COLLECTION].find(
             {"student_id": student_id},
@@ -250,6 +258,7 @@ class CrmChatService:
         }
         await db[LOCAL_MESSAGES_COLLECTION].insert_one(msg_doc)
         del msg_doc["_id"]
+        await crm_inbox_index.record_topic(student_id, item_id, update_id, body, author_name, msg_doc["created_at"])
 
         return {
             "success": True,
@@ -295,70 +304,17 @@ class CrmChatService:
         }
         await db[LOCAL_MESSAGES_COLLECTION].insert_one(msg_doc)
         del msg_doc["_id"]
+        await crm_inbox_index.record_reply(student_id, update_id, reply_id, msg_doc["created_at"])
 
         return {"success": True, "monday_posted": monday_posted, "message": msg_doc}
 
     # ---------- Admin methods ----------
 
-    async def get_admin_inbox(self) -> Dict:
-        """Get all CRM chat conversations for admin view"""
-        links = await db[LINK_COLLECTION].find({}, {"_id": 0}).to_list(200)
-        if not links:
-            return {"conversations": [], "total": 0}
-
-        conversations = []
-        for link in links:
-            student_id = link["student_id"]
-            item_id = link["monday_item_id"]
-
-            student = await db.store_students.find_one(
-                {"student_id": student_id},
-                {"_id": 0, "full_name": 1, "user_id": 1}
-            )
-            student_name = student.get("full_name", "Unknown") if student else "Unknown"
-
-            user_id = student.get("user_id") if student else None
-            user_email = ""
-            if user_id:
-                user = await db.auth_users.find_one({"user_id": user_id}, {"_id": 0, "email": 1})
-                user_email = user.get("email", "") if user else ""
-
-            try:
-                topics = await crm_monday_adapter.get_topics(item_id)
-            except Exception as e:
-                logger.error(f"Error fetching topics for {student_id}: {e}")
-                topics = []
-
-            unread = await db[LOCAL_MESSAGES_COLLECTION].count_documents({
-                "student_id": student_id,
-                "is_staff": False,
-                "read_by": {"$not": {"$elemMatch": {"$eq": "admin"}}},
-            })
-
-            last_topic = topics[0] if topics else None
-
-            conversations.append({
-                "student_id": student_id,
-                "student_name": student_name,
-                "user_email": user_email,
-                "monday_item_id": item_id,
-                "topic_count": len(topics),
-                "unread_count": unread,
-                "last_topic": {
-                    "id": last_topic["id"],
-                    "body": last_topic["body"][:100],
-                    "author": last_topic["author"],
-                    "created_at": last_topic["created_at"],
-                    "reply_count": last_topic["reply_count"],
-                } if last_topic else None,
-            })
-
-        conversations.sort(
-            key=lambda c: c["last_topic"]["created_at"] if c.get("last_topic") else "",
-            reverse=True,
-        )
-
-        return {"conversations": conversations, "total": len(conversations)}
+    async def get_admin_inbox(self, skip: int = 0, limit: int = 50, q: Optional[str] = None) -> Dict:
+        """Get CRM chat conversations for admin view, most recent activity first.
+        Served from the local inbox index — no Monday.com calls at read time.
+        """
+        return await crm_inbox_index.get_inbox(skip=skip, limit=limit, q=q)
 
     async def admin_get_topics(self, student_id: str) -> Dict:
         """Admin: get all topics for a student (no ownership check)."""
@@ -390,6 +346,7 @@ class CrmChatService:
 
         item_id = link["monday_item_id"]
         topics = await crm_monday_adapter.get_topics(item_id)
+        await crm_inbox_index.sync_topics(student_id, item_id, topics)
 
         return {
             "topics": topics,
@@ -428,6 +385,7 @@ class CrmChatService:
         }
         await db[LOCAL_MESSAGES_COLLECTION].insert_one(msg_doc)
         del msg_doc["_id"]
+        await crm_inbox_index.record_reply(student_id, update_id, reply_id, msg_doc["created_at"])
 
         return {"success": True, "monday_posted": bool(reply_id), "message": msg_doc}
 
@@ -464,6 +422,7 @@ class CrmChatService:
         }
         await db[LOCAL_MESSAGES_COLLECTION].insert_one(msg_doc)
         del msg_doc["_id"]
+        await crm_inbox_index.record_topic(student_id, item_id, update_id, body, author_name, msg_doc["created_at"])
 
         return {"success": True, "topic_id": update_id, "message": msg_doc}
 
@@ -487,6 +446,13 @@ class CrmChatService:
 
         student_id = link["student_id"]
 
+        # Keep the admin inbox summary current without calling Monday.com at read time
+        parent_update_id = str(event.get("parentUpdateId") or event.get("parent_update_id") or "")
+        if parent_update_id:
+            await crm_inbox_index.record_reply(student_id, parent_update_id, update_id)
+        else:
+            await crm_inbox_index.record_topic(student_id, item_id, update_id, update_body, creator_name)
+
         student = await db.store_students.find_one(
             {"student_id": student_id}, {"_id": 0, "user_id": 1, "full_name": 1}
         )
@@ -0,0 +1,161 @@
+"""
+Sysbook — Duplicate product detection
+Pure functions over the product list loaded by the merge routes.
+
+- Code families: a code followed by a space/tab and extra text ("G7-6 El Arte
+  del Lenguaje") duplicates the clean code ("G7-6") in the same grade. Codes
+  are normalized once and indexed by grade; each code then only probes its
+  own word-boundary prefixes, so detection is linear in the catalog size.
+- Similar names: products in the same grade whose names share most of their
+  character trigrams but have different codes. Candidates come from blocks
+  on each name's rarest trigrams (prefix filtering), never from comparing
+  every pair; trigrams shared by too many names are not used as blocks.
+"""
+import math
+import re
+import unicodedata
+from collections import Counter, defaultdict
+from itertools import chain, combinations
+from typing import Dict, Iterable, List, Optional, Tuple
+
+NAME_SIMILARITY = 0.8   # Jaccard over trigrams
+MAX_BLOCK_SIZE = 50     # Blocks larger than this are too common to pair up
+MIN_NAME_LENGTH = 4
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def _item(p: Dict, grade: str) -> Dict:
+    return {
+        "book_id": p["book_id"],
+        "code": p.get("code", ""),
+        "name": p.get("name", ""),
+        "grade": grade,
+        "price": p.get("price", 0),
+        "stock": p.get("inventory_quantity", 0),
+        "reserved": p.get("reserved_quantity", 0),
+    }
+
+
+def _by_grade(products: Iterable[Dict]) -> Dict[str, List[Dict]]:
+    by_grade: Dict[str, List[Dict]] = defaultdict(list)
+    for p in products:
+        by_grade[p.get("grade", "")].append(p)
+    return by_grade
+
+
+def _boundary_prefixes(code: str) -> Iterable[str]:
+    """Prefixes of `code` that end right before a space or tab, shortest first."""
+    for i, ch in enumerate(code):
+        if ch in " \t" and i and code[i - 1] not in " \t":
+            yield code[:i]
+
+
+def find_code_duplicates(products: Iterable[Dict]) -> List[Dict]:
+    """Group each clean code with the codes that extend it with extra text.
+
+    Example duplicate: code "G7-6" vs code "G7-6 El Arte del Lenguaje"
+    NOT duplicate: code "K4/5-4" vs code "K4/5-9" (different item numbers)
+
+    A code belongs to the family of its shortest prefix that is itself a code
+    in the grade; that product (shortest code) is the suggested one to keep.
+    """
+    groups = []
+    for grade, items in _by_grade(products).items():
+        roots: Dict[str, Tuple[int, Dict]] = {}   # code -> (position, first product with it)
+        coded = []
+        for pos, p in enumerate(items):
+            code = (p.get("code") or "").strip()
+            if code:
+                coded.append((code, p))
+                roots.setdefault(code, (pos, p))
+
+        families: Dict[str, List[Dict]] = {}
+        for code, p in sorted(coded, key=lambda c: len(c[0])):
+            root = next((prefix for prefix in _boundary_prefixes(code) if prefix in roots), None)
+            if root:
+                families.setdefault(root, [roots[root][1]]).append(p)
+
+        for root in sorted(families, key=lambda c: (len(c), roots[c][0])):
+            family = families[root]
+            groups.append({
+                "key": f"{root}|{grade}",
+                "normalized_code": root,
+                "grade": grade,
+                "items": [_item(p, grade) for p in family],
+                "suggested_keep": family[0]["book_id"],  # shortest code = correct
+            })
+    return groups
+
+
+def normalize_name(name: Optional[str]) -> str:
+    """Lowercase, accents removed, punctuation collapsed to single spaces."""
+    name = name or ""
+    if not name.isascii():
+        name = "".join(ch for ch in unicodedata.normalize("NFKD", name) if not unicodedata.combining(ch))
+    return _NON_ALNUM.sub(" ", name.lower()).strip()
+
+
+def _trigrams(text: str) -> set:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def find_similar_names(products: Iterable[Dict], threshold: float = NAME_SIMILARITY) -> List[Dict]:
+    """Cluster products of a grade with near-identical names and different codes.
+
+    Prefix filtering: with each name's trigrams sorted rarest first, two names
+    can only reach `threshold` if their first len - ceil(threshold * len) + 1
+    trigrams overlap. Only those prefixes are blocked on; the candidate pairs
+    found in a block are then checked exactly.
+    """
+    groups = []
+    for grade, items in _by_grade(products).items():
+        grams = []
+        for p in items:
+            name = normalize_name(p.get("name"))
+            grams.append(_trigrams(name) if len(name) >= MIN_NAME_LENGTH else set())
+
+        freq = Counter(chain.from_iterable(grams))
+        rank = {g: i for i, g in enumerate(sorted(freq, key=freq.__getitem__))}
+        blocks: Dict[str, List[int]] = defaultdict(list)
+        for idx, gs in enumerate(grams):
+            ordered = sorted(gs, key=rank.__getitem__)
+            for g in ordered[:len(ordered) - math.ceil(threshold * len(ordered)) + 1]:
+                blocks[g].append(idx)
+
+        candidates = set()
+        for block in blocks.values():
+            if 1 < len(block) <= MAX_BLOCK_SIZE:
+                candidates.update(combinations(block, 2))
+
+        parent = list(range(len(items)))
+
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for a, b in candidates:
+            if (items[a].get("code") or "").strip() == (items[b].get("code") or "").strip():
+                continue
+            common = len(grams[a] & grams[b])
+            if common / (len(grams[a]) + len(grams[b]) - common) >= threshold:
+                parent[find(b)] = find(a)
+
+        clusters: Dict[int, List[int]] = defaultdict(list)
+        for idx in range(len(items)):
+            clusters[find(idx)].append(idx)
+        for members in clusters.values():
+            if len(members) < 2:
+                continue
+            family = [items[i] for i in sorted(members)]
+            name = normalize_name(family[0].get("name"))
+            groups.append({
+                "key": f"{name}|{grade}",
+                "normalized_name": name,
+                "grade": grade,
+                "items": [_item(p, grade) for p in family],
+            })
+    return groups
@@ -13,6 +13,7 @@ from core.database import db
 from core.config import MONDAY_API_KEY
 from modules.integrations.monday.core_client import monday_client
 from modules.store.services.monday_config_service import monday_config_service
+from modules.store.services.analytics_rollup_service import analytics_rollup_service
 
 logger = logging.getLogger(__name__)
 
@@ -394,6 +395,7 @@ class PreSaleImportService:
             {"order_id": order_id},
             {"$set": {"items": order["items"]}}
         )
+        await analytics_rollup_service.record_order_change(None, order)
 
         logger.info(f"Created pre-sale order {order_id} for {parsed['student_name']} (grade {parsed['grade']})")
         return order
@@ -481,19 +483,18 @@ class PreSaleImportService:
 
         now = datetime.now(timezone.utc).isoformat()
         # Link the order
-        await db.store_textbook_orders.update_one(
-            {"order_id": order_id},
-            {"$set": {
-                "user_id": suggestion.get("user_id"),
-                "student_id": suggestion["student_id"],
-                "status": "submitted",
-                "link_status": "linked",
-                "linked_at": now,
-                "linked_method": "suggestion_confirmed",
-                "linked_by_admin": admin_user_id,
-                "updated_at": now,
-            }}
-        )
+        link = {
+            "user_id": suggestion.get("user_id"),
+            "student_id": suggestion["student_id"],
+            "status": "submitted",
+            "link_status": "linked",
+            "linked_at": now,
+            "linked_method": "suggestion_confirmed",
+            "linked_by_admin": admin_user_id,
+            "updated_at": now,
+        }
+        await db.store_textbook_orders.update_one({"order_id": order_id}, {"$set": link})
+        await analytics_rollup_service.record_order_change(order, {**order, **link})
         # Update suggestion status
         await db.presale_link_suggestions.update_one(
             {"suggestion_id": suggestion_id},
@@ -527,21 +528,20 @@ class PreSaleImportService:
             raise ValueError("Order is not linked")
 
         now = datetime.now(timezone.utc).isoformat()
-        await db.store_textbook_orders.update_one(
-            {"order_id": order_id},
-            {"$set": {
-                "user_id": None,
-                "student_id": None,
-                "status": "awaiting_link",
-                "link_status": "unlinked",
-                "unlinked_at": now,
-                "unlinked_by": admin_user_id,
-                "linked_at": None,
-                "linked_method": None,
-                "linked_by_admin": None,
-                "updated_at": now,
-            }}
-        )
+        unlink = {
+            "user_id": None,
+            "student_id": None,
+            "status": "awaiting_link",
+            "link_status": "unlinked",
+            "unlinked_at": now,
+            "unlinked_by": admin_user_id,
+            "linked_at": None,
+            "linked_method": None,
+            "linked_by_admin": None,
+            "updated_at": now,
+        }
+        await db.store_textbook_orders.update_one({"order_id": order_id}, {"$set": unlink})
+        await analytics_rollup_service.record_order_change(order, {**order, **unlink})
         logger.info(f"Admin {admin_user_id} unlinked order {order_id}")
         return {"order_id": order_id, "unlinked": True}
 
@@ -554,19 +554,18 @@ class PreSaleImportService:
             raise ValueError("Order already linked")
 
         now = datetime.now(timezone.utc).isoformat()
-        await db.store_textbook_orders.update_one(
-            {"order_id": order_id},
-            {"$set": {
-                "user_id": user_id,
-                "student_id": student_id,
-                "status": "submitted",
-                "link_status": "linked",
-                "linked_at": now,
-                "linked_method": "manual",
-                "linked_by_admin": admin_user_id,
-                "updated_at": now,
-            }}
-        )
+        link = {
+            "user_id": user_id,
+            "student_id": student_id,
+            "status": "submitted",
+            "link_status": "linked",
+            "linked_at": now,
+            "linked_method": "manual",
+            "linked_by_admin": admin_user_id,
+            "updated_at": now,
+        }
+        await db.store_textbook_orders.update_one({"order_id": order_id}, {"$set": link})
+        await analytics_rollup_service.record_order_change(order, {**order, **link})
         logger.info(f"Admin {admin_user_id} manually linked order {order_id} to student {student_id}")
         return {"order_id": order_id, "linked": True}
 
@@ -677,10 +676,12 @@ class PreSaleImportService:
         # Step 4: Re-link presale order items and recalculate reserved_quantity
         updated_orders = 0
         reserved_totals = defaultdict(int)
+        rollup_changes = []
 
         for order in orders:
             grade = order.get("grade", "")
             items = order.get("items", [])
+            before = {**order, "items": [dict(i) for i in items]}
             changed = False
 
             for item in items:
@@ -702,6 +703,7 @@ class PreSaleImportService:
                     {"order_id": order["order_id"]},
                     {"$set": {"items": items, "updated_at": now}}
                 )
+                rollup_changes.append((before, order))
                 updated_orders += 1
 
         # Step 5: Set reserved_quantity on each product
@@ -710,6 +712,8 @@ class PreSaleImportService:
                 {"book_id": book_id},
                 {"$set": {"reserved_quantity": total_reserved}}
             )
+        await analytics_rollup_service.record_order_changes(rollup_changes)
+        await analytics_rollup_service.refresh_inventory(reserved_totals)
 
         logger.info(f"[presale-sync] Created {created_count} products, matched {matched_count} existing, updated {updated_orders} orders, reserved quantities set for {len(reserved_totals)} products")
         return {
@@ -1061,7 +1065,7 @@ class PreSaleImportService:
         if not order:
             raise ValueError(f"Order {order_id} not found")
 
-        existing_items = order.get("items", [])
+        existing_items = list(order.get("items", []))
         existing_subitem_ids = set(
             str(it.get("monday_subitem_id", "")) for it in existing_items if it.get("monday_subitem_id")
         )
@@ -1125,6 +1129,9 @@ class PreSaleImportService:
                 "last_merge_by": admin_user_id,
             }}
         )
+        await analytics_rollup_service.record_order_change(
+            order, {**order, "items": existing_items, "total_amount": new_total}
+        )
 
         logger.info(f"[reconcile] Merged {len(added)} new items into order {order_id}")
         return {
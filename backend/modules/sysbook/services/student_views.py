@@ -0,0 +1,94 @@
+"""
+Textbook Access Module - Student view caches
+In-memory lookups that keep student views off the per-request query path.
+
+- School map: `store_schools` is small and rarely changes, so school names
+  come from one dict loaded on first use. School CRUD reloads it.
+- Access summaries: the approved students and grades a user can browse the
+  catalog with. They are cached per user and dropped when that user's
+  students, enrollments, approvals or links change.
+
+Invalidations go through the realtime broker so every worker drops its copy.
+Both caches also expire (SCHOOLS_TTL / SUMMARY_TTL) to catch writes made
+outside the textbook access service (imports, merges, Monday sync).
+"""
+import time
+import logging
+from typing import Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+from core.realtime_broker import realtime_broker
+
+logger = logging.getLogger(__name__)
+
+INVALIDATE_CHANNEL = "sysbook:student_views:"
+SCHOOLS_TTL = 600
+SUMMARY_TTL = 60
+MAX_SUMMARIES = 10000
+
+
+class StudentViewCache:
+    """School map and per-user access summaries"""
+
+    def __init__(self):
+        self._schools: Dict[str, Dict] = {}
+        self._schools_loaded_at = 0.0
+        self._summaries: Dict[str, Tuple[float, Dict]] = {}
+        self.stats = {"school_loads": 0, "summary_hits": 0, "summary_misses": 0}
+        realtime_broker.subscribe(INVALIDATE_CHANNEL, self._on_invalidate)
+
+    # ---------- Schools ----------
+
+    async def school_map(self, load: Callable[[], Awaitable[list]]) -> Dict[str, Dict]:
+        """school_id -> school, loading every school once per SCHOOLS_TTL."""
+        if not self._schools_loaded_at or time.monotonic() - self._schools_loaded_at > SCHOOLS_TTL:
+            schools = await load()
+            self._schools = {s["school_id"]: s for s in schools if s.get("school_id")}
+            self._schools_loaded_at = time.monotonic()
+            self.stats["school_loads"] += 1
+        return self._schools
+
+    async def invalidate_schools(self) -> None:
+        await realtime_broker.publish(INVALIDATE_CHANNEL + "schools", {})
+
+    # ---------- Access summaries ----------
+
+    def get_summary(self, user_id: str) -> Optional[Dict]:
+        cached = self._summaries.get(user_id)
+        if cached and time.monotonic() - cached[0] < SUMMARY_TTL:
+            self.stats["summary_hits"] += 1
+            return cached[1]
+        self.stats["summary_misses"] += 1
+        return None
+
+    def set_summary(self, user_id: str, summary: Dict) -> None:
+        if len(self._summaries) >= MAX_SUMMARIES:
+            self._summaries.clear()
+        self._summaries[user_id] = (time.monotonic(), summary)
+
+    async def invalidate_users(self, user_ids: Iterable[str]) -> None:
+        user_ids = sorted({u for u in user_ids if u})
+        if user_ids:
+            await realtime_broker.publish(INVALIDATE_CHANNEL + "users", {"user_ids": user_ids})
+
+    async def invalidate_student(self, student: Optional[Dict]) -> None:
+        """Drop the summaries of a student's owner and linked users."""
+        if student:
+            await self.invalidate_users(
+                [student.get("user_id")] + [lu.get("user_id") for lu in student.get("linked_users") or []]
+            )
+
+    async def _on_invalidate(self, channel: str, message: Dict) -> None:
+        kind = channel[len(INVALIDATE_CHANNEL):]
+        if kind == "schools":
+            self._schools_loaded_at = 0.0
+            # School names are part of the summaries too
+            self._summaries.clear()
+        elif kind == "users":
+            for user_id in message.get("user_ids", []):
+                self._summaries.pop(user_id, None)
+
+    def get_status(self) -> Dict:
+        return {**self.stats, "schools": len(self._schools), "summaries": len(self._summaries)}
+
+
+student_view_cache = StudentViewCache()
@@ -9,6 +9,7 @@ import logging
 from core.base import BaseService
 from core.database import db
 from modules.sysbook.repositories.textbook_access_repository import school_repository, student_record_repository
+from modules.sysbook.services.student_views import student_view_cache
 from modules.sysbook.models.textbook_access import (
     RequestStatus, RelationType, SchoolGrade,
     StudentRecordCreate, StudentRecordUpdate, 
@@ -30,6 +31,7 @@ class TextbookAccessService(BaseService):
         super().__init__()
         self.school_repo = school_repository
         self.student_repo = student_record_repository
+        self.views = student_view_cache
     
     # ============== SCHOOL MANAGEMENT ==============
     
@@ -44,27 +46,36 @@ class TextbookAccessService(BaseService):
             "short_name": short_name,
             "catalog_id": catalog_id
         }
-        return await self.school_repo.create(data)
+        result = await self.school_repo.create(data)
+        await self.views.invalidate_schools()
+        return result
     
     async def update_school(self, school_id: str, name: str, short_name: str = None, 
                            catalog_id: str = None, is_active: bool = True) -> Optional[Dict]:
         """Update a school"""
-        return await self.school_repo.update(school_id, {
+        result = await self.school_repo.update(school_id, {
             "name": name,
             "short_name": short_name,
             "catalog_id": catalog_id,
             "is_active": is_active
         })
+        await self.views.invalidate_schools()
+        return result
     
     async def delete_school(self, school_id: str) -> bool:
         """Delete (deactivate) a school"""
         result = await self.school_repo.update(school_id, {"is_active": False})
+        await self.views.invalidate_schools()
         return result is not None
     
     async def get_school(self, school_id: str) -> Optional[Dict]:
         """Get a school by ID"""
         return await self.school_repo.get_by_id(school_id)
     
+    async def get_school_map(self) -> Dict[str, Dict]:
+        """All schools by ID, from memory (reloaded after school changes)"""
+        return await self.views.school_map(self.school_repo.get_all)
+    
     # ============== YEAR LOGIC ==============
     
     def get_current_school_year(self) -> int:
@@ -128,6 +139,7 @@ class TextbookAccessService(BaseService):
         """Get all student records for a user with computed fields"""
         students = await self.student_repo.get_by_user(user_id)
         current_year = self.get_current_school_year()
+        schools = await self.get_school_map()
         
         # Enrich with computed fields
         for student in students:
@@ -135,7 +147,7 @@ class TextbookAccessService(BaseService):
             self._normalize_name_fields(student)
             
             # Get school name
-            school = await self.school_repo.get_by_id(student.get("school_id"))
+            school = schools.get(student.get("school_id"))
             student["school_name"] = school.get("name") if school else "Unknown"
             
             # Mark which years are editable
@@ -171,20 +183,24 @@ class TextbookAccessService(BaseService):
         
         return students
     
-    async def get_all_students(self, status: str = None, school_id: str = None) -> List[Dict]:
-        """Get all student records from all users (admin view)"""
-        students = await self.student_repo.get_all(status=status, school_id=school_id)
+    async def get_all_students(
+        self,
+        status: str = None,
+        school_id: str = None,
+        skip: int = 0,
+        limit: int = 100
+    ) -> Dict:
+        """One page of student records from all users (admin view), with the total"""
+        page = await self.student_repo.get_all_with_school(
+            status=status, school_id=school_id, skip=skip, limit=limit
+        )
         current_year = self.get_current_school_year()
         
-        # Enrich with computed fields
-        for student in students:
+        # Enrich with computed fields (school_name comes from the $lookup)
+        for student in page["students"]:
             # Normalize name fields for backward compatibility
             self._normalize_name_fields(student)
             
-            # Get school name
-            school = await self.school_repo.get_by_id(student.get("school_id"))
-            student["school_name"] = school.get("name") if school else "Unknown"
-            
             # Flatten enrollment data
             enrollments = student.get("enrollments", [])
             current_enrollment = next(
@@ -196,7 +212,38 @@ class TextbookAccessService(BaseService):
             student["grade"] = current_enrollment.get("grade", "")
             student["year"] = current_enrollment.get("year", current_year)
         
-        return students
+        return page
+    
+    async def get_access_summary(self, user_id: str) -> Dict:
+        """
+        Approved students and grades a user can browse the catalog with.
+        Cached per user; dropped when their students or enrollments change.
+        """
+        summary = self.views.get_summary(user_id)
+        if summary is not None:
+            return summary
+        
+        students = []
+        grades = set()
+        for student in await self.get_user_students(user_id):
+            if student.get("has_approved_access") or student.get("status") == "approved":
+                students.append({
+                    "sync_id": student.get("student_id"),
+                    "name": student.get("full_name"),
+                    "first_name": student.get("first_name", ""),
+                    "last_name": student.get("last_name", ""),
+                    "full_name": student.get("full_name"),
+                    "grade": student.get("grade"),
+                    "section": student.get("section"),
+                    "student_id": student.get("student_id"),
+                    "school_name": student.get("school_name")
+                })
+                if student.get("grade"):
+                    grades.add(student.get("grade"))
+        
+        summary = {"students": students, "grades": sorted(grades)}
+        self.views.set_summary(user_id, summary)
+        return summary
     
     async def create_student_record(self, user_id: str, data: StudentRecordCreate) -> Dict:
         """Create a new student record with initial enrollment"""
@@ -267,6 +314,8 @@ class TextbookAccessService(BaseService):
             result = await self.student_repo.create(student_data)
             self.log_info(f"Student record created: {result['student_id']} by user {user_id}")
         
+        await self.views.invalidate_student(result)
+        
         # Send notification to admins/moderators
         await self._notify_new_request(result, enrollment)
         
@@ -318,6 +367,7 @@ class TextbookAccessService(BaseService):
                 update_data["relation_other"] = None
         
         await self.student_repo.update_student(student_id, update_data)
+        await self.views.invalidate_student(student)
         
         return await self.student_repo.get_by_id(student_id)
     
@@ -360,6 +410,7 @@ class TextbookAccessService(BaseService):
         }
         
         await self.student_repo.add_enrollment(student_id, enrollment)
+        await self.views.invalidate_student(student)
         
         self.log_info(f"Enrollment added: student {student_id}, year {data.year}")
         
@@ -391,6 +442,7 @@ class TextbookAccessService(BaseService):
             raise ValueError(f"Year {year} is no longer editable")
         
         await self.student_repo.update_enrollment(student_id, year, {"grade": grade})
+        await self.views.invalidate_student(student)
         
         return await self.student_repo.get_by_id(student_id)
     
@@ -410,7 +462,9 @@ class TextbookAccessService(BaseService):
         if not is_admin and student.get("user_id") != user_id:
             raise ValueError("Access denied")
         
-        return await self.student_repo.deactivate(student_id)
+        result = await self.student_repo.deactivate(student_id)
+        await self.views.invalidate_student(student)
+        return result
     
     # ============== APPROVAL WORKFLOW ==============
     
@@ -505,6 +559,7 @@ class TextbookAccessService(BaseService):
             })
             self.log_info(f"Student {student_id} auto-locked after approval")
         
+        await self.views.invalidate_student(student)
         self.log_info(f"Enrollment {student_id}/{year} updated to {action.status.value} by {admin_id}")
         
         # Notify user
@@ -0,0 +1,390 @@
+"""
+TextbookBoardMirror — Local mirror of the TB2026-Textbooks Monday.com board items.
+
+Each board item is one document in `textbook_board_items` (board_id, item_id,
+code, name, updated_at). Every process keeps a hot in-memory code/name → item_id
+map built from that snapshot, so lookups never touch Mongo or Monday.com.
+
+Changes flow in three ways:
+- Monday.com webhooks (create / rename / column change / delete / archive)
+  are applied one item at a time.
+- A delta reconciliation re-reads only items whose `__last_updated__` is
+  recent, through the `items_page` cursor.
+- A rare id sweep catches deletions that no webhook reported.
+
+Every write stamps a board-wide `revision`. Other processes poll that counter
+every few seconds and pull only the documents past the revision they have
+already seen, so a webhook handled by one worker shows up in the others
+within seconds.
+"""
+import logging
+import asyncio
+import json
+import time
+from typing import Dict, List, Optional, Iterable
+from datetime import datetime, timezone, timedelta
+
+from pymongo import UpdateOne, ReturnDocument
+
+from core.database import db
+from modules.integrations.monday.core_client import monday_client
+
+logger = logging.getLogger(__name__)
+
+TEXTBOOKS_BOARD_ID = "18397140920"
+
+ITEMS_COLLECTION = "textbook_board_items"
+META_COLLECTION = "textbook_board_mirror_meta"
+
+CODE_COLUMN_IDS = ("text", "code", "texto")
+PAGE_LIMIT = 500
+REVISION_CHECK_SECONDS = 5
+DELTA_RECONCILE_SECONDS = 60
+FULL_RECONCILE_SECONDS = 15 * 60
+# Re-pull a few revisions back so writers that committed out of order are not missed
+REVISION_OVERLAP = 20
+
+WEBHOOK_EVENTS = ("create_item", "change_name", "change_column_value", "item_deleted", "item_archived")
+DELETE_EVENT_TYPES = ("delete_pulse", "archive_pulse")
+
+ITEM_FIELDS = (
+    "id name updated_at "
+    f"column_values(ids: {json.dumps(list(CODE_COLUMN_IDS))}) {{ id text }}"
+)
+
+
+def extract_code(item: Dict) -> str:
+    """Book code from the code column, else the "G5-1" prefix of the item name."""
+    for col in item.get("column_values", []):
+        if col.get("id") in CODE_COLUMN_IDS and col.get("text"):
+            return col["text"]
+    name = item.get("name", "")
+    if " " in name:
+        prefix = name.split(" ", 1)[0]
+        if prefix and "-" in prefix:
+            return prefix
+    return ""
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class TextbookBoardMirror:
+
+    def __init__(self, board_id: str = TEXTBOOKS_BOARD_ID):
+        self.board_id = board_id
+        self._items: Dict[str, Dict] = {}   # item_id -> {"code", "name", "updated_at"}
+        self._map: Dict[str, str] = {}      # code / name -> item_id
+        self._loaded = False
+        self._revision = 0
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+        self._reconcile_task: Optional[asyncio.Task] = None
+
+    # ---------- Lookups ----------
+
+    async def get_map(self) -> Dict[str, str]:
+        """Hot code/name → item_id map (seconds fresh)."""
+        await self._ensure_fresh()
+        return self._map
+
+    async def lookup(self, code: str, name: str = "") -> Optional[str]:
+        board_map = await self.get_map()
+        return board_map.get(code) or board_map.get(name)
+
+    async def _ensure_fresh(self):
+        if self._loaded and time.monotonic() - self._checked_at < REVISION_CHECK_SECONDS:
+            return
+        async with self._lock:
+            if self._loaded and time.monotonic() - self._checked_at < REVISION_CHECK_SECONDS:
+                return
+            if not self._loaded:
+                await self._load_snapshot()
+            else:
+                await self._pull_changes()
+            self._checked_at = time.monotonic()
+        self._schedule_reconcile()
+
+    async def _load_snapshot(self):
+        meta = await db[META_COLLECTION].find_one({"board_id": self.board_id}, {"_id": 0})
+        if not meta or not meta.get("full_reconciled_at"):
+            # First run: crawl the board once to seed the snapshot
+            try:
+                await self.reconcile(full=True)
+            except Exception as e:
+                logger.error(f"[textbook_mirror] Initial board crawl failed: {e}")
+            meta = await db[META_COLLECTION].find_one({"board_id": self.board_id}, {"_id": 0}) or {}
+        self._items = {}
+        self._map = {}
+        async for doc in db[ITEMS_COLLECTION].find(
+            {"board_id": self.board_id, "deleted": {"$ne": True}},
+            {"_id": 0, "item_id": 1, "code": 1, "name": 1, "updated_at": 1},
+        ):
+            self._put(doc)
+        self._revision = meta.get("revision", 0)
+        self._loaded = True
+        logger.info(f"[textbook_mirror] Loaded {len(self._items)} board items (rev {self._revision})")
+
+    async def _pull_changes(self):
+        meta = await db[META_COLLECTION].find_one(
+            {"board_id": self.board_id}, {"_id": 0, "revision": 1}
+        )
+        revision = (meta or {}).get("revision", 0)
+        if revision == self._revision:
+            return
+        async for doc in db[ITEMS_COLLECTION].find(
+            {"board_id": self.board_id, "revision": {"$gt": self._revision - REVISION_OVERLAP}},
+            {"_id": 0, "item_id": 1, "code": 1, "name": 1, "updated_at": 1, "deleted": 1},
+        ):
+            if doc.get("deleted"):
+                self._drop(doc["item_id"])
+            else:
+                self._put(doc)
+        self._revision = revision
+
+    # ---------- Hot map ----------
+
+    def _put(self, doc: Dict):
+        item_id = str(doc["item_id"])
+        self._drop(item_id)
+        entry = {"code": doc.get("code", ""), "name": doc.get("name", ""), "updated_at": doc.get("updated_at")}
+        self._items[item_id] = entry
+        if entry["code"]:
+            self._map[entry["code"]] = item_id
+        if entry["name"]:
+            self._map[entry["name"]] = item_id
+
+    def _drop(self, item_id: str):
+        old = self._items.pop(str(item_id), None)
+        if not old:
+            return
+        for key in (old["code"], old["name"]):
+            if key and self._map.get(key) == str(item_id):
+                del self._map[key]
+
+    # ---------- Writes ----------
+
+    async def _next_revision(self) -> int:
+        meta = await db[META_COLLECTION].find_one_and_update(
+            {"board_id": self.board_id},
+            {"$inc": {"revision": 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        return meta["revision"]
+
+    async def _store(self, items: List[Dict]) -> int:
+        """Upsert Monday items that differ from the mirror; returns how many changed."""
+        docs = []
+        for item in items:
+            item_id = str(item.get("id", ""))
+            if not item_id:
+                continue
+            doc = {
+                "item_id": item_id,
+                "code": extract_code(item),
+                "name": item.get("name", ""),
+                "updated_at": item.get("updated_at"),
+            }
+            current = self._items.get(item_id)
+            if current and all(current.get(k) == doc[k] for k in ("code", "name", "updated_at")):
+                continue
+            docs.append(doc)
+        if not docs:
+            return 0
+        revision = await self._next_revision()
+        synced_at = _now()
+        await db[ITEMS_COLLECTION].bulk_write([
+            UpdateOne(
+                {"board_id": self.board_id, "item_id": d["item_id"]},
+                {"$set": {**d, "board_id": self.board_id, "revision": revision,
+                          "deleted": False, "synced_at": synced_at}},
+                upsert=True,
+            )
+            for d in docs
+        ], ordered=False)
+        for d in docs:
+            self._put(d)
+        return len(docs)
+
+    async def _tombstone(self, item_ids: Iterable[str]) -> int:
+        item_ids = [str(i) for i in item_ids]
+        if not item_ids:
+            return 0
+        revision = await self._next_revision()
+        await db[ITEMS_COLLECTION].update_many(
+            {"board_id": self.board_id, "item_id": {"$in": item_ids}},
+            {"$set": {"deleted": True, "revision": revision, "synced_at": _now()}},
+        )
+        for item_id in item_ids:
+            self._drop(item_id)
+        return len(item_ids)
+
+    # ---------- Webhooks ----------
+
+    async def handle_webhook(self, event: dict) -> dict:
+        """Apply one Monday.com item event to the mirror."""
+        event_type = event.get("type", "")
+        item_id = str(event.get("pulseId") or event.get("itemId") or "")
+        if not item_id or event.get("parentItemId"):
+            return {"status": "ignored"}
+
+        if not self._loaded:
+            await self._ensure_fresh()
+
+        if event_type in DELETE_EVENT_TYPES:
+            await self._tombstone([item_id])
+        else:
+            items = await self._fetch_items_by_ids([item_id])
+            if items:
+                await self._store(items)
+            else:
+                await self._tombstone([item_id])
+        return {"status": "applied", "item_id": item_id, "type": event_type}
+
+    async def register_webhooks(self, webhook_url: str) -> Dict:
+        """Create the Monday.com webhooks that keep the mirror current."""
+        from modules.integrations.monday.webhook_router import register_handler
+
+        webhook_ids = {}
+        for event in WEBHOOK_EVENTS:
+            try:
+                webhook_ids[event] = await monday_client.register_webhook(self.board_id, webhook_url, event=event)
+            except Exception as e:
+                logger.warning(f"[textbook_mirror] Webhook {event} registration failed: {e}")
+        await db[META_COLLECTION].update_one(
+            {"board_id": self.board_id},
+            {"$set": {"webhooks": webhook_ids, "webhook_url": webhook_url, "webhooks_registered_at": _now()}},
+            upsert=True,
+        )
+        register_handler(self.board_id, self.handle_webhook)
+        return {"webhooks": webhook_ids}
+
+    # ---------- Reconciliation ----------
+
+    def _schedule_reconcile(self):
+        if self._reconcile_task and not self._reconcile_task.done():
+            return
+        self._reconcile_task = asyncio.create_task(self._reconcile_if_due())
+
+    async def _claim(self, field: str, interval: int) -> bool:
+        """Claim a reconciliation slot across processes (one runner per interval)."""
+        now = datetime.now(timezone.utc)
+        cutoff = (now - timedelta(seconds=interval)).isoformat()
+        # The meta doc may not exist yet (e.g. the first crawl failed); the claim needs one
+        await db[META_COLLECTION].update_one(
+            {"board_id": self.board_id}, {"$setOnInsert": {"board_id": self.board_id}}, upsert=True
+        )
+        result = await db[META_COLLECTION].update_one(
+            {"board_id": self.board_id, "$or": [
+                {field: {"$lt": cutoff}}, {field: {"$exists": False}},
+            ]},
+            {"$set": {field: now.isoformat()}},
+        )
+        return result.matched_count == 1
+
+    async def _reconcile_if_due(self):
+        try:
+            if await self._claim("full_reconciled_at", FULL_RECONCILE_SECONDS):
+                await self.reconcile(full=True, claimed=True)
+            elif await self._claim("delta_reconciled_at", DELTA_RECONCILE_SECONDS):
+                await self.reconcile(full=False, claimed=True)
+        except Exception as e:
+            logger.warning(f"[textbook_mirror] Reconcile failed (non-blocking): {e}")
+
+    async def reconcile(self, full: bool = False, claimed: bool = False) -> Dict:
+        """Re-read the board (full sweep, or only items updated since the last delta)."""
+        meta = await db[META_COLLECTION].find_one({"board_id": self.board_id}, {"_id": 0}) or {}
+        started_at = _now()
+        if full:
+            items = await self._crawl()
+        else:
+            # __last_updated__ filters by day; the updated_at comparison in _store drops the rest
+            since = (meta.get("delta_synced_at") or started_at)[:10]
+            items = await self._crawl(
+                '{rules: [{column_id: "__last_updated__", compare_attribute: "UPDATED_AT", '
+                f'compare_value: ["EXACT", "{since}"], operator: greater_than_or_equals}}]}}'
+            )
+        changed = await self._store(items)
+        removed = 0
+        if full:
+            seen = {str(i.get("id")) for i in items}
+            stale = await db[ITEMS_COLLECTION].distinct(
+                "item_id", {"board_id": self.board_id, "deleted": {"$ne": True}, "item_id": {"$nin": list(seen)}}
+            )
+            removed = await self._tombstone(stale)
+
+        stamp = {"delta_synced_at": started_at}
+        if full:
+            stamp["full_reconciled_at"] = started_at
+        elif not claimed:
+            stamp["delta_reconciled_at"] = started_at
+        await db[META_COLLECTION].update_one({"board_id": self.board_id}, {"$set": stamp}, upsert=True)
+        if changed or removed:
+            logger.info(f"[textbook_mirror] Reconciled ({'full' if full else 'delta'}): {changed} changed, {removed} removed")
+        return {"full": full, "fetched": len(items), "changed": changed, "removed": removed}
+
+    async def _crawl(self, query_params: str = "") -> List[Dict]:
+        """Walk items_page / next_items_page for this board."""
+        params = f", query_params: {query_params}" if query_params else ""
+        data = await monday_client.execute(
+            f'''query {{
+                boards(ids: [{self.board_id}]) {{
+                    items_page(limit: {PAGE_LIMIT}{params}) {{ cursor items {{ {ITEM_FIELDS} }} }}
+                }}
+            }}''',
+            timeout=45.0,
+        )
+        boards = data.get("boards", [])
+        page = boards[0].get("items_page", {}) if boards else {}
+        items = list(page.get("items", []))
+        cursor = page.get("cursor")
+        while cursor:
+            data = await monday_client.execute(
+                f'''query {{
+                    next_items_page(limit: {PAGE_LIMIT}, cursor: "{cursor}") {{ cursor items {{ {ITEM_FIELDS} }} }}
+                }}''',
+                timeout=45.0,
+            )
+            page = data.get("next_items_page", {})
+            items.extend(page.get("items", []))
+            cursor = page.get("cursor") if page.get("items") else None
+        return items
+
+    async def _fetch_items_by_ids(self, item_ids: List[str]) -> List[Dict]:
+        data = await monday_client.execute(
+            f'query {{ items(ids: [{", ".join(item_ids)}]) {{ {ITEM_FIELDS} board {{ id }} state }} }}'
+        )
+        return [
+            i for i in data.get("items", [])
+            if str((i.get("board") or {}).get("id", self.board_id)) == self.board_id
+            and i.get("state", "active") == "active"
+        ]
+
+    # ---------- Admin ----------
+
+    async def refresh(self) -> Dict:
+        """Full re-crawl now and reload the hot map."""
+        result = await self.reconcile(full=True)
+        async with self._lock:
+            await self._load_snapshot()
+            self._checked_at = time.monotonic()
+        return {**result, "items_mapped": len(self._map)}
+
+    async def get_status(self) -> Dict:
+        meta = await db[META_COLLECTION].find_one({"board_id": self.board_id}, {"_id": 0}) or {}
+        return {
+            "board_id": self.board_id,
+            "loaded": self._loaded,
+            "items": len(self._items),
+            "keys": len(self._map),
+            "local_revision": self._revision,
+            "revision": meta.get("revision", 0),
+            "full_reconciled_at": meta.get("full_reconciled_at"),
+            "delta_reconciled_at": meta.get("delta_reconciled_at"),
+            "webhooks": meta.get("webhooks", {}),
+        }
+
+
+textbook_board_mirror = TextbookBoardMirror()
@@ -8,63 +8,17 @@ from typing import Dict, List, Optional
 from datetime import datetime, timezone
 from core.database import db
 from modules.integrations.monday.core_client import monday_client
+from modules.sysbook.services.textbook_board_mirror import textbook_board_mirror
 
 logger = logging.getLogger(__name__)
 
-TEXTBOOKS_BOARD_ID = "18397140920"
-
 
 class TextbookBoardSync:
 
     async def _get_board_items_map(self) -> Dict[str, str]:
-        """Get mapping of book_code → monday_item_id from the Textbooks board.
-        Caches in DB for performance."""
-        cache = await db.app_config.find_one({"key": "textbooks_board_map"}, {"_id": 0})
-        if cache and cache.get("map"):
-            # Use cache if less than 1 hour old
-            cached_at = cache.get("cached_at", "")
-            if cached_at:
-                try:
-                    age = (datetime.now(timezone.utc) - datetime.fromisoformat(cached_at)).total_seconds()
-                    if age < 3600:
-                        return cache["map"]
-                except Exception:
-                    pass
-
-        # Fetch from Monday.com
-        try:
-            items = await monday_client.get_board_items(TEXTBOOKS_BOARD_ID, limit=500)
-        except Exception as e:
-            logger.error(f"Monday.com sync fetch failed: {e}")
-            return {"synced": 0, "error": str(e)}
-        code_map = {}
-        for item in items:
-            item_id = str(item.get("id", ""))
-            name = item.get("name", "")
-            # Try to extract code from item name or columns
-            code = ""
-            for col in item.get("column_values", []):
-                if col.get("id") in ("text", "code", "texto"):
-                    code = col.get("text", "")
-                    break
-            # Also try parsing code from name (e.g., "G5-1 Science 5")
-            if not code and " " in name:
-                parts = name.split(" ", 1)
-                if parts[0] and "-" in parts[0]:
-                    code = parts[0]
-            if code:
-                code_map[code] = item_id
-            # Also map by full name
-            code_map[name] = item_id
-
-        # Cache the map
-        await db.app_config.update_one(
-            {"key": "textbooks_board_map"},
-            {"$set": {"key": "textbooks_board_map", "map": code_map, "cached_at": datetime.now(timezone.utc).isoformat(), "item_count": len(code_map)}},
-            upsert=True,
-        )
-        logger.info(f"[textbook_sync] Built board map: {len(code_map)} items")
-        return code_map
+        """Get mapping of book_code / item name → monday_item_id from the Textbooks board.
+        Served from the in-memory board mirror (kept current by webhooks + reconciliation)."""
+        return await textbook_board_mirror.get_map()
 
     async def sync_order_to_textbooks_board(self, order: Dict) -> Dict:
         """Sync a single order's items to the Textbooks board as subitems."""
@@ -220,9 +174,10 @@ class TextbookBoardSync:
             "errors": total_errors,
         }
 
-    async def invalidate_cache(self):
-        """Force refresh of the board items map."""
-        await db.app_config.delete_one({"key": "textbooks_board_map"})
+    async def invalidate_cache(self) -> Dict:
+        """Force a full re-crawl of the board items map."""
+        await db.app_config.delete_one({"key": "textbooks_board_map"})  # legacy single-document cache
+        return await textbook_board_mirror.refresh()
 
 
 textbook_board_sync = TextbookBoardSync()
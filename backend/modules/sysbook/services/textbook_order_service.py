@@ -4,17 +4,20 @@ Business logic for textbook ordering system
 """
 from typing import List, Optional, Dict
 from datetime import datetime, timezone
+import copy
 import logging
 import httpx
 import json
 
 from core.base import BaseService
 from core.database import db
+from core.events import StoreEvents
 from core.config import MONDAY_API_KEY
 from modules.sysbook.repositories.textbook_order_repository import textbook_order_repository
 from modules.sysbook.repositories.textbook_access_repository import student_record_repository
 from modules.sysbook.services.textbook_access_service import textbook_access_service
 from modules.store.services.monday_config_service import monday_config_service
+from modules.store.services.analytics_rollup_service import analytics_rollup_service
 from modules.sysbook.models.textbook_order import (
     OrderStatus, OrderItemStatus, OrderItem,
     SubmitOrderRequest, ReorderRequest
@@ -437,6 +440,8 @@ class TextbookOrderService(BaseService):
         if order.get("user_id") != user_id:
             raise ValueError("Access denied")
         
+        order_before = copy.deepcopy(order)
+        
         # Get items that are newly selected (not yet ordered)
         items = order.get("items", [])
         new_selected_items = [
@@ -562,6 +567,13 @@ class TextbookOrderService(BaseService):
         if is_presale:
             update_data["is_presale"] = True
         await self.order_repo.update_order(order_id, update_data)
+        await analytics_rollup_service.record_order_change(order_before, {**order, **update_data})
+        await self.emit_event(StoreEvents.TEXTBOOK_ORDER_SUBMITTED, {
+            "order_id": order_id,
+            "student_name": order.get("student_name", ""),
+            "items_count": len(new_selected_items),
+            "total": submission_total,
+        })
         
         # Send notification
         await self._notify_order_submitted(order, user_name, user_email)
@@ -772,6 +784,14 @@ class TextbookOrderService(BaseService):
                 if wallet_transaction:
                     await self._notify_admin_post_order_failure(order_id, user_name, student.get("full_name", ""), total_amount, "stock_deduction", str(stock_err))
 
+        await analytics_rollup_service.record_order_change(None, order)
+        await self.emit_event(StoreEvents.TEXTBOOK_ORDER_SUBMITTED, {
+            "order_id": order_id,
+            "student_name": order.get("student_name", ""),
+            "items_count": len(order_items),
+            "total": total_amount,
+        })
+
         # 8b. Update draft order to mark submitted items as 'ordered'
         try:
             ordered_book_ids = {item["book_id"] for item in order_items}
@@ -1066,6 +1086,7 @@ class TextbookOrderService(BaseService):
             "status_updated_by": admin_id,
             "status_updated_at": datetime.now(timezone.utc).isoformat()
         })
+        await analytics_rollup_service.record_order_change(order, {**order, "status": status.value})
         
         order["status"] = status.value
         return order
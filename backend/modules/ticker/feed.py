@@ -0,0 +1,304 @@
+"""
+Ticker Module — Feed cache
+Serves the public ticker feed from memory instead of querying on every view.
+
+Each activity source keeps a small ring of its latest items. Rings are
+refilled from Mongo every BACKFILL_SECONDS (all sources concurrently, config
+included) and topped up in between by EventBus events emitted by the same
+writes the backfill reads (textbook order submitted, sport match recorded,
+user registered, post created). The public payload is serialized
+once per change and served with an ETag, so a page view costs no queries.
+
+Events only reach the worker that handled the write; other workers pick the
+activity up at their next backfill.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import deque
+from datetime import datetime, timezone, timedelta
+from typing import Deque, Dict, Optional, Tuple
+
+from core.events import event_bus, Event, StoreEvents, AuthEvents, CommunityEvents, SportEvents
+
+logger = logging.getLogger(__name__)
+
+RING_SIZE = 5
+BACKFILL_SECONDS = 30
+CACHE_MAX_AGE_SECONDS = 5
+
+# ─── Default Config ───
+DEFAULT_CONFIG = {
+    "enabled": True,
+    "rotation_interval_ms": 4000,
+    "pause_on_hover": True,
+    "sponsor_frequency": 5,
+    "max_activities": 20,
+    "show_on_pages": ["*"],
+    "hide_on_pages": ["/admin", "/login", "/registro", "/embed"],
+    "activity_sources": {
+        "matches": {"enabled": True, "label": "PinPanClub", "icon": "trophy", "color": "#d97706"},
+        "new_users": {"enabled": True, "label": "New Members", "icon": "user-plus", "color": "#059669"},
+        "orders": {"enabled": True, "label": "Store", "icon": "shopping-bag", "color": "#C8102E"},
+        "community": {"enabled": True, "label": "Community", "icon": "message-circle", "color": "#7c3aed"},
+        "transactions": {"enabled": False, "label": "Wallet", "icon": "wallet", "color": "#0284c7"},
+        "custom": {"enabled": True, "messages": []}
+    },
+    "sponsors": [],
+    "style": {
+        "mode": "dark",
+        "bg_color": "#1A1A1A",
+        "text_color": "#FFFFFF",
+        "accent_color": "#C8102E",
+        "height_px": 36,
+        "font_size_px": 12
+    }
+}
+
+# source key -> (activity type, default icon, default color)
+SOURCES = {
+    "matches": ("match", "trophy", "#d97706"),
+    "new_users": ("new_user", "user-plus", "#059669"),
+    "orders": ("order", "shopping-bag", "#C8102E"),
+    "community": ("community", "message-circle", "#7c3aed"),
+    "transactions": ("transaction", "wallet", "#0284c7"),
+}
+
+
+async def _get_config(db):
+    """Get ticker config, seeding defaults if missing."""
+    doc = await db.app_config.find_one({"config_key": "ticker_config"}, {"_id": 0})
+    if not doc:
+        await db.app_config.insert_one({"config_key": "ticker_config", "value": DEFAULT_CONFIG})
+        return DEFAULT_CONFIG
+    return doc.get("value", DEFAULT_CONFIG)
+
+
+def _merge_defaults(config):
+    """Ensure all default keys exist in config."""
+    merged = {**DEFAULT_CONFIG, **config}
+    merged["activity_sources"] = {**DEFAULT_CONFIG["activity_sources"], **config.get("activity_sources", {})}
+    merged["style"] = {**DEFAULT_CONFIG["style"], **config.get("style", {})}
+    return merged
+
+
+# ─── Activity text (shared by backfill and events) ───
+
+def _match_text(m: dict) -> str:
+    a = m.get("player_a") or {}
+    b = m.get("player_b") or {}
+    p1 = a.get("nickname", "Player 1")
+    p2 = b.get("nickname", "Player 2")
+    if m.get("winner_id"):
+        winner, loser = (p1, p2) if m["winner_id"] == a.get("player_id") else (p2, p1)
+        return f"{winner} won vs {loser}"
+    return f"{p1} vs {p2}"
+
+
+def _user_text(u: dict) -> str:
+    name = u.get("nombre") or u.get("name") or (u.get("email") or "Someone").split("@")[0]
+    return f"{name} joined the community"
+
+
+def _order_text(o: dict) -> str:
+    name = o.get("student_name") or o.get("acudiente") or "Someone"
+    item_count = o["items_count"] if "items_count" in o else len(o.get("items", []))
+    return f"{name} ordered {item_count} item{'s' if item_count != 1 else ''}"
+
+
+def _post_text(p: dict) -> str:
+    author = p.get("author_name") or "Someone"
+    title = p.get("title") or p.get("titulo") or "a new post"
+    if len(title) > 40:
+        title = title[:37] + "..."
+    return f'{author} posted: "{title}"'
+
+
+def _transaction_text(tx: dict) -> str:
+    return f"Wallet activity: ${tx.get('amount', 0):.2f}"
+
+
+def _serializable(value):
+    return str(value) if type(value).__name__ == "ObjectId" else value
+
+
+class TickerFeed:
+    """Per-source activity rings and the pre-serialized public payload"""
+
+    def __init__(self):
+        self._rings: Dict[str, Deque[dict]] = {key: deque(maxlen=RING_SIZE) for key in SOURCES}
+        self._config: Optional[dict] = None
+        self._payload: Optional[Tuple[bytes, str]] = None   # (body, etag)
+        self._loaded_at = 0.0
+        self._refresh_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"backfills": 0, "events": 0, "builds": 0}
+
+        event_bus.subscribe_handler(StoreEvents.TEXTBOOK_ORDER_SUBMITTED, self._on_order_submitted)
+        event_bus.subscribe_handler(SportEvents.MATCH_RECORDED, self._on_match_recorded)
+        event_bus.subscribe_handler(AuthEvents.USER_REGISTERED, self._on_user_registered)
+        event_bus.subscribe_handler(CommunityEvents.POST_CREATED, self._on_post_created)
+
+    async def get(self) -> Tuple[bytes, str]:
+        """Serialized feed and its ETag; loads from Mongo only on first use."""
+        if self._config is None:
+            await self.refresh()
+        if not self._task or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        if self._payload is None:
+            self._build()
+        return self._payload
+
+    def set_config(self, config: dict) -> None:
+        """Apply a config saved by this worker without waiting for the next backfill."""
+        self._config = _merge_defaults(config)
+        self._payload = None
+
+    async def refresh(self) -> None:
+        """Reload config and refill every enabled source's ring (concurrently)."""
+        from core.database import db
+        async with self._refresh_lock:
+            if self._config is not None and time.monotonic() - self._loaded_at < 1:
+                return  # another request just refreshed
+            config = _merge_defaults(await _get_config(db))
+            sources = config.get("activity_sources", {})
+            since = (datetime.now(timezone.utc) - timedelta(days=7)).isoformat()
+            queries = {
+                "matches": lambda: db.sport_matches.find(
+                    {"created_at": {"$gte": since}, "source": {"$ne": "demo"}},
+                    {"_id": 0, "player_a": 1, "player_b": 1, "winner_id": 1, "created_at": 1}
+                ),
+                "new_users": lambda: db.auth_users.find({}, {"_id": 0, "name": 1, "email": 1, "created_at": 1}),
+                "orders": lambda: db.store_textbook_orders.find(
+                    {}, {"_id": 0, "student_name": 1, "items": 1, "created_at": 1, "status": 1}
+                ),
+                "community": lambda: db.community_posts.find(
+                    {}, {"_id": 0, "title": 1, "titulo": 1, "author_name": 1, "created_at": 1}
+                ),
+                "transactions": lambda: db.wallet_transactions.find(
+                    {"type": {"$in": ["topup", "transfer"]}}, {"_id": 0, "type": 1, "amount": 1, "created_at": 1}
+                ),
+            }
+            texts = {"matches": _match_text, "new_users": _user_text, "orders": _order_text,
+                     "community": _post_text, "transactions": _transaction_text}
+            enabled = [key for key in SOURCES if sources.get(key, {}).get("enabled")]
+
+            async def fetch(key):
+                try:
+                    return await queries[key]().sort("created_at", -1).limit(RING_SIZE).to_list(RING_SIZE)
+                except Exception as e:
+                    logger.warning(f"[ticker] Backfill of {key} failed (non-blocking): {e}")
+                    return None
+
+            results = await asyncio.gather(*(fetch(key) for key in enabled))
+            now = datetime.now(timezone.utc).isoformat()
+            for key, docs in zip(enabled, results):
+                if docs is None:
+                    continue  # keep what we had
+                self._rings[key] = deque(
+                    ({"text": texts[key](d), "timestamp": d.get("created_at", now)} for d in reversed(docs)),
+                    maxlen=RING_SIZE,
+                )
+            self._config = config
+            self._payload = None
+            self._loaded_at = time.monotonic()
+            self.stats["backfills"] += 1
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(BACKFILL_SECONDS)
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"[ticker] Periodic backfill failed (non-blocking): {e}")
+
+    def push(self, source: str, text: str, timestamp: Optional[str] = None) -> None:
+        """Add one activity to a source's ring."""
+        self._rings[source].append({"text": text, "timestamp": timestamp or datetime.now(timezone.utc).isoformat()})
+        self._payload = None
+        self.stats["events"] += 1
+
+    def _build(self) -> None:
+        config = self._config
+        if not config.get("enabled"):
+            body = {"enabled": False, "activities": [], "sponsors": [], "config": {}}
+        else:
+            body = {
+                "enabled": True,
+                "activities": self._activities(config),
+                "sponsors": [
+                    {k: _serializable(v) for k, v in s.items() if k != "_id"}
+                    for s in config.get("sponsors", []) if s.get("active", True)
+                ],
+                "config": {
+                    "rotation_interval_ms": config.get("rotation_interval_ms", 4000),
+                    "pause_on_hover": config.get("pause_on_hover", True),
+                    "sponsor_frequency": config.get("sponsor_frequency", 5),
+                    "show_on_pages": config.get("show_on_pages", ["*"]),
+                    "hide_on_pages": config.get("hide_on_pages", []),
+                    "style": config.get("style", DEFAULT_CONFIG["style"])
+                }
+            }
+        raw = json.dumps(body, default=str, separators=(",", ":")).encode()
+        self._payload = (raw, f'"{hashlib.md5(raw).hexdigest()}"')
+        self.stats["builds"] += 1
+
+    def _activities(self, config: dict) -> list:
+        sources = config.get("activity_sources", {})
+        now = datetime.now(timezone.utc).isoformat()
+        activities = []
+        for key, (kind, icon, color) in SOURCES.items():
+            source = sources.get(key, {})
+            if not source.get("enabled"):
+                continue
+            for item in self._rings[key]:
+                activities.append({
+                    "type": kind, "text": item["text"],
+                    "icon": source.get("icon", icon),
+                    "color": source.get("color", color),
+                    "timestamp": item["timestamp"]
+                })
+        if sources.get("custom", {}).get("enabled"):
+            for msg in sources.get("custom", {}).get("messages", []):
+                if msg.get("active", True):
+                    activities.append({
+                        "type": "custom", "text": msg.get("text", ""),
+                        "icon": msg.get("icon", "megaphone"),
+                        "color": msg.get("color", "#C8102E"),
+                        "timestamp": now
+                    })
+        activities.sort(key=lambda x: x.get("timestamp", ""), reverse=True)
+        return activities[:config.get("max_activities", 20)]
+
+    # ─── EventBus handlers ───
+
+    async def _on_order_submitted(self, event: Event):
+        self.push("orders", _order_text(event.payload), event.timestamp)
+
+    async def _on_match_recorded(self, event: Event):
+        self.push("matches", _match_text(event.payload), event.timestamp)
+
+    async def _on_user_registered(self, event: Event):
+        self.push("new_users", _user_text(event.payload), event.timestamp)
+
+    async def _on_post_created(self, event: Event):
+        self.push("community", _post_text(event.payload), event.timestamp)
+
+    async def stop(self):
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    def get_status(self) -> Dict:
+        return {**self.stats, "items": {key: len(ring) for key, ring in self._rings.items()}}
+
+
+ticker_feed = TickerFeed()
@@ -4,11 +4,14 @@ Configurable ticker bar that replaces the traditional header.
 Pulls real activities from app modules (matches, orders, users, posts).
 Shows sponsor banners at configurable intervals.
 """
-from fastapi import APIRouter, Depends, HTTPException
-from datetime import datetime, timezone, timedelta
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from datetime import datetime, timezone
 from bson import ObjectId
 import os
 
+from modules.landing.bootstrap import public_bootstrap
+from .feed import CACHE_MAX_AGE_SECONDS, _get_config, _merge_defaults, ticker_feed
+
 router = APIRouter(prefix="/ticker", tags=["Ticker"])
 admin_router = APIRouter(prefix="/admin/ticker", tags=["Ticker Admin"])
 
@@ -21,207 +24,16 @@ def get_admin_user():
     """Dependency placeholder — replaced when mounted"""
     pass
 
-# ─── Default Config ───
-DEFAULT_CONFIG = {
-    "enabled": True,
-    "rotation_interval_ms": 4000,
-    "pause_on_hover": True,
-    "sponsor_frequency": 5,
-    "max_activities": 20,
-    "show_on_pages": ["*"],
-    "hide_on_pages": ["/admin", "/login", "/registro", "/embed"],
-    "activity_sources": {
-        "matches": {"enabled": True, "label": "PinPanClub", "icon": "trophy", "color": "#d97706"},
-        "new_users": {"enabled": True, "label": "New Members", "icon": "user-plus", "color": "#059669"},
-        "orders": {"enabled": True, "label": "Store", "icon": "shopping-bag", "color": "#C8102E"},
-        "community": {"enabled": True, "label": "Community", "icon": "message-circle", "color": "#7c3aed"},
-        "transactions": {"enabled": False, "label": "Wallet", "icon": "wallet", "color": "#0284c7"},
-        "custom": {"enabled": True, "messages": []}
-    },
-    "sponsors": [],
-    "style": {
-        "mode": "dark",
-        "bg_color": "#1A1A1A",
-        "text_color": "#FFFFFF",
-        "accent_color": "#C8102E",
-        "height_px": 36,
-        "font_size_px": 12
-    }
-}
-
-
-async def _get_config(db):
-    """Get ticker config, seeding defaults if missing."""
-    doc = await db.app_config.find_one({"config_key": "ticker_config"}, {"_id": 0})
-    if not doc:
-        await db.app_config.insert_one({"config_key": "ticker_config", "value": DEFAULT_CONFIG})
-        return DEFAULT_CONFIG
-    return doc.get("value", DEFAULT_CONFIG)
-
-
-def _merge_defaults(config):
-    """Ensure all default keys exist in config."""
-    merged = {**DEFAULT_CONFIG, **config}
-    merged["activity_sources"] = {**DEFAULT_CONFIG["activity_sources"], **config.get("activity_sources", {})}
-    merged["style"] = {**DEFAULT_CONFIG["style"], **config.get("style", {})}
-    return merged
-
-
-# ─── Activity Aggregator ───
-async def _fetch_activities(db, config):
-    """Pull real activities from enabled sources."""
-    activities = []
-    sources = config.get("activity_sources", {})
-    now = datetime.now(timezone.utc)
-    since = now - timedelta(days=7)
-
-    # PinPanClub Matches
-    if sources.get("matches", {}).get("enabled"):
-        try:
-            matches = await db.pinpanclub_matches.find(
-                {"created_at": {"$gte": since.isoformat()}},
-                {"_id": 0, "player1_name": 1, "player2_name": 1, "status": 1, "created_at": 1, "winner_name": 1}
-            ).sort("created_at", -1).limit(5).to_list(5)
-            for m in matches:
-                p1 = m.get("player1_name", "Player 1")
-                p2 = m.get("player2_name", "Player 2")
-                winner = m.get("winner_name")
-                if winner:
-                    text = f"{winner} won vs {p2 if winner == p1 else p1}"
-                else:
-                    text = f"{p1} vs {p2} — match in progress"
-                activities.append({
-                    "type": "match", "text": text,
-                    "icon": sources["matches"].get("icon", "trophy"),
-                    "color": sources["matches"].get("color", "#d97706"),
-                    "timestamp": m.get("created_at", now.isoformat())
-                })
-        except Exception:
-            pass
-
-    # New Users
-    if sources.get("new_users", {}).get("enabled"):
-        try:
-            users = await db.users.find(
-                {},
-                {"_id": 0, "nombre": 1, "email": 1, "created_at": 1}
-            ).sort("created_at", -1).limit(5).to_list(5)
-            for u in users:
-                name = u.get("nombre", u.get("email", "Someone").split("@")[0])
-                activities.append({
-                    "type": "new_user", "text": f"{name} joined the community",
-                    "icon": sources["new_users"].get("icon", "user-plus"),
-                    "color": sources["new_users"].get("color", "#059669"),
-                    "timestamp": u.get("created_at", now.isoformat())
-                })
-        except Exception:
-            pass
-
-    # Store Orders
-    if sources.get("orders", {}).get("enabled"):
-        try:
-            orders = await db.store_textbook_orders.find(
-                {},
-                {"_id": 0, "student_name": 1, "items": 1, "created_at": 1, "status": 1}
-            ).sort("created_at", -1).limit(5).to_list(5)
-            for o in orders:
-                name = o.get("student_name", "Someone")
-                item_count = len(o.get("items", []))
-                activities.append({
-                    "type": "order", "text": f"{name} ordered {item_count} item{'s' if item_count != 1 else ''}",
-                    "icon": sources["orders"].get("icon", "shopping-bag"),
-                    "color": sources["orders"].get("color", "#C8102E"),
-                    "timestamp": o.get("created_at", now.isoformat())
-                })
-        except Exception:
-            pass
-
-    # Community Posts
-    if sources.get("community", {}).get("enabled"):
-        try:
-            posts = await db.community_posts.find(
-                {},
-                {"_id": 0, "title": 1, "author_name": 1, "created_at": 1}
-            ).sort("created_at", -1).limit(5).to_list(5)
-            for p in posts:
-                author = p.get("author_name", "Someone")
-                title = p.get("title", "a new post")
-                if len(title) > 40:
-                    title = title[:37] + "..."
-                activities.append({
-                    "type": "community", "text": f'{author} posted: "{title}"',
-                    "icon": sources["community"].get("icon", "message-circle"),
-                    "color": sources["community"].get("color", "#7c3aed"),
-                    "timestamp": p.get("created_at", now.isoformat())
-                })
-        except Exception:
-            pass
-
-    # Wallet Transactions
-    if sources.get("transactions", {}).get("enabled"):
-        try:
-            txns = await db.wallet_transactions.find(
-                {"type": {"$in": ["topup", "transfer"]}},
-                {"_id": 0, "type": 1, "amount": 1, "created_at": 1}
-            ).sort("created_at", -1).limit(5).to_list(5)
-            for tx in txns:
-                amt = tx.get("amount", 0)
-                activities.append({
-                    "type": "transaction", "text": f"Wallet activity: ${amt:.2f}",
-                    "icon": sources["transactions"].get("icon", "wallet"),
-                    "color": sources["transactions"].get("color", "#0284c7"),
-                    "timestamp": tx.get("created_at", now.isoformat())
-                })
-        except Exception:
-            pass
-
-    # Custom Messages
-    if sources.get("custom", {}).get("enabled"):
-        for msg in sources.get("custom", {}).get("messages", []):
-            if msg.get("active", True):
-                activities.append({
-                    "type": "custom", "text": msg.get("text", ""),
-                    "icon": msg.get("icon", "megaphone"),
-                    "color": msg.get("color", "#C8102E"),
-                    "timestamp": now.isoformat()
-                })
-
-    # Sort by timestamp descending, limit
-    max_items = config.get("max_activities", 20)
-    activities.sort(key=lambda x: x.get("timestamp", ""), reverse=True)
-    return activities[:max_items]
-
-
 # ═══ PUBLIC ENDPOINTS ═══
 
 @router.get("/feed")
-async def get_ticker_feed():
-    """Public: returns activities + sponsors + display config."""
-    db = get_db()
-    config = _merge_defaults(await _get_config(db))
-
-    if not config.get("enabled"):
-        return {"enabled": False, "activities": [], "sponsors": [], "config": {}}
-
-    activities = await _fetch_activities(db, config)
-    active_sponsors = []
-    for s in config.get("sponsors", []):
-        if s.get("active", True):
-            active_sponsors.append({k: str(v) if hasattr(v, '__str__') and type(v).__name__ == 'ObjectId' else v for k, v in s.items() if k != "_id"})
-
-    return {
-        "enabled": True,
-        "activities": activities,
-        "sponsors": active_sponsors,
-        "config": {
-            "rotation_interval_ms": config.get("rotation_interval_ms", 4000),
-            "pause_on_hover": config.get("pause_on_hover", True),
-            "sponsor_frequency": config.get("sponsor_frequency", 5),
-            "show_on_pages": config.get("show_on_pages", ["*"]),
-            "hide_on_pages": config.get("hide_on_pages", []),
-            "style": config.get("style", DEFAULT_CONFIG["style"])
-        }
-    }
+async def get_ticker_feed(request: Request):
+    """Public: returns activities + sponsors + display config (served from the feed cache)."""
+    body, etag = await ticker_feed.get()
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={CACHE_MAX_AGE_SECONDS}"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
 
 
 # ═══ ADMIN ENDPOINTS ═══
@@ -262,6 +74,7 @@ async def update_ticker_config(body: dict):
         {"$set": {"value": updated}},
         upsert=True
     )
+    ticker_feed.set_config(updated)
     return {"status": "ok", "config": updated}
 
 
@@ -292,6 +105,7 @@ async def add_sponsor(body: dict):
         {"$set": {"value.sponsors": sponsors}},
         upsert=True
     )
+    ticker_feed.set_config({**config, "sponsors": sponsors})
     return {"status": "ok", "sponsor": sponsor}
 
 
@@ -316,6 +130,7 @@ async def update_sponsor(sponsor_id: str, body: dict):
         {"config_key": "ticker_config"},
         {"$set": {"value.sponsors": sponsors}}
     )
+    ticker_feed.set_config({**config, "sponsors": sponsors})
     return {"status": "ok"}
 
 
@@ -330,6 +145,7 @@ async def delete_sponsor(sponsor_id: str):
         {"config_key": "ticker_config"},
         {"$set": {"value.sponsors": sponsors}}
     )
+    ticker_feed.set_config({**config, "sponsors": sponsors})
     return {"status": "ok"}
 
 
@@ -443,6 +259,7 @@ async def update_layout_icons(layout_id: str, body: dict):
         {"$set": {"config_key": "layout_icons", "value": current, "updated_at": datetime.now(timezone.utc).isoformat()}},
         upsert=True
     )
+    await public_bootstrap.invalidate()
     return {"status": "ok", "layout_id": layout_id, "icons": icons}
 
 
@@ -492,4 +309,5 @@ async def update_icon_statuses(body: dict):
         {"$set": {"config_key": "icon_statuses", "value": statuses, "updated_at": datetime.now(timezone.utc).isoformat()}},
         upsert=True
     )
+    await public_bootstrap.invalidate()
     return {"status": "ok", "statuses": statuses}
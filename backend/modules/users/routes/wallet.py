@@ -2,7 +2,7 @@
 Wallet API Routes - ChipiWallet y transactions
 """
 from fastapi import APIRouter, HTTPException, Depends, Query
-from typing import Optional
+from typing import Literal, Optional
 from datetime import datetime, timezone
 from pydantic import BaseModel
 import asyncio
@@ -10,7 +10,9 @@ import logging
 
 from core.auth import get_current_user, get_admin_user
 from core.database import db
+from core.exports import ExportSpec, export_response, export_jobs, in_batches
 from modules.users.services.wallet_service import wallet_service
+from modules.users.services import wallet_directory
 from modules.users.models.wallet_models import (
     Currency, PaymentMethod, PointsEarnType
 )
@@ -745,40 +747,21 @@ async def update_default_descriptions(data: dict, admin=Depends(get_admin_user))
 
 @router.get("/admin/all-users")
 async def get_all_users_with_wallets(
+    q: Optional[str] = Query(None, description="Prefix of the name or email"),
+    sort: str = Query("name", description="name, balance or activity"),
+    limit: int = Query(wallet_directory.DEFAULT_LIMIT, ge=1, le=wallet_directory.MAX_LIMIT),
+    cursor: Optional[str] = None,
+    include_archived: bool = True,
     admin=Depends(get_admin_user)
 ):
-    """Get all non-admin users with their wallet info (admin)"""
-    # Fetch non-admin users
-    users_cursor = db.auth_users.find(
-        {"is_admin": {"$ne": True}},
-        {"_id": 0, "user_id": 1, "email": 1, "name": 1}
-    )
-    users = await users_cursor.to_list(length=500)
-    
-    # Fetch all wallets
-    wallets_cursor = db.chipi_wallets.find({}, {"_id": 0})
-    wallets = await wallets_cursor.to_list(length=500)
-    wallet_map = {w["user_id"]: w for w in wallets}
-    
-    # Merge
-    result = []
-    for u in users:
-        if not u.get("email"):
-            continue
-        w = wallet_map.get(u["user_id"])
-        result.append({
-            "user_id": u["user_id"],
-            "email": u.get("email", ""),
-            "name": u.get("name", ""),
-            "wallet": {
-                "balance_usd": w.get("balance_usd", 0) if w else 0,
-                "total_deposited": w.get("total_deposited", 0) if w else 0,
-                "total_spent": w.get("total_spent", 0) if w else 0,
-                "is_locked": w.get("is_locked", False) if w else False,
-            } if w else None
-        })
-    
-    return {"users": result}
+    """Get one page of non-admin users with their wallet info (admin).
+    The first page (no cursor) also returns total, total_balance and users_with_balance."""
+    try:
+        return await wallet_directory.list_users_with_wallets(
+            q=q, sort=sort, limit=limit, cursor=cursor, include_archived=include_archived
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 
@@ -955,26 +938,53 @@ async def delete_bank_info(context: str, admin=Depends(get_admin_user)):
 # ============== ADMIN TRANSACTIONS ==============
 
 
-@router.get("/admin/transactions")
-async def get_all_transactions(
-    limit: int = 50,
-    offset: int = 0,
+TRANSACTION_COLUMNS = [
+    ("transaction_id", "Transaction ID"),
+    ("created_at", "Date"),
+    ("user_name", "User"),
+    ("user_email", "Email"),
+    ("transaction_type", "Type"),
+    ("status", "Status"),
+    ("currency", "Currency"),
+    ("amount", "Amount"),
+    ("balance_before", "Balance Before"),
+    ("balance_after", "Balance After"),
+    ("payment_method", "Payment Method"),
+    ("reference_id", "Reference"),
+    ("description", "Description"),
+]
+
+
+def _transactions_query(
     user_id: Optional[str] = None,
-    admin=Depends(get_admin_user)
-):
-    """Get all wallet transactions (admin)"""
+    transaction_type: Optional[str] = None,
+    currency: Optional[str] = None,
+    status: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+) -> dict:
+    """Admin transaction filters. Dates are ISO strings compared against created_at;
+    a date-only date_to includes that whole day."""
     query = {}
     if user_id:
         query["user_id"] = user_id
-
-    cursor = db.chipi_transactions.find(
-        query, {"_id": 0}
-    ).sort("created_at", -1).skip(offset).limit(limit)
-    transactions = await cursor.to_list(length=limit)
-
-    total = await db.chipi_transactions.count_documents(query)
-
-    # Enrich with user info
+    if transaction_type:
+        query["transaction_type"] = transaction_type
+    if currency:
+        query["currency"] = currency
+    if status:
+        query["status"] = status
+    if date_from or date_to:
+        query["created_at"] = {}
+        if date_from:
+            query["created_at"]["$gte"] = date_from
+        if date_to:
+            query["created_at"]["$lte"] = date_to if "T" in date_to else f"{date_to}T23:59:59.999999Z"
+    return query
+
+
+async def _attach_users(transactions: list):
+    """Enrich transactions with user name/email in one lookup."""
     user_ids = list(set(t.get("user_id") for t in transactions if t.get("user_id")))
     if user_ids:
         users_cursor = db.auth_users.find(
@@ -989,4 +999,68 @@ async def get_all_transactions(
                 t["user_name"] = u.get("name", "")
                 t["user_email"] = u.get("email", "")
 
+
+def transactions_export(
+    user_id: Optional[str] = None,
+    transaction_type: Optional[str] = None,
+    currency: Optional[str] = None,
+    status: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+) -> ExportSpec:
+    query = _transactions_query(user_id, transaction_type, currency, status, date_from, date_to)
+
+    async def rows():
+        cursor = db.chipi_transactions.find(query, {"_id": 0, "metadata": 0}).sort("created_at", -1)
+        async for batch in in_batches(cursor):
+            await _attach_users(batch)
+            for t in batch:
+                yield t
+
+    return ExportSpec(name="wallet_transactions", columns=TRANSACTION_COLUMNS, source=rows)
+
+
+export_jobs.register("wallet_transactions", transactions_export, "Wallet transactions with user info")
+
+
+@router.get("/admin/transactions")
+async def get_all_transactions(
+    limit: int = 50,
+    offset: int = 0,
+    user_id: Optional[str] = None,
+    transaction_type: Optional[str] = None,
+    currency: Optional[str] = None,
+    status: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    admin=Depends(get_admin_user)
+):
+    """Get all wallet transactions (admin)"""
+    query = _transactions_query(user_id, transaction_type, currency, status, date_from, date_to)
+
+    cursor = db.chipi_transactions.find(
+        query, {"_id": 0}
+    ).sort("created_at", -1).skip(offset).limit(limit)
+    transactions = await cursor.to_list(length=limit)
+
+    total = await db.chipi_transactions.count_documents(query)
+
+    await _attach_users(transactions)
+
     return {"transactions": transactions, "total": total}
+
+
+@router.get("/admin/transactions/export")
+async def export_transactions(
+    fmt: Literal["csv", "xlsx"] = Query("csv", alias="format"),
+    user_id: Optional[str] = None,
+    transaction_type: Optional[str] = None,
+    currency: Optional[str] = None,
+    status: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    admin=Depends(get_admin_user)
+):
+    """Download filtered wallet transactions as CSV or XLSX (streamed, no row limit)."""
+    return export_response(transactions_export(
+        user_id, transaction_type, currency, status, date_from, date_to), fmt)
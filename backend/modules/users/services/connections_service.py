@@ -582,6 +582,8 @@ class ConexionesService:
         }
         
         await db.auth_users.insert_one(acudido)
+        from modules.auth.services.user_name_index import user_name_index
+        await user_name_index.refresh_users([new_user_id])
         
         # Create connection con acudiente
         await self.crear_conexion(
@@ -0,0 +1,238 @@
+"""
+Admin wallet directory: non-admin users joined with their ChipiWallet.
+
+Pages use keyset pagination (an opaque cursor holding the last row's sort
+key), so every page is an index range scan plus one wallet lookup per row:
+  - name:     auth_users by (name, user_id), wallets joined after the limit.
+  - balance:  chipi_wallets by (balance_usd desc, user_id), users joined;
+  - activity: chipi_wallets by (updated_at desc, user_id), users joined.
+    Users without a wallet (balance 0, no activity) follow, by name.
+  - search:   prefix match on email and name (anchored regexes use the
+    indexes); the matches are few, so they are joined and sorted in one go.
+
+The first page also carries the totals for the current search, computed
+with a $facet over the same filter. Archived users are listed unless
+include_archived=False.
+"""
+import base64
+import json
+import re
+from typing import Dict, List, Optional
+
+from core.database import db
+
+SORTS = ("name", "balance", "activity")
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+# Listed users: not admins, and with an email
+USER_FILTER = {"is_admin": {"$ne": True}, "email": {"$nin": [None, ""]}}
+USER_FIELDS = {"_id": 0, "user_id": 1, "email": 1, "name": 1, "archived": 1}
+WALLET_FIELDS = {key: 1 for key in ("balance_usd", "total_deposited", "total_spent", "is_locked", "updated_at")}
+
+# Sorts driven by a wallet field (descending)
+_WALLET_SORT = {"balance": "balance_usd", "activity": "updated_at"}
+
+
+def encode_cursor(data: dict) -> str:
+    return base64.urlsafe_b64encode(json.dumps(data, separators=(",", ":")).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> dict:
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(data, dict) or "id" not in data:
+        raise ValueError("Invalid cursor")
+    return data
+
+
+def search_filter(q: Optional[str]) -> dict:
+    """Prefix match on email (stored lowercase) and name.
+
+    Names are matched as typed, lowercase, capitalized and title-cased;
+    case-sensitive anchored regexes keep each branch an index range.
+    """
+    q = (q or "").strip()
+    if not q:
+        return {}
+    variants = {q, q.lower(), q.capitalize(), q.title()}
+    return {"$or": [{"email": {"$regex": "^" + re.escape(q.lower())}}]
+            + [{"name": {"$regex": "^" + re.escape(v)}} for v in sorted(variants)]}
+
+
+def _listed(include_archived: bool = True) -> dict:
+    return dict(USER_FILTER) if include_archived else {**USER_FILTER, "archived": {"$ne": True}}
+
+
+def _user_match(q: Optional[str], include_archived: bool = True) -> dict:
+    search = search_filter(q)
+    listed = _listed(include_archived)
+    return {"$and": [listed, search]} if search else listed
+
+
+def _after_name(cursor: dict) -> dict:
+    """Rows after (name, user_id) in ascending order; missing names sort first."""
+    name, user_id = cursor.get("v"), cursor["id"]
+    if name is None:
+        return {"$or": [{"name": None, "user_id": {"$gt": user_id}}, {"name": {"$type": "string"}}]}
+    return {"$or": [{"name": {"$gt": name}}, {"name": name, "user_id": {"$gt": user_id}}]}
+
+
+def _after_desc(field: str, value, user_id: str) -> dict:
+    """Rows after (value desc, user_id asc)."""
+    if value is None:
+        return {field: None, "user_id": {"$gt": user_id}}
+    return {"$or": [
+        {field: {"$lt": value}},
+        {field: None},
+        {field: value, "user_id": {"$gt": user_id}},
+    ]}
+
+
+def _row(user: dict, wallet: Optional[dict]) -> dict:
+    return {
+        "user_id": user["user_id"],
+        "email": user.get("email", ""),
+        "name": user.get("name", ""),
+        "archived": bool(user.get("archived")),
+        "wallet": {
+            "balance_usd": wallet.get("balance_usd", 0),
+            "total_deposited": wallet.get("total_deposited", 0),
+            "total_spent": wallet.get("total_spent", 0),
+            "is_locked": wallet.get("is_locked", False),
+            "last_activity": wallet.get("updated_at"),
+        } if wallet else None,
+    }
+
+
+_JOIN_WALLET = [
+    {"$lookup": {"from": "chipi_wallets", "localField": "user_id", "foreignField": "user_id", "as": "wallet"}},
+    {"$addFields": {"wallet": {"$arrayElemAt": ["$wallet", 0]}}},
+]
+
+
+async def _page_by_name(match: dict, cursor: Optional[dict], limit: int, without_wallet: bool = False) -> List[dict]:
+    if cursor:
+        match = {"$and": [match, _after_name(cursor)]}
+    pipeline = [{"$match": match}, {"$sort": {"name": 1, "user_id": 1}}]
+    if without_wallet:
+        # Tail of the wallet-driven sorts: the wallet has to be looked up before the limit
+        pipeline += _JOIN_WALLET + [{"$match": {"wallet": None}}, {"$limit": limit}]
+    else:
+        pipeline += [{"$limit": limit}] + _JOIN_WALLET
+    pipeline.append({"$project": {**USER_FIELDS, "wallet": WALLET_FIELDS}})
+    docs = await db.auth_users.aggregate(pipeline).to_list(limit)
+    return [{**_row(d, d.get("wallet")), "_key": d.get("name")} for d in docs]
+
+
+async def _page_by_wallet(field: str, cursor: Optional[dict], limit: int, listed: dict) -> List[dict]:
+    match: dict = {}
+    if cursor:
+        match = _after_desc(field, cursor.get("v"), cursor["id"])
+    docs = await db.chipi_wallets.aggregate([
+        {"$match": match},
+        {"$sort": {field: -1, "user_id": 1}},
+        {"$lookup": {
+            "from": "auth_users",
+            "let": {"uid": "$user_id"},
+            "pipeline": [
+                {"$match": {"$expr": {"$eq": ["$user_id", "$$uid"]}}},
+                {"$match": listed},
+                {"$project": USER_FIELDS},
+            ],
+            "as": "user",
+        }},
+        {"$unwind": "$user"},
+        {"$limit": limit},
+        {"$project": {"_id": 0, **WALLET_FIELDS, "user": 1}},
+    ]).to_list(limit)
+    return [{**_row(d["user"], d), "_key": d.get(field)} for d in docs]
+
+
+async def _page_search(q: str, sort: str, cursor: Optional[dict], limit: int, include_archived: bool) -> List[dict]:
+    """Search results are a prefix range: join them all, sort, then cut the page."""
+    match = _user_match(q, include_archived)
+    if sort == "name":
+        return await _page_by_name(match, cursor, limit)
+    field = _WALLET_SORT[sort]
+    pipeline = [{"$match": match}] + _JOIN_WALLET + [
+        {"$addFields": {"_key": f"$wallet.{field}"}},
+        {"$sort": {"_key": -1, "user_id": 1}},
+    ]
+    if cursor:
+        pipeline.append({"$match": _after_desc("_key", cursor.get("v"), cursor["id"])})
+    pipeline += [{"$limit": limit}, {"$project": {**USER_FIELDS, "wallet": WALLET_FIELDS, "_key": 1}}]
+    docs = await db.auth_users.aggregate(pipeline).to_list(limit)
+    return [{**_row(d, d.get("wallet")), "_key": d.get("_key")} for d in docs]
+
+
+async def get_totals(q: Optional[str] = None, include_archived: bool = True) -> Dict:
+    """Listed users, and how many of them hold a balance (and how much)."""
+    result = await db.auth_users.aggregate([
+        {"$match": _user_match(q, include_archived)},
+        {"$facet": {
+            "total": [{"$count": "n"}],
+            "balances": [
+                {"$lookup": {"from": "chipi_wallets", "localField": "user_id", "foreignField": "user_id",
+                             "as": "wallet"}},
+                {"$unwind": "$wallet"},
+                {"$match": {"wallet.balance_usd": {"$gt": 0}}},
+                {"$group": {"_id": None, "users": {"$sum": 1}, "balance": {"$sum": "$wallet.balance_usd"}}},
+            ],
+        }},
+    ]).to_list(1)
+    facet = result[0] if result else {}
+    balances = (facet.get("balances") or [{}])[0]
+    return {
+        "total": (facet.get("total") or [{}])[0].get("n", 0),
+        "total_balance": round(balances.get("balance", 0), 2),
+        "users_with_balance": balances.get("users", 0),
+    }
+
+
+async def list_users_with_wallets(
+    q: Optional[str] = None,
+    sort: str = "name",
+    limit: int = DEFAULT_LIMIT,
+    cursor: Optional[str] = None,
+    include_archived: bool = True,
+) -> Dict:
+    """One page of the directory and the cursor for the next one."""
+    if sort not in SORTS:
+        raise ValueError(f"Invalid sort: {sort}")
+    limit = max(1, min(limit, MAX_LIMIT))
+    after = decode_cursor(cursor) if cursor else None
+    q = (q or "").strip()
+    listed = _listed(include_archived)
+
+    if q:
+        rows = await _page_search(q, sort, after, limit, include_archived)
+        phase = "search"
+    elif sort == "name":
+        rows = await _page_by_name(listed, after, limit)
+        phase = "name"
+    else:
+        # Wallets in sort order, then the users who have none
+        rows, phase = [], "wallets"
+        if not after or after.get("phase") == "wallets":
+            rows = await _page_by_wallet(_WALLET_SORT[sort], after, limit, listed)
+        if len(rows) < limit:
+            tail_after = after if after and after.get("phase") == "no_wallet" else None
+            tail = await _page_by_name(listed, tail_after, limit - len(rows), without_wallet=True)
+            if tail:
+                rows += tail
+                phase = "no_wallet"
+
+    next_cursor = None
+    if len(rows) == limit:
+        last = rows[-1]
+        next_cursor = encode_cursor({"phase": phase, "id": last["user_id"], "v": last["_key"]})
+    for row in rows:
+        row.pop("_key", None)
+
+    page = {"users": rows, "next_cursor": next_cursor, "sort": sort}
+    if not cursor:
+        page.update(await get_totals(q, include_archived))
+    return page
@@ -1,10 +1,17 @@
 """
-Gmail Background Polling Service
-Automatically scans Gmail inbox at configured intervals for bank transfer alerts.
+Gmail Background Ingestion Service
+Watches the Gmail inbox for bank transfer alerts with IMAP IDLE (see
+imap_ingestion.py) and feeds new emails to process_email as they arrive.
+
+Only one API worker process holds the IMAP session: ownership is a lease on the
+settings document, renewed by the supervisor loop. The Integration Hub's
+interval scan stands down while the lease is live.
 """
 import asyncio
 import logging
-from datetime import datetime, timezone
+import os
+import socket
+from datetime import datetime, timezone, timedelta
 
 from core.database import db
 
@@ -13,18 +20,29 @@ logger = logging.getLogger(__name__)
 SETTINGS_COL = "wallet_topup_settings"
 PENDING_COL = "wallet_pending_topups"
 
+LEASE_TTL = timedelta(seconds=90)
+SUPERVISE_INTERVAL = 30
+ERROR_BACKOFF = 30  # must stay below LEASE_TTL, or another worker takes the lease mid back-off
+
 
 class GmailPoller:
     def __init__(self):
         self._task = None
+        self._consumer = None
         self._running = False
+        self._engine = None
+        self._owner = f"{socket.gethostname()}:{os.getpid()}"
 
     @property
     def is_running(self):
         return self._running and self._task and not self._task.done()
 
+    @property
+    def is_ingesting(self):
+        return bool(self._engine and self._engine.is_running)
+
     async def start(self):
-        """Start the background polling loop if configured."""
+        """Start the ingestion supervisor if configured."""
         if self.is_running:
             logger.info("[GmailPoller] Already running")
             return
@@ -39,11 +57,11 @@ class GmailPoller:
             return
 
         self._running = True
-        self._task = asyncio.create_task(self._poll_loop())
-        logger.info("[GmailPoller] Background polling started")
+        self._task = asyncio.create_task(self._supervise())
+        logger.info("[GmailPoller] Background ingestion started")
 
     async def stop(self):
-        """Stop the background polling loop."""
+        """Stop ingestion and release the IMAP lease."""
         self._running = False
         if self._task and not self._task.done():
             self._task.cancel()
@@ -52,78 +70,126 @@ class GmailPoller:
             except asyncio.CancelledError:
                 pass
         self._task = None
-        logger.info("[GmailPoller] Background polling stopped")
+        await self._stop_engine()
+        logger.info("[GmailPoller] Background ingestion stopped")
 
-    async def _poll_loop(self):
-        """Main polling loop - scans Gmail at configured intervals."""
+    async def _supervise(self):
+        """Keep the engine running while this process holds the lease and realtime mode is on."""
         while self._running:
             try:
                 settings = await db[SETTINGS_COL].find_one({"id": "default"}, {"_id": 0})
-                if not settings:
-                    await asyncio.sleep(60)
-                    continue
-
-                # Check if still configured for realtime
-                if settings.get("polling_mode") != "realtime" or not settings.get("gmail_connected"):
-                    logger.info("[GmailPoller] Settings changed, stopping poll loop")
+                if not settings or settings.get("polling_mode") != "realtime" or not settings.get("gmail_connected"):
+                    logger.info("[GmailPoller] Settings changed, stopping ingestion")
                     self._running = False
                     break
 
-                interval_minutes = settings.get("polling_interval_minutes", 1)
-
-                # Run the scan
-                await self._scan_once()
+                if await self._acquire_lease():
+                    if not self.is_ingesting:
+                        await self._start_engine(settings.get("imap_cursor"))
+                elif self.is_ingesting:
+                    logger.info("[GmailPoller] IMAP lease lost to another worker")
+                    await self._stop_engine(release=False)
 
-                # Wait for the configured interval
-                await asyncio.sleep(max(interval_minutes * 60, 60))
+                await asyncio.sleep(SUPERVISE_INTERVAL)
 
             except asyncio.CancelledError:
                 break
             except Exception as e:
-                logger.error(f"[GmailPoller] Error in poll loop: {e}")
-                await asyncio.sleep(120)  # Wait 2 min on error
-
-    async def _scan_once(self):
-        """Perform a single Gmail scan cycle."""
-        try:
-            from .gmail_service import gmail_service, process_email
-
-            if not gmail_service.is_configured:
-                return
-
-            emails = await asyncio.to_thread(gmail_service.fetch_recent_emails, 20)
-            created = 0
-            skipped = 0
-
-            for em in emails:
-                try:
-                    result = await process_email(em)
-                    if result.get("created"):
-                        created += 1
-                        # Sync to Monday.com
-                        from .monday_sync import payment_alerts_monday
-                        topup = result["topup"]
-                        dedup = result.get("dedup")
-                        try:
-                            await payment_alerts_monday.create_topup_item(topup, dedup)
-                        except Exception as sync_err:
-                            logger.warning(f"[GmailPoller] Monday sync failed: {sync_err}")
-                    else:
-                        skipped += 1
-                except Exception as e:
-                    logger.warning(f"[GmailPoller] Error processing email: {e}")
-
-            if created > 0:
-                logger.info(f"[GmailPoller] Scan complete: {created} new pending, {skipped} skipped")
-
-            # Update last scan timestamp
+                logger.error(f"[GmailPoller] Error in supervisor loop: {e}")
+                await asyncio.sleep(ERROR_BACKOFF)
+        await self._stop_engine()
+
+    async def _acquire_lease(self) -> bool:
+        now = datetime.now(timezone.utc)
+        result = await db[SETTINGS_COL].update_one(
+            {"id": "default", "$or": [
+                {"imap_lease_owner": self._owner},
+                {"imap_lease_expires": {"$lt": now.isoformat()}},
+                {"imap_lease_expires": {"$exists": False}},
+            ]},
+            {"$set": {"imap_lease_owner": self._owner, "imap_lease_expires": (now + LEASE_TTL).isoformat()}},
+        )
+        return result.matched_count == 1
+
+    async def _start_engine(self, cursor):
+        from .gmail_service import gmail_service
+        from .imap_ingestion import ImapIngestionEngine
+
+        if not gmail_service.is_configured:
+            return
+        self._engine = ImapIngestionEngine(gmail_service)
+        queue = self._engine.start(cursor)
+        self._consumer = asyncio.create_task(self._consume(queue))
+
+    async def _stop_engine(self, release: bool = True):
+        if self._engine:
+            self._engine.stop()
+        if self._consumer and not self._consumer.done():
+            self._consumer.cancel()
+            try:
+                await self._consumer
+            except asyncio.CancelledError:
+                pass
+        self._consumer = None
+        if release:
             await db[SETTINGS_COL].update_one(
-                {"id": "default"},
-                {"$set": {"last_auto_scan": datetime.now(timezone.utc).isoformat(), "last_scan_created": created}}
+                {"id": "default", "imap_lease_owner": self._owner},
+                {"$unset": {"imap_lease_owner": "", "imap_lease_expires": ""}},
             )
 
-        except Exception as e:
-            logger.error(f"[GmailPoller] Scan error: {e}")
+    async def _consume(self, queue: asyncio.Queue):
+        """Drain batches from the IMAP thread; persist the cursor after each batch."""
+        while True:
+            batch = await queue.get()
+            try:
+                created = await self.ingest(batch["emails"])
+                await db[SETTINGS_COL].update_one(
+                    {"id": "default"},
+                    {"$set": {
+                        "imap_cursor": {"uidvalidity": batch["uidvalidity"], "last_uid": batch["last_uid"]},
+                        "last_auto_scan": datetime.now(timezone.utc).isoformat(),
+                        "last_scan_created": created,
+                    }}
+                )
+            except Exception as e:
+                logger.error(f"[GmailPoller] Batch ingest error: {e}")
+            finally:
+                queue.task_done()
+
+    async def ingest(self, emails: list) -> int:
+        """Run emails through process_email and sync new pending top-ups to Monday.com."""
+        from .gmail_service import process_email
+
+        created = 0
+        skipped = 0
+        for em in emails:
+            try:
+                result = await process_email(em)
+                if result.get("created"):
+                    created += 1
+                    # Sync to Monday.com
+                    from .monday_sync import payment_alerts_monday
+                    topup = result["topup"]
+                    dedup = result.get("dedup")
+                    try:
+                        await payment_alerts_monday.create_topup_item(topup, dedup)
+                    except Exception as sync_err:
+                        logger.warning(f"[GmailPoller] Monday sync failed: {sync_err}")
+                else:
+                    skipped += 1
+            except Exception as e:
+                logger.warning(f"[GmailPoller] Error processing email: {e}")
+
+        if created > 0:
+            logger.info(f"[GmailPoller] Ingested batch: {created} new pending, {skipped} skipped")
+        return created
+
+    def get_status(self) -> dict:
+        return {
+            "running": bool(self.is_running),
+            "owner": self._owner,
+            "engine": self._engine.get_status() if self._engine else None,
+        }
 
 
 gmail_poller = GmailPoller()
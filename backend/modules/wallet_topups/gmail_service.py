@@ -22,6 +22,42 @@ RULES_COL = "wallet_topup_rules"
 SETTINGS_COL = "wallet_topup_settings"
 PROCESSED_COL = "wallet_processed_emails"
 
+IMAP_TIMEOUT = 30  # seconds; bounds every socket read/connect
+
+# Only the envelope headers and a capped slice of the body are fetched; PEEK
+# leaves the \Seen flag untouched. The MIME headers are needed to re-parse
+# multipart bodies.
+FETCH_ITEMS = (
+    "(UID BODY.PEEK[HEADER.FIELDS (FROM SUBJECT DATE MESSAGE-ID MIME-VERSION "
+    "CONTENT-TYPE CONTENT-TRANSFER-ENCODING)] BODY.PEEK[TEXT]<0.65536>)"
+)
+
+_FETCH_START_RE = re.compile(rb"^\d+ \(")
+_FETCH_UID_RE = re.compile(rb"UID (\d+)")
+
+
+def parse_fetch_response(data: list) -> dict:
+    """Group an imaplib FETCH response by UID -> {"header": bytes, "text": bytes}."""
+    messages = []
+    current = None
+    for part in data:
+        if isinstance(part, tuple):
+            meta, payload = part
+            if _FETCH_START_RE.match(meta) or current is None:
+                current = {"uid": None, "header": b"", "text": b""}
+                messages.append(current)
+            meta_upper = meta.upper()
+            if b"HEADER" in meta_upper:
+                current["header"] = payload or b""
+            elif b"TEXT" in meta_upper:
+                current["text"] = payload or b""
+        else:
+            meta = part or b""
+        uid_match = _FETCH_UID_RE.search(meta)
+        if uid_match and current is not None and current["uid"] is None:
+            current["uid"] = int(uid_match.group(1))
+    return {m["uid"]: m for m in messages if m["uid"] is not None}
+
 
 class GmailService:
     """IMAP-based Gmail reader for bank alert emails."""
@@ -38,7 +74,7 @@ class GmailService:
 
     def _connect(self):
         """Create IMAP connection."""
-        mail = imaplib.IMAP4_SSL(self.imap_server, self.imap_port)
+        mail = imaplib.IMAP4_SSL(self.imap_server, self.imap_port, timeout=IMAP_TIMEOUT)
         mail.login(self.email_addr, self.app_password)
         return mail
 
@@ -48,64 +84,61 @@ class GmailService:
             return {"connected": False, "error": "Gmail credentials not configured"}
         try:
             mail = self._connect()
-            mail.select("INBOX")
-            status, messages = mail.search(None, "ALL")
-            total = len(messages[0].split()) if status == "OK" and messages[0] else 0
+            status, data = mail.select("INBOX", readonly=True)
+            total = int(data[0]) if status == "OK" and data and data[0] else 0
             mail.logout()
             return {"connected": True, "email": self.email_addr, "total_emails": total}
         except Exception as e:
             return {"connected": False, "error": str(e)}
 
     def fetch_recent_emails(self, limit: int = 20, since_date: str = None) -> list:
-        """Fetch recent emails from inbox."""
+        """Fetch recent emails from inbox (newest first) in one batched FETCH."""
         if not self.is_configured:
             return []
         try:
             mail = self._connect()
-            mail.select("INBOX")
+            mail.select("INBOX", readonly=True)
 
             if since_date:
-                status, messages = mail.search(None, f'(SINCE "{since_date}")')
+                status, messages = mail.uid("SEARCH", None, f'(SINCE "{since_date}")')
             else:
-                status, messages = mail.search(None, "ALL")
+                status, messages = mail.uid("SEARCH", None, "ALL")
 
             if status != "OK" or not messages[0]:
                 mail.logout()
                 return []
 
-            email_ids = messages[0].split()
-            recent_ids = email_ids[-limit:]  # Last N emails
+            recent_uids = messages[0].split()[-limit:]  # Last N emails
+            status, data = mail.uid("FETCH", b",".join(recent_uids).decode(), FETCH_ITEMS)
+            mail.logout()
+            if status != "OK":
+                return []
 
+            parts = parse_fetch_response(data)
             emails = []
-            for eid in reversed(recent_ids):
-                status, msg_data = mail.fetch(eid, "(RFC822)")
-                if status != "OK":
-                    continue
-                msg = email.message_from_bytes(msg_data[0][1])
-
-                subject = self._decode_header(msg["Subject"])
-                from_addr = self._decode_header(msg["From"])
-                date_str = msg["Date"]
-                message_id = msg["Message-ID"] or str(eid)
-
-                body = self._extract_body(msg)
-
-                emails.append({
-                    "id": message_id,
-                    "imap_id": eid.decode(),
-                    "from": from_addr,
-                    "subject": subject,
-                    "date": date_str,
-                    "body": body[:3000],
-                    "body_preview": body[:500],
-                })
-
-            mail.logout()
+            for uid in reversed(recent_uids):
+                msg_parts = parts.get(int(uid))
+                if msg_parts:
+                    emails.append(self.email_from_parts(int(uid), msg_parts["header"], msg_parts["text"]))
             return emails
         except Exception as e:
             logger.error(f"Gmail fetch error: {e}")
             return []
 
+    def email_from_parts(self, uid: int, header: bytes, text: bytes) -> dict:
+        """Build the email dict consumed by process_email from fetched header/body parts."""
+        msg = email.message_from_bytes(header + text)
+        body = self._extract_body(msg)
+        return {
+            "id": msg["Message-ID"] or str(uid),
+            "imap_id": str(uid),
+            "from": self._decode_header(msg["From"]),
+            "subject": self._decode_header(msg["Subject"]),
+            "date": msg["Date"],
+            "body": body[:3000],
+            "body_preview": body[:500],
+        }
+
     def _decode_header(self, header) -> str:
         if not header:
             return ""
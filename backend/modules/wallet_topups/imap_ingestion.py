@@ -0,0 +1,243 @@
+"""
+IMAP Ingestion Engine - Push-style Gmail reader for bank alert emails.
+
+The IMAP session runs in a dedicated daemon thread, so imaplib never blocks the
+event loop. New mail is detected with IMAP IDLE (NOOP polling when the server
+lacks IDLE). Each wake-up fetches only UIDs above the last seen one, in batched
+UID FETCH commands that pull the envelope headers and a capped body slice.
+
+Emails are handed to the event loop through a bounded asyncio.Queue. Each
+batch carries its cursor (UIDVALIDITY + last UID), and the consumer persists
+the cursor once the batch is processed. A restart therefore resumes where
+processing stopped; process_email dedupes anything seen twice.
+"""
+import asyncio
+import concurrent.futures
+import imaplib
+import logging
+import select
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from .gmail_service import FETCH_ITEMS, parse_fetch_response
+
+logger = logging.getLogger(__name__)
+
+QUEUE_SIZE = 8            # batches buffered before the IMAP thread waits
+FETCH_BATCH_SIZE = 25     # UIDs per FETCH command
+INITIAL_BACKFILL = 20     # messages picked up when there is no valid cursor
+IDLE_TIMEOUT = 9 * 60     # re-issue IDLE before Gmail drops idle sessions
+NOOP_INTERVAL = 60        # fallback poll when the server has no IDLE
+MAX_BACKOFF = 300
+
+
+class _SocketLines:
+    """CRLF-terminated lines read directly from a socket, with its own small buffer"""
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.buffer = b""
+
+    def has_line(self) -> bool:
+        return b"\n" in self.buffer
+
+    def readline(self) -> bytes:
+        """Next line (blocking); b"" once the connection is closed"""
+        while b"\n" not in self.buffer:
+            chunk = self.sock.recv(4096)
+            if not chunk:
+                return b""
+            self.buffer += chunk
+        line, _, self.buffer = self.buffer.partition(b"\n")
+        return line + b"\n"
+
+
+class ImapIngestionEngine:
+    """Owns one IMAP session in a worker thread and feeds parsed emails to a queue."""
+
+    def __init__(self, gmail_service):
+        self.gmail = gmail_service
+        self.queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._uidvalidity: Optional[int] = None
+        self._last_uid = 0
+        self.stats = {
+            "connected": False,
+            "idle_supported": None,
+            "last_event_at": None,
+            "last_error": None,
+            "fetched": 0,
+        }
+
+    @property
+    def is_running(self) -> bool:
+        return bool(self._thread and self._thread.is_alive())
+
+    def start(self, cursor: Optional[Dict] = None) -> asyncio.Queue:
+        """Start the IMAP thread from the event loop; returns the batch queue."""
+        if self.is_running:
+            return self.queue
+        cursor = cursor or {}
+        self._uidvalidity = cursor.get("uidvalidity")
+        self._last_uid = int(cursor.get("last_uid") or 0)
+        self._loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="gmail-imap", daemon=True)
+        self._thread.start()
+        return self.queue
+
+    def stop(self):
+        """Signal the IMAP thread to leave IDLE and log out (within about a second)."""
+        self._stop.set()
+
+    # ---------- Worker thread ----------
+
+    def _run(self):
+        backoff = 5
+        while not self._stop.is_set():
+            try:
+                self._session()
+                backoff = 5
+            except Exception as e:
+                self.stats["connected"] = False
+                self.stats["last_error"] = str(e)
+                logger.warning(f"[ImapIngestion] Session error, reconnecting in {backoff}s: {e}")
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, MAX_BACKOFF)
+        self.stats["connected"] = False
+
+    def _session(self):
+        mail = self.gmail._connect()
+        try:
+            status, _ = mail.select("INBOX", readonly=True)
+            if status != "OK":
+                raise imaplib.IMAP4.error("Cannot select INBOX")
+            uidvalidity = self._response_int(mail, "UIDVALIDITY")
+            uidnext = self._response_int(mail, "UIDNEXT")
+            if uidnext is None:
+                status, data = mail.status("INBOX", "(UIDNEXT)")
+                uidnext = int(data[0].split(b"UIDNEXT")[1].strip(b" )")) if status == "OK" else 1
+
+            if uidvalidity != self._uidvalidity:
+                # New mailbox or UIDs renumbered: old cursor is meaningless
+                if self._uidvalidity is not None:
+                    logger.info(f"[ImapIngestion] UIDVALIDITY changed ({self._uidvalidity} -> {uidvalidity}), resetting cursor")
+                self._uidvalidity = uidvalidity
+                self._last_uid = max(uidnext - 1 - INITIAL_BACKFILL, 0)
+
+            idle_supported = "IDLE" in mail.capabilities
+            self.stats.update(connected=True, idle_supported=idle_supported, last_error=None)
+            logger.info(f"[ImapIngestion] Connected (idle={idle_supported}, last_uid={self._last_uid})")
+
+            while not self._stop.is_set():
+                self._fetch_new(mail)
+                if idle_supported:
+                    self._idle(mail)
+                else:
+                    self._stop.wait(NOOP_INTERVAL)
+                    mail.noop()
+        finally:
+            try:
+                mail.logout()
+            except Exception:
+                pass
+
+    @staticmethod
+    def _response_int(mail, code: str) -> Optional[int]:
+        _, data = mail.response(code)
+        try:
+            return int(data[0]) if data and data[0] else None
+        except (TypeError, ValueError):
+            return None
+
+    def _fetch_new(self, mail):
+        status, data = mail.uid("SEARCH", None, f"UID {self._last_uid + 1}:*")
+        if status != "OK" or not data or not data[0]:
+            return
+        # "n:*" always matches the newest message, even when its UID is below n
+        uids = sorted(u for u in (int(x) for x in data[0].split()) if u > self._last_uid)
+        for i in range(0, len(uids), FETCH_BATCH_SIZE):
+            chunk = uids[i:i + FETCH_BATCH_SIZE]
+            status, data = mail.uid("FETCH", ",".join(str(u) for u in chunk), FETCH_ITEMS)
+            if status != "OK":
+                raise imaplib.IMAP4.error(f"FETCH failed for UIDs {chunk[0]}-{chunk[-1]}")
+            parts = parse_fetch_response(data)
+            emails = [
+                self.gmail.email_from_parts(uid, parts[uid]["header"], parts[uid]["text"])
+                for uid in chunk if uid in parts
+            ]
+            batch = {"emails": emails, "uidvalidity": self._uidvalidity, "last_uid": chunk[-1]}
+            if not self._hand_off(batch):
+                return
+            self._last_uid = chunk[-1]
+            self.stats["fetched"] += len(emails)
+            self.stats["last_event_at"] = datetime.now(timezone.utc).isoformat()
+
+    def _hand_off(self, batch: Dict) -> bool:
+        """Blocking put onto the bounded queue (back-pressure); False if stopped meanwhile."""
+        future = asyncio.run_coroutine_threadsafe(self.queue.put(batch), self._loop)
+        while True:
+            try:
+                future.result(timeout=1)
+                return True
+            except concurrent.futures.TimeoutError:
+                if self._stop.is_set():
+                    future.cancel()
+                    return False
+
+    def _idle(self, mail):
+        """
+        Block in IDLE until the server reports new mail, the timeout hits, or stop().
+        The IDLE exchange is read straight off the socket: imaplib's buffered
+        readline could pull an EXISTS line into its file buffer along with the
+        continuation, where select() would never see it.
+        """
+        tag = mail._new_tag()
+        mail.send(tag + b" IDLE\r\n")
+        lines = _SocketLines(mail.sock)
+        line = lines.readline()
+        if not line.startswith(b"+"):
+            raise imaplib.IMAP4.error(f"IDLE rejected: {line!r}")
+
+        deadline = time.monotonic() + IDLE_TIMEOUT
+        while not self._stop.is_set() and time.monotonic() < deadline:
+            if not lines.has_line() and not self._readable(mail, 1.0):
+                continue
+            line = lines.readline()
+            if not line:
+                raise imaplib.IMAP4.abort("Connection closed during IDLE")
+            if b"EXISTS" in line:
+                break
+
+        mail.send(b"DONE\r\n")
+        while True:
+            line = lines.readline()
+            if not line:
+                raise imaplib.IMAP4.abort("Connection closed leaving IDLE")
+            if line.startswith(tag):
+                if b"OK" not in line:
+                    raise imaplib.IMAP4.error(f"IDLE ended with {line!r}")
+                return
+
+    @staticmethod
+    def _readable(mail, timeout: float) -> bool:
+        sock = mail.sock
+        if getattr(sock, "pending", None) and sock.pending():
+            return True
+        readable, _, _ = select.select([sock], [], [], timeout)
+        return bool(readable)
+
+    def get_status(self) -> Dict:
+        return {
+            **self.stats,
+            "running": self.is_running,
+            "uidvalidity": self._uidvalidity,
+            "last_uid": self._last_uid,
+            "queued_batches": self.queue.qsize() if self.queue else 0,
+        }
+
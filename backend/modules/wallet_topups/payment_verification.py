@@ -11,7 +11,7 @@ Group: Payment Verification (group_mm1bcd7k)
 import logging
 import re
 import uuid
-from datetime import datetime, timezone
+from datetime import datetime, timezone, timedelta
 from typing import Dict, Optional, List
 
 from core.database import db
@@ -23,6 +23,13 @@ logger = logging.getLogger(__name__)
 WALLET_BOARD_ID = "18399650704"
 VERIFICATION_GROUP = "group_mm1bcd7k"
 
+# Payment-to-user matching: weights sum past 1 on purpose (capped), so a full
+# name match plus any amount signal is a confident match
+MATCH_WEIGHTS = {"name": 0.6, "topup_request": 0.3, "open_order": 0.2}
+MATCH_MIN_CONFIDENCE = 0.2
+OPEN_ORDER_STATUSES = ["awaiting_link", "submitted"]
+TOPUP_REQUEST_WINDOW_DAYS = 7
+
 # Column IDs
 COL = {
     "client_name": "text_mm1bhgry",
@@ -67,7 +74,8 @@ class PaymentVerificationService:
         sender_hint = email_data.get("sender_name", "")
 
         # Match user in ChiPi Link
-        user_match = await self._match_user(amount, sender_hint, reference)
+        candidates = await self.find_candidates(amount, sender_hint)
+        user_match = self._pick_match(candidates)
 
         client_name = "Unknown"
         client_email = ""
@@ -117,6 +125,8 @@ class PaymentVerificationService:
             "client_name": client_name,
             "client_email": client_email,
             "chipi_user_id": chipi_user_id,
+            "match_confidence": user_match["confidence"] if user_match else 0,
+            "match_candidates": candidates,
             "amount": amount,
             "bank_account": bank_account,
             "bank_reference": reference,
@@ -280,42 +290,92 @@ class PaymentVerificationService:
 
     # ═══ Private Helpers ═══
 
-    async def _match_user(self, amount: float, name_hint: str, reference: str) -> Optional[Dict]:
-        """Try to match payment to a ChiPi user."""
-        from core.constants import AuthCollections
-
-        # Try by name hint (fuzzy)
-        if name_hint and len(name_hint) > 2:
-            parts = name_hint.strip().split()
-            for part in parts:
-                if len(part) < 3:
-                    continue
-                user = await db[AuthCollections.USERS].find_one(
-                    {"$or": [
-                        {"name": {"$regex": part, "$options": "i"}},
-                        {"last_name": {"$regex": part, "$options": "i"}},
-                        {"email": {"$regex": part, "$options": "i"}},
-                    ]},
-                    {"_id": 0, "user_id": 1, "name": 1, "last_name": 1, "email": 1}
-                )
-                if user:
-                    return user
+    def _pick_match(self, candidates: List[Dict]) -> Optional[Dict]:
+        """Best-scoring candidate, or None when no candidate is clear."""
+        if not candidates or candidates[0]["confidence"] < MATCH_MIN_CONFIDENCE:
+            return None
+        if len(candidates) > 1 and candidates[1]["confidence"] >= candidates[0]["confidence"]:
+            return None  # Tie — leave it to the verification portal
+        return candidates[0]
 
-        # Try by matching pending order amount
+    async def find_candidates(self, amount: float, name_hint: str, limit: int = 5) -> List[Dict]:
+        """
+        Scored user candidates for a payment, in one indexed aggregation:
+        - name: share of the sender's folded name tokens found in the user's tokens
+        - top-up: the user recently requested a top-up of exactly this amount
+        - order: the user has an open textbook order of exactly this amount
+        """
+        from core.constants import AuthCollections
+        from modules.auth.services.user_name_index import user_name_index, name_tokens, TOKENS_COLLECTION
+
+        tokens = name_tokens(name_hint)
+        if not tokens and not (amount and amount > 0):
+            return []
+        await user_name_index.ensure_fresh()
+
+        pipeline = [
+            {"$match": {"tokens": {"$in": tokens}}},
+            {"$project": {
+                "_id": 0,
+                "user_id": 1,
+                "name_hits": {"$size": {"$setIntersection": ["$tokens", tokens]}},
+            }},
+        ]
         if amount and amount > 0:
-            order = await db.store_textbook_orders.find_one(
-                {"total_amount": amount, "status": {"$in": ["awaiting_link", "submitted"]}},
-                {"_id": 0, "user_id": 1, "student_name": 1}
-            )
-            if order and order.get("user_id"):
-                user = await db[AuthCollections.USERS].find_one(
-                    {"user_id": order["user_id"]},
-                    {"_id": 0, "user_id": 1, "name": 1, "last_name": 1, "email": 1}
-                )
-                if user:
-                    return user
-
-        return None
+            since = (datetime.now(timezone.utc) - timedelta(days=TOPUP_REQUEST_WINDOW_DAYS)).isoformat()
+            pipeline += [
+                {"$unionWith": {"coll": "store_textbook_orders", "pipeline": [
+                    {"$match": {"total_amount": amount, "status": {"$in": OPEN_ORDER_STATUSES}}},
+                    {"$project": {"_id": 0, "user_id": 1, "order_hits": {"$literal": 1}}},
+                ]}},
+                {"$unionWith": {"coll": "wallet_pending_topups", "pipeline": [
+                    {"$match": {
+                        "amount": amount,
+                        "source": "user_request",
+                        "status": "pending",
+                        "created_at": {"$gte": since},
+                    }},
+                    {"$project": {"_id": 0, "user_id": 1, "topup_hits": {"$literal": 1}}},
+                ]}},
+            ]
+        name_score = {"$divide": [{"$ifNull": ["$name_hits", 0]}, max(len(tokens), 1)]}
+        pipeline += [
+            {"$match": {"user_id": {"$nin": [None, ""]}}},
+            {"$group": {
+                "_id": "$user_id",
+                "name_hits": {"$max": "$name_hits"},
+                "order_hits": {"$sum": "$order_hits"},
+                "topup_hits": {"$sum": "$topup_hits"},
+            }},
+            {"$set": {"confidence": {"$min": [1, {"$add": [
+                {"$multiply": [MATCH_WEIGHTS["name"], name_score]},
+                {"$cond": [{"$gt": ["$topup_hits", 0]}, MATCH_WEIGHTS["topup_request"], 0]},
+                {"$cond": [{"$gt": ["$order_hits", 0]}, MATCH_WEIGHTS["open_order"], 0]},
+            ]}]}}},
+            {"$sort": {"confidence": -1, "_id": 1}},
+            {"$limit": limit},
+            {"$lookup": {
+                "from": AuthCollections.USERS,
+                "localField": "_id",
+                "foreignField": "user_id",
+                "as": "user",
+            }},
+            {"$unwind": "$user"},
+            {"$project": {
+                "_id": 0,
+                "user_id": "$_id",
+                "name": "$user.name",
+                "last_name": "$user.last_name",
+                "email": "$user.email",
+                "confidence": {"$round": ["$confidence", 2]},
+                "signals": {
+                    "name_tokens": {"$ifNull": ["$name_hits", 0]},
+                    "open_orders": "$order_hits",
+                    "topup_requests": "$topup_hits",
+                },
+            }},
+        ]
+        return await db[TOKENS_COLLECTION].aggregate(pipeline).to_list(limit)
 
     async def _credit_wallet(self, user_id: str, amount: float, reference: str):
         """Credit user's ChiPi wallet."""
@@ -73,6 +73,25 @@ async def get_stats(admin: dict = Depends(get_admin_user)):
     return await payment_verification_service.get_stats()
 
 
+@router.get("/match-candidates")
+async def match_candidates(
+    name: str = "",
+    amount: float = 0,
+    limit: int = Query(5, ge=1, le=20),
+    admin: dict = Depends(get_admin_user),
+):
+    """Scored user candidates for a payment (sender name and/or exact amount)."""
+    candidates = await payment_verification_service.find_candidates(amount, name, limit)
+    return {"candidates": candidates, "count": len(candidates)}
+
+
+@router.post("/match-index/rebuild")
+async def rebuild_match_index(admin: dict = Depends(get_admin_user)):
+    """Re-index every user's folded name tokens."""
+    from modules.auth.services.user_name_index import user_name_index
+    return await user_name_index.rebuild()
+
+
 @router.post("/process-alert")
 async def process_bank_alert(data: dict, admin: dict = Depends(get_admin_user)):
     """
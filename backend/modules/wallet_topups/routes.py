@@ -322,8 +322,14 @@ async def update_settings(data: dict, admin: dict = Depends(get_admin_user)):
     else:
         await db[SETTINGS_COL].update_one({"id": "default"}, {"$set": update_fields})
 
-    # Gmail polling now runs in the Integration Hub — settings are read from DB by the Hub
-    # No local poller to restart; Hub picks up config changes automatically
+    # Realtime mode runs the IMAP IDLE ingestion; any other mode stops it.
+    # The Hub's interval scan reads the same settings from DB.
+    from .gmail_poller import gmail_poller
+    if "polling_mode" in update_fields:
+        if update_fields["polling_mode"] == "realtime":
+            await gmail_poller.start()
+        else:
+            await gmail_poller.stop()
 
     result = await db[SETTINGS_COL].find_one({"id": "default"}, {"_id": 0})
     return result
@@ -331,8 +337,12 @@ async def update_settings(data: dict, admin: dict = Depends(get_admin_user)):
 
 @router.get("/polling/status")
 async def get_polling_status(admin: dict = Depends(get_admin_user)):
-    """Check the Gmail background polling status (Hub-managed)."""
+    """Check the Gmail background ingestion status (IMAP IDLE lease holder or Hub)."""
+    from .gmail_poller import gmail_poller
     settings = await db[SETTINGS_COL].find_one({"id": "default"}, {"_id": 0})
+    lease_live = bool(
+        settings and settings.get("imap_lease_expires", "") > datetime.now(timezone.utc).isoformat()
+    )
     # Check Hub status
     hub_running = False
     try:
@@ -343,12 +353,17 @@ async def get_polling_status(admin: dict = Depends(get_admin_user)):
     except Exception:
         pass
     return {
-        "poller_running": hub_running,
+        "poller_running": lease_live or hub_running,
         "polling_mode": settings.get("polling_mode", "manual") if settings else "manual",
         "polling_interval_minutes": settings.get("polling_interval_minutes", 1) if settings else 1,
         "last_auto_scan": settings.get("last_auto_scan") if settings else None,
         "last_scan_created": settings.get("last_scan_created", 0) if settings else 0,
-        "hub_managed": True,
+        "hub_managed": not lease_live,
+        "imap_ingestion": {
+            "lease_owner": settings.get("imap_lease_owner") if lease_live else None,
+            "cursor": settings.get("imap_cursor") if settings else None,
+            "local": gmail_poller.get_status(),
+        },
     }
 
 
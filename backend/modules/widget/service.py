@@ -50,6 +50,11 @@ DEFAULT_WIDGET_CONFIG = {
 }
 
 
+async def _invalidate_bootstrap():
+    from modules.landing.bootstrap import public_bootstrap
+    await public_bootstrap.invalidate()
+
+
 class WidgetConfigService:
     async def get_config(self) -> Dict:
         config = await db.app_config.find_one({"config_key": "widget_config"}, {"_id": 0})
@@ -70,6 +75,7 @@ class WidgetConfigService:
             {"$set": {"value": data, "updated_by": admin_id}},
             upsert=True,
         )
+        await _invalidate_bootstrap()
         return await self.get_config()
 
     async def reset_config(self, admin_id: Optional[str] = None) -> Dict:
@@ -79,6 +85,7 @@ class WidgetConfigService:
             {"$set": {"value": DEFAULT_WIDGET_CONFIG, "updated_by": admin_id}},
             upsert=True,
         )
+        await _invalidate_bootstrap()
         return DEFAULT_WIDGET_CONFIG
 
     async def get_public_config(self) -> Dict:
@@ -0,0 +1,242 @@
+"""
+Base Repository - keyset pagination and batched helpers
+Cursor encoding, find_page ordering (nulls, ties, projections), find_by_ids and bulk_upsert.
+"""
+import asyncio
+import os
+import sys
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+from bson import ObjectId
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.base.repository import BaseRepository, decode_cursor, encode_cursor  # noqa: E402
+
+needs_db = pytest.mark.skipif(not os.environ.get("MONGO_URL"), reason="needs direct database access")
+
+
+def run(scenario):
+    """Run scenario(repo) against a throwaway collection"""
+    async def wrapper():
+        from motor.motor_asyncio import AsyncIOMotorClient
+
+        mongo = AsyncIOMotorClient(os.environ["MONGO_URL"])
+        db = mongo[os.environ.get("DB_NAME", "chipilink_prod")]
+        repo = BaseRepository(db, f"test_base_repository_{uuid.uuid4().hex[:8]}")
+        try:
+            return await scenario(repo)
+        finally:
+            await repo.collection.drop()
+            mongo.close()
+    return asyncio.run(wrapper())
+
+
+async def all_pages(repo, limit=2, **kwargs):
+    """Every item find_page returns, following next_cursor to the end"""
+    items, cursor = [], None
+    for _ in range(50):
+        page = await repo.find_page(limit=limit, cursor=cursor, **kwargs)
+        items.extend(page["items"])
+        cursor = page["next_cursor"]
+        if not cursor:
+            return items
+    raise AssertionError("find_page never ran out of pages")
+
+
+def ranked_docs():
+    # Explicit ids so ties break in a known order
+    ranks = [3, None, 1, "missing", 2, None, 2]
+    docs = []
+    for i, rank in enumerate(ranks):
+        doc = {"_id": ObjectId(), "name": f"n{i}"}
+        if rank != "missing":
+            doc["rank"] = rank
+        docs.append(doc)
+    return docs
+
+
+def expected_names(docs, descending):
+    # Mongo sorts null/missing below every number
+    ordered = sorted(docs, key=lambda d: (d.get("rank") is not None, d.get("rank") or 0, d["_id"]))
+    if descending:
+        ordered.reverse()
+    return [d["name"] for d in ordered]
+
+
+class TestCursor:
+    """encode_cursor / decode_cursor"""
+
+    def test_datetime_and_objectid_round_trip(self):
+        at = datetime(2025, 3, 1, 12, 30, 15, 250000, tzinfo=timezone.utc)
+        oid = ObjectId()
+        value, last_id = decode_cursor(encode_cursor(at, oid))
+        assert value == at and isinstance(value, datetime)
+        assert last_id == oid and isinstance(last_id, ObjectId)
+
+    def test_plain_values_round_trip(self):
+        assert decode_cursor(encode_cursor("2025-03-01T00:00:00", "book_abc")) == ("2025-03-01T00:00:00", "book_abc")
+        assert decode_cursor(encode_cursor(None, 7)) == (None, 7)
+
+    @pytest.mark.parametrize("cursor", ["not-base64!", encode_cursor("x", "y")[:-4], "W10=", "eyJ2IjoxfQ=="])
+    def test_malformed_cursor_raises_value_error(self, cursor):
+        with pytest.raises(ValueError):
+            decode_cursor(cursor)
+
+    def test_bad_objectid_raises_value_error(self):
+        import base64
+        cursor = base64.urlsafe_b64encode(b'{"v":1,"id":{"$oid":"nope"}}').decode()
+        with pytest.raises(ValueError):
+            decode_cursor(cursor)
+
+
+class TestAfter:
+    """BaseRepository._after: the filter for rows after the cursor"""
+
+    def test_value_ascending_excludes_nulls(self):
+        # Nulls sort first ascending, so they are already behind a non-null cursor
+        assert BaseRepository._after("rank", "_id", 2, 5, descending=False) == {
+            "$or": [{"rank": {"$gt": 2}}, {"rank": 2, "_id": {"$gt": 5}}]
+        }
+
+    def test_value_descending_keeps_nulls(self):
+        # Nulls sort last descending, so they still lie ahead of a non-null cursor
+        assert BaseRepository._after("rank", "_id", 2, 5, descending=True) == {
+            "$or": [{"rank": {"$lt": 2}}, {"rank": 2, "_id": {"$lt": 5}}, {"rank": None}]
+        }
+
+    def test_null_ascending_moves_on_to_values(self):
+        assert BaseRepository._after("rank", "_id", None, 5, descending=False) == {
+            "$or": [{"rank": None, "_id": {"$gt": 5}}, {"rank": {"$ne": None}}]
+        }
+
+    def test_null_descending_stays_in_nulls(self):
+        assert BaseRepository._after("rank", "_id", None, 5, descending=True) == {"rank": None, "_id": {"$lt": 5}}
+
+
+@needs_db
+class TestFindPage:
+    """find_page against a real collection"""
+
+    @pytest.mark.parametrize("descending", [False, True])
+    def test_nulls_and_ties_page_in_sort_order(self, descending):
+        docs = ranked_docs()
+
+        async def scenario(repo):
+            await repo.collection.insert_many([dict(d) for d in docs])
+            return await all_pages(repo, sort_field="rank", descending=descending)
+
+        items = run(scenario)
+        assert [d["name"] for d in items] == expected_names(docs, descending)
+
+    def test_ties_on_sort_field_are_neither_skipped_nor_repeated(self):
+        async def scenario(repo):
+            await repo.collection.insert_many([{"name": f"n{i}", "rank": 1} for i in range(7)])
+            return await all_pages(repo, sort_field="rank", descending=False, limit=3)
+
+        names = [d["name"] for d in run(scenario)]
+        assert names == [f"n{i}" for i in range(7)]  # ObjectIds grow with insert order
+
+    def test_datetime_sort_and_objectid_id_follow_the_cursor(self):
+        base = datetime(2025, 1, 1)
+        docs = [{"_id": ObjectId(), "name": f"n{i}", "at": base + timedelta(minutes=i // 2)} for i in range(6)]
+
+        async def scenario(repo):
+            await repo.collection.insert_many([dict(d) for d in docs])
+            first = await repo.find_page(sort_field="at", limit=2)
+            rest = await all_pages(repo, sort_field="at")
+            return first, rest
+
+        first, rest = run(scenario)
+        value, last_id = decode_cursor(first["next_cursor"])
+        assert isinstance(value, datetime) and isinstance(last_id, ObjectId)
+        assert (value, last_id) == (docs[4]["at"], docs[4]["_id"])  # newest first, ties by _id
+        assert [d["name"] for d in rest] == [f"n{i}" for i in reversed(range(6))]
+        assert all("_id" not in d for d in rest)  # default projection still hides _id
+
+    @pytest.mark.parametrize("projection", [{"name": 1}, {"rank": 0}])
+    def test_projection_without_sort_keys_still_pages(self, projection):
+        docs = ranked_docs()
+
+        async def scenario(repo):
+            await repo.collection.insert_many([dict(d) for d in docs])
+            return await all_pages(repo, sort_field="rank", descending=True, projection=projection)
+
+        items = run(scenario)
+        assert [d["name"] for d in items] == expected_names(docs, descending=True)
+        assert all("rank" not in d and "_id" not in d for d in items)
+
+    def test_malformed_cursor_raises_value_error(self):
+        async def scenario(repo):
+            await repo.find_page(cursor="not-a-cursor")
+
+        with pytest.raises(ValueError):
+            run(scenario)
+
+
+@needs_db
+class TestFindByIds:
+    """find_by_ids(id_field, ids, projection, chunk_size)"""
+
+    def test_chunks_dedupes_and_keys_by_id(self):
+        async def scenario(repo):
+            await repo.collection.insert_many([{"code": c, "name": c.upper()} for c in ("a", "b", "c")])
+            return await repo.find_by_ids("code", ["a", "b", "a", None, "zz"], chunk_size=1)
+
+        found = run(scenario)
+        assert set(found) == {"a", "b"}
+        assert found["a"] == {"code": "a", "name": "A"}
+
+    def test_projection_without_id_field_drops_it_from_docs(self):
+        async def scenario(repo):
+            await repo.collection.insert_many([{"code": c, "name": c.upper(), "n": 1} for c in ("a", "b")])
+            return await repo.find_by_ids("code", ["a", "b"], projection={"name": 1})
+
+        assert run(scenario) == {"a": {"name": "A"}, "b": {"name": "B"}}
+
+
+@needs_db
+class TestBulkUpsert:
+    """bulk_upsert(documents, key_fields, set_on_insert)"""
+
+    def test_set_on_insert_only_applies_to_new_documents(self):
+        async def scenario(repo):
+            first = await repo.bulk_upsert(
+                [{"code": "a", "name": "A", "created_at": "2020-01-01T00:00:00"}],
+                "code", set_on_insert={"status": "new"}
+            )
+            await repo.collection.update_one({"code": "a"}, {"$set": {"status": "active"}})
+            second = await repo.bulk_upsert(
+                [
+                    {"code": "a", "name": "A2", "created_at": "2099-01-01T00:00:00"},
+                    {"code": "b", "name": "B"},
+                ],
+                "code", set_on_insert={"status": "new"}, chunk_size=1
+            )
+            docs = {d["code"]: d async for d in repo.collection.find({}, {"_id": 0})}
+            return first, second, docs
+
+        first, second, docs = run(scenario)
+        assert first == {"matched": 0, "modified": 0, "upserted": 1}
+        assert second == {"matched": 1, "modified": 1, "upserted": 1}
+        # Existing row: $set fields change, created_at and set_on_insert fields do not
+        assert docs["a"]["name"] == "A2"
+        assert docs["a"]["created_at"] == "2020-01-01T00:00:00"
+        assert docs["a"]["status"] == "active"
+        # New row: gets created_at and the set_on_insert defaults
+        assert docs["b"]["status"] == "new"
+        assert docs["b"]["created_at"] and docs["b"]["updated_at"]
+
+    def test_compound_key_fields(self):
+        async def scenario(repo):
+            await repo.bulk_upsert([{"school": "s1", "code": "a", "qty": 1}], ["school", "code"])
+            await repo.bulk_upsert(
+                [{"school": "s1", "code": "a", "qty": 2}, {"school": "s2", "code": "a", "qty": 5}],
+                ["school", "code"]
+            )
+            return await repo.collection.find({}, {"_id": 0, "school": 1, "qty": 1}).sort("school", 1).to_list(10)
+
+        assert run(scenario) == [{"school": "s1", "qty": 2}, {"school": "s2", "qty": 5}]
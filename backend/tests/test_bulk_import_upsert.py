@@ -0,0 +1,76 @@
+"""
+Bulk Import Upsert Tests
+TSV book/student imports: preview and import agree, re-imports update in place
+"""
+import pytest
+import requests
+import os
+import uuid
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+BOOK_MAPPING = {"code": 0, "name": 1, "price": 2, "grade": 3}
+
+
+def _books_tsv(codes):
+    lines = ["Code\tName\tPrice\tGrade"]
+    lines += [f"{code}\tTest Book {code}\t$12.50\t3" for code in codes]
+    return "\n".join(lines)
+
+
+class TestBulkImportUpsert:
+    """Chunked upserts behind /api/sysbook/bulk-import"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.session = requests.Session()
+        login = self.session.post(f"{BASE_URL}/api/auth-v2/login", json={
+            "email": "teck@koh.one",
+            "password": "Acdb##0897"
+        })
+        assert login.status_code == 200, f"Admin login failed: {login.text}"
+        self.headers = {"Authorization": f"Bearer {login.json().get('token')}"}
+
+    def _post(self, path, payload):
+        res = requests.post(f"{BASE_URL}/api/sysbook/bulk-import/{path}", json=payload, headers=self.headers)
+        assert res.status_code == 200, res.text
+        return res.json()
+
+    def test_book_preview_then_import_then_reimport(self):
+        prefix = f"TEST-BULK-{uuid.uuid4().hex[:6].upper()}"
+        codes = [f"{prefix}-{i}" for i in range(5)]
+        # Last row repeats a code and one row has no name
+        raw_text = _books_tsv(codes) + f"\n{codes[0]}\tDup\t1\t3\n{prefix}-X\t\t1\t3"
+        payload = {"raw_text": raw_text, "column_mapping": BOOK_MAPPING}
+
+        preview = self._post("books/preview", payload)
+        assert preview["resumen"]["validos"] == 5
+        assert preview["resumen"]["nuevos"] == 5
+        assert {e["error"] for e in preview["errores"]} == {f"Code duplicado: {codes[0]}", "Nombre empty"}
+        assert all(p["grade"] == "3" for p in preview["preview"])
+
+        first = self._post("books/import", payload)
+        assert first["creados"] == 5 and first["actualizados"] == 0
+        assert first["omitidos"] == 1
+        assert [e["fila"] for e in first["errores"]] == [8]
+
+        again = self._post("books/preview", payload)
+        assert again["resumen"]["actualizaciones"] == 5
+
+        second = self._post("books/import", payload)
+        assert second["creados"] == 0 and second["actualizados"] == 5
+
+    def test_student_import_methods_exist(self):
+        numero = f"TEST{uuid.uuid4().hex[:8]}"
+        payload = {
+            "raw_text": f"Numero\tNombre\tGrado\n{numero}\tAna Perez\t4\n{numero}\tAna Perez\t4",
+            "column_mapping": {"numero_estudiante": 0, "full_name": 1, "grade": 2},
+        }
+        preview = self._post("students/preview", payload)
+        assert preview["resumen"]["validos"] == 1
+        assert preview["resumen"]["duplicados"] == 1
+        assert preview["preview"][0]["apellido"] == "Perez"
+
+        result = self._post("students/import", {**payload, "sheet_name": "Test Import"})
+        assert result["creados"] == 1 and result["omitidos"] == 1
+        assert result["errores"] == []
@@ -0,0 +1,61 @@
+"""
+Cleanup Job Tests
+Background cleanup jobs with progress, and count-based previews
+"""
+import pytest
+import requests
+import os
+import time
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+UNKNOWN_STUDENT_ID = "std_cleanup_job_none"
+
+
+class TestCleanupJobs:
+    """POST /api/cleanup/jobs and GET /api/cleanup/jobs/{job_id}"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.session = requests.Session()
+        login = self.session.post(f"{BASE_URL}/api/auth-v2/login", json={
+            "email": "teck@koh.one",
+            "password": "Acdb##0897"
+        })
+        assert login.status_code == 200, f"Admin login failed: {login.text}"
+        self.headers = {"Authorization": f"Bearer {login.json().get('token')}"}
+
+    def _wait(self, job_id):
+        for _ in range(30):
+            job = requests.get(f"{BASE_URL}/api/cleanup/jobs/{job_id}", headers=self.headers).json()
+            if job["status"] in ("done", "error"):
+                return job
+            time.sleep(1)
+        pytest.fail(f"Cleanup job {job_id} did not finish")
+
+    def test_job_requires_filter(self):
+        res = requests.post(f"{BASE_URL}/api/cleanup/jobs", json={}, headers=self.headers)
+        assert res.status_code == 400
+
+    def test_unknown_job(self):
+        res = requests.get(f"{BASE_URL}/api/cleanup/jobs/cj_missing", headers=self.headers)
+        assert res.status_code == 404
+
+    def test_job_runs_to_completion(self):
+        body = {"student_ids": [UNKNOWN_STUDENT_ID], "delete_monday_items": False}
+        res = requests.post(f"{BASE_URL}/api/cleanup/jobs", json=body, headers=self.headers)
+        assert res.status_code == 200, res.text
+        job = self._wait(res.json()["job_id"])
+        assert job["status"] == "done", job
+        assert job["result"]["orders"] == {"deleted": 0}
+        assert job["result"]["monday_items"]["attempted"] == 0
+        assert "orders" in job["progress"]
+
+    def test_preview_counts_match_filters(self):
+        body = {"student_ids": [UNKNOWN_STUDENT_ID]}
+        res = requests.post(f"{BASE_URL}/api/cleanup/preview", json=body, headers=self.headers)
+        assert res.status_code == 200, res.text
+        data = res.json()["data"]
+        assert data["orders"]["count"] == 0 and data["orders"]["samples"] == []
+        assert data["total_monday_items"] == 0
+        assert data["students"]["count"] == 0
@@ -0,0 +1,72 @@
+"""
+CRM Inbox Index Tests
+Tests for the paginated admin inbox served from the local summary index
+"""
+import pytest
+import requests
+import os
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+
+class TestCrmAdminInbox:
+    """/api/store/crm-chat/admin/inbox pagination and shape"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.session = requests.Session()
+        self.session.headers.update({"Content-Type": "application/json"})
+        login = self.session.post(f"{BASE_URL}/api/auth-v2/login", json={
+            "email": "teck@koh.one",
+            "password": "Acdb##0897"
+        })
+        assert login.status_code == 200, f"Admin login failed: {login.text}"
+        self.session.headers.update({"Authorization": f"Bearer {login.json().get('token')}"})
+
+    def test_inbox_page_shape(self):
+        response = self.session.get(
+            f"{BASE_URL}/api/store/crm-chat/admin/inbox", params={"skip": 0, "limit": 10}
+        )
+        assert response.status_code == 200
+        data = response.json()
+        for key in ("conversations", "total", "skip", "limit"):
+            assert key in data
+        assert len(data["conversations"]) <= 10
+        for conv in data["conversations"]:
+            assert "student_id" in conv
+            assert "unread_count" in conv
+            assert "topic_count" in conv
+
+    def test_inbox_sorted_by_activity(self):
+        data = self.session.get(f"{BASE_URL}/api/store/crm-chat/admin/inbox").json()
+        activity = [c.get("last_activity_at") or "" for c in data["conversations"]]
+        assert activity == sorted(activity, reverse=True)
+
+    def test_inbox_rejects_oversized_page(self):
+        response = self.session.get(
+            f"{BASE_URL}/api/store/crm-chat/admin/inbox", params={"limit": 1000}
+        )
+        assert response.status_code == 422
+
+    def test_inbox_search_and_unread_cover_whole_inbox(self):
+        first = self.session.get(
+            f"{BASE_URL}/api/store/crm-chat/admin/inbox", params={"limit": 1}
+        ).json()
+        assert "total_unread" in first
+        if not first["conversations"]:
+            pytest.skip("No CRM conversations to search")
+        conv = first["conversations"][0]
+        # total_unread is inbox-wide, not just the returned page
+        assert first["total_unread"] >= conv["unread_count"]
+        name = conv["student_name"]
+        if name == "Unknown":
+            pytest.skip("Newest conversation has no student record")
+        found = self.session.get(
+            f"{BASE_URL}/api/store/crm-chat/admin/inbox", params={"q": name[:4].lower(), "limit": 200}
+        ).json()
+        assert conv["student_id"] in [c["student_id"] for c in found["conversations"]]
+        assert found["total_unread"] == first["total_unread"]
+        none = self.session.get(
+            f"{BASE_URL}/api/store/crm-chat/admin/inbox", params={"q": "zz-no-such-student-zz"}
+        ).json()
+        assert none["total"] == 0 and none["conversations"] == []
@@ -0,0 +1,79 @@
+"""
+Export Tests
+Streamed CSV/XLSX downloads and background export jobs
+"""
+import pytest
+import requests
+import os
+import io
+import csv
+import time
+import zipfile
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+
+class TestExports:
+    """Module /export endpoints and /api/exports/jobs"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.session = requests.Session()
+        login = self.session.post(f"{BASE_URL}/api/auth-v2/login", json={
+            "email": "teck@koh.one",
+            "password": "Acdb##0897"
+        })
+        assert login.status_code == 200, f"Admin login failed: {login.text}"
+        self.headers = {"Authorization": f"Bearer {login.json().get('token')}"}
+
+    def _wait(self, job_id):
+        for _ in range(60):
+            job = requests.get(f"{BASE_URL}/api/exports/jobs/{job_id}", headers=self.headers).json()
+            if job["status"] in ("done", "error"):
+                return job
+            time.sleep(1)
+        pytest.fail(f"Export job {job_id} did not finish")
+
+    def test_inventory_report_csv_matches_json(self):
+        report = requests.get(f"{BASE_URL}/api/store/analytics/inventory-report", headers=self.headers)
+        assert report.status_code == 200, report.text
+        res = requests.get(f"{BASE_URL}/api/store/analytics/inventory-report/export", headers=self.headers)
+        assert res.status_code == 200, res.text
+        assert res.headers["content-type"].startswith("text/csv")
+        assert "attachment" in res.headers["content-disposition"]
+        rows = list(csv.reader(io.StringIO(res.content.decode("utf-8-sig"))))
+        assert rows[0][:2] == ["Book ID", "Name"]
+        assert len(rows) - 1 == report.json()["total_products"]
+
+    def test_transactions_xlsx(self):
+        res = requests.get(f"{BASE_URL}/api/wallet/admin/transactions/export",
+                           params={"format": "xlsx", "currency": "USD"}, headers=self.headers)
+        assert res.status_code == 200, res.text
+        archive = zipfile.ZipFile(io.BytesIO(res.content))
+        assert archive.testzip() is None
+        sheet = archive.read("xl/worksheets/sheet1.xml").decode("utf-8")
+        assert "Transaction ID" in sheet
+
+    def test_unknown_format_rejected(self):
+        res = requests.get(f"{BASE_URL}/api/sysbook/inventory/products/none/purchasers/export",
+                           params={"format": "pdf"}, headers=self.headers)
+        assert res.status_code == 422
+
+    def test_job_validation(self):
+        listing = requests.get(f"{BASE_URL}/api/exports", headers=self.headers).json()
+        assert "sysbook_purchasers" in {e["name"] for e in listing["exports"]}
+        for body in ({"export": "nope"}, {"export": "sysbook_purchasers", "params": {}}):
+            res = requests.post(f"{BASE_URL}/api/exports/jobs", json=body, headers=self.headers)
+            assert res.status_code == 400, res.text
+
+    def test_job_download(self):
+        body = {"export": "sysbook_purchasers", "format": "csv", "params": {"book_id": "bk_export_none"}}
+        res = requests.post(f"{BASE_URL}/api/exports/jobs", json=body, headers=self.headers)
+        assert res.status_code == 200, res.text
+        job = self._wait(res.json()["job_id"])
+        assert job["status"] == "done", job
+        assert job["progress"]["rows"] == 0
+        download = requests.get(f"{BASE_URL}/api/exports/jobs/{job['job_id']}/download", headers=self.headers)
+        assert download.status_code == 200
+        rows = list(csv.reader(io.StringIO(download.content.decode("utf-8-sig"))))
+        assert rows[0][0] == "Order ID" and len(rows) == 1
@@ -39,6 +39,16 @@ class TestGmailPolling:
         print(f"Polling Status: {data}")
         assert data["poller_running"] == True, "Poller should be running at startup"
     
+    def test_polling_status_reports_imap_ingestion(self):
+        """GET /api/wallet-topups/polling/status exposes the IMAP IDLE lease and UID cursor"""
+        response = requests.get(f"{BASE_URL}/api/wallet-topups/polling/status", headers=self.headers)
+        assert response.status_code == 200
+        data = response.json()
+        assert "imap_ingestion" in data
+        assert "cursor" in data["imap_ingestion"]
+        assert "lease_owner" in data["imap_ingestion"]
+        print(f"IMAP ingestion: {data['imap_ingestion']}")
+
     def test_settings_returns_polling_mode_and_interval(self):
         """GET /api/wallet-topups/settings shows polling_mode=realtime and polling_interval_minutes=5"""
         response = requests.get(f"{BASE_URL}/api/wallet-topups/settings", headers=self.headers)
@@ -0,0 +1,83 @@
+"""
+Google Sheets incremental sync — snapshot diff
+Which rows are written or deactivated, and what the next snapshot keeps.
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from modules.store.services.google_sheets_service import diff_snapshot, next_snapshot  # noqa: E402
+
+
+PREVIOUS = {
+    "100": ("fp-a", "1A"),
+    "101": ("fp-b", "1A"),
+    "102": ("fp-c", "1A"),
+    "200": ("fp-d", "2A"),
+}
+
+
+class TestDiffSnapshot:
+    """diff_snapshot(current, previous, synced_tabs, forzar)"""
+
+    def test_only_new_and_changed_rows_are_written(self):
+        current = {"100": ("fp-a", "1A"), "101": ("fp-b2", "1A"), "102": ("fp-c", "1A"), "103": ("fp-e", "1A")}
+        changed, removed = diff_snapshot(current, PREVIOUS, {"1A"}, forzar=False)
+        assert sorted(changed) == ["101", "103"]
+        assert removed == []
+
+    def test_rows_dropped_from_a_synced_tab_are_removed(self):
+        current = {"100": ("fp-a", "1A")}
+        changed, removed = diff_snapshot(current, PREVIOUS, {"1A", "2A"}, forzar=False)
+        assert changed == []
+        assert sorted(removed) == ["101", "102", "200"]
+
+    def test_solo_hoja_does_not_remove_other_tabs(self):
+        # Only 1A was read: 2A's student is absent from `current` but must not be deactivated
+        current = {"100": ("fp-a", "1A"), "101": ("fp-b", "1A")}
+        changed, removed = diff_snapshot(current, PREVIOUS, {"1A"}, forzar=False)
+        assert changed == []
+        assert removed == ["102"]
+
+    def test_forzar_rewrites_everything(self):
+        current = {"100": ("fp-a", "1A"), "101": ("fp-b", "1A"), "102": ("fp-c", "1A")}
+        changed, removed = diff_snapshot(current, PREVIOUS, {"1A"}, forzar=True)
+        assert sorted(changed) == ["100", "101", "102"]
+        assert removed == []
+
+
+class TestNextSnapshot:
+    """next_snapshot(current, previous, synced_tabs, removed, skipped)"""
+
+    def test_written_rows_take_the_new_fingerprint(self):
+        current = {"100": ("fp-a2", "1A"), "101": ("fp-b", "1A"), "102": ("fp-c", "1A")}
+        rows = next_snapshot(current, PREVIOUS, {"1A"}, removed=[], skipped=set())
+        assert rows["100"] == ("fp-a2", "1A")
+
+    def test_overridden_and_failed_rows_keep_their_old_fingerprint(self):
+        current = {"100": ("fp-a2", "1A"), "101": ("fp-b2", "1A"), "102": ("fp-c", "1A"), "103": ("fp-e", "1A")}
+        # 100 is overridden locally, 101 changed but its write failed, 103 is new but failed
+        rows = next_snapshot(current, PREVIOUS, {"1A"}, removed=[], skipped={"100", "101", "103"})
+        assert rows["100"] == ("fp-a", "1A")
+        assert rows["101"] == ("fp-b", "1A")
+        assert "103" not in rows  # still new next time
+        assert rows["102"] == ("fp-c", "1A")
+
+    def test_removed_rows_leave_the_snapshot_unless_skipped(self):
+        current = {"100": ("fp-a", "1A")}
+        rows = next_snapshot(current, PREVIOUS, {"1A"}, removed=["101", "102"], skipped={"102"})
+        assert "101" not in rows
+        assert rows["102"] == ("fp-c", "1A")  # deactivation not written: retried next sync
+
+    def test_solo_hoja_keeps_other_tabs_entries(self):
+        current = {"100": ("fp-a", "1A"), "101": ("fp-b", "1A"), "102": ("fp-c", "1A")}
+        rows = next_snapshot(current, PREVIOUS, {"1A"}, removed=[], skipped=set())
+        assert rows["200"] == ("fp-d", "2A")
+
+    def test_forzar_then_clean_sync_is_a_no_op(self):
+        current = {"100": ("fp-a", "1A"), "101": ("fp-b", "1A"), "102": ("fp-c", "1A"), "200": ("fp-d", "2A")}
+        changed, removed = diff_snapshot(current, PREVIOUS, {"1A", "2A"}, forzar=True)
+        rows = next_snapshot(current, PREVIOUS, {"1A", "2A"}, removed, skipped=set())
+        assert len(changed) == 4
+        assert diff_snapshot(current, rows, {"1A", "2A"}, forzar=False) == ([], [])
@@ -0,0 +1,80 @@
+"""
+IMAP ingestion — IDLE wake-up
+The engine must leave IDLE as soon as the server reports new mail, even when the
+EXISTS line arrives in the same packet as the IDLE continuation.
+"""
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from modules.wallet_topups.imap_ingestion import ImapIngestionEngine  # noqa: E402
+
+
+class FakeMail:
+    """Just enough of imaplib.IMAP4 for _idle"""
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.file = sock.makefile("rb")
+
+    def _new_tag(self):
+        return b"A001"
+
+    def send(self, data):
+        self.sock.sendall(data)
+
+    def readline(self):
+        return self.file.readline()
+
+
+def serve(server, replies):
+    """Answer each client line with its reply chunks; a float pauses between chunks"""
+    lines = server.makefile("rb")
+    for chunks in replies:
+        lines.readline()
+        for chunk in chunks:
+            if isinstance(chunk, float):
+                time.sleep(chunk)
+            else:
+                server.sendall(chunk)
+
+
+def run_idle(replies, timeout=3):
+    client, server = socket.socketpair()
+    threading.Thread(target=serve, args=(server, replies), daemon=True).start()
+    engine = ImapIngestionEngine(gmail_service=None)
+    done = threading.Event()
+
+    def idle():
+        engine._idle(FakeMail(client))
+        done.set()
+
+    threading.Thread(target=idle, daemon=True).start()
+    started = time.monotonic()
+    finished = done.wait(timeout)
+    engine.stop()
+    client.close()
+    server.close()
+    return finished, time.monotonic() - started
+
+
+class TestIdle:
+    """ImapIngestionEngine._idle"""
+
+    def test_exists_in_same_packet_as_continuation_wakes_immediately(self):
+        finished, elapsed = run_idle([
+            [b"+ idling\r\n* 3 EXISTS\r\n"],
+            [b"A001 OK IDLE terminated\r\n"],
+        ])
+        assert finished and elapsed < 1
+
+    def test_exists_after_continuation_wakes(self):
+        finished, elapsed = run_idle([
+            [b"+ idling\r\n", 0.2, b"* 4 EXISTS\r\n"],
+            [b"* 4 FETCH (FLAGS ())\r\nA001 OK IDLE terminated\r\n"],
+        ])
+        assert finished and elapsed < 1.5
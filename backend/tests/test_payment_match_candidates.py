@@ -0,0 +1,54 @@
+"""
+Payment Match Candidates Tests
+Tests for the indexed, scored payment-to-user matching
+"""
+import pytest
+import requests
+import os
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+
+class TestPaymentMatchCandidates:
+    """/api/payment-verify/match-candidates and match index rebuild"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.session = requests.Session()
+        self.session.headers.update({"Content-Type": "application/json"})
+        login = self.session.post(f"{BASE_URL}/api/auth-v2/login", json={
+            "email": "teck@koh.one",
+            "password": "Acdb##0897"
+        })
+        assert login.status_code == 200, f"Admin login failed: {login.text}"
+        self.session.headers.update({"Authorization": f"Bearer {login.json().get('token')}"})
+
+    def test_rebuild_index(self):
+        response = self.session.post(f"{BASE_URL}/api/payment-verify/match-index/rebuild")
+        assert response.status_code == 200
+        assert response.json()["indexed"] >= 1
+
+    def test_accent_folded_name_match(self):
+        """The seeded admin ("Administrador ChiPi Link") matches an accented, upper-case hint"""
+        response = self.session.get(
+            f"{BASE_URL}/api/payment-verify/match-candidates",
+            params={"name": "ADMINISTRADÓR Chipí"}
+        )
+        assert response.status_code == 200
+        candidates = response.json()["candidates"]
+        assert any(c["email"] == "teck@koh.one" for c in candidates)
+        for c in candidates:
+            assert 0 <= c["confidence"] <= 1
+            assert "signals" in c
+
+    def test_candidates_sorted_by_confidence(self):
+        data = self.session.get(
+            f"{BASE_URL}/api/payment-verify/match-candidates",
+            params={"name": "Maria Gonzalez", "amount": 25}
+        ).json()
+        scores = [c["confidence"] for c in data["candidates"]]
+        assert scores == sorted(scores, reverse=True)
+
+    def test_empty_hint_returns_nothing(self):
+        data = self.session.get(f"{BASE_URL}/api/payment-verify/match-candidates").json()
+        assert data["candidates"] == []
@@ -0,0 +1,60 @@
+"""
+Thermal Receipt Renderer Tests
+ESC/POS output, cached HTML receipts, print jobs storing order references
+"""
+import pytest
+import requests
+import os
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+TEST_ORDER_IDS = ["ord_test001", "ord_test002"]
+
+
+class TestThermalReceipts:
+    """HTML and ESC/POS receipts for the same orders"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.session = requests.Session()
+        login = self.session.post(f"{BASE_URL}/api/auth-v2/login", json={
+            "email": "teck@koh.one",
+            "password": "Acdb##0897"
+        })
+        assert login.status_code == 200, f"Admin login failed: {login.text}"
+        self.token = login.json().get("token")
+        self.headers = {"Authorization": f"Bearer {self.token}"}
+
+    def test_escpos_receipts(self):
+        res = requests.post(f"{BASE_URL}/api/print/thermal-escpos",
+                            json={"order_ids": TEST_ORDER_IDS}, headers=self.headers)
+        assert res.status_code == 200, res.text
+        assert res.headers["content-type"] == "application/octet-stream"
+        data = res.content
+        assert data.startswith(b"\x1b@"), "Should start with ESC @ (initialize)"
+        assert data.count(b"\x1dVB\x00") == 2, "One cut per order"
+        assert b"MAT-3A" in data and b"Matematicas" in data
+
+    def test_escpos_requires_orders(self):
+        res = requests.post(f"{BASE_URL}/api/print/thermal-escpos", json={"order_ids": []}, headers=self.headers)
+        assert res.status_code == 400
+
+    def test_repeated_html_is_identical(self):
+        """Cached receipts render the same markup as fresh ones"""
+        params = {"order_ids": ",".join(TEST_ORDER_IDS), "token": self.token}
+        first = requests.get(f"{BASE_URL}/api/print/thermal-page", params=params)
+        second = requests.get(f"{BASE_URL}/api/print/thermal-page", params=params)
+        assert first.status_code == 200
+        # Only the print date may differ between the two
+        strip = lambda html: html.split("<div style=\"font-size:9px; color:#000; font-weight:500;\">")[0]
+        assert strip(first.text) == strip(second.text)
+        assert first.text.count("CUT HERE") == 1
+
+    def test_print_job_stores_references(self):
+        res = requests.post(f"{BASE_URL}/api/print/jobs", json={"order_ids": TEST_ORDER_IDS}, headers=self.headers)
+        assert res.status_code == 200, res.text
+        job_id = res.json()["job_id"]
+        job = requests.get(f"{BASE_URL}/api/print/jobs/{job_id}", headers=self.headers).json()
+        assert job["order_ids"] == TEST_ORDER_IDS
+        # Orders are loaded from the orders collection, not copied into the job
+        assert {o["order_id"] for o in job["orders"]} == set(TEST_ORDER_IDS)
@@ -0,0 +1,56 @@
+"""
+Public Bootstrap Bundle Tests
+GET /api/public/bootstrap: sections, ETag revalidation, invalidation on admin writes
+"""
+import pytest
+import requests
+import os
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+SECTIONS = ["site_config", "landing_page", "module_status", "ui_style", "widget",
+            "banners", "media_player", "layout_icons", "icon_statuses"]
+
+
+class TestPublicBootstrap:
+    """One cached response for all public config"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.session = requests.Session()
+        login = self.session.post(f"{BASE_URL}/api/auth-v2/login", json={
+            "email": "teck@koh.one",
+            "password": "Acdb##0897"
+        })
+        assert login.status_code == 200, f"Admin login failed: {login.text}"
+        self.headers = {"Authorization": f"Bearer {login.json().get('token')}"}
+
+    def test_bundle_has_all_sections(self):
+        res = requests.get(f"{BASE_URL}/api/public/bootstrap")
+        assert res.status_code == 200, res.text
+        data = res.json()
+        for section in SECTIONS:
+            assert section in data, f"Missing section {section}"
+        assert data["module_status"] == requests.get(f"{BASE_URL}/api/public/module-status").json()
+        assert res.headers.get("ETag") == f'"{data["version"]}"'
+
+    def test_etag_revalidation_returns_304(self):
+        etag = requests.get(f"{BASE_URL}/api/public/bootstrap").headers["ETag"]
+        res = requests.get(f"{BASE_URL}/api/public/bootstrap", headers={"If-None-Match": etag})
+        assert res.status_code == 304
+        assert res.content == b""
+
+    def test_admin_write_invalidates_bundle(self):
+        statuses = self.session.get(f"{BASE_URL}/api/admin/module-status", headers=self.headers).json()["statuses"]
+        before = requests.get(f"{BASE_URL}/api/public/bootstrap").json()
+        changed = {**statuses, "gallery": {"status": "live_beta", "customLabel": "TEST Bootstrap"}}
+        try:
+            res = self.session.put(f"{BASE_URL}/api/admin/module-status",
+                                   json={"statuses": changed}, headers=self.headers)
+            assert res.status_code == 200
+            after = requests.get(f"{BASE_URL}/api/public/bootstrap").json()
+            assert after["module_status"]["statuses"]["gallery"]["customLabel"] == "TEST Bootstrap"
+            assert after["version"] != before["version"]
+        finally:
+            self.session.put(f"{BASE_URL}/api/admin/module-status",
+                             json={"statuses": statuses}, headers=self.headers)
@@ -53,6 +53,15 @@ class TestWebSocketEndpoint:
         assert "rooms" in data
         print(f"WebSocket stats: {data}")
 
+    def test_websocket_stats_reports_broker(self, admin_headers):
+        """Test /api/realtime/stats includes the cross-worker broker status"""
+        response = requests.get(f"{BASE_URL}/api/realtime/stats", headers=admin_headers)
+        assert response.status_code == 200
+        broker = response.json()["broker"]
+        assert broker["transport"] in ("mongo", "local")
+        assert "worker_id" in broker
+        assert "published" in broker
+
     def test_websocket_rooms_endpoint(self, admin_headers):
         """Test /api/realtime/rooms returns available rooms"""
         response = requests.get(f"{BASE_URL}/api/realtime/rooms", headers=admin_headers)
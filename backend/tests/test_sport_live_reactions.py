@@ -0,0 +1,77 @@
+"""
+Sport Live Reaction Tests
+Tests for coalesced spectator reactions on live sessions
+"""
+import pytest
+import requests
+import os
+import uuid
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+
+class TestLiveReactions:
+    """POST /api/sport/live/{session_id}/react"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.session = requests.Session()
+        self.session.headers.update({"Content-Type": "application/json"})
+        login = self.session.post(f"{BASE_URL}/api/auth-v2/login", json={
+            "email": "teck@koh.one",
+            "password": "Acdb##0897"
+        })
+        assert login.status_code == 200, f"Admin login failed: {login.text}"
+        self.session.headers.update({"Authorization": f"Bearer {login.json().get('token')}"})
+
+    def _create_live(self):
+        suffix = uuid.uuid4().hex[:6]
+        response = self.session.post(f"{BASE_URL}/api/sport/live", json={
+            "player_a_name": f"TEST_A_{suffix}",
+            "player_b_name": f"TEST_B_{suffix}",
+            "referee_name": f"TEST_REF_{suffix}",
+        })
+        assert response.status_code == 200, response.text
+        return response.json()["session_id"]
+
+    def test_react_returns_running_totals(self):
+        session_id = self._create_live()
+        first = requests.post(f"{BASE_URL}/api/sport/live/{session_id}/react", json={"reaction_id": "clap"})
+        second = requests.post(f"{BASE_URL}/api/sport/live/{session_id}/react", json={"reaction_id": "clap"})
+        assert first.status_code == 200
+        assert second.status_code == 200
+        assert second.json()["clap"] == first.json()["clap"] + 1
+        self.session.post(f"{BASE_URL}/api/sport/live/{session_id}/end")
+
+    def test_react_rate_limited_per_client(self):
+        session_id = self._create_live()
+        codes = [
+            requests.post(f"{BASE_URL}/api/sport/live/{session_id}/react",
+                          json={"reaction_id": "fire"}).status_code
+            for _ in range(25)
+        ]
+        assert 200 in codes
+        assert 429 in codes
+        self.session.post(f"{BASE_URL}/api/sport/live/{session_id}/end")
+
+    def test_react_limit_ignores_client_supplied_forwarded_for(self):
+        session_id = self._create_live()
+        # Rotating the client-controlled (leftmost) hop must not mint new buckets
+        codes = [
+            requests.post(f"{BASE_URL}/api/sport/live/{session_id}/react", json={"reaction_id": "fire"},
+                          headers={"X-Forwarded-For": f"10.3.{i}.7"}).status_code
+            for i in range(25)
+        ]
+        assert 429 in codes
+        self.session.post(f"{BASE_URL}/api/sport/live/{session_id}/end")
+
+    def test_react_rejects_invalid_reaction_id(self):
+        session_id = self._create_live()
+        response = requests.post(f"{BASE_URL}/api/sport/live/{session_id}/react",
+                                 json={"reaction_id": "$set.score"})
+        assert response.status_code == 400
+        self.session.post(f"{BASE_URL}/api/sport/live/{session_id}/end")
+
+    def test_react_unknown_session(self):
+        response = requests.post(f"{BASE_URL}/api/sport/live/live_missing0/react", json={"reaction_id": "clap"})
+        assert response.status_code == 404
@@ -0,0 +1,82 @@
+"""
+Sport Live Stream Tests
+Tests for sequenced live-session deltas on the polling endpoint
+"""
+import pytest
+import requests
+import os
+import uuid
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+
+class TestLiveStream:
+    """GET /api/sport/live/{session_id}/state?since="""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.session = requests.Session()
+        self.session.headers.update({"Content-Type": "application/json"})
+        login = self.session.post(f"{BASE_URL}/api/auth-v2/login", json={
+            "email": "teck@koh.one",
+            "password": "Acdb##0897"
+        })
+        assert login.status_code == 200, f"Admin login failed: {login.text}"
+        self.session.headers.update({"Authorization": f"Bearer {login.json().get('token')}"})
+        suffix = uuid.uuid4().hex[:6]
+        response = self.session.post(f"{BASE_URL}/api/sport/live", json={
+            "player_a_name": f"TEST_A_{suffix}",
+            "player_b_name": f"TEST_B_{suffix}",
+            "referee_name": f"TEST_REF_{suffix}",
+        })
+        assert response.status_code == 200, response.text
+        self.session_id = response.json()["session_id"]
+        yield
+        self.session.post(f"{BASE_URL}/api/sport/live/{self.session_id}/end")
+
+    def _state(self, **params):
+        return requests.get(f"{BASE_URL}/api/sport/live/{self.session_id}/state", params=params)
+
+    def test_state_carries_seq(self):
+        response = self._state()
+        assert response.status_code == 200
+        assert response.json()["seq"] == 0
+
+    def test_unchanged_since_returns_304(self):
+        seq = self._state().json()["seq"]
+        assert self._state(since=seq).status_code == 304
+
+    def test_since_returns_missing_deltas(self):
+        seq = self._state().json()["seq"]
+        point = self.session.post(f"{BASE_URL}/api/sport/live/{self.session_id}/point", json={"scored_by": "a"})
+        assert point.status_code == 200
+        assert point.json()["seq"] == seq + 1
+
+        response = self._state(since=seq)
+        assert response.status_code == 200
+        data = response.json()
+        assert data["seq"] == seq + 1
+        assert [d["seq"] for d in data["deltas"]] == [seq + 1]
+        delta = data["deltas"][0]
+        assert delta["type"] == "point"
+        assert delta["patch"]["set"]["score"] == {"a": 1, "b": 0}
+
+    def test_mutations_bump_seq(self):
+        seq = self._state().json()["seq"]
+        self.session.put(f"{BASE_URL}/api/sport/live/{self.session_id}/server", json={"server": "b"})
+        self.session.put(f"{BASE_URL}/api/sport/live/{self.session_id}/display", json={"swapped": True})
+        data = self._state(since=seq).json()
+        assert [d["type"] for d in data["deltas"]] == ["server", "display_update"]
+        assert data["deltas"][1]["patch"]["set"] == {"display.swapped": True}
+
+    def test_rapid_points_read_back_immediately(self):
+        for _ in range(5):
+            assert self.session.post(
+                f"{BASE_URL}/api/sport/live/{self.session_id}/point", json={"scored_by": "b"}
+            ).status_code == 200
+        undo = self.session.post(f"{BASE_URL}/api/sport/live/{self.session_id}/undo")
+        assert undo.status_code == 200
+        state = self._state().json()
+        assert state["seq"] == 6
+        assert state["score"] == {"a": 0, "b": 4}
+        assert len(state["points"]) == 4
@@ -0,0 +1,81 @@
+"""
+Sport Match Stats Tests
+Player ELO, counters, win rate and streaks after recording matches
+"""
+import pytest
+import requests
+import os
+import uuid
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+
+class TestMatchStats:
+    """POST /api/sport/matches updates both players and the referee"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.session = requests.Session()
+        self.session.headers.update({"Content-Type": "application/json"})
+        login = self.session.post(f"{BASE_URL}/api/auth-v2/login", json={
+            "email": "teck@koh.one",
+            "password": "Acdb##0897"
+        })
+        assert login.status_code == 200, f"Admin login failed: {login.text}"
+        self.session.headers.update({"Authorization": f"Bearer {login.json().get('token')}"})
+        suffix = uuid.uuid4().hex[:6]
+        self.a, self.b, self.ref = f"TEST_A_{suffix}", f"TEST_B_{suffix}", f"TEST_REF_{suffix}"
+
+    def _record(self, winner):
+        response = self.session.post(f"{BASE_URL}/api/sport/matches", json={
+            "player_a_name": self.a, "player_b_name": self.b,
+            "referee_name": self.ref, "winner_name": winner,
+        })
+        assert response.status_code == 200, response.text
+        return response.json()
+
+    def _player(self, player_id):
+        return requests.get(f"{BASE_URL}/api/sport/players/{player_id}").json()
+
+    def test_stats_after_matches(self):
+        first = self._record(self.a)
+        self._record(self.a)
+        last = self._record(self.b)
+
+        pa = self._player(first["player_a"]["player_id"])
+        pb = self._player(first["player_b"]["player_id"])
+        ref = self._player(first["referee"]["player_id"])
+
+        assert pa["stats"]["matches"] == 3
+        assert pa["stats"]["wins"] == 2 and pa["stats"]["losses"] == 1
+        assert pa["stats"]["win_rate"] == 67
+        assert pa["stats"]["current_streak"] == 0 and pa["stats"]["best_streak"] == 2
+        assert pb["stats"]["current_streak"] == 1 and pb["stats"]["win_rate"] == 33
+        assert pa["elo"] + pb["elo"] == first["player_a"]["elo_before"] + first["player_b"]["elo_before"]
+        assert pb["elo"] == last["player_b"]["elo_before"] + last["player_b"]["elo_change"]
+        assert ref["stats"]["matches_refereed"] == 3
+
+    def test_replay_rebuilds_ratings_after_delete(self):
+        first = self._record(self.a)
+        second = self._record(self.b)
+        pa_id = first["player_a"]["player_id"]
+
+        assert self.session.delete(f"{BASE_URL}/api/sport/matches/{first['match_id']}").status_code == 200
+        summary = self.session.post(f"{BASE_URL}/api/sport/ratings/replay").json()
+        assert summary["scope"] == "global"
+
+        # The remaining match is now the players' first one
+        history = requests.get(f"{BASE_URL}/api/sport/players/{pa_id}/rating-history").json()
+        assert len(history["r"]) == len(history["t"])
+        match = self.session.get(f"{BASE_URL}/api/sport/matches/{second['match_id']}").json()
+        assert match["player_a"]["elo_before"] == first["player_a"]["elo_before"]
+        assert history["r"][-1] == self._player(pa_id)["elo"]
+
+    def test_replay_keeps_instant_elo(self):
+        """Recording and replaying use the same K, so a fresh history replays unchanged"""
+        matches = [self._record(w) for w in (self.a, self.a, self.b)]
+        self.session.post(f"{BASE_URL}/api/sport/ratings/replay")
+        for recorded in matches:
+            replayed = self.session.get(f"{BASE_URL}/api/sport/matches/{recorded['match_id']}").json()
+            assert replayed["player_a"]["elo_change"] == recorded["player_a"]["elo_change"]
+            assert replayed["player_b"]["elo_change"] == recorded["player_b"]["elo_change"]
@@ -0,0 +1,71 @@
+"""
+Store Analytics Rollups Tests
+Tests for the materialized rollups behind /api/store/analytics/comprehensive
+"""
+import pytest
+import requests
+import os
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+
+class TestStoreAnalyticsRollups:
+    """Dashboard served from rollups + rebuild/status endpoints"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.session = requests.Session()
+        self.session.headers.update({"Content-Type": "application/json"})
+        login = self.session.post(f"{BASE_URL}/api/auth-v2/login", json={
+            "email": "teck@koh.one",
+            "password": "Acdb##0897"
+        })
+        assert login.status_code == 200, f"Admin login failed: {login.text}"
+        self.session.headers.update({"Authorization": f"Bearer {login.json().get('token')}"})
+
+    def test_rebuild_rollups(self):
+        response = self.session.post(f"{BASE_URL}/api/store/analytics/rollups/rebuild")
+        assert response.status_code == 200
+        data = response.json()
+        assert "rebuilt_at" in data
+        assert "version" in data
+
+    def test_rollup_status(self):
+        response = self.session.get(f"{BASE_URL}/api/store/analytics/rollups/status")
+        assert response.status_code == 200
+        data = response.json()
+        assert "collections" in data
+        assert "store_analytics_daily" in data["collections"]
+
+    @pytest.mark.parametrize("period", ["all", "week", "month", "quarter", "year"])
+    def test_comprehensive_shape(self, period):
+        response = self.session.get(
+            f"{BASE_URL}/api/store/analytics/comprehensive", params={"period": period}
+        )
+        assert response.status_code == 200
+        data = response.json()
+        for key in ("revenue", "orders", "inventory", "by_grade", "by_client",
+                    "by_student", "by_book", "trends", "alerts", "purchase_recommendations"):
+            assert key in data
+        assert isinstance(data["orders"]["by_status"], dict)
+        assert isinstance(data["trends"]["monthly"], list)
+        assert "draft" not in data["orders"]["by_status"]
+
+    def test_all_period_matches_status_totals(self):
+        """Lifetime revenue equals the sum of non-cancelled status buckets"""
+        data = self.session.get(f"{BASE_URL}/api/store/analytics/comprehensive").json()
+        by_status = data["orders"]["by_status"]
+        expected = sum(v["count"] for k, v in by_status.items() if k != "cancelled")
+        assert data["revenue"].get("order_count", 0) == expected
+
+    def test_requires_admin(self):
+        response = requests.get(f"{BASE_URL}/api/store/analytics/comprehensive")
+        assert response.status_code in (401, 403)
+
+    def test_rebuild_matches_incremental_totals(self):
+        """A rebuild replaces rows in place: totals before and after agree"""
+        before = self.session.get(f"{BASE_URL}/api/store/analytics/comprehensive").json()
+        self.session.post(f"{BASE_URL}/api/store/analytics/rollups/rebuild")
+        after = self.session.get(f"{BASE_URL}/api/store/analytics/comprehensive").json()
+        assert before["orders"]["by_status"] == after["orders"]["by_status"]
+        assert before["revenue"] == after["revenue"]
@@ -0,0 +1,45 @@
+"""
+Sysbook Duplicate Detection Tests
+Code-prefix families and opt-in similar-name clusters from /api/sysbook/merge
+"""
+import pytest
+import requests
+import os
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+
+class TestDuplicateDetection:
+    """GET /api/sysbook/merge/detect-duplicates"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.session = requests.Session()
+        login = self.session.post(f"{BASE_URL}/api/auth-v2/login", json={
+            "email": "teck@koh.one",
+            "password": "Acdb##0897"
+        })
+        assert login.status_code == 200, f"Admin login failed: {login.text}"
+        self.headers = {"Authorization": f"Bearer {login.json().get('token')}"}
+
+    def test_code_families(self):
+        res = requests.get(f"{BASE_URL}/api/sysbook/merge/detect-duplicates", headers=self.headers)
+        assert res.status_code == 200, res.text
+        data = res.json()
+        assert data["total_duplicates"] == len(data["groups"])
+        assert "name_groups" not in data
+        for group in data["groups"]:
+            keep = group["items"][0]
+            assert group["suggested_keep"] == keep["book_id"]
+            assert keep["code"].strip() == group["normalized_code"]
+            for item in group["items"][1:]:
+                assert item["code"].strip().startswith(group["normalized_code"])
+                assert item["code"].strip()[len(group["normalized_code"])] in " \t"
+
+    def test_similar_names_opt_in(self):
+        res = requests.get(f"{BASE_URL}/api/sysbook/merge/detect-duplicates",
+                           params={"include_names": "true"}, headers=self.headers)
+        assert res.status_code == 200, res.text
+        for group in res.json()["name_groups"]:
+            assert len(group["items"]) >= 2
+            assert len({item["grade"] for item in group["items"]}) == 1
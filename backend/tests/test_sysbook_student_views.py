@@ -0,0 +1,56 @@
+"""
+Sysbook Student Views Tests
+Paginated admin student list with school names, cached access summary
+"""
+import pytest
+import requests
+import os
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+
+class TestSysbookStudentViews:
+    """Admin student listing and browse access"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.session = requests.Session()
+        login = self.session.post(f"{BASE_URL}/api/auth-v2/login", json={
+            "email": "teck@koh.one",
+            "password": "Acdb##0897"
+        })
+        assert login.status_code == 200, f"Admin login failed: {login.text}"
+        self.headers = {"Authorization": f"Bearer {login.json().get('token')}"}
+
+    def test_all_students_is_paginated(self):
+        res = requests.get(f"{BASE_URL}/api/sysbook/access/admin/all-students",
+                           params={"limit": 5}, headers=self.headers)
+        assert res.status_code == 200, res.text
+        data = res.json()
+        assert len(data["students"]) <= 5
+        assert data["total"] >= len(data["students"])
+        for student in data["students"]:
+            assert student.get("school_name")
+            assert "status" in student and "grade" in student
+
+    def test_pages_do_not_overlap(self):
+        url = f"{BASE_URL}/api/sysbook/access/admin/all-students"
+        first = requests.get(url, params={"limit": 3}, headers=self.headers).json()
+        if first["total"] <= 3:
+            pytest.skip("Not enough students for a second page")
+        second = requests.get(url, params={"skip": 3, "limit": 3}, headers=self.headers).json()
+        first_ids = {s["student_id"] for s in first["students"]}
+        assert not first_ids & {s["student_id"] for s in second["students"]}
+        assert second["total"] == first["total"]
+
+    def test_limit_is_bounded(self):
+        res = requests.get(f"{BASE_URL}/api/sysbook/access/admin/all-students",
+                           params={"limit": 5000}, headers=self.headers)
+        assert res.status_code == 422
+
+    def test_browse_access_is_stable(self):
+        url = f"{BASE_URL}/api/sysbook/browse/access"
+        first = requests.get(url, headers=self.headers)
+        assert first.status_code == 200, first.text
+        assert first.json() == requests.get(url, headers=self.headers).json()
+        assert "has_access" in first.json() and "grades" in first.json()
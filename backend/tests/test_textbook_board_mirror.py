@@ -0,0 +1,43 @@
+"""
+Textbook Board Mirror Tests
+Tests for the indexed Textbooks board item mirror behind the board sync
+"""
+import pytest
+import requests
+import os
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+
+class TestTextbookBoardMirror:
+    """/api/sysbook/presale-import/textbooks-map/* endpoints"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.session = requests.Session()
+        self.session.headers.update({"Content-Type": "application/json"})
+        login = self.session.post(f"{BASE_URL}/api/auth-v2/login", json={
+            "email": "teck@koh.one",
+            "password": "Acdb##0897"
+        })
+        assert login.status_code == 200, f"Admin login failed: {login.text}"
+        self.session.headers.update({"Authorization": f"Bearer {login.json().get('token')}"})
+
+    def test_mirror_status(self):
+        response = self.session.get(f"{BASE_URL}/api/sysbook/presale-import/textbooks-map/status")
+        assert response.status_code == 200
+        data = response.json()
+        for key in ("board_id", "items", "keys", "revision", "full_reconciled_at"):
+            assert key in data
+
+    def test_refresh_reports_counts(self):
+        response = self.session.post(f"{BASE_URL}/api/sysbook/presale-import/refresh-textbooks-map")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["status"] == "ok"
+        assert "items_mapped" in data
+        assert "changed" in data
+
+    def test_status_requires_admin(self):
+        response = requests.get(f"{BASE_URL}/api/sysbook/presale-import/textbooks-map/status")
+        assert response.status_code in (401, 403)
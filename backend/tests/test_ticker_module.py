@@ -5,11 +5,59 @@ Tests: Public feed, Admin config, Sponsor CRUD
 import pytest
 import requests
 import os
+import time
+import uuid
 from datetime import datetime
 
 BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', 'https://deployment-blocker-11.preview.emergentagent.com').rstrip('/')
 
 
+class TestTickerActivityEvents:
+    """Activities written through the app reach the feed"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.session = requests.Session()
+        self.session.headers.update({"Content-Type": "application/json"})
+        login = self.session.post(f"{BASE_URL}/api/auth-v2/login", json={
+            "email": "teck@koh.one",
+            "password": "Acdb##0897"
+        })
+        assert login.status_code == 200, f"Admin login failed: {login.text}"
+        self.session.headers.update({"Authorization": f"Bearer {login.json().get('token')}"})
+
+    def _wait_for(self, text, timeout=40):
+        """Same worker: immediate (event); any other worker: next backfill"""
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            texts = [a["text"] for a in requests.get(f"{BASE_URL}/api/ticker/feed").json().get("activities", [])]
+            if any(text in t for t in texts):
+                return True
+            time.sleep(1)
+        return False
+
+    def test_recorded_sport_match_appears(self):
+        suffix = uuid.uuid4().hex[:6]
+        a, b = f"TEST_TA_{suffix}", f"TEST_TB_{suffix}"
+        res = self.session.post(f"{BASE_URL}/api/sport/matches", json={
+            "player_a_name": a, "player_b_name": b, "referee_name": f"TEST_TR_{suffix}", "winner_name": b,
+        })
+        assert res.status_code == 200, res.text
+        assert self._wait_for(f"{b} won vs {a}")
+
+    def test_registered_user_survives_backfill(self):
+        suffix = uuid.uuid4().hex[:6]
+        name = f"TEST_TU_{suffix}"
+        res = requests.post(f"{BASE_URL}/api/auth-v2/register", json={
+            "email": f"test_ticker_{suffix}@example.com", "password": "TestPass123!", "name": name,
+        })
+        assert res.status_code in (200, 201), res.text
+        assert self._wait_for(f"{name} joined the community")
+        # The 30s backfill rebuilds the ring from the same users the event came from
+        time.sleep(35)
+        assert self._wait_for(f"{name} joined the community", timeout=5)
+
+
 class TestTickerPublicFeed:
     """Tests for GET /api/ticker/feed — public endpoint"""
 
@@ -64,6 +112,19 @@ class TestTickerPublicFeed:
             assert activity.get("type") in valid_types, f"Invalid type: {activity.get('type')}"
         print(f"PASS: All activity types are valid: {set(a.get('type') for a in activities)}")
 
+    def test_feed_etag_revalidation(self):
+        """Unchanged feed should answer If-None-Match with 304 and no body"""
+        res = requests.get(f"{BASE_URL}/api/ticker/feed")
+        etag = res.headers.get("ETag")
+        assert etag, "Feed should send an ETag"
+        res = requests.get(f"{BASE_URL}/api/ticker/feed", headers={"If-None-Match": etag})
+        assert res.status_code in (200, 304)
+        if res.status_code == 304:
+            assert res.content == b""
+        else:
+            assert res.headers.get("ETag") != etag, "200 only when the feed changed"
+        print(f"PASS: Feed revalidation returned {res.status_code}")
+
 
 class TestTickerAdminConfig:
     """Tests for admin ticker config endpoints"""
@@ -67,6 +67,57 @@ class TestAdminAllUsers:
         
         print(f"PASS: /api/wallet/admin/all-users returns {len(users)} users")
 
+    def test_all_users_keyset_pages(self):
+        """Test pages follow next_cursor without overlap; totals come with the first page"""
+        token = self._admin_login()
+        self.session.headers.update({"Authorization": f"Bearer {token}"})
+        url = f"{BASE_URL}/api/wallet/admin/all-users"
+
+        for sort in ["name", "balance", "activity"]:
+            first = self.session.get(url, params={"limit": 5, "sort": sort}).json()
+            assert "total" in first and "total_balance" in first and "users_with_balance" in first
+            assert len(first["users"]) <= 5
+            if not first["next_cursor"]:
+                continue
+            second = self.session.get(url, params={"limit": 5, "sort": sort, "cursor": first["next_cursor"]}).json()
+            assert "total" not in second
+            seen = {u["user_id"] for u in first["users"]}
+            assert not seen & {u["user_id"] for u in second["users"]}, f"Pages overlap for sort={sort}"
+            if sort == "balance":
+                balances = [(u["wallet"] or {}).get("balance_usd", 0) for u in first["users"] + second["users"]]
+                assert balances == sorted(balances, reverse=True)
+
+    def test_all_users_prefix_search(self):
+        """Test server-side prefix search on email"""
+        token = self._admin_login()
+        self.session.headers.update({"Authorization": f"Bearer {token}"})
+
+        response = self.session.get(f"{BASE_URL}/api/wallet/admin/all-users", params={"q": "juan.perez"})
+        assert response.status_code == 200, f"Failed: {response.text}"
+        data = response.json()
+        assert all(u["email"].startswith("juan.perez") or (u["name"] or "").lower().startswith("juan.perez")
+                   for u in data["users"])
+        assert data["total"] == len(data["users"]) or data["next_cursor"]
+
+    def test_all_users_excludes_archived_on_request(self):
+        """Test include_archived=false drops archived users from the page and the totals"""
+        token = self._admin_login()
+        self.session.headers.update({"Authorization": f"Bearer {token}"})
+        url = f"{BASE_URL}/api/wallet/admin/all-users"
+
+        everyone = self.session.get(url, params={"limit": 200}).json()
+        active = self.session.get(url, params={"limit": 200, "include_archived": "false"}).json()
+        assert not any(u["archived"] for u in active["users"])
+        archived = sum(1 for u in everyone["users"] if u["archived"])
+        if not everyone["next_cursor"]:
+            assert active["total"] == everyone["total"] - archived
+
+    def test_all_users_rejects_bad_cursor(self):
+        token = self._admin_login()
+        self.session.headers.update({"Authorization": f"Bearer {token}"})
+        response = self.session.get(f"{BASE_URL}/api/wallet/admin/all-users", params={"cursor": "not-a-cursor"})
+        assert response.status_code == 400
+
 
 class TestAdminAdjustWallet:
     """Test POST /api/wallet/admin/adjust/{user_id} endpoint"""
@@ -8,9 +8,7 @@
 import { useState, useEffect, useCallback, useRef } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { ChevronLeft, ChevronRight, ExternalLink } from 'lucide-react';
-import RESOLVED_API_URL from '@/config/apiUrl';
-
-const API_URL = RESOLVED_API_URL;
+import { loadPublicSection } from '@/config/publicBootstrap';
 
 const FONT_SIZES = { sm: 'text-sm', md: 'text-base', lg: 'text-lg', xl: 'text-xl' };
 
@@ -53,8 +51,7 @@ export default function BannerCarousel() {
   const navigate = useNavigate();
 
   useEffect(() => {
-    fetch(`${API_URL}/api/showcase/banners`)
-      .then(r => r.ok ? r.json() : [])
+    loadPublicSection('banners', '/api/showcase/banners')
       .then(data => setBanners(data.length > 0 ? data : DEFAULT_BANNERS))
       .catch(() => setBanners(DEFAULT_BANNERS));
   }, []);
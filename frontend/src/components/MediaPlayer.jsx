@@ -7,9 +7,7 @@ import { useState, useEffect, useRef, useCallback, useMemo } from 'react';
 import { Play, Pause, ChevronLeft, ChevronRight, Volume2, VolumeX, Image } from 'lucide-react';
 import { useTranslation } from 'react-i18next';
 import SectionTitle from '@/components/ui/SectionTitle';
-import RESOLVED_API_URL from '@/config/apiUrl';
-
-const API_URL = RESOLVED_API_URL;
+import { loadPublicSection } from '@/config/publicBootstrap';
 
 const DEFAULT_CONFIG = {
   album_title: '',
@@ -133,8 +131,7 @@ export default function MediaPlayer() {
   /* Fetch config with cache fallback */
   useEffect(() => {
     const CACHE_KEY = 'chipi_media_player';
-    fetch(`${API_URL}/api/showcase/media-player`, { signal: AbortSignal.timeout(8000) })
-      .then(r => r.ok ? r.json() : null)
+    loadPublicSection('media_player', '/api/showcase/media-player')
       .then(data => {
         if (data?.items?.length > 0) {
           setConfig({ ...DEFAULT_CONFIG, ...data });
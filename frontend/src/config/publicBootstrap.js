@@ -0,0 +1,33 @@
+/**
+ * Public bootstrap bundle
+ * First-paint config (site config, UI style, module statuses, banners, media
+ * player, layout icons, ...) comes from a single cached request to
+ * GET /api/public/bootstrap, shared by every loader on the page.
+ *
+ * Each loader reads its section from the bundle and falls back to the
+ * section's own endpoint when the bundle is unavailable or that section
+ * failed to build (null). Refreshes after an admin save should call the
+ * endpoint directly.
+ */
+import RESOLVED_API_URL from './apiUrl';
+
+const API_URL = RESOLVED_API_URL;
+
+let bundlePromise = null;
+
+export function loadBootstrap() {
+  if (!bundlePromise) {
+    bundlePromise = fetch(`${API_URL}/api/public/bootstrap`, { signal: AbortSignal.timeout(8000) })
+      .then(r => (r.ok ? r.json() : null))
+      .catch(() => null);
+  }
+  return bundlePromise;
+}
+
+export async function loadPublicSection(section, fallbackPath) {
+  const bundle = await loadBootstrap();
+  if (bundle && bundle[section] != null) return bundle[section];
+  const res = await fetch(`${API_URL}${fallbackPath}`, { signal: AbortSignal.timeout(8000) });
+  if (!res.ok) throw new Error(`${fallbackPath} returned ${res.status}`);
+  return res.json();
+}
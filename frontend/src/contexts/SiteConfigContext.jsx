@@ -1,6 +1,7 @@
 import { createContext, useContext, useState, useEffect } from 'react';
 import axios from 'axios';
 import RESOLVED_API_URL from '@/config/apiUrl';
+import { loadPublicSection } from '@/config/publicBootstrap';
 
 const BACKEND_URL = RESOLVED_API_URL;
 
@@ -36,10 +37,12 @@ export function SiteConfigProvider({ children }) {
   });
   const [loading, setLoading] = useState(true);
 
-  const fetchConfig = async () => {
+  const fetchConfig = async (fresh = false) => {
     try {
-      const response = await axios.get(`${BACKEND_URL}/api/public/site-config`);
-      setSiteConfig(response.data);
+      const data = fresh
+        ? (await axios.get(`${BACKEND_URL}/api/public/site-config`)).data
+        : await loadPublicSection('site_config', '/api/public/site-config');
+      setSiteConfig(data);
     } catch (error) {
       console.error('Error fetching site config:', error);
     } finally {
@@ -52,7 +55,7 @@ export function SiteConfigProvider({ children }) {
   }, []);
 
   const refreshConfig = () => {
-    fetchConfig();
+    fetchConfig(true);
   };
 
   return (
@@ -2,6 +2,7 @@ import { createContext, useContext, useEffect, useState, useCallback, useMemo }
 import axios from 'axios';
 import { applyUIStyle, clearUIStyle } from '@/config/uiStylePresets';
 import RESOLVED_API_URL from '@/config/apiUrl';
+import { loadPublicSection } from '@/config/publicBootstrap';
 
 const API_URL = RESOLVED_API_URL;
 
@@ -70,7 +71,7 @@ export function ThemeProvider({ children }) {
       }
 
       try {
-        const { data } = await axios.get(`${API_URL}/api/public/ui-style`);
+        const data = await loadPublicSection('ui_style', '/api/public/ui-style');
         // Handle both old format ({style: ...}) and new format ({public: ..., admin: ...})
         if (data.public) {
           setUIStyles({ public: data.public, admin: data.admin });
@@ -155,6 +155,7 @@ export default function DataCleanupModule() {
   const [previewing, setPreviewing] = useState(false);
   const [executing, setExecuting] = useState(false);
   const [result, setResult] = useState(null);
+  const [progress, setProgress] = useState(null);
 
   const fetchStudents = useCallback(async () => {
     setLoading(true);
@@ -235,36 +236,58 @@ export default function DataCleanupModule() {
     }
   };
 
+  // Poll the cleanup job, showing per-collection progress until it finishes
+  const pollJob = async (jobId) => {
+    for (let i = 0; i < 300; i++) { // max ~10 min
+      await new Promise(r => setTimeout(r, 2000));
+      let job;
+      try {
+        const res = await fetch(`${API}/api/cleanup/jobs/${jobId}`, {
+          headers: { Authorization: `Bearer ${token}` },
+        });
+        if (!res.ok) continue;
+        job = await res.json();
+      } catch { continue; /* retry */ }
+      setProgress(job.progress || null);
+      if (job.status === 'done') return job.result;
+      if (job.status === 'error') throw new Error(job.error || 'Cleanup failed');
+    }
+    throw new Error('Cleanup is still running after 10 minutes');
+  };
+
   const handleExecute = async () => {
     if (!preview) {
       toast.error('Run preview first');
       return;
     }
     setExecuting(true);
+    setProgress(null);
     try {
       const body = { delete_monday_items: deleteMondayItems };
       if (selectedIds.size > 0) body.student_ids = [...selectedIds];
       if (demoOnly) body.demo_only = true;
 
-      const res = await fetch(`${API}/api/cleanup/execute`, {
+      const res = await fetch(`${API}/api/cleanup/jobs`, {
         method: 'POST',
         headers: { 'Content-Type': 'application/json', Authorization: `Bearer ${token}` },
         body: JSON.stringify(body),
       });
-      if (res.ok) {
-        const data = await res.json();
-        setResult(data.results);
-        setPreview(null);
-        toast.success('Cleanup completed');
-        fetchStudents();
-      } else {
+      if (!res.ok) {
         const err = await res.json();
         toast.error(err.detail || 'Cleanup failed');
+        return;
       }
-    } catch {
-      toast.error('Cleanup failed');
+      const { job_id } = await res.json();
+      const results = await pollJob(job_id);
+      setResult(results);
+      setPreview(null);
+      toast.success('Cleanup completed');
+      fetchStudents();
+    } catch (e) {
+      toast.error(e?.message || 'Cleanup failed');
     } finally {
       setExecuting(false);
+      setProgress(null);
     }
   };
 
@@ -352,6 +375,25 @@ export default function DataCleanupModule() {
         </div>
       )}
 
+      {/* Execution progress */}
+      {executing && progress && (
+        <div className="border rounded-xl p-4 bg-card" data-testid="cleanup-progress">
+          <h4 className="text-sm font-semibold flex items-center gap-1.5 mb-3">
+            <Loader2 className="h-4 w-4 animate-spin" /> Deleting...
+          </h4>
+          <div className="grid grid-cols-2 sm:grid-cols-3 gap-2 text-xs">
+            {Object.entries(progress).map(([key, val]) => (
+              <div key={key} className="px-2 py-1.5 rounded border">
+                <p className="text-muted-foreground capitalize">{key.replace(/_/g, ' ')}</p>
+                <p className="font-bold">
+                  {typeof val === 'object' ? `${val.deleted} / ${val.attempted}` : val}
+                </p>
+              </div>
+            ))}
+          </div>
+        </div>
+      )}
+
       {/* Execution result */}
       {result && (
         <div className="border rounded-xl p-4 bg-green-50 dark:bg-green-950/20 border-green-200 dark:border-green-900" data-testid="cleanup-result">
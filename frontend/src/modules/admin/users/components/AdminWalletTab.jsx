@@ -24,6 +24,7 @@ import {
   TableRow,
 } from '@/components/ui/table';
 import { Textarea } from '@/components/ui/textarea';
+import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from '@/components/ui/select';
 import { toast } from 'sonner';
 import axios from 'axios';
 import {
@@ -34,41 +35,45 @@ import { useTranslation } from 'react-i18next';
 import RESOLVED_API_URL from '@/config/apiUrl';
 
 const API_URL = RESOLVED_API_URL;
+const PAGE_SIZE = 50;
 
 export default function AdminWalletTab({ token }) {
   const { t } = useTranslation();
   const [users, setUsers] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [searchQuery, setSearchQuery] = useState('');
+  const [debouncedQuery, setDebouncedQuery] = useState('');
+  const [sort, setSort] = useState('name');
+  const [nextCursor, setNextCursor] = useState(null);
   const [adjustDialog, setAdjustDialog] = useState(null); // { user, action: 'topup' | 'deduct' }
   const [adjustAmount, setAdjustAmount] = useState('');
   const [adjustDescription, setAdjustDescription] = useState('');
   const [adjusting, setAdjusting] = useState(false);
   const [stats, setStats] = useState({ totalUsers: 0, totalBalance: 0, usersWithBalance: 0 });
 
+  // Search runs on the server (prefix of name or email)
+  useEffect(() => {
+    const timer = setTimeout(() => setDebouncedQuery(searchQuery.trim()), 300);
+    return () => clearTimeout(timer);
+  }, [searchQuery]);
+
+  const fetchPage = useCallback((cursor) => axios.get(`${API_URL}/api/wallet/admin/all-users`, {
+    headers: { Authorization: `Bearer ${token}` },
+    params: { q: debouncedQuery || undefined, sort, limit: PAGE_SIZE, cursor: cursor || undefined }
+  }), [token, debouncedQuery, sort]);
+
   const fetchUsersWithWallets = useCallback(async () => {
     setLoading(true);
     try {
-      // Fetch all users with wallets in one call
-      const res = await axios.get(`${API_URL}/api/wallet/admin/all-users`, {
-        headers: { Authorization: `Bearer ${token}` }
-      });
-      const usersWithWallets = res.data.users || [];
-
-      setUsers(usersWithWallets);
-
-      // Calculate stats
-      const totalBalance = usersWithWallets.reduce(
-        (sum, u) => sum + (u.wallet?.balance_usd || 0), 0
-      );
-      const usersWithBalance = usersWithWallets.filter(
-        u => (u.wallet?.balance_usd || 0) > 0
-      ).length;
-
+      // First page, with totals for the current search
+      const res = await fetchPage(null);
+      setUsers(res.data.users || []);
+      setNextCursor(res.data.next_cursor || null);
       setStats({
-        totalUsers: usersWithWallets.length,
-        totalBalance,
-        usersWithBalance
+        totalUsers: res.data.total || 0,
+        totalBalance: res.data.total_balance || 0,
+        usersWithBalance: res.data.users_with_balance || 0
       });
     } catch (error) {
       console.error('Error fetching users:', error);
@@ -76,7 +81,21 @@ export default function AdminWalletTab({ token }) {
     } finally {
       setLoading(false);
     }
-  }, [token]);
+  }, [fetchPage]);
+
+  const loadMore = async () => {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    try {
+      const res = await fetchPage(nextCursor);
+      setUsers(prev => [...prev, ...(res.data.users || [])]);
+      setNextCursor(res.data.next_cursor || null);
+    } catch (error) {
+      toast.error('Error loading users');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
 
   useEffect(() => {
     fetchUsersWithWallets();
@@ -117,15 +136,6 @@ export default function AdminWalletTab({ token }) {
     }
   };
 
-  const filteredUsers = users.filter(u => {
-    if (!searchQuery) return true;
-    const q = searchQuery.toLowerCase();
-    return (
-      (u.name || '').toLowerCase().includes(q) ||
-      (u.email || '').toLowerCase().includes(q)
-    );
-  });
-
   return (
     <div className="space-y-6">
       {/* Stats Cards */}
@@ -171,6 +181,16 @@ export default function AdminWalletTab({ token }) {
             data-testid="wallet-search-input"
           />
         </div>
+        <Select value={sort} onValueChange={setSort}>
+          <SelectTrigger className="w-44" data-testid="wallet-sort-select">
+            <SelectValue />
+          </SelectTrigger>
+          <SelectContent>
+            <SelectItem value="name">Sort by name</SelectItem>
+            <SelectItem value="balance">Highest balance</SelectItem>
+            <SelectItem value="activity">Recent activity</SelectItem>
+          </SelectContent>
+        </Select>
         <Button variant="outline" onClick={fetchUsersWithWallets} disabled={loading} data-testid="refresh-wallets-btn">
           <RefreshCw className={`h-4 w-4 ${loading ? 'animate-spin' : ''}`} />
         </Button>
@@ -195,14 +215,14 @@ export default function AdminWalletTab({ token }) {
               </TableRow>
             </TableHeader>
             <TableBody>
-              {filteredUsers.length === 0 ? (
+              {users.length === 0 ? (
                 <TableRow>
                   <TableCell colSpan={6} className="text-center py-8 text-muted-foreground">
                     No users found
                   </TableCell>
                 </TableRow>
               ) : (
-                filteredUsers.map((user) => (
+                users.map((user) => (
                   <TableRow key={user.user_id} data-testid={`wallet-row-${user.user_id}`}>
                     <TableCell className="font-medium">
                       {user.name || 'N/A'}
@@ -253,6 +273,14 @@ export default function AdminWalletTab({ token }) {
               )}
             </TableBody>
           </Table>
+          {nextCursor && (
+            <div className="flex justify-center p-3 border-t">
+              <Button variant="ghost" size="sm" onClick={loadMore} disabled={loadingMore} data-testid="wallet-load-more-btn">
+                {loadingMore && <Loader2 className="h-4 w-4 animate-spin mr-2" />}
+                Load more ({users.length} of {stats.totalUsers})
+              </Button>
+            </div>
+          )}
         </Card>
       )}
 
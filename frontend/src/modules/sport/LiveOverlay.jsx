@@ -6,6 +6,7 @@ import { useState, useEffect, useCallback, useRef } from 'react';
 import { useParams } from 'react-router-dom';
 import MomentumGraph from './components/MomentumGraph';
 import RESOLVED_API_URL from '@/config/apiUrl';
+import { applyLiveFrame } from './liveStream';
 
 const API = RESOLVED_API_URL;
 
@@ -14,13 +15,18 @@ export default function LiveOverlay() {
   const [state, setState] = useState(null);
   const [session, setSession] = useState(null);
 
+  const seqRef = useRef(null);
+
   const fetchState = useCallback(async () => {
     try {
-      const [stateRes, sessionRes] = await Promise.all([
-        fetch(`${API}/api/sport/live/${sessionId}/state`),
-        fetch(`${API}/api/sport/live/${sessionId}`),
-      ]);
-      if (stateRes.ok) setState(await stateRes.json());
+      const since = seqRef.current != null ? `?since=${seqRef.current}` : '';
+      const stateRes = await fetch(`${API}/api/sport/live/${sessionId}/state${since}`);
+      if (stateRes.status === 304 || !stateRes.ok) return;
+      const data = await stateRes.json();
+      setState(prev => (data.deltas ? data.deltas.reduce(applyLiveFrame, prev) : data));
+      seqRef.current = data.seq;
+      // Names/photos only change with the state, so refetch the session on change
+      const sessionRes = await fetch(`${API}/api/sport/live/${sessionId}`);
       if (sessionRes.ok) setSession(await sessionRes.json());
     } catch {}
   }, [sessionId]);
@@ -134,7 +134,11 @@ export default function LiveRefPanel() {
     if (!sessionId) return;
     try {
       const ws = new WebSocket(`${API.replace('http', 'ws')}/api/sport/ws/live/${sessionId}`);
-      ws.onmessage = () => fetchSession();
+      ws.onmessage = (e) => {
+        // Spectator reaction ticks don't change the match state
+        try { if (JSON.parse(e.data).type === 'reaction') return; } catch {}
+        fetchSession();
+      };
       return () => ws.close();
     } catch {}
   }, [sessionId, fetchSession]);
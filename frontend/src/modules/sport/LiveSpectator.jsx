@@ -12,6 +12,7 @@ import EmotionOverlay from './components/EmotionOverlay';
 import { AblyChatProvider } from '@/modules/ably/AblyProvider';
 import LiveChat from '@/modules/ably/LiveChat';
 import RESOLVED_API_URL from '@/config/apiUrl';
+import { applyLiveFrame } from './liveStream';
 
 const API = RESOLVED_API_URL;
 
@@ -31,14 +32,22 @@ export default function LiveSpectator() {
   const [fullSession, setFullSession] = useState(null);
   const wsRef = useRef(null);
   const pollRef = useRef(null);
+  const seqRef = useRef(null);
 
   const fetchState = useCallback(async () => {
     try {
-      const r = await fetch(`${API}/api/sport/live/${sessionId}/state`);
+      const since = seqRef.current != null ? `?since=${seqRef.current}` : '';
+      const r = await fetch(`${API}/api/sport/live/${sessionId}/state${since}`);
+      if (r.status === 304) return;
       if (r.ok) {
         const data = await r.json();
-        setState(data);
-        setReactions(data.reactions || {});
+        if (data.deltas) {
+          setState(prev => data.deltas.reduce(applyLiveFrame, prev));
+        } else {
+          setState(data);
+          setReactions(data.reactions || {});
+        }
+        seqRef.current = data.seq;
       }
     } catch {}
   }, [sessionId]);
@@ -55,20 +64,28 @@ export default function LiveSpectator() {
     if (!sessionId) return;
     let wsConnected = false;
     try {
-      const wsUrl = `${API.replace('http', 'ws')}/api/sport/ws/live/${sessionId}`;
+      const since = seqRef.current != null ? `?since=${seqRef.current}` : '';
+      const wsUrl = `${API.replace('http', 'ws')}/api/sport/ws/live/${sessionId}${since}`;
       const ws = new WebSocket(wsUrl);
       ws.onopen = () => { wsConnected = true; };
+      ws.onclose = () => { wsConnected = false; };
       ws.onmessage = (e) => {
         const msg = JSON.parse(e.data);
-        if (msg.type === 'point') {
-          setState(prev => ({ ...prev, ...msg.data }));
-          if (msg.data.emotions?.length > 0) {
-            setEmotion(msg.data.emotions[0]);
-            setTimeout(() => setEmotion(null), 3000);
-          }
+        if (msg.type === 'reaction') { setReactions(msg.data); return; }
+        if (msg.type === 'snapshot') {
+          setState(msg.data);
+          seqRef.current = msg.seq;
+          return;
+        }
+        // Sequenced delta: skip anything already applied
+        if (msg.seq == null || (seqRef.current != null && msg.seq <= seqRef.current)) return;
+        if (seqRef.current != null && msg.seq > seqRef.current + 1) { fetchState(); return; }
+        setState(prev => applyLiveFrame(prev, msg));
+        seqRef.current = msg.seq;
+        if (msg.type === 'point' && msg.data?.emotions?.length > 0) {
+          setEmotion(msg.data.emotions[0]);
+          setTimeout(() => setEmotion(null), 3000);
         }
-        if (msg.type === 'reaction') setReactions(msg.data);
-        if (msg.type === 'undo' || msg.type === 'ended') fetchState();
       };
       wsRef.current = ws;
     } catch {}
@@ -0,0 +1,29 @@
+/**
+ * Live state stream helpers — apply sequenced delta frames from
+ * /api/sport/live/{id}/state?since= and /api/sport/ws/live/{id}?since=
+ */
+
+const setPath = (obj, path, fn) => {
+  const keys = path.split('.');
+  const root = { ...obj };
+  let node = root;
+  keys.slice(0, -1).forEach((k) => {
+    node[k] = { ...(node[k] || {}) };
+    node = node[k];
+  });
+  const last = keys[keys.length - 1];
+  node[last] = fn(node[last]);
+  return root;
+};
+
+/** Apply one delta frame's patch (set / inc / push / pop by dotted path) to a state object. */
+export function applyLiveFrame(state, frame) {
+  if (!state || !frame?.patch) return state;
+  const { set = {}, inc = {}, push = {}, pop = [] } = frame.patch;
+  let next = { ...state, seq: frame.seq };
+  Object.entries(set).forEach(([path, value]) => { next = setPath(next, path, () => value); });
+  Object.entries(inc).forEach(([path, n]) => { next = setPath(next, path, (v) => (v || 0) + n); });
+  Object.entries(push).forEach(([path, value]) => { next = setPath(next, path, (v) => [...(v || []), value]); });
+  pop.forEach((path) => { next = setPath(next, path, (v) => (v || []).slice(0, -1)); });
+  return next;
+}
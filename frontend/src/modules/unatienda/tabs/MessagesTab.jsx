@@ -18,44 +18,68 @@ import { BoardHeader } from '@/components/shared/BoardHeader';
 import RESOLVED_API_URL from '@/config/apiUrl';
 
 const API = RESOLVED_API_URL;
+const PAGE_SIZE = 50;
 
 export default function MessagesTab({ token }) {
   const [conversations, setConversations] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [loaded, setLoaded] = useState(false);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [search, setSearch] = useState('');
+  const [debouncedSearch, setDebouncedSearch] = useState('');
+  const [total, setTotal] = useState(0);
+  const [totalUnread, setTotalUnread] = useState(0);
   const [chatStudent, setChatStudent] = useState(null);
   const [showConfig, setShowConfig] = useState(false);
 
+  // Search runs on the server (student name or email, whole inbox)
+  useEffect(() => {
+    const timer = setTimeout(() => setDebouncedSearch(search.trim()), 300);
+    return () => clearTimeout(timer);
+  }, [search]);
+
+  const fetchPage = useCallback(async (skip) => {
+    const params = new URLSearchParams({ skip: String(skip), limit: String(PAGE_SIZE) });
+    if (debouncedSearch) params.set('q', debouncedSearch);
+    const res = await fetch(`${API}/api/store/crm-chat/admin/inbox?${params}`, {
+      headers: { Authorization: `Bearer ${token}` },
+    });
+    if (!res.ok) throw new Error(`Inbox returned ${res.status}`);
+    return res.json();
+  }, [token, debouncedSearch]);
+
   const fetchInbox = useCallback(async () => {
+    setLoading(true);
     try {
-      const res = await fetch(`${API}/api/store/crm-chat/admin/inbox`, {
-        headers: { Authorization: `Bearer ${token}` },
-      });
-      if (res.ok) {
-        const data = await res.json();
-        setConversations(data.conversations || []);
-      }
+      const data = await fetchPage(0);
+      setConversations(data.conversations || []);
+      setTotal(data.total || 0);
+      setTotalUnread(data.total_unread || 0);
     } catch (e) {
       console.error('Error fetching inbox:', e);
     } finally {
       setLoading(false);
+      setLoaded(true);
     }
-  }, [token]);
-
-  useEffect(() => { fetchInbox(); }, [fetchInbox]);
+  }, [fetchPage]);
 
-  const filtered = conversations.filter((c) => {
-    if (!search) return true;
-    const q = search.toLowerCase();
-    return (
-      c.student_name?.toLowerCase().includes(q) ||
-      c.user_email?.toLowerCase().includes(q)
-    );
-  });
+  const loadMore = async () => {
+    setLoadingMore(true);
+    try {
+      const data = await fetchPage(conversations.length);
+      setConversations((prev) => [...prev, ...(data.conversations || [])]);
+      setTotal(data.total || 0);
+      setTotalUnread(data.total_unread || 0);
+    } catch (e) {
+      toast.error('Error loading conversations');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
 
-  const totalUnread = conversations.reduce((sum, c) => sum + (c.unread_count || 0), 0);
+  useEffect(() => { fetchInbox(); }, [fetchInbox]);
 
-  if (loading) {
+  if (!loaded) {
     return (
       <div className="flex justify-center py-12">
         <Loader2 className="h-6 w-6 animate-spin text-primary" />
@@ -75,11 +99,11 @@ export default function MessagesTab({ token }) {
         hasActiveFilters={!!search}
         onClearFilters={() => setSearch('')}
         stats={[
-          { label: 'conversations', value: conversations.length, color: 'blue' },
+          { label: 'conversations', value: total, color: 'blue' },
           ...(totalUnread > 0 ? [{ label: 'unread', value: totalUnread, color: 'red', highlight: true }] : []),
         ]}
         loading={loading}
-        onRefresh={() => { setLoading(true); fetchInbox(); }}
+        onRefresh={fetchInbox}
         actions={
           <Button
             size="sm"
@@ -96,14 +120,14 @@ export default function MessagesTab({ token }) {
       {showConfig && <CrmConfigPanel token={token} />}
 
       {/* Conversation list */}
-      {filtered.length === 0 ? (
+      {conversations.length === 0 ? (
         <Card>
           <CardContent className="py-12 text-center">
             <Inbox className="h-10 w-10 mx-auto text-muted-foreground/20 mb-3" />
             <p className="text-sm text-muted-foreground mb-1">
-              {conversations.length === 0
-                ? 'No conversations yet'
-                : 'No conversations match your search'}
+              {debouncedSearch
+                ? 'No conversations match your search'
+                : 'No conversations yet'}
             </p>
             <p className="text-xs text-muted-foreground/60">
               Conversations appear when students send messages
@@ -112,7 +136,7 @@ export default function MessagesTab({ token }) {
         </Card>
       ) : (
         <div className="space-y-1.5">
-          {filtered.map((conv) => (
+          {conversations.map((conv) => (
             <button
               key={conv.student_id}
               onClick={() => setChatStudent(conv)}
@@ -155,6 +179,16 @@ export default function MessagesTab({ token }) {
         </div>
       )}
 
+      {/* Paging: next page of the inbox */}
+      {conversations.length < total && (
+        <div className="flex justify-center">
+          <Button variant="ghost" size="sm" onClick={loadMore} disabled={loadingMore} data-testid="messages-load-more-btn">
+            {loadingMore && <Loader2 className="h-4 w-4 animate-spin mr-2" />}
+            Load more ({conversations.length} of {total})
+          </Button>
+        </div>
+      )}
+
       {/* Chat modal */}
       {chatStudent && (
         <CrmChat
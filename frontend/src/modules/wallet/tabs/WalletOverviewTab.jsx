@@ -1,6 +1,6 @@
 /**
  * WalletOverviewTab — Users with wallets
- * Features: search, multi-select, bulk archive/delete, individual actions
+ * Features: server-side search and paging, multi-select, bulk archive/delete, individual actions
  * Sensitive: Users are archivable; permanent delete requires confirmation
  */
 import { useState, useEffect, useCallback } from 'react';
@@ -24,22 +24,34 @@ import {
   RefreshCw, DollarSign, Users, TrendingUp, Trash2, Archive
 } from 'lucide-react';
 import { useTableSelection } from '@/hooks/useTableSelection';
-import { usePagination } from '@/hooks/usePagination';
 import { BulkActionBar } from '@/components/shared/BulkActionBar';
 import { ConfirmDialog } from '@/components/shared/ConfirmDialog';
 import { AdminTableToolbar } from '@/components/shared/AdminTableToolbar';
-import { TablePagination } from '@/components/shared/TablePagination';
 import { useTranslation } from 'react-i18next';
 import RESOLVED_API_URL from '@/config/apiUrl';
 
 const API_URL = RESOLVED_API_URL;
+const PAGE_SIZE = 50;
+
+// Flatten wallet data into user object for easy access
+const flatten = (raw) => raw.map(u => ({
+  ...u,
+  balance: u.wallet?.balance_usd || 0,
+  total_deposited: u.wallet?.total_deposited || 0,
+  total_spent: u.wallet?.total_spent || 0,
+  is_locked: u.wallet?.is_locked || false,
+}));
 
 export default function WalletOverviewTab() {
   const { t } = useTranslation();
   const token = localStorage.getItem('auth_token');
   const [users, setUsers] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [loaded, setLoaded] = useState(false);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [search, setSearch] = useState('');
+  const [debouncedSearch, setDebouncedSearch] = useState('');
+  const [nextCursor, setNextCursor] = useState(null);
   const [showArchived, setShowArchived] = useState(false);
   const [adjustDialog, setAdjustDialog] = useState(null);
   const [adjustAmount, setAdjustAmount] = useState('');
@@ -49,44 +61,57 @@ export default function WalletOverviewTab() {
   const [bulkLoading, setBulkLoading] = useState(false);
   const [stats, setStats] = useState({ totalUsers: 0, totalBalance: 0, usersWithBalance: 0 });
 
-  const filtered = users.filter(u => {
-    const matchSearch = !search || u.name?.toLowerCase().includes(search.toLowerCase()) || u.email?.toLowerCase().includes(search.toLowerCase());
-    const matchArchived = showArchived || !u.archived;
-    return matchSearch && matchArchived;
-  });
+  const selection = useTableSelection(users, 'user_id');
+
+  // Search runs on the server (prefix of name or email)
+  useEffect(() => {
+    const timer = setTimeout(() => setDebouncedSearch(search.trim()), 300);
+    return () => clearTimeout(timer);
+  }, [search]);
 
-  const selection = useTableSelection(filtered, 'user_id');
-  const pagination = usePagination(filtered, 25);
-  const pageItems = pagination.paginated;
+  const fetchPage = useCallback((cursor) => axios.get(`${API_URL}/api/wallet/admin/all-users`, {
+    headers: { Authorization: `Bearer ${token}` },
+    params: {
+      q: debouncedSearch || undefined,
+      include_archived: showArchived,
+      limit: PAGE_SIZE,
+      cursor: cursor || undefined,
+    }
+  }), [token, debouncedSearch, showArchived]);
 
   const fetchUsers = useCallback(async () => {
     setLoading(true);
     try {
-      const res = await axios.get(`${API_URL}/api/wallet/admin/all-users`, {
-        headers: { Authorization: `Bearer ${token}` }
-      });
-      const raw = res.data.users || [];
-      // Flatten wallet data into user object for easy access
-      const data = raw.map(u => ({
-        ...u,
-        balance: u.wallet?.balance_usd || 0,
-        total_deposited: u.wallet?.total_deposited || 0,
-        total_spent: u.wallet?.total_spent || 0,
-        is_locked: u.wallet?.is_locked || false,
-      }));
-      setUsers(data);
-      const active = data.filter(u => !u.archived);
+      // First page, with totals for the current search
+      const res = await fetchPage(null);
+      setUsers(flatten(res.data.users || []));
+      setNextCursor(res.data.next_cursor || null);
       setStats({
-        totalUsers: active.length,
-        totalBalance: active.reduce((s, u) => s + (u.balance || 0), 0),
-        usersWithBalance: active.filter(u => (u.balance || 0) > 0).length,
+        totalUsers: res.data.total || 0,
+        totalBalance: res.data.total_balance || 0,
+        usersWithBalance: res.data.users_with_balance || 0,
       });
     } catch (err) {
       toast.error('Error loading users');
     } finally {
       setLoading(false);
+      setLoaded(true);
     }
-  }, [token]);
+  }, [fetchPage]);
+
+  const loadMore = async () => {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    try {
+      const res = await fetchPage(nextCursor);
+      setUsers(prev => [...prev, ...flatten(res.data.users || [])]);
+      setNextCursor(res.data.next_cursor || null);
+    } catch (err) {
+      toast.error('Error loading users');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
 
   useEffect(() => { fetchUsers(); }, [fetchUsers]);
 
@@ -161,7 +186,7 @@ export default function WalletOverviewTab() {
     }
   };
 
-  if (loading) return <div className="animate-pulse h-40 bg-muted rounded-lg" />;
+  if (loading && !loaded) return <div className="animate-pulse h-40 bg-muted rounded-lg" />;
 
   return (
     <div className="space-y-4">
@@ -186,8 +211,7 @@ export default function WalletOverviewTab() {
         search={search}
         onSearchChange={setSearch}
         placeholder="Search users by name or email..."
-        totalCount={users.length}
-        filteredCount={filtered.length}
+        totalCount={stats.totalUsers}
         showArchived={showArchived}
         onToggleArchived={() => setShowArchived(!showArchived)}
         onRefresh={fetchUsers}
@@ -214,7 +238,7 @@ export default function WalletOverviewTab() {
             </TableRow>
           </TableHeader>
           <TableBody>
-            {pageItems.map(user => (
+            {users.map(user => (
               <TableRow key={user.user_id} className={user.archived ? 'opacity-50' : ''} data-testid={`user-row-${user.user_id}`}>
                 <TableCell>
                   <Checkbox checked={selection.isSelected(user.user_id)}
@@ -252,19 +276,22 @@ export default function WalletOverviewTab() {
                 </TableCell>
               </TableRow>
             ))}
-            {pageItems.length === 0 && (
+            {users.length === 0 && (
               <TableRow><TableCell colSpan={7} className="text-center py-8 text-muted-foreground">{t("common.noUsersFound")}</TableCell></TableRow>
             )}
           </TableBody>
         </Table>
       </div>
 
-      {/* Pagination */}
-      <TablePagination
-        page={pagination.page} totalPages={pagination.totalPages} totalItems={pagination.totalItems}
-        pageSize={pagination.pageSize} onPageChange={pagination.setPage} onPageSizeChange={pagination.setPageSize}
-        canPrev={pagination.canPrev} canNext={pagination.canNext}
-      />
+      {/* Paging: next page by cursor */}
+      {nextCursor && (
+        <div className="flex justify-center">
+          <Button variant="ghost" size="sm" onClick={loadMore} disabled={loadingMore} data-testid="wallet-load-more-btn">
+            {loadingMore && <Loader2 className="h-4 w-4 animate-spin mr-2" />}
+            Load more ({users.length} of {stats.totalUsers})
+          </Button>
+        </div>
+      )}
 
       {/* Bulk Action Bar */}
       <BulkActionBar count={selection.count} onClear={selection.clear}
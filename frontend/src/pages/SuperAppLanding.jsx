@@ -41,6 +41,7 @@ const LivingGridLanding = lazy(() => import('./landing-layouts/LivingGridLanding
 const CinematicLanding = lazy(() => import('./landing-layouts/CinematicLanding'));
 const HorizonLanding = lazy(() => import('./landing-layouts/HorizonLanding'));
 import RESOLVED_API_URL from '@/config/apiUrl';
+import { loadPublicSection } from '@/config/publicBootstrap';
 
 const API_URL = RESOLVED_API_URL;
 
@@ -503,7 +504,7 @@ export default function SuperAppLanding() {
 
   const fetchModuleStatuses = async () => {
     try {
-      const { data } = await axios.get(`${API_URL}/api/public/module-status`);
+      const data = await loadPublicSection('module_status', '/api/public/module-status');
       setModuleStatuses(data.statuses);
     } catch {
       // Module status unavailable — using defaults
@@ -4,6 +4,10 @@ Migrated from main app: backend/modules/wallet_topups/gmail_poller.py
 
 The main app writes gmail_scan jobs to hub_jobs.
 This worker picks them up and processes email scanning.
+
+While the main app holds the IMAP IDLE lease (wallet_topup_settings.imap_lease_expires
+in the future) new mail is already ingested as it arrives, so the interval
+scan stands down.
 """
 import os
 import asyncio
@@ -37,6 +41,11 @@ class GmailWorker:
                     await asyncio.sleep(interval)
                     continue
 
+                if self._imap_lease_live(settings):
+                    logger.debug("[GmailWorker] IMAP IDLE ingestion active in main app, skipping scan")
+                    await asyncio.sleep(interval)
+                    continue
+
                 interval_mins = settings.get("polling_interval_minutes", 2)
                 await self._scan_once()
                 await asyncio.sleep(max(interval_mins * 60, 60))
@@ -47,6 +56,11 @@ class GmailWorker:
                 logger.error(f"[GmailWorker] Poll loop error: {e}")
                 await asyncio.sleep(120)
 
+    @staticmethod
+    def _imap_lease_live(settings: dict) -> bool:
+        expires = settings.get("imap_lease_expires") or ""
+        return expires > datetime.now(timezone.utc).isoformat()
+
     async def _scan_once(self):
         """Perform a single Gmail scan cycle using credentials from DB."""
         try:
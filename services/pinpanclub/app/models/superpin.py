@@ -74,6 +74,14 @@ class ScoringConfig(BaseModel):
     custom_rules: Optional[Dict[str, Any]] = None
 
 
+class Venue(BaseModel):
+    """Additional club venue for geolocation check-in"""
+    name: Optional[str] = None
+    latitude: float
+    longitude: float
+    radius_meters: Optional[int] = None  # Defaults to the league radius
+
+
 class CheckInConfig(BaseModel):
     """Check-in configuration"""
     method: CheckInMethod = CheckInMethod.MANUAL
@@ -84,6 +92,7 @@ class CheckInConfig(BaseModel):
     club_latitude: Optional[float] = None
     club_longitude: Optional[float] = None
     radius_meters: int = 100  # Allowed radius
+    venues: List[Venue] = []  # Extra venues besides the main club location
     
     # QR config
     qr_code_secret: Optional[str] = None
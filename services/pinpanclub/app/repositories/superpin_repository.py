@@ -6,10 +6,16 @@ from typing import List, Optional, Dict, Any
 from datetime import datetime, timezone, timedelta
 import uuid
 
+from pymongo import UpdateOne
+from pymongo.errors import OperationFailure
+
 from core.base import BaseRepository
 from core.database import db
 from core.constants import PinpanClubCollections
 
+# Código de error de MongoDB < 5.0 ante una etapa desconocida ($setWindowFields)
+UNRECOGNIZED_STAGE = 40324
+
 
 class SuperPinLeagueRepository(BaseRepository):
     """
@@ -42,6 +48,10 @@ class SuperPinLeagueRepository(BaseRepository):
             sort=[("created_at", -1)]
         )
     
+    def iter_leagues(self, query: Dict = None, projection: Dict = None):
+        """Recorrer ligas sin límite (migraciones de arranque)"""
+        return self._collection.find(query or {}, {"_id": 0, **(projection or {})})
+    
     async def get_all_leagues(self, limit: int = 50) -> List[Dict]:
         """Obtener todas las ligas"""
         return await self.find_many(
@@ -83,12 +93,22 @@ class PlayerCheckInRepository(BaseRepository):
     def __init__(self):
         super().__init__(db, self.COLLECTION_NAME)
     
-    async def create(self, checkin_data: Dict) -> Dict:
-        """Crear nuevo check-in"""
+    async def create(self, checkin_data: Dict, expires_hours: int = 8) -> Dict:
+        """
+        Crear nuevo check-in.
+        `expires_at` (fecha BSON) alimenta el índice TTL: un check-in activo que
+        nadie cierra desaparece solo tras `expires_hours`.
+        """
+        now = datetime.now(timezone.utc)
         checkin_data["checkin_id"] = f"checkin_{uuid.uuid4().hex[:12]}"
-        checkin_data["check_in_time"] = datetime.now(timezone.utc).isoformat()
+        checkin_data["check_in_time"] = now.isoformat()
         checkin_data["is_active"] = True
-        return await self.insert_one(checkin_data)
+        checkin_data["expires_at"] = now + timedelta(hours=expires_hours)
+        if checkin_data.get("latitude") is not None and checkin_data.get("longitude") is not None:
+            checkin_data["location"] = geo_point(checkin_data["latitude"], checkin_data["longitude"])
+        result = await self.insert_one(checkin_data)
+        result.pop("expires_at", None)
+        return result
     
     async def get_active_checkins(self, liga_id: str) -> List[Dict]:
         """Obtener jugadores actualmente en el club"""
@@ -112,7 +132,7 @@ class PlayerCheckInRepository(BaseRepository):
             {"$set": {
                 "is_active": False,
                 "check_out_time": datetime.now(timezone.utc).isoformat()
-            }}
+            }, "$unset": {"expires_at": ""}}
         )
         return result.modified_count > 0
     
@@ -123,10 +143,31 @@ class PlayerCheckInRepository(BaseRepository):
             {"$set": {
                 "is_active": False,
                 "check_out_time": datetime.now(timezone.utc).isoformat()
-            }}
+            }, "$unset": {"expires_at": ""}}
         )
         return result.modified_count > 0
     
+    async def backfill_expires_at(self, hours: int = 8, liga_ids: Optional[List[str]] = None) -> int:
+        """
+        Migración: los check-ins abiertos creados antes del índice TTL no tienen
+        `expires_at`. Se calcula desde `check_in_time` + `hours`, igual que en `create`.
+        `liga_ids=None` cubre todos los check-ins restantes.
+        """
+        query = {"is_active": True, "expires_at": {"$exists": False}}
+        if liga_ids is not None:
+            query["liga_id"] = {"$in": liga_ids}
+        result = await self._collection.update_many(query, [
+            {"$set": {"expires_at": {"$add": [
+                {"$dateFromString": {
+                    "dateString": "$check_in_time",
+                    "onError": "$$NOW",
+                    "onNull": "$$NOW",
+                }},
+                hours * 3600 * 1000,
+            ]}}}
+        ])
+        return result.modified_count
+    
     async def auto_checkout_expired(self, hours: int = 8) -> int:
         """Checkout automático de check-ins expirados"""
         cutoff = (datetime.now(timezone.utc) - timedelta(hours=hours)).isoformat()
@@ -135,11 +176,99 @@ class PlayerCheckInRepository(BaseRepository):
             {"$set": {
                 "is_active": False,
                 "check_out_time": datetime.now(timezone.utc).isoformat()
-            }}
+            }, "$unset": {"expires_at": ""}}
         )
         return result.modified_count
 
 
+class VenueRepository(BaseRepository):
+    """
+    Repository para sedes de las ligas (ubicaciones de check-in).
+    Cada sede es un punto GeoJSON con índice 2dsphere, así que la validación de
+    radio, la sede más cercana y las ligas cercanas son una sola consulta $geoNear.
+    """
+    
+    COLLECTION_NAME = PinpanClubCollections.SUPERPIN_VENUES
+    ID_FIELD = "venue_id"
+    
+    def __init__(self):
+        super().__init__(db, self.COLLECTION_NAME)
+    
+    async def replace_for_league(self, liga_id: str, venues: List[Dict], liga_nombre: str, activa: bool) -> int:
+        """Reemplazar las sedes de una liga (cada una: nombre, latitude, longitude, radius_meters)"""
+        now = datetime.now(timezone.utc).isoformat()
+        docs = [{
+            "venue_id": f"{liga_id}_{i}",
+            "liga_id": liga_id,
+            "liga_nombre": liga_nombre,
+            "nombre": v.get("name") or liga_nombre,
+            "location": geo_point(v["latitude"], v["longitude"]),
+            "radius_meters": v["radius_meters"],
+            "activa": activa,
+            "updated_at": now,
+        } for i, v in enumerate(venues)]
+        await self._collection.delete_many({"liga_id": liga_id})
+        if docs:
+            await self._collection.insert_many(docs)
+        return len(docs)
+    
+    async def nearest(self, liga_id: str, latitude: float, longitude: float) -> Optional[Dict]:
+        """Sede de la liga más cercana al punto, con `distancia_m`"""
+        results = await self.aggregate([
+            {"$geoNear": {
+                "near": geo_point(latitude, longitude),
+                "distanceField": "distancia_m",
+                "query": {"liga_id": liga_id},
+                "spherical": True,
+            }},
+            {"$limit": 1},
+            {"$project": {"_id": 0}},
+        ])
+        return results[0] if results else None
+    
+    async def nearby(self, latitude: float, longitude: float, max_meters: float, limit: int = 20) -> List[Dict]:
+        """Sedes de ligas activas dentro de `max_meters`, con jugadores presentes ahora"""
+        return await self.aggregate([
+            {"$geoNear": {
+                "near": geo_point(latitude, longitude),
+                "distanceField": "distancia_m",
+                "maxDistance": max_meters,
+                "query": {"activa": True},
+                "spherical": True,
+            }},
+            {"$limit": limit},
+            {"$lookup": {
+                "from": PinpanClubCollections.SUPERPIN_CHECKINS,
+                "let": {"liga": "$liga_id"},
+                "pipeline": [
+                    {"$match": {"$expr": {"$and": [
+                        {"$eq": ["$liga_id", "$$liga"]},
+                        {"$eq": ["$is_active", True]},
+                    ]}}},
+                    {"$count": "n"},
+                ],
+                "as": "_presentes",
+            }},
+            {"$project": {
+                "_id": 0,
+                "venue_id": 1,
+                "liga_id": 1,
+                "liga_nombre": 1,
+                "nombre": 1,
+                "latitude": {"$arrayElemAt": ["$location.coordinates", 1]},
+                "longitude": {"$arrayElemAt": ["$location.coordinates", 0]},
+                "radius_meters": 1,
+                "distancia_m": {"$round": ["$distancia_m", 0]},
+                "jugadores_presentes": {"$ifNull": [{"$first": "$_presentes.n"}, 0]},
+            }},
+        ])
+
+
+def geo_point(latitude: float, longitude: float) -> Dict:
+    """Punto GeoJSON (ojo: GeoJSON va [longitud, latitud])"""
+    return {"type": "Point", "coordinates": [float(longitude), float(latitude)]}
+
+
 class SuperPinMatchRepository(BaseRepository):
     """
     Repository para partidos Super Pin.
@@ -231,6 +360,8 @@ class RankingRepository(BaseRepository):
     
     COLLECTION_NAME = PinpanClubCollections.SUPERPIN_RANKINGS
     ID_FIELD = "ranking_id"
+    # None = aún no comprobado; False = el servidor no soporta $setWindowFields (< 5.0)
+    _window_fields_supported: Optional[bool] = None
     
     def __init__(self):
         super().__init__(db, self.COLLECTION_NAME)
@@ -293,40 +424,133 @@ class RankingRepository(BaseRepository):
         data["updated_at"] = datetime.now(timezone.utc).isoformat()
         return await self.update_by_id(self.ID_FIELD, ranking_id, data)
     
+    async def apply_match_result(self, liga_id: str, results: List[Dict]) -> None:
+        """
+        Aplicar el resultado de un partido a los rankings de ambos jugadores.
+        Cada resultado: jugador_id, gano, puntos, elo_change, sets_ganados, sets_perdidos.
+        Los contadores se suman en el servidor (update con pipeline) para que dos
+        partidos simultáneos no se pisen; ambos jugadores van en un solo bulk_write.
+        """
+        now = datetime.now(timezone.utc).isoformat()
+        operations = []
+        for r in results:
+            counters = {
+                "puntos_totales": _add("puntos_totales", r["puntos"]),
+                "elo_rating": _add("elo_rating", r.get("elo_change", 0), default=1000),
+                "partidos_jugados": _add("partidos_jugados", 1),
+                "sets_ganados": _add("sets_ganados", r["sets_ganados"]),
+                "sets_perdidos": _add("sets_perdidos", r["sets_perdidos"]),
+                "last_match_date": now,
+                "updated_at": now,
+            }
+            racha = {"$ifNull": ["$racha_actual", 0]}
+            if r["gano"]:
+                counters["partidos_ganados"] = _add("partidos_ganados", 1)
+                counters["racha_actual"] = {"$cond": [{"$gte": [racha, 0]}, {"$add": [racha, 1]}, 1]}
+                # mejor_racha depende de la racha ya actualizada: segunda etapa
+                stages = [
+                    {"$set": counters},
+                    {"$set": {"mejor_racha": {"$max": [{"$ifNull": ["$mejor_racha", 0]}, "$racha_actual"]}}},
+                ]
+            else:
+                counters["partidos_perdidos"] = _add("partidos_perdidos", 1)
+                counters["racha_actual"] = {"$cond": [{"$lte": [racha, 0]}, {"$subtract": [racha, 1]}, -1]}
+                stages = [{"$set": counters}]
+            operations.append(UpdateOne({"liga_id": liga_id, "jugador_id": r["jugador_id"]}, stages))
+
+        if operations:
+            await self._collection.bulk_write(operations, ordered=False)
+
     async def recalculate_positions(self, liga_id: str, scoring_system: str = "simple") -> bool:
-        """Recalcular posiciones del ranking"""
-        # Obtener todos los rankings de la liga
-        rankings = await self.find_many(
-            query={"liga_id": liga_id},
-            limit=1000
-        )
-        
-        # Ordenar según el sistema de puntuación
+        """
+        Recalcular posiciones del ranking.
+        Se ordena en el servidor y solo se escriben las filas cuya posición cambió:
+        con $setWindowFields + $merge en un solo pipeline, o con un bulk_write
+        ordenado si el servidor no soporta funciones de ventana.
+        """
+        sort_keys, sort_by = self._ranking_sort(scoring_system)
+        now = datetime.now(timezone.utc).isoformat()
+
+        if RankingRepository._window_fields_supported is not False:
+            try:
+                await self.aggregate([
+                    {"$match": {"liga_id": liga_id}},
+                    {"$set": sort_keys},
+                    {"$setWindowFields": {
+                        "sortBy": sort_by,
+                        "output": {"_nueva_posicion": {"$documentNumber": {}}},
+                    }},
+                    {"$match": {"$expr": {"$ne": ["$_nueva_posicion", "$posicion"]}}},
+                    {"$project": {
+                        "_id": 1,
+                        "posicion": "$_nueva_posicion",
+                        "posicion_anterior": {"$ifNull": ["$posicion", "$_nueva_posicion"]},
+                        "cambio_posicion": {"$subtract": [
+                            {"$ifNull": ["$posicion", "$_nueva_posicion"]}, "$_nueva_posicion"
+                        ]},
+                        "updated_at": {"$literal": now},
+                    }},
+                    {"$merge": {
+                        "into": self.collection_name,
+                        "on": "_id",
+                        "whenMatched": "merge",
+                        "whenNotMatched": "discard",
+                    }},
+                ])
+                RankingRepository._window_fields_supported = True
+                return True
+            except OperationFailure as e:
+                if e.code != UNRECOGNIZED_STAGE:
+                    raise
+                RankingRepository._window_fields_supported = False
+
+        # Sin funciones de ventana: ordenar en el servidor y numerar aquí
+        rankings = await self.aggregate([
+            {"$match": {"liga_id": liga_id}},
+            {"$set": sort_keys},
+            {"$sort": sort_by},
+            {"$project": {"_id": 1, "posicion": 1}},
+        ])
+        operations = []
+        for new_pos, entry in enumerate(rankings, start=1):
+            old_pos = entry.get("posicion")
+            if old_pos == new_pos:
+                continue
+            old_pos = old_pos or new_pos
+            operations.append(UpdateOne({"_id": entry["_id"]}, {"$set": {
+                "posicion": new_pos,
+                "posicion_anterior": old_pos,
+                "cambio_posicion": old_pos - new_pos,
+                "updated_at": now,
+            }}))
+        if operations:
+            await self._collection.bulk_write(operations, ordered=True)
+
+        return True
+
+    @staticmethod
+    def _ranking_sort(scoring_system: str) -> tuple:
+        """Claves calculadas y orden del ranking (empates: orden de inserción)"""
         if scoring_system == "elo":
-            rankings.sort(key=lambda x: x.get("elo_rating", 0), reverse=True)
+            keys = {"_k_elo": {"$ifNull": ["$elo_rating", 0]}}
+            sort_by = {"_k_elo": -1, "_id": 1}
         else:
-            rankings.sort(key=lambda x: (
-                x.get("puntos_totales", 0),
-                x.get("partidos_ganados", 0) - x.get("partidos_perdidos", 0),
-                x.get("sets_ganados", 0) - x.get("sets_perdidos", 0)
-            ), reverse=True)
-        
-        # Actualizar posiciones
-        for i, entry in enumerate(rankings):
-            old_pos = entry.get("posicion", i + 1)
-            new_pos = i + 1
-            
-            await self._collection.update_one(
-                {"ranking_id": entry["ranking_id"]},
-                {"$set": {
-                    "posicion": new_pos,
-                    "posicion_anterior": old_pos,
-                    "cambio_posicion": old_pos - new_pos,
-                    "updated_at": datetime.now(timezone.utc).isoformat()
-                }}
-            )
-        
-        return True
+            keys = {
+                "_k_puntos": {"$ifNull": ["$puntos_totales", 0]},
+                "_k_partidos": {"$subtract": [
+                    {"$ifNull": ["$partidos_ganados", 0]}, {"$ifNull": ["$partidos_perdidos", 0]}
+                ]},
+                "_k_sets": {"$subtract": [
+                    {"$ifNull": ["$sets_ganados", 0]}, {"$ifNull": ["$sets_perdidos", 0]}
+                ]},
+            }
+            sort_by = {"_k_puntos": -1, "_k_partidos": -1, "_k_sets": -1, "_id": 1}
+        return keys, sort_by
+
+
+def _add(field: str, amount, default: int = 0) -> Dict:
+    """Expresión de pipeline equivalente a $inc sobre `field`"""
+    return {"$add": [{"$ifNull": [f"${field}", default]}, amount]}
 
 
 class SeasonTournamentRepository(BaseRepository):
@@ -80,6 +80,17 @@ async def get_available_players(liga_id: str):
     return await superpin_service.get_available_players(liga_id)
 
 
+@router.get("/nearby")
+async def get_nearby_leagues(
+    latitude: float = Query(..., ge=-90, le=90),
+    longitude: float = Query(..., ge=-180, le=180),
+    max_distance_m: float = Query(5000, gt=0, le=100000),
+    limit: int = Query(20, ge=1, le=100)
+):
+    """Ligas activas con sede cercana (más cercanas primero) y jugadores presentes"""
+    return await superpin_service.get_nearby_leagues(latitude, longitude, max_distance_m, limit)
+
+
 @router.post("/leagues/{liga_id}/checkin", response_model=PlayerCheckIn)
 async def check_in(
     liga_id: str,
@@ -2,7 +2,6 @@
 Super Pin Ranking - Service Layer
 Lógica de negocio para el sistema de ranking
 """
-import math
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timezone
 
@@ -13,7 +12,8 @@ from ..repositories.superpin_repository import (
     PlayerCheckInRepository,
     SuperPinMatchRepository,
     RankingRepository,
-    SeasonTournamentRepository
+    SeasonTournamentRepository,
+    VenueRepository
 )
 from ..repositories.player_repository import PlayerRepository
 from ..models.superpin import (
@@ -40,6 +40,7 @@ class SuperPinService(BaseService):
         self.match_repo = SuperPinMatchRepository()
         self.ranking_repo = RankingRepository()
         self.tournament_repo = SeasonTournamentRepository()
+        self.venue_repo = VenueRepository()
         self.player_repo = PlayerRepository()
     
     # ============== LEAGUE MANAGEMENT ==============
@@ -63,6 +64,7 @@ class SuperPinService(BaseService):
         league_dict["estado"] = "draft"
         
         result = await self.league_repo.create(league_dict)
+        await self._sync_venues(result)
         self.log_info(f"League created: {result['liga_id']}")
         
         return SuperPinLeague(**result)
@@ -105,9 +107,65 @@ class SuperPinService(BaseService):
         success = await self.league_repo.update_league(liga_id, update_data)
         
         if success:
-            return await self.get_league(liga_id)
+            league = await self.league_repo.get_by_id(liga_id)
+            await self._sync_venues(league)
+            return SuperPinLeague(**league) if league else None
         return None
     
+    async def _sync_venues(self, league: Optional[Dict]) -> int:
+        """
+        Reflejar las sedes de la liga (club_latitude/longitude + venues) en la
+        colección geoespacial. Devuelve cuántas sedes tiene la liga.
+        """
+        if not league:
+            return 0
+        config = league.get("checkin_config") or {}
+        radius = config.get("radius_meters") or 100
+        venues = []
+        if config.get("club_latitude") is not None and config.get("club_longitude") is not None:
+            venues.append({
+                "name": league.get("name") or league.get("nombre"),
+                "latitude": config["club_latitude"],
+                "longitude": config["club_longitude"],
+                "radius_meters": radius,
+            })
+        for v in config.get("venues") or []:
+            venues.append({**v, "radius_meters": v.get("radius_meters") or radius})
+        
+        activa = (league.get("estado") or league.get("status")) == "active"
+        try:
+            return await self.venue_repo.replace_for_league(
+                league["liga_id"], venues, league.get("name") or league.get("nombre") or "", activa
+            )
+        except Exception as e:
+            self.log_warning(f"Venue sync failed for {league.get('liga_id')} (non-blocking): {e}")
+            return len(venues)
+    
+    async def backfill_geo(self) -> Dict[str, int]:
+        """
+        Migración de arranque: sedes de las ligas activas que existían antes de la
+        colección geoespacial, y `expires_at` de check-ins abiertos previos al TTL.
+        Idempotente; se ejecuta tras crear los índices.
+        """
+        leagues = 0
+        venues = 0
+        checkins = 0
+        async for league in self.league_repo.iter_leagues({"estado": "active"}):
+            leagues += 1
+            venues += await self._sync_venues(league)
+        
+        by_hours: Dict[int, List[str]] = {}
+        async for league in self.league_repo.iter_leagues(
+            projection={"liga_id": 1, "checkin_config.auto_checkout_hours": 1}
+        ):
+            hours = (league.get("checkin_config") or {}).get("auto_checkout_hours") or 8
+            by_hours.setdefault(int(hours), []).append(league["liga_id"])
+        for hours, liga_ids in by_hours.items():
+            checkins += await self.checkin_repo.backfill_expires_at(hours, liga_ids)
+        checkins += await self.checkin_repo.backfill_expires_at()
+        
+        return {"leagues": leagues, "venues": venues, "checkins": checkins}
+    
     async def activate_league(self, liga_id: str) -> Optional[SuperPinLeague]:
         """Activar liga"""
         return await self.update_league(
@@ -135,7 +193,9 @@ class SuperPinService(BaseService):
         checkin_dict = data.model_dump()
         checkin_dict["jugador_info"] = player
         
-        result = await self.checkin_repo.create(checkin_dict)
+        league = await self.league_repo.get_by_id(data.liga_id)
+        hours = ((league or {}).get("checkin_config") or {}).get("auto_checkout_hours") or 8
+        result = await self.checkin_repo.create(checkin_dict, expires_hours=hours)
         
         # Incrementar contador de jugadores en liga si es nuevo
         await self.league_repo.increment_stats(data.liga_id, jugadores=1)
@@ -160,41 +220,33 @@ class SuperPinService(BaseService):
         longitude: float
     ) -> bool:
         """Validar ubicación para check-in por geolocalización"""
-        league = await self.get_league(liga_id)
-        if not league:
-            return False
-        
-        config = league.checkin_config
-        if not config.club_latitude or not config.club_longitude:
-            return True  # Sin ubicación configurada, permitir
-        
-        # Calcular distancia usando fórmula de Haversine
-        distance = self._haversine_distance(
-            config.club_latitude, config.club_longitude,
-            latitude, longitude
-        )
-        
-        return distance <= config.radius_meters
+        venue = await self.find_nearest_venue(liga_id, latitude, longitude)
+        if venue is None:
+            league = await self.league_repo.get_by_id(liga_id)
+            if not league:
+                return False
+            # Liga sin sedes indexadas todavía (creada antes de la colección de sedes)
+            if not await self._sync_venues(league):
+                return True  # Sin ubicación configurada, permitir
+            venue = await self.find_nearest_venue(liga_id, latitude, longitude)
+            if venue is None:
+                return True
+        
+        return venue["distancia_m"] <= venue["radius_meters"]
+    
+    async def find_nearest_venue(self, liga_id: str, latitude: float, longitude: float) -> Optional[Dict]:
+        """Sede de la liga más cercana (con `distancia_m`), vía $geoNear"""
+        return await self.venue_repo.nearest(liga_id, latitude, longitude)
     
-    def _haversine_distance(
+    async def get_nearby_leagues(
         self,
-        lat1: float, lon1: float,
-        lat2: float, lon2: float
-    ) -> float:
-        """Calcular distancia en metros entre dos puntos GPS"""
-        R = 6371000  # Radio de la Tierra en metros
-        
-        phi1 = math.radians(lat1)
-        phi2 = math.radians(lat2)
-        delta_phi = math.radians(lat2 - lat1)
-        delta_lambda = math.radians(lon2 - lon1)
-        
-        a = (math.sin(delta_phi / 2) ** 2 +
-             math.cos(phi1) * math.cos(phi2) *
-             math.sin(delta_lambda / 2) ** 2)
-        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-        
-        return R * c
+        latitude: float,
+        longitude: float,
+        max_distance_m: float = 5000,
+        limit: int = 20
+    ) -> List[Dict]:
+        """Sedes de ligas activas cercanas, ordenadas por distancia, con jugadores presentes"""
+        return await self.venue_repo.nearby(latitude, longitude, max_distance_m, limit)
     
     # ============== MATCH MANAGEMENT ==============
     
@@ -388,36 +440,25 @@ class SuperPinService(BaseService):
             sets_ganador = match["sets_jugador_b"]
             sets_perdedor = match["sets_jugador_a"]
         
-        # Actualizar ranking del ganador
-        racha_ganador = ranking_ganador.get("racha_actual", 0)
-        nueva_racha_ganador = racha_ganador + 1 if racha_ganador >= 0 else 1
-        
-        await self.ranking_repo.update_ranking(ranking_ganador["ranking_id"], {
-            "puntos_totales": ranking_ganador.get("puntos_totales", 0) + puntos_ganador,
-            "elo_rating": ranking_ganador.get("elo_rating", 1000) + elo_change,
-            "partidos_jugados": ranking_ganador.get("partidos_jugados", 0) + 1,
-            "partidos_ganados": ranking_ganador.get("partidos_ganados", 0) + 1,
-            "sets_ganados": ranking_ganador.get("sets_ganados", 0) + sets_ganador,
-            "sets_perdidos": ranking_ganador.get("sets_perdidos", 0) + sets_perdedor,
-            "racha_actual": nueva_racha_ganador,
-            "mejor_racha": max(ranking_ganador.get("mejor_racha", 0), nueva_racha_ganador),
-            "last_match_date": datetime.now(timezone.utc).isoformat()
-        })
-        
-        # Actualizar ranking del perdedor
-        racha_perdedor = ranking_perdedor.get("racha_actual", 0)
-        nueva_racha_perdedor = racha_perdedor - 1 if racha_perdedor <= 0 else -1
-        
-        await self.ranking_repo.update_ranking(ranking_perdedor["ranking_id"], {
-            "puntos_totales": ranking_perdedor.get("puntos_totales", 0) + puntos_perdedor,
-            "elo_rating": ranking_perdedor.get("elo_rating", 1000) - elo_change,
-            "partidos_jugados": ranking_perdedor.get("partidos_jugados", 0) + 1,
-            "partidos_perdidos": ranking_perdedor.get("partidos_perdidos", 0) + 1,
-            "sets_ganados": ranking_perdedor.get("sets_ganados", 0) + sets_perdedor,
-            "sets_perdidos": ranking_perdedor.get("sets_perdidos", 0) + sets_ganador,
-            "racha_actual": nueva_racha_perdedor,
-            "last_match_date": datetime.now(timezone.utc).isoformat()
-        })
+        # Aplicar el resultado a ambos rankings (atómico, un solo bulk_write)
+        await self.ranking_repo.apply_match_result(liga_id, [
+            {
+                "jugador_id": ganador_id,
+                "gano": True,
+                "puntos": puntos_ganador,
+                "elo_change": elo_change,
+                "sets_ganados": sets_ganador,
+                "sets_perdidos": sets_perdedor,
+            },
+            {
+                "jugador_id": perdedor_id,
+                "gano": False,
+                "puntos": puntos_perdedor,
+                "elo_change": -elo_change,
+                "sets_ganados": sets_perdedor,
+                "sets_perdidos": sets_ganador,
+            },
+        ])
         
         # Guardar puntos en el partido
         await self.match_repo.update_match(match["partido_id"], {
@@ -300,6 +300,16 @@ async def create_indexes():
         await db[StoreCollections.PRODUCTS].create_index([("grado", 1), ("activo", 1)])
         await db[StoreCollections.ORDERS].create_index([("estado", 1), ("fecha_creacion", -1)])
         
+        # Super Pin rankings: updates per player and per-league position recalculation
+        await db[PinpanClubCollections.SUPERPIN_RANKINGS].create_index([("liga_id", 1), ("jugador_id", 1)])
+        
+        # Super Pin venues and check-ins: GeoJSON points ($geoNear), stale check-ins expire via TTL
+        await db[PinpanClubCollections.SUPERPIN_VENUES].create_index([("location", "2dsphere"), ("activa", 1)])
+        await db[PinpanClubCollections.SUPERPIN_VENUES].create_index("liga_id")
+        await db[PinpanClubCollections.SUPERPIN_CHECKINS].create_index([("location", "2dsphere")])
+        await db[PinpanClubCollections.SUPERPIN_CHECKINS].create_index([("liga_id", 1), ("is_active", 1)])
+        await db[PinpanClubCollections.SUPERPIN_CHECKINS].create_index("expires_at", expireAfterSeconds=0)
+        
         print("✅ Database indexes created successfully")
     except Exception as e:
         print(f"⚠️ Error creating indexes (may already exist): {e}")
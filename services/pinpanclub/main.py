@@ -31,6 +31,17 @@ async def lifespan(app: FastAPI):
     from app import init_module
     init_module()
     
+    from core.database import create_indexes
+    await create_indexes()
+    
+    # Sedes y expiración de check-ins anteriores a los índices geo/TTL
+    try:
+        from app.services.superpin_service import superpin_service
+        result = await superpin_service.backfill_geo()
+        print(f"✅ Super Pin geo backfill: {result}")
+    except Exception as e:
+        print(f"⚠️ Super Pin geo backfill failed (non-blocking): {e}")
+    
     yield
     
     print(f"👋 Shutting down {SERVICE_NAME} service")
@@ -194,6 +194,25 @@ class TestCheckInEndpoints:
         # Accept 200 (success), 400 (already checked in or out of range)
         assert response.status_code in [200, 400], f"Expected 200 or 400, got {response.status_code}"
 
+    
+    def test_nearby_leagues(self):
+        """Test GET /api/pinpanclub/superpin/nearby - venues sorted by distance"""
+        response = requests.get(
+            f"{BASE_URL}/api/pinpanclub/superpin/nearby",
+            params={"latitude": 9.0, "longitude": -79.5, "max_distance_m": 50000}
+        )
+        print(f"Nearby response: {response.status_code}")
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}"
+        data = response.json()
+        assert isinstance(data, list), "Response should be a list"
+        distances = [v["distancia_m"] for v in data]
+        assert distances == sorted(distances), "Venues should be sorted by distance"
+        assert all(d <= 50000 for d in distances)
+    
+    def test_nearby_requires_coordinates(self):
+        """Test GET /api/pinpanclub/superpin/nearby validates coordinates"""
+        response = requests.get(f"{BASE_URL}/api/pinpanclub/superpin/nearby", params={"latitude": 120, "longitude": 0})
+        assert response.status_code == 422
 
 class TestLeagueMatchesEndpoints:
     """Test league matches endpoints"""